@@ -1,7 +1,9 @@
 import argparse
 import sys
+from pathlib import Path
 
 from pyprocessor.utils.core.application_context import ApplicationContext
+from pyprocessor.utils.process.preemption import URGENT_PRIORITY, request_priority
 
 # Signal handling is now managed by ApplicationContext
 
@@ -36,7 +38,63 @@ def parse_args():
     parser.add_argument(
         "--no-audio", action="store_true", help="Exclude audio from output"
     )
+    parser.add_argument(
+        "--scaling-mode",
+        choices=["parallel", "cascade"],
+        help="Filter graph layout for scaling the rendition ladder",
+    )
+    parser.add_argument(
+        "--audio-mode",
+        choices=["muxed", "group"],
+        help="Mux audio into every variant or share HLS audio rendition groups",
+    )
+    parser.add_argument(
+        "--progressive-publish",
+        action="store_true",
+        help="Publish HLS segments to the output folder while encoding "
+        "(FFmpegEncoder.encode_video only; batch runs write into the output "
+        "folder directly)",
+    )
+    parser.add_argument(
+        "--hls-encryption",
+        choices=["none", "aes-128"],
+        help="Encrypt HLS segments with FFmpeg while encoding",
+    )
+    parser.add_argument(
+        "--hls-key-rotation",
+        type=int,
+        metavar="N",
+        help="Issue a new HLS key every N segments (0 for one key per file)",
+    )
+    parser.add_argument(
+        "--hls-key-uri", metavar="URI", help="Base URI of a key server for HLS keys"
+    )
+    parser.add_argument(
+        "--hls-key-dir",
+        metavar="DIR",
+        help="Folder HLS keys are written to for the key server (with --hls-key-uri)",
+    )
+    parser.add_argument(
+        "--chunked-encoding",
+        action="store_true",
+        help="Encode long titles as parallel keyframe-aligned chunks",
+    )
+    parser.add_argument(
+        "--chunk-duration", type=int, metavar="SECONDS", help="Target chunk length"
+    )
+    parser.add_argument(
+        "--chunk-workers",
+        type=int,
+        metavar="N",
+        help="Chunks of a title encoded at the same time (0 for its CPU share)",
+    )
     parser.add_argument("--jobs", type=int, help="Number of parallel jobs")
+    parser.add_argument(
+        "--order",
+        choices=["lpt", "spt", "fifo"],
+        help="Start the longest files first (lpt), the shortest first (spt) "
+        "or in directory order (fifo)",
+    )
 
     # Batch processing options
     batch_group = parser.add_argument_group("Batch Processing")
@@ -53,6 +111,109 @@ def parse_args():
         type=int,
         help="Maximum memory usage percentage before throttling batches",
     )
+    batch_group.add_argument(
+        "--batch-streaming",
+        choices=["enabled", "disabled"],
+        help="Stream files through one work queue instead of waiting at batch boundaries",
+    )
+    batch_group.add_argument(
+        "--engine",
+        choices=["async", "threads"],
+        help="Supervise encodes from one asyncio event loop or one thread per file",
+    )
+    batch_group.add_argument(
+        "--encode-timeout",
+        type=int,
+        help="Seconds an FFmpeg process may run before it is killed (0 for no limit)",
+    )
+    batch_group.add_argument(
+        "--stall-timeout",
+        type=int,
+        help="Seconds an encode may go without progress before it is killed "
+        "(0 to disable)",
+    )
+    batch_group.add_argument(
+        "--encode-retries",
+        type=int,
+        help="Times an encode is started again after it timed out or stalled",
+    )
+    batch_group.add_argument(
+        "--thread-budget",
+        choices=["enabled", "disabled"],
+        help="Split the CPU threads across concurrent encodes instead of letting "
+        "each FFmpeg process use all cores",
+    )
+    batch_group.add_argument(
+        "--encode-threads",
+        type=int,
+        help="Threads shared by the concurrent encodes (0 for the CPU count)",
+    )
+    batch_group.add_argument(
+        "--cpu-placement",
+        choices=["off", "node", "cores"],
+        help="Pin each encode to a NUMA node or to a set of CPUs of one node",
+    )
+    batch_group.add_argument(
+        "--adaptive-concurrency",
+        choices=["enabled", "disabled"],
+        help="Adjust the number of concurrent encodes from CPU, memory and iowait",
+    )
+    batch_group.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Most concurrent encodes adaptive concurrency may open (0 for the CPU count)",
+    )
+    batch_group.add_argument(
+        "--target-cpu",
+        type=int,
+        help="CPU utilization percentage below which encodes are added",
+    )
+    batch_group.add_argument(
+        "--resource-admission",
+        choices=["enabled", "disabled"],
+        help="Start each file only when its estimated resources fit "
+        "(individual process mode)",
+    )
+    batch_group.add_argument(
+        "--preemption",
+        choices=["enabled", "disabled"],
+        help="Pause the lowest-priority encode when a file of higher priority "
+        "waits (individual process mode)",
+    )
+    batch_group.add_argument(
+        "--pause-memory",
+        type=int,
+        help="Memory usage percentage at which running encodes are paused "
+        "(individual process mode, 0 to disable)",
+    )
+    batch_group.add_argument(
+        "--warm-pool",
+        choices=["enabled", "disabled"],
+        help="Start the worker processes before the first file and keep them "
+        "(individual process mode)",
+    )
+    batch_group.add_argument(
+        "--journal",
+        choices=["enabled", "disabled"],
+        help="Record the files of each run so an interrupted run can be resumed",
+    )
+    batch_group.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last run of the same folders, skipping completed files",
+    )
+    batch_group.add_argument(
+        "--prioritize",
+        metavar="FILE",
+        help="Move a file of the running batch (individual process mode) to the "
+        "front and exit; fails if no such batch is running",
+    )
+    batch_group.add_argument(
+        "--priority",
+        type=int,
+        default=URGENT_PRIORITY,
+        help="Priority given by --prioritize (higher values start first)",
+    )
 
     # Execution options
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
@@ -127,6 +288,12 @@ def parse_args():
         "--encryption-key",
         help="Encryption key ID to use (uses default key if not specified)",
     )
+    security_group.add_argument(
+        "--encryption-workers",
+        type=int,
+        help="Number of threads used to encrypt output files, split across the "
+        "files processed at the same time (default: one per CPU)",
+    )
 
     return parser.parse_args()
 
@@ -142,6 +309,17 @@ def main():
     # Parse command line arguments
     args = parse_args()
 
+    # Hand a priority change to the running batch
+    if args.prioritize:
+        if not request_priority(args.prioritize, args.priority):
+            print(
+                "No batch in individual process mode is running to take the request",
+                file=sys.stderr,
+            )
+            return 1
+        print(f"Requested priority {args.priority} for {Path(args.prioritize).name}")
+        return 0
+
     # Create and initialize application context
     app_context = ApplicationContext()
     if not app_context.initialize(args):
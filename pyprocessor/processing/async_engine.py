@@ -0,0 +1,714 @@
+"""
+Asyncio execution engine for PyProcessor.
+
+The thread-based BatchProcessor runs one Python thread per concurrent file,
+each blocked on its FFmpeg pipes. AsyncEncodeEngine supervises every FFmpeg
+process from a single event loop instead:
+
+- processes are started with ``asyncio.create_subprocess_exec``
+- their progress and log pipes are read by coroutines
+- the number of concurrent encodes does not change the number of threads
+
+The quick blocking steps before an encode (probing the source, building the
+command) run one at a time on a helper thread. The long steps after it
+(stitching chunks, encrypting the output) run on a small pool of their own,
+so a file that is being encrypted never holds up the start of the next one.
+Cancellation, per-process timeouts and progress fan-out to any number of
+listeners are handled on the loop. An optional Watchdog kills FFmpeg
+processes that stop making progress.
+
+``process_files`` is a synchronous facade that runs the loop to completion,
+so the engine can be used from ``ProcessingScheduler.process_videos``.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyprocessor.processing.concurrency_controller import ConcurrencyController
+from pyprocessor.processing.thread_budget import ThreadBudget
+from pyprocessor.processing.video_task import VideoTask
+from pyprocessor.utils.logging.error_manager import EncodingError, ErrorSeverity
+from pyprocessor.utils.media.ffmpeg_log import FFmpegLog
+from pyprocessor.utils.process.cpu_placement import CpuPlacer, pinned
+from pyprocessor.utils.process.watchdog import STALLED, TIMED_OUT, Watchdog
+from pyprocessor.utils.media.ffmpeg_progress import (
+    READ_SIZE,
+    FFmpegProgress,
+    ProgressParser,
+    add_progress_args,
+    get_command_duration,
+)
+
+# Seconds FFmpeg gets to exit after terminate() before it is killed
+TERMINATE_TIMEOUT = 5.0
+
+# Error message of files that were cancelled before they completed
+CANCELLED_MESSAGE = "Cancelled"
+
+# Threads for the steps after an encode (stitching chunks, encrypting output)
+FINISH_THREADS = 2
+
+
+def _attach_pidfd_child_watcher(loop: asyncio.AbstractEventLoop):
+    """
+    Make asyncio wait for child processes on the loop instead of on threads.
+
+    Before Python 3.12, asyncio's default ThreadedChildWatcher starts one
+    waitpid() thread per subprocess. PidfdChildWatcher (Linux 5.3+) polls
+    pidfds on the loop instead. Python 3.12 and later do this on their own.
+
+    Args:
+        loop: The running event loop
+
+    Returns:
+        Tuple of (previous watcher, new watcher), or None if nothing changed
+    """
+    if sys.version_info >= (3, 12) or not hasattr(asyncio, "PidfdChildWatcher"):
+        return None
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        # Kernel without pidfd support
+        return None
+
+    policy = asyncio.get_event_loop_policy()
+    previous = policy.get_child_watcher()
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    policy.set_child_watcher(watcher)
+    return previous, watcher
+
+
+class AsyncEncodeEngine:
+    """
+    Encodes many files concurrently from a single asyncio event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        timeout: Optional[float] = None,
+        logger=None,
+        thread_budget: Optional[ThreadBudget] = None,
+        cpu_placer: Optional[CpuPlacer] = None,
+        concurrency: Optional[ConcurrencyController] = None,
+        stall_timeout: Optional[float] = None,
+        retries: int = 0,
+        watchdog: Optional[Watchdog] = None,
+        encryption_workers: Optional[int] = None,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            max_concurrent: Files encoded at the same time (default: CPU count)
+            timeout: Seconds an FFmpeg process may run before it is terminated
+                (None or 0 for no limit)
+            logger: Logger instance (optional)
+            thread_budget: Budget the FFmpeg threads of each file are taken
+                from (FFmpeg sizes its own threads if None)
+            cpu_placer: Placer that pins each file's FFmpeg processes to a
+                NUMA node or CPU set (not pinned if None)
+            concurrency: Controller that decides how many of the
+                max_concurrent slots are open (all of them if None)
+            stall_timeout: Seconds an FFmpeg process may go without progress
+                before the watchdog kills it (None or 0 for no limit)
+            retries: How many times a file is encoded again after its FFmpeg
+                process timed out or stalled
+            watchdog: Watchdog the FFmpeg processes are reported to (needed
+                for stall_timeout)
+            encryption_workers: Threads each file's output is encrypted with
+                (the encryption manager's count if None)
+        """
+        self.max_concurrent = max(1, int(max_concurrent or os.cpu_count() or 1))
+        self.timeout = timeout or None
+        self.logger = logger
+        self.thread_budget = thread_budget
+        self.cpu_placer = cpu_placer
+        self.concurrency = concurrency
+        self.stall_timeout = stall_timeout or None
+        self.retries = max(0, int(retries or 0))
+        self.watchdog = watchdog
+        self.encryption_workers = encryption_workers
+        if concurrency is not None:
+            concurrency.add_listener(self._on_slots_changed)
+
+        self.start_listeners: List[Callable[[str], None]] = []
+        self.progress_listeners: List[Callable[[str, int], None]] = []
+        self.output_file_listeners: List[Callable[[str, Optional[str]], None]] = []
+        self.result_listeners: List[Callable[[Tuple], None]] = []
+
+        self.is_running = False
+        self.abort_requested = False
+        self.processes: Dict[int, asyncio.subprocess.Process] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._finish_executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Future] = []
+        self._waiting = 0
+        self._slots_changed: Optional[asyncio.Condition] = None
+
+        # Affinity of the loop thread, restored after each pinned spawn
+        self._loop_affinity = None
+
+    def add_start_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Register a listener for files whose encode starts.
+
+        Args:
+            listener: Called with the filename on the loop thread
+        """
+        self.start_listeners.append(listener)
+
+    def add_progress_listener(self, listener: Callable[[str, int], None]) -> None:
+        """
+        Register a listener for per-file progress.
+
+        Args:
+            listener: Called with (filename, percent) on the loop thread
+        """
+        self.progress_listeners.append(listener)
+
+    def add_output_file_listener(
+        self, listener: Callable[[str, Optional[str]], None]
+    ) -> None:
+        """
+        Register a listener for created output files.
+
+        Args:
+            listener: Called with (filename, resolution) on the loop thread
+        """
+        self.output_file_listeners.append(listener)
+
+    def add_result_listener(self, listener: Callable[[Tuple], None]) -> None:
+        """
+        Register a listener for completed files.
+
+        Args:
+            listener: Called with (filename, success, duration, error_message)
+                as soon as each file completes
+        """
+        self.result_listeners.append(listener)
+
+    def process_files(
+        self,
+        files: List[Path],
+        output_folder: Path,
+        ffmpeg_params: Dict[str, Any],
+        encrypt_output: bool = False,
+        encryption_key_id: Optional[str] = None,
+    ) -> List[Tuple[str, bool, float, Optional[str]]]:
+        """
+        Encode files and block until all of them are done.
+
+        Args:
+            files: Video files to encode
+            output_folder: Output folder for the encoded videos
+            ffmpeg_params: FFmpeg parameters
+            encrypt_output: Whether to encrypt the output files
+            encryption_key_id: Encryption key ID (default key if None)
+
+        Returns:
+            List of tuples (filename, success, duration, error_message), in
+            the order of files
+        """
+        return asyncio.run(
+            self.process_files_async(
+                files, output_folder, ffmpeg_params, encrypt_output, encryption_key_id
+            )
+        )
+
+    async def process_files_async(
+        self,
+        files: List[Path],
+        output_folder: Path,
+        ffmpeg_params: Dict[str, Any],
+        encrypt_output: bool = False,
+        encryption_key_id: Optional[str] = None,
+    ) -> List[Tuple[str, bool, float, Optional[str]]]:
+        """
+        Encode files on the running event loop.
+
+        Args:
+            files: Video files to encode
+            output_folder: Output folder for the encoded videos
+            ffmpeg_params: FFmpeg parameters
+            encrypt_output: Whether to encrypt the output files
+            encryption_key_id: Encryption key ID (default key if None)
+
+        Returns:
+            List of tuples (filename, success, duration, error_message), in
+            the order of files
+        """
+        self._loop = asyncio.get_running_loop()
+        if self.cpu_placer is not None:
+            self._loop_affinity = os.sched_getaffinity(0)
+        watchers = _attach_pidfd_child_watcher(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._slots_changed = asyncio.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="AsyncEncodeEngine"
+        )
+        self._finish_executor = ThreadPoolExecutor(
+            max_workers=FINISH_THREADS, thread_name_prefix="AsyncEncodeEngineFinish"
+        )
+        self.is_running = True
+        self._log(
+            "info",
+            f"Encoding {len(files)} files with up to {self.max_concurrent} "
+            f"concurrent encodes",
+        )
+
+        if self.concurrency is not None:
+            self.concurrency.start()
+
+        try:
+            self._waiting = len(files)
+            self._tasks = [
+                asyncio.ensure_future(
+                    self._process_file(
+                        VideoTask(file, output_folder, ffmpeg_params),
+                        encrypt_output,
+                        encryption_key_id,
+                    )
+                )
+                for file in files
+            ]
+            return list(await asyncio.gather(*self._tasks))
+        finally:
+            if self.concurrency is not None:
+                self.concurrency.stop()
+            self._executor.shutdown(wait=True)
+            self._finish_executor.shutdown(wait=True)
+            if watchers is not None:
+                previous, watcher = watchers
+                watcher.close()
+                asyncio.get_event_loop_policy().set_child_watcher(previous)
+            self._tasks = []
+            self._loop = None
+            self.is_running = False
+
+    def request_abort(self) -> bool:
+        """
+        Cancel all files; running FFmpeg processes are terminated.
+
+        Safe to call from any thread.
+
+        Returns:
+            bool: True if a run was in progress
+        """
+        if not self.is_running:
+            return False
+
+        self._log("warning", "Encoding abort requested")
+        self.abort_requested = True
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._cancel_tasks)
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the engine state to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Engine information
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "timeout": self.timeout,
+            "stall_timeout": self.stall_timeout,
+            "retries": self.retries,
+            "encryption_workers": self.encryption_workers,
+            "is_running": self.is_running,
+            "abort_requested": self.abort_requested,
+            "running_processes": sorted(self.processes),
+            "thread_budget": (
+                self.thread_budget.to_dict() if self.thread_budget else None
+            ),
+            "cpu_placement": self.cpu_placer.to_dict() if self.cpu_placer else None,
+            "concurrency": self.concurrency.to_dict() if self.concurrency else None,
+        }
+
+    def _cancel_tasks(self) -> None:
+        """Cancel every file task (runs on the loop thread)."""
+        for task in self._tasks:
+            task.cancel()
+
+    def _on_slots_changed(self, limit: int) -> None:
+        """Wake the files waiting for a slot (runs on the controller thread)."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._wake_slot_waiters)
+
+    def _wake_slot_waiters(self) -> None:
+        """Let the files waiting for a slot check again (loop thread)."""
+
+        async def notify():
+            async with self._slots_changed:
+                self._slots_changed.notify_all()
+
+        asyncio.ensure_future(notify())
+
+    async def _acquire_slot(self) -> None:
+        """Wait until the concurrency controller opens a slot and take it."""
+        async with self._slots_changed:
+            await self._slots_changed.wait_for(self.concurrency.try_acquire)
+
+    async def _process_file(
+        self,
+        task: VideoTask,
+        encrypt_output: bool,
+        encryption_key_id: Optional[str],
+    ) -> Tuple[str, bool, float, Optional[str]]:
+        """
+        Encode one file once a slot is free.
+
+        Returns:
+            Tuple of (filename, success, duration, error_message)
+        """
+        start_time = time.time()
+        threads = None
+        placement = None
+        slot_taken = False
+        try:
+            async with self._semaphore:
+                if self.concurrency is not None:
+                    await self._acquire_slot()
+                    slot_taken = True
+                self._waiting -= 1
+                if self.abort_requested:
+                    error_message = CANCELLED_MESSAGE
+                else:
+                    start_time = time.time()
+                    for listener in self.start_listeners:
+                        self._notify(listener, task.name)
+                    if self.thread_budget is not None:
+                        waiting = self._waiting + 1
+                        if self.concurrency is not None:
+                            waiting = min(waiting, self.concurrency.open_slots())
+                        threads = self.thread_budget.acquire(waiting)
+                    if self.cpu_placer is not None:
+                        placement = self.cpu_placer.acquire(threads)
+                        task.cpus = placement.cpus
+                    task.slots = self.max_concurrent
+                    error_message = await self._encode_with_retries(
+                        task, encrypt_output, encryption_key_id, threads
+                    )
+        except asyncio.CancelledError:
+            error_message = CANCELLED_MESSAGE
+        except Exception as e:
+            error_message = getattr(e, "message", None) or str(e)
+        finally:
+            if threads is not None:
+                self.thread_budget.release(threads)
+            if placement is not None:
+                self.cpu_placer.release(placement)
+                self.cpu_placer.log_occupancy()
+            if slot_taken:
+                self.concurrency.release()
+                self._wake_slot_waiters()
+            task.cleanup()
+
+        result = (
+            task.name,
+            error_message is None,
+            time.time() - start_time,
+            error_message,
+        )
+        for listener in self.result_listeners:
+            self._notify(listener, result)
+        return result
+
+    async def _encode_with_retries(
+        self,
+        task: VideoTask,
+        encrypt_output: bool,
+        encryption_key_id: Optional[str],
+        threads: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Encode a file, starting over if FFmpeg timed out or stalled.
+
+        Returns:
+            Optional[str]: Error message, or None if the file was encoded
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._encode_file(
+                    task, encrypt_output, encryption_key_id, threads
+                )
+            except EncodingError as e:
+                if attempt == self.retries or not e.details.get("expired"):
+                    raise
+                self._log(
+                    "warning",
+                    f"Retrying {task.name} ({attempt + 1}/{self.retries}): "
+                    f"{e.message}",
+                )
+                task.cleanup()
+
+    async def _encode_file(
+        self,
+        task: VideoTask,
+        encrypt_output: bool,
+        encryption_key_id: Optional[str],
+        threads: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Run every step of a file's encode.
+
+        Args:
+            threads: Threads FFmpeg may use (FFmpeg default if None)
+
+        Returns:
+            Optional[str]: Error message, or None if the file was encoded
+        """
+        cmd = await self._run_blocking(task.prepare, threads)
+
+        if task.chunks:
+            await self._encode_chunks(task, cmd)
+        else:
+
+            def on_progress(progress: FFmpegProgress) -> None:
+                if progress.percent is not None:
+                    self._emit_progress(task.name, progress.percent)
+
+            rotation = None
+            if task.key_rotator and task.key_rotator.rotation_segments:
+                rotation = asyncio.ensure_future(self._rotate_keys(task.key_rotator))
+            try:
+                duration = await self._run_blocking(get_command_duration, cmd)
+                returncode, ffmpeg_log, progress = await self._run_ffmpeg(
+                    cmd, duration, on_progress, task.cpus, task.name
+                )
+            finally:
+                if rotation is not None:
+                    rotation.cancel()
+
+            if returncode != 0:
+                return VideoTask.describe_failure(ffmpeg_log, returncode, progress)
+
+        # Check if output files were created and report them
+        error_message = task.check_output(self._emit_output_file)
+        if error_message:
+            return error_message
+
+        self._emit_progress(task.name, 100)
+        await self._run_finishing(
+            task.encrypt_output,
+            encrypt_output,
+            encryption_key_id,
+            self.encryption_workers,
+        )
+        return None
+
+    async def _encode_chunks(self, task: VideoTask, cmd: List[str]) -> None:
+        """
+        Encode a file's chunks concurrently and stitch them.
+
+        Raises:
+            EncodingError: If a chunk fails; the other chunks are cancelled
+        """
+        encoder = task.create_chunked_encoder(self.logger)
+        workers = asyncio.Semaphore(await self._run_blocking(encoder.start, task.name))
+
+        async def encode_chunk(chunk):
+            def on_progress(progress: FFmpegProgress) -> None:
+                encoder.report_progress(
+                    chunk, progress.out_time, task.name, self._emit_progress
+                )
+
+            async with workers:
+                returncode, ffmpeg_log, progress = await self._run_ffmpeg(
+                    encoder.build_chunk_command(cmd, chunk),
+                    chunk.duration,
+                    on_progress,
+                    task.cpus,
+                    f"{task.name} {chunk.name}",
+                )
+            if returncode != 0:
+                raise encoder.chunk_error(
+                    chunk,
+                    ffmpeg_log.failure_details(returncode, progress),
+                    input_file=task.name,
+                )
+
+        jobs = [asyncio.ensure_future(encode_chunk(chunk)) for chunk in task.chunks]
+        try:
+            await asyncio.gather(*jobs)
+        except BaseException:
+            # The title cannot be completed, so stop the other chunks
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(*jobs, return_exceptions=True)
+            raise
+
+        await self._run_finishing(encoder.stitch)
+
+    async def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        duration: Optional[float],
+        on_progress: Callable[[FFmpegProgress], None],
+        cpus: Optional[List[int]] = None,
+        name: Optional[str] = None,
+    ) -> Tuple[int, FFmpegLog, FFmpegProgress]:
+        """
+        Run FFmpeg and read its progress and log pipes until it exits.
+
+        The process is terminated if the coroutine is cancelled.
+
+        Args:
+            cmd: FFmpeg command
+            duration: Expected output duration in seconds (for percentages)
+            on_progress: Called with the FFmpegProgress after throttling
+            cpus: CPUs the process is pinned to (default: any)
+            name: Name of the encode for the watchdog's log
+
+        Returns:
+            Tuple of (return code, captured log, final progress)
+
+        Raises:
+            EncodingError: If FFmpeg runs longer than the timeout or the
+                watchdog killed it; details["expired"] holds the reason
+        """
+        watched = False
+
+        def on_parsed(progress: FFmpegProgress) -> None:
+            if watched:
+                self.watchdog.touch(key, progress.out_time)
+            on_progress(progress)
+
+        parser = ProgressParser(duration, on_parsed)
+        ffmpeg_log = FFmpegLog()
+        # The process is forked from the loop thread, so the loop thread is
+        # pinned while it starts
+        with pinned(cpus, restore=self._loop_affinity):
+            process = await asyncio.create_subprocess_exec(
+                *add_progress_args(cmd),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        self.processes[process.pid] = process
+        key = f"ffmpeg/{process.pid}"
+        if self.watchdog is not None:
+            watched = self.watchdog.watch(
+                key, stall_timeout=self.stall_timeout, pid=process.pid, name=name
+            )
+
+        expired = None
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._read_progress(process.stdout, parser),
+                    self._read_log(process.stderr, ffmpeg_log),
+                    process.wait(),
+                ),
+                self.timeout,
+            )
+        except asyncio.TimeoutError:
+            await self._stop_process(process)
+            expired = (TIMED_OUT, f"timed out after {self.timeout:g}s")
+        except asyncio.CancelledError:
+            await self._stop_process(process)
+            raise
+        finally:
+            self.processes.pop(process.pid, None)
+            if watched:
+                description = self.watchdog.unwatch(key)
+                if description is not None and expired is None:
+                    expired = (STALLED, description)
+
+        if expired is not None:
+            raise EncodingError(
+                f"FFmpeg {expired[1]}",
+                severity=ErrorSeverity.ERROR,
+                details={
+                    "command": " ".join(cmd),
+                    "expired": expired[0],
+                    **ffmpeg_log.failure_details(process.returncode, parser.progress),
+                },
+            )
+
+        return process.returncode, ffmpeg_log, parser.progress
+
+    @staticmethod
+    async def _read_progress(stream: asyncio.StreamReader, parser: ProgressParser):
+        """Feed the progress pipe to the parser until FFmpeg closes it."""
+        while True:
+            data = await stream.read(READ_SIZE)
+            if not data:
+                break
+            parser.feed(data)
+
+    @staticmethod
+    async def _read_log(stream: asyncio.StreamReader, ffmpeg_log: FFmpegLog):
+        """Read the log pipe line by line until FFmpeg closes it."""
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # Longer than the stream limit; the line has been discarded
+                continue
+            if not line:
+                break
+            ffmpeg_log.add_line(line.decode("utf-8", "replace").rstrip())
+
+    @staticmethod
+    async def _stop_process(process: asyncio.subprocess.Process) -> None:
+        """Terminate a process, killing it if it does not exit in time."""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    @staticmethod
+    async def _rotate_keys(key_rotator) -> None:
+        """Drive HLS key rotation from the loop instead of a thread."""
+        while True:
+            await asyncio.sleep(key_rotator.poll_interval)
+            key_rotator.poll()
+
+    async def _run_blocking(self, func: Callable, *args):
+        """Run a quick blocking step on the helper thread."""
+        return await self._loop.run_in_executor(self._executor, func, *args)
+
+    async def _run_finishing(self, func: Callable, *args):
+        """Run a long step after an encode on the finishing threads."""
+        return await self._loop.run_in_executor(self._finish_executor, func, *args)
+
+    def _emit_progress(self, filename: str, percent: int) -> None:
+        """Send a file's progress to every progress listener."""
+        for listener in self.progress_listeners:
+            self._notify(listener, filename, percent)
+
+    def _emit_output_file(self, filename: str, resolution: Optional[str]) -> None:
+        """Send a created output file to every output file listener."""
+        for listener in self.output_file_listeners:
+            self._notify(listener, filename, resolution)
+
+    def _notify(self, listener: Callable, *args) -> None:
+        """Call a listener; a failing listener must not stop the encodes."""
+        try:
+            listener(*args)
+        except Exception as e:
+            self._log("error", f"Error in engine listener: {str(e)}")
+
+    def _log(self, level: str, message: str) -> None:
+        """Log a message if a logger was provided."""
+        if self.logger:
+            getattr(self.logger, level)(message)
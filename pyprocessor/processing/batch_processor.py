@@ -11,7 +11,14 @@ import time
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from pyprocessor.processing.concurrency_controller import (
+    create_concurrency_controller,
+)
+from pyprocessor.processing.thread_budget import create_thread_budget
+from pyprocessor.processing.video_task import get_encryption_workers
 from pyprocessor.utils.logging import get_logger
+from pyprocessor.utils.process.cpu_placement import create_cpu_placer
+from pyprocessor.utils.process.progress_table import ProgressTable
 from pyprocessor.utils.process.resource_manager import get_resource_manager
 
 
@@ -23,27 +30,36 @@ class BatchProcessor:
     which provides a balance between process isolation and resource usage.
     """
 
-    def __init__(self, config, logger=None):
+    def __init__(self, config, logger=None, task_function: Optional[Callable] = None):
         """
         Initialize the batch processor.
 
         Args:
             config: Configuration object
             logger: Logger instance (optional)
+            task_function: Function that processes one file, with the
+                signature of process_video_task (default: process_video_task)
         """
         self.config = config
         self.logger = logger or get_logger()
+        self.task_function = task_function
         self.resource_manager = get_resource_manager()
 
         # Get batch processing settings
         self.batch_enabled = config.get("batch_processing.enabled", True)
         self.batch_size = config.get("batch_processing.batch_size", 10)
         self.max_memory_percent = config.get("batch_processing.max_memory_percent", 80)
+        self.encode_retries = config.get("batch_processing.encode_retries", 0)
 
         # Internal state
         self.processing_queue = queue.Queue()
         self.results_queue = queue.Queue()
         self.worker_threads = []
+        self.worker_count = 0
+        self.encryption_workers = None
+        self.thread_budget = None
+        self.cpu_placer = None
+        self.concurrency = None
         self.is_running = False
         self.abort_requested = False
 
@@ -56,16 +72,35 @@ class BatchProcessor:
         output_file_callback: Optional[Callable] = None,
         encrypt_output: bool = False,
         encryption_key_id: Optional[str] = None,
+        result_callback: Optional[Callable] = None,
+        max_workers: Optional[int] = None,
+        progress_table: Optional[ProgressTable] = None,
+        first_slot: int = 0,
     ) -> List[Tuple[str, bool, float, str]]:
         """
         Process a batch of video files.
 
+        Worker threads pull files from one queue until it is empty, so a
+        worker starts the next file as soon as it finishes one. Passing every
+        file in a single call streams them through max_workers workers
+        without waiting at batch boundaries. With adaptive concurrency, up to
+        max_concurrency workers are started and the controller decides how
+        many of them encode at once.
+
         Args:
             files: List of video files to process
             output_folder: Output folder for processed videos
             ffmpeg_params: FFmpeg parameters
             progress_callback: Callback for progress updates
             output_file_callback: Callback for output file updates
+            encrypt_output: Whether to encrypt output files
+            encryption_key_id: Encryption key ID to use
+            result_callback: Called with each result tuple as soon as the
+                file completes
+            max_workers: Number of worker threads (default: batch_size)
+            progress_table: Table the progress of each file is written to
+            first_slot: Slot in progress_table of the first file; the
+                others follow in order
 
         Returns:
             List of tuples (filename, success, duration, error_message)
@@ -81,19 +116,41 @@ class BatchProcessor:
             self.results_queue.get()
 
         # Add files to processing queue
-        for file in files:
+        for slot, file in enumerate(files, first_slot):
             self.processing_queue.put(
-                (file, output_folder, ffmpeg_params, encrypt_output, encryption_key_id)
+                (
+                    file,
+                    slot,
+                    output_folder,
+                    ffmpeg_params,
+                    encrypt_output,
+                    encryption_key_id,
+                )
             )
 
         # Start worker threads
-        num_threads = min(len(files), self.batch_size)
+        num_threads = max(1, min(len(files), max_workers or self.batch_size or 1))
         self.worker_threads = []
 
+        # Optionally let resource usage decide how many workers encode at once
+        self.concurrency = create_concurrency_controller(
+            self.config, num_threads, self.logger
+        )
+        if self.concurrency is not None:
+            num_threads = max(1, min(len(files), self.concurrency.max_slots))
+            self.concurrency.start()
+
+        # Split the FFmpeg threads across the files encoded at the same time,
+        # and optionally pin each file to a NUMA node or CPU set
+        self.thread_budget = create_thread_budget(self.config, num_threads)
+        self.cpu_placer = create_cpu_placer(self.config, self.logger)
+        self.worker_count = num_threads
+        self.encryption_workers = get_encryption_workers(self.config, num_threads)
+
         for i in range(num_threads):
             thread = threading.Thread(
                 target=self._worker_thread,
-                args=(i, progress_callback, output_file_callback),
+                args=(i, progress_callback, output_file_callback, progress_table),
                 daemon=True,
                 name=f"BatchWorker-{i}",
             )
@@ -110,6 +167,10 @@ class BatchProcessor:
                     result = self.results_queue.get(timeout=0.5)
                     results.append(result)
                     self.results_queue.task_done()
+                    if result_callback:
+                        result_callback(result)
+                    if self.cpu_placer is not None:
+                        self.cpu_placer.log_occupancy()
                 except queue.Empty:
                     # Check if all threads are done
                     if all(not thread.is_alive() for thread in self.worker_threads):
@@ -125,6 +186,8 @@ class BatchProcessor:
                         thread.join(timeout=5.0)
         finally:
             self.is_running = False
+            if self.concurrency is not None:
+                self.concurrency.stop()
 
         return results
 
@@ -133,6 +196,7 @@ class BatchProcessor:
         thread_id: int,
         progress_callback: Optional[Callable],
         output_file_callback: Optional[Callable],
+        progress_table: Optional[ProgressTable] = None,
     ):
         """
         Worker thread for processing videos.
@@ -141,15 +205,29 @@ class BatchProcessor:
             thread_id: Thread ID
             progress_callback: Callback for progress updates
             output_file_callback: Callback for output file updates
+            progress_table: Table the progress of each file is written to
         """
         self.logger.debug(f"Worker thread {thread_id} started")
 
         while not self.abort_requested:
+            slot_taken = False
             try:
+                # Wait until the controller opens a slot for this worker
+                if self.concurrency is not None:
+                    while (
+                        not self.abort_requested and not self.processing_queue.empty()
+                    ):
+                        slot_taken = self.concurrency.acquire(timeout=0.5)
+                        if slot_taken:
+                            break
+                    if not slot_taken:
+                        break
+
                 # Get next file from queue with timeout to allow checking abort flag
                 try:
                     (
                         file,
+                        slot,
                         output_folder,
                         ffmpeg_params,
                         encrypt_output,
@@ -159,23 +237,47 @@ class BatchProcessor:
                     break
 
                 # Process the file
+                threads = None
+                placement = None
                 try:
                     self.logger.info(f"Thread {thread_id} processing {file.name}")
                     start_time = time.time()
 
-                    # Import here to avoid circular imports
-                    from pyprocessor.processing.encoder import process_video_task
-
-                    # Process the video
-                    result = process_video_task(
+                    if self.thread_budget is not None:
+                        waiting = self.processing_queue.qsize() + 1
+                        if self.concurrency is not None:
+                            waiting = min(waiting, self.concurrency.open_slots())
+                        threads = self.thread_budget.acquire(waiting=waiting)
+                    if self.cpu_placer is not None:
+                        placement = self.cpu_placer.acquire(threads)
+                        self.logger.debug(
+                            f"Thread {thread_id} placed {file.name} on NUMA node "
+                            f"{placement.node} ({len(placement.cpus)} CPUs)"
+                        )
+
+                    task_function = self.task_function
+                    if task_function is None:
+                        # Import here to avoid circular imports
+                        from pyprocessor.processing.scheduler import (
+                            process_video_task as task_function,
+                        )
+
+                    # Process the video; the task ID is the file's slot
+                    result = task_function(
                         str(file),
                         str(output_folder),
                         ffmpeg_params,
-                        thread_id,
+                        slot,
                         progress_callback=progress_callback,
                         output_file_callback=output_file_callback,
                         encrypt_output=encrypt_output,
                         encryption_key_id=encryption_key_id,
+                        progress_table=progress_table,
+                        threads=threads,
+                        cpus=placement.cpus if placement else None,
+                        retries=self.encode_retries,
+                        slots=self.worker_count,
+                        encryption_workers=self.encryption_workers,
                     )
 
                     # Add result to results queue
@@ -195,9 +297,19 @@ class BatchProcessor:
                     self.results_queue.put((str(file), False, 0.0, str(e)))
                     self.processing_queue.task_done()
 
+                finally:
+                    if threads is not None:
+                        self.thread_budget.release(threads)
+                    if placement is not None:
+                        self.cpu_placer.release(placement)
+
             except Exception as e:
                 self.logger.error(f"Error in worker thread {thread_id}: {str(e)}")
 
+            finally:
+                if slot_taken:
+                    self.concurrency.release()
+
         self.logger.debug(f"Worker thread {thread_id} stopped")
 
     def request_abort(self):
@@ -0,0 +1,655 @@
+"""
+Chunked parallel encoding for PyProcessor.
+
+One FFmpeg process encodes a title from start to finish, so a single long
+source can keep only part of the machine busy. In chunked mode the source is
+cut into chunks that start on source keyframes, the chunks are encoded by
+concurrent FFmpeg processes, and the per-chunk HLS output is stitched into one
+set of playlists:
+
+- each chunk is encoded with ``-ss``/``-t`` input seeking and
+  ``-output_ts_offset``, so timestamps continue across chunk boundaries
+- segments are renumbered into a single media sequence per variant
+- an ``#EXT-X-DISCONTINUITY`` tag marks each chunk boundary, since the
+  encoders restart there
+"""
+
+import bisect
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyprocessor.processing.hls_encryption import is_hls_encryption_enabled
+from pyprocessor.utils.logging.error_manager import EncodingError, ErrorSeverity
+from pyprocessor.utils.media.ffmpeg_log import FFmpegLog
+from pyprocessor.utils.media.ffmpeg_progress import (
+    ProgressParser,
+    add_progress_args,
+    read_progress,
+)
+from pyprocessor.utils.media.header_parser import read_keyframe_times
+from pyprocessor.utils.media.probe_manager import probe_file
+from pyprocessor.utils.process.cpu_placement import pinned
+from pyprocessor.utils.process.watchdog import was_killed
+
+# Default target chunk length in seconds
+DEFAULT_CHUNK_DURATION = 120
+
+# Sources shorter than this (in seconds) are encoded in one piece by default
+DEFAULT_MIN_SOURCE_DURATION = 600
+
+# A trailing chunk shorter than this is merged into the previous chunk
+MIN_CHUNK_DURATION = 10
+
+# Directory (inside the staging directory) that holds a chunk's output
+CHUNK_DIR_FORMAT = "chunk_{:03d}"
+
+# Names of the stitched files
+SEGMENT_NAME_FORMAT = "segment_{:03d}.ts"
+PLAYLIST_NAME = "playlist.m3u8"
+MASTER_PLAYLIST = "master.m3u8"
+
+# Playlist tags that are rewritten for the stitched playlist
+STITCHED_TAGS = (
+    "#EXTM3U",
+    "#EXT-X-VERSION:",
+    "#EXT-X-TARGETDURATION:",
+    "#EXT-X-MEDIA-SEQUENCE:",
+    "#EXT-X-DISCONTINUITY-SEQUENCE:",
+    "#EXT-X-PLAYLIST-TYPE:",
+    "#EXT-X-INDEPENDENT-SEGMENTS",
+    "#EXT-X-ENDLIST",
+)
+
+
+class EncodeChunk:
+    """
+    A time range of the source encoded by one FFmpeg process.
+    """
+
+    def __init__(self, index: int, start: float, end: float, last: bool = False):
+        """
+        Initialize a chunk.
+
+        Args:
+            index: Position of the chunk in the title
+            start: Start time in seconds
+            end: End time in seconds (the source duration for the last chunk)
+            last: Whether this is the final chunk (encoded to the end of input)
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+        self.last = last
+
+    @property
+    def name(self) -> str:
+        """Get the chunk's directory name."""
+        return CHUNK_DIR_FORMAT.format(self.index)
+
+    @property
+    def duration(self) -> float:
+        """Get the chunk length in seconds."""
+        return max(0.0, self.end - self.start)
+
+    def input_args(self) -> List[str]:
+        """
+        Build the input options that select this chunk.
+
+        Returns:
+            List[str]: FFmpeg arguments placed before ``-i``
+        """
+        args = []
+        if self.start > 0:
+            args.extend(["-ss", f"{self.start:.6f}"])
+        if not self.last:
+            args.extend(["-t", f"{self.duration:.6f}"])
+        return args
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the chunk to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Chunk information
+        """
+        return {
+            "index": self.index,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "last": self.last,
+        }
+
+
+def plan_chunks(
+    duration: float,
+    chunk_duration: float = DEFAULT_CHUNK_DURATION,
+    keyframes: Optional[List[float]] = None,
+) -> List[EncodeChunk]:
+    """
+    Split a title into chunks of about chunk_duration seconds.
+
+    Each cut is moved to the first source keyframe at or after its target time,
+    so seeking to a chunk start does not decode frames from the previous GOP.
+    Without keyframe times (or when the next keyframe is too far away) the cut
+    stays at the target time, which FFmpeg still handles by decoding from the
+    preceding keyframe.
+
+    Args:
+        duration: Source duration in seconds
+        chunk_duration: Target chunk length in seconds
+        keyframes: Sorted source keyframe times in seconds (optional)
+
+    Returns:
+        List[EncodeChunk]: Chunks covering the whole title, in order
+    """
+    if not duration or duration <= 0 or not chunk_duration or chunk_duration <= 0:
+        return [EncodeChunk(0, 0.0, max(0.0, duration or 0.0), last=True)]
+
+    cuts = []
+    target = float(chunk_duration)
+    while target < duration - MIN_CHUNK_DURATION:
+        cut = target
+        if keyframes:
+            position = bisect.bisect_left(keyframes, target)
+            if (
+                position < len(keyframes)
+                and keyframes[position] - target < chunk_duration / 2
+            ):
+                cut = keyframes[position]
+        if cut >= duration - MIN_CHUNK_DURATION:
+            break
+        cuts.append(cut)
+        target = cut + chunk_duration
+
+    starts = [0.0] + cuts
+    ends = cuts + [duration]
+    last = len(starts) - 1
+    return [
+        EncodeChunk(i, start, end, last=(i == last))
+        for i, (start, end) in enumerate(zip(starts, ends))
+    ]
+
+
+def plan_chunked_encoding(
+    ffmpeg_params: Dict[str, Any], file_path: Path
+) -> Optional[List[EncodeChunk]]:
+    """
+    Decide whether a source is encoded in chunks and plan them.
+
+    Args:
+        ffmpeg_params: FFmpeg parameters from the configuration
+        file_path: Source file
+
+    Returns:
+        Optional[List[EncodeChunk]]: The chunks, or None to encode in one piece
+    """
+    if not ffmpeg_params.get("chunked_encoding", False):
+        return None
+
+    # Keys are issued per FFmpeg process, so encrypted output is not chunked
+    if is_hls_encryption_enabled(ffmpeg_params):
+        return None
+
+    try:
+        duration = probe_file(file_path).duration
+    except Exception:
+        return None
+
+    min_duration = ffmpeg_params.get("chunk_min_duration", DEFAULT_MIN_SOURCE_DURATION)
+    if not duration or duration < min_duration:
+        return None
+
+    chunks = plan_chunks(
+        duration,
+        ffmpeg_params.get("chunk_duration", DEFAULT_CHUNK_DURATION),
+        read_keyframe_times(file_path),
+    )
+    return chunks if len(chunks) > 1 else None
+
+
+def chunk_worker_count(
+    ffmpeg_params: Dict[str, Any],
+    chunks: int,
+    threads: Optional[int] = None,
+    slots: Optional[int] = None,
+) -> int:
+    """
+    Get the number of chunks of a title encoded at the same time.
+
+    Without a configured chunk_workers, a title gets one chunk process per
+    thread of its ThreadBudget share, or its part of the CPUs when other
+    files are encoded at the same time, so chunking does not oversubscribe
+    the machine.
+
+    Args:
+        ffmpeg_params: FFmpeg parameters from the configuration
+        chunks: Number of chunks planned for the title
+        threads: Threads the title's encode may use (from a ThreadBudget)
+        slots: Files encoded at the same time (used without threads)
+
+    Returns:
+        int: Concurrent chunk encoders (at least 1, at most chunks)
+    """
+    workers = ffmpeg_params.get("chunk_workers", 0)
+    if not workers:
+        workers = threads or (os.cpu_count() or 1) // max(1, slots or 1)
+    return max(1, min(workers, chunks))
+
+
+def _stitch_variant(staging_dir: Path, chunks: List[EncodeChunk], variant: str) -> int:
+    """
+    Merge the chunk playlists of one variant and renumber their segments.
+
+    Returns:
+        int: Number of segments in the stitched playlist
+    """
+    output_dir = staging_dir / variant
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    version = 3
+    target_duration = 1
+    independent = False
+    entries: List[str] = []
+    number = 0
+
+    for chunk in chunks:
+        playlist = staging_dir / chunk.name / variant / PLAYLIST_NAME
+        if not playlist.exists():
+            raise EncodingError(
+                f"Missing playlist for {variant} in {chunk.name}",
+                severity=ErrorSeverity.ERROR,
+                details={"playlist": str(playlist), "chunk": chunk.to_dict()},
+            )
+
+        pending: List[str] = []
+        first_segment = True
+        for line in playlist.read_text().splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#EXT-X-VERSION:"):
+                version = max(version, int(line.split(":", 1)[1]))
+            elif line.startswith("#EXT-X-TARGETDURATION:"):
+                target_duration = max(target_duration, int(line.split(":", 1)[1]))
+            elif line == "#EXT-X-INDEPENDENT-SEGMENTS":
+                independent = True
+            if line.startswith(STITCHED_TAGS):
+                continue
+            if line.startswith("#"):
+                pending.append(line)
+                continue
+
+            # Segment URI: mark the chunk boundary and give it the next number
+            if first_segment and chunk.index > 0:
+                entries.append("#EXT-X-DISCONTINUITY")
+            first_segment = False
+            entries.extend(pending)
+            pending = []
+
+            name = SEGMENT_NAME_FORMAT.format(number)
+            os.replace(playlist.parent / line, output_dir / name)
+            entries.append(name)
+            number += 1
+
+    lines = [
+        "#EXTM3U",
+        f"#EXT-X-VERSION:{version}",
+        f"#EXT-X-TARGETDURATION:{target_duration}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    if independent:
+        lines.append("#EXT-X-INDEPENDENT-SEGMENTS")
+    lines.extend(entries)
+    lines.append("#EXT-X-ENDLIST")
+
+    temp_path = output_dir / f".{PLAYLIST_NAME}.tmp"
+    temp_path.write_text("\n".join(lines) + "\n")
+    os.replace(temp_path, output_dir / PLAYLIST_NAME)
+    return number
+
+
+def stitch_chunks(staging_dir: Path, chunks: List[EncodeChunk]) -> Dict[str, int]:
+    """
+    Stitch the HLS output of all chunks into the staging directory.
+
+    Variant playlists are written first and the master playlist (taken from
+    the first chunk, as every chunk has the same variants) last. The chunk
+    directories are removed afterwards.
+
+    Args:
+        staging_dir: Directory holding one subdirectory per chunk
+        chunks: The encoded chunks, in order
+
+    Returns:
+        Dict[str, int]: Number of segments per variant
+
+    Raises:
+        EncodingError: If a chunk is missing a playlist
+    """
+    staging_dir = Path(staging_dir)
+    first_dir = staging_dir / chunks[0].name
+    variants = sorted(
+        playlist.parent.name for playlist in first_dir.glob(f"*/{PLAYLIST_NAME}")
+    )
+
+    segments = {
+        variant: _stitch_variant(staging_dir, chunks, variant) for variant in variants
+    }
+
+    master = first_dir / MASTER_PLAYLIST
+    if master.exists():
+        os.replace(master, staging_dir / MASTER_PLAYLIST)
+
+    for chunk in chunks:
+        shutil.rmtree(staging_dir / chunk.name, ignore_errors=True)
+
+    return segments
+
+
+class ChunkedEncoder:
+    """
+    Encodes the chunks of a title concurrently and stitches the result.
+    """
+
+    def __init__(
+        self,
+        staging_dir: Path,
+        chunks: List[EncodeChunk],
+        max_workers: Optional[int] = None,
+        logger=None,
+        cpus: Optional[List[int]] = None,
+        retries: int = 0,
+        pid_callback: Optional[Callable[[int], None]] = None,
+    ):
+        """
+        Initialize the chunked encoder.
+
+        Args:
+            staging_dir: Directory the full-title command writes into
+            chunks: Chunks planned for the title
+            max_workers: Concurrent FFmpeg processes (default: CPU count)
+            logger: Logger instance (optional)
+            cpus: CPUs the chunk processes are pinned to (default: any)
+            retries: How many times a chunk is encoded again after its FFmpeg
+                process was killed (by the watchdog)
+            pid_callback: Called with the process ID the watchdog should kill
+                when the title stalls (the oldest running chunk, 0 if none)
+        """
+        self.staging_dir = Path(staging_dir)
+        self.chunks = chunks
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.logger = logger
+        self.cpus = cpus
+        self.retries = max(0, int(retries or 0))
+        self.pid_callback = pid_callback
+
+        self.segments: Dict[str, int] = {}
+        self._positions: Dict[int, float] = {}
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def duration(self) -> float:
+        """Get the total duration of all chunks in seconds."""
+        return sum(chunk.duration for chunk in self.chunks)
+
+    def build_chunk_command(self, cmd: List[str], chunk: EncodeChunk) -> List[str]:
+        """
+        Derive a chunk's command from the command for the whole title.
+
+        The chunk's seek options go before ``-i``, its timestamp offset before
+        the HLS muxer, and output paths are moved into the chunk directory.
+
+        Args:
+            cmd: FFmpeg command that encodes the whole title into staging_dir
+            chunk: Chunk to encode
+
+        Returns:
+            List[str]: FFmpeg command for the chunk
+        """
+        prefix = str(self.staging_dir) + "/"
+        chunk_prefix = str(self.staging_dir / chunk.name) + "/"
+
+        chunk_cmd = []
+        for i, arg in enumerate(cmd):
+            if arg == "-i":
+                chunk_cmd.extend(chunk.input_args())
+            elif arg == "-f" and i + 1 < len(cmd) and cmd[i + 1] == "hls":
+                chunk_cmd.extend(["-output_ts_offset", f"{chunk.start:.6f}"])
+            elif arg.startswith(prefix):
+                arg = chunk_prefix + arg[len(prefix) :]
+            chunk_cmd.append(arg)
+        return chunk_cmd
+
+    def run(
+        self,
+        cmd: List[str],
+        input_file: Optional[str] = None,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+    ) -> bool:
+        """
+        Encode all chunks and stitch them into the staging directory.
+
+        Args:
+            cmd: FFmpeg command that encodes the whole title into staging_dir
+            input_file: Input file name (for progress reporting)
+            progress_callback: Called with (input_file, percent) as chunks advance
+
+        Returns:
+            bool: True if every chunk was encoded and stitched
+
+        Raises:
+            EncodingError: If a chunk fails to encode or cannot be stitched
+        """
+        workers = self.start(input_file)
+
+        failure = None
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for chunk in self.chunks:
+                future = executor.submit(
+                    self._encode_chunk,
+                    self.build_chunk_command(cmd, chunk),
+                    chunk,
+                    input_file,
+                    progress_callback,
+                )
+                futures[future] = chunk
+
+            for future in as_completed(futures):
+                chunk = futures[future]
+                returncode, facts = future.result()
+                if returncode != 0 and failure is None:
+                    failure = (chunk, facts)
+                    # Stop the other chunks; the title cannot be completed
+                    self.terminate()
+
+        if failure is not None:
+            raise self.chunk_error(*failure, input_file=input_file)
+
+        self.stitch()
+        if progress_callback and input_file:
+            progress_callback(input_file, 100)
+        return True
+
+    def start(self, input_file: Optional[str] = None) -> int:
+        """
+        Reset the progress state and create the chunk directories.
+
+        Args:
+            input_file: Input file name (for logging)
+
+        Returns:
+            int: Number of chunks to encode at the same time
+        """
+        self._cancelled.clear()
+        self._positions = {chunk.index: 0.0 for chunk in self.chunks}
+        for chunk in self.chunks:
+            (self.staging_dir / chunk.name).mkdir(parents=True, exist_ok=True)
+
+        workers = min(self.max_workers, len(self.chunks))
+        self._log(
+            "info",
+            f"Encoding {input_file or 'source'} in {len(self.chunks)} chunks "
+            f"with {workers} workers",
+        )
+        return workers
+
+    def stitch(self) -> Dict[str, int]:
+        """
+        Stitch the encoded chunks into the staging directory.
+
+        Returns:
+            Dict[str, int]: Number of segments per variant
+        """
+        self.segments = stitch_chunks(self.staging_dir, self.chunks)
+        self._log(
+            "info",
+            f"Stitched {len(self.chunks)} chunks into "
+            f"{sum(self.segments.values())} segments",
+        )
+        return self.segments
+
+    @staticmethod
+    def chunk_error(
+        chunk: EncodeChunk, facts: Dict[str, Any], input_file: Optional[str] = None
+    ) -> EncodingError:
+        """
+        Build the error raised when a chunk fails.
+
+        Args:
+            chunk: The failed chunk
+            facts: Failure facts from FFmpegLog.failure_details
+            input_file: Input file name
+
+        Returns:
+            EncodingError: Error describing the failure
+        """
+        message = (
+            f"FFmpeg failed on {chunk.name} with return code {facts['returncode']}"
+        )
+        if facts["first_error"]:
+            message += f": {facts['first_error']}"
+        return EncodingError(
+            message,
+            severity=ErrorSeverity.ERROR,
+            details={"input_file": input_file, "chunk": chunk.to_dict(), **facts},
+        )
+
+    def terminate(self) -> bool:
+        """
+        Terminate all running chunk encoders.
+
+        Returns:
+            bool: True if any process was terminated
+        """
+        self._cancelled.set()
+        with self._lock:
+            processes = list(self._processes.values())
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        return bool(processes)
+
+    def _encode_chunk(
+        self,
+        cmd: List[str],
+        chunk: EncodeChunk,
+        input_file: Optional[str],
+        progress_callback: Optional[Callable[[str, int], None]],
+    ) -> Tuple[int, Dict[str, Any]]:
+        """
+        Run FFmpeg for one chunk, starting over if the process was killed.
+
+        Returns:
+            Tuple of (return code, failure facts from FFmpegLog.failure_details)
+        """
+
+        def on_progress(progress):
+            if progress_callback and input_file:
+                self.report_progress(
+                    chunk, progress.out_time, input_file, progress_callback
+                )
+
+        for attempt in range(self.retries + 1):
+            ffmpeg_log = FFmpegLog()
+            if self._cancelled.is_set():
+                ffmpeg_log.add_line("Cancelled")
+                return -1, ffmpeg_log.failure_details(-1)
+
+            with pinned(self.cpus):
+                process = subprocess.Popen(
+                    add_progress_args(cmd),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            with self._lock:
+                self._processes[chunk.index] = process
+            self._publish_pid()
+
+            try:
+                ffmpeg_log.start(process.stderr)
+                progress = read_progress(
+                    process.stdout, ProgressParser(chunk.duration, on_progress)
+                )
+                process.wait()
+                ffmpeg_log.join()
+            finally:
+                with self._lock:
+                    self._processes.pop(chunk.index, None)
+                self._publish_pid()
+
+            if not was_killed(process.returncode) or attempt == self.retries:
+                break
+            # Killed from outside, most likely by the watchdog
+            self._log(
+                "warning",
+                f"Retrying {chunk.name} ({attempt + 1}/{self.retries}): "
+                f"FFmpeg was killed",
+            )
+            if progress_callback and input_file:
+                self.report_progress(chunk, 0.0, input_file, progress_callback)
+
+        if process.returncode == 0:
+            speed = f", speed {progress.speed:.2f}x" if progress.speed else ""
+            self._log("debug", f"Encoded {chunk.name} ({chunk.duration:.1f}s{speed})")
+        return process.returncode, ffmpeg_log.failure_details(
+            process.returncode, progress
+        )
+
+    def _publish_pid(self) -> None:
+        """Report the oldest running chunk process to pid_callback."""
+        if self.pid_callback is None:
+            return
+        with self._lock:
+            oldest = min(self._processes) if self._processes else None
+            pid = self._processes[oldest].pid if oldest is not None else 0
+        self.pid_callback(pid)
+
+    def report_progress(
+        self,
+        chunk: EncodeChunk,
+        position: float,
+        input_file: str,
+        progress_callback: Callable[[str, int], None],
+    ) -> None:
+        """Report progress over the whole title from one chunk's position."""
+        with self._lock:
+            self._positions[chunk.index] = min(position, chunk.duration)
+            done = sum(self._positions.values())
+        total = self.duration
+        if total > 0:
+            progress_callback(input_file, min(int(done / total * 100), 99))
+
+    def _log(self, level: str, message: str) -> None:
+        """Log a message if a logger was provided."""
+        if self.logger:
+            getattr(self.logger, level)(message)
@@ -0,0 +1,385 @@
+"""
+Adaptive encode concurrency for PyProcessor.
+
+The number of files encoded at once is normally fixed before the run from a
+resource estimate. Encodes differ widely in what they need, so a fixed
+number either leaves the host idle or pushes it into swap.
+
+ConcurrencyController samples CPU, memory, swap and iowait from the
+ResourceManager while the run goes on and moves the number of encode slots
+with an AIMD (additive increase, multiplicative decrease) rule:
+
+- Memory above ``max_memory_percent``, swapping or high iowait: the slots
+  are cut by half. Running encodes are not stopped; no new encode starts
+  until enough of them have finished.
+- CPU below the target, every slot busy and room for one more encode in
+  memory: one slot is added. An encode is taken to need the memory used
+  above the level when the controller started, split across the running
+  encodes, so memory that was in use before the run does not count.
+- Otherwise the slots are kept.
+
+Each decision is logged with the metrics it was based on as a structured
+``concurrency_decision`` event.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from pyprocessor.utils.logging.log_manager import get_logger
+
+# Swap-in rate (bytes per second) that counts as swapping
+SWAP_IN_THRESHOLD = 1024 * 1024
+
+# Decisions kept for to_dict()
+DECISION_HISTORY = 100
+
+
+def create_concurrency_controller(
+    config,
+    initial_slots: int,
+    logger=None,
+    active_count: Optional[Callable[[], int]] = None,
+) -> Optional["ConcurrencyController"]:
+    """
+    Create the concurrency controller for a run, if it is enabled.
+
+    Args:
+        config: Configuration object
+        initial_slots: Encodes running at the same time at the start
+        logger: Logger instance (optional)
+        active_count: Returns the encodes running now (default: the slots
+            taken with acquire())
+
+    Returns:
+        Optional[ConcurrencyController]: Controller, or None if the
+        concurrency is fixed
+    """
+    if not config.get("batch_processing.adaptive_concurrency", False):
+        return None
+
+    initial_slots = max(1, int(initial_slots or 1))
+    max_slots = config.get("batch_processing.max_concurrency", 0) or os.cpu_count()
+    return ConcurrencyController(
+        initial_slots,
+        max(initial_slots, max_slots or 1),
+        target_cpu=config.get("batch_processing.target_cpu_percent", 85) / 100.0,
+        max_memory=config.get("batch_processing.max_memory_percent", 80) / 100.0,
+        max_iowait=config.get("batch_processing.max_iowait_percent", 20) / 100.0,
+        interval=config.get("batch_processing.adaptive_interval", 5.0),
+        logger=logger,
+        active_count=active_count,
+    )
+
+
+class ConcurrencyController:
+    """
+    Adjusts the number of encode slots from live resource usage.
+
+    Workers take a slot with acquire() (or try_acquire()) before starting a
+    file and give it back with release(). Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        initial_slots: int,
+        max_slots: int,
+        min_slots: int = 1,
+        target_cpu: float = 0.85,
+        max_memory: float = 0.8,
+        max_iowait: float = 0.2,
+        interval: float = 5.0,
+        decrease_factor: float = 0.5,
+        resource_manager=None,
+        logger=None,
+        active_count: Optional[Callable[[], int]] = None,
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            initial_slots: Slots at the start
+            max_slots: Most slots the controller may open
+            min_slots: Fewest slots the controller may leave
+            target_cpu: CPU utilization to stay below (0.0-1.0)
+            max_memory: Memory utilization to stay below (0.0-1.0)
+            max_iowait: iowait above which slots are cut (0.0-1.0)
+            interval: Seconds between samples
+            decrease_factor: Share of the slots kept on a cut
+            resource_manager: Source of the metrics (default: the
+                ResourceManager singleton)
+            logger: Logger instance (optional)
+            active_count: Returns the encodes running now (default: the
+                slots taken with acquire())
+        """
+        self.min_slots = max(1, int(min_slots))
+        self.max_slots = max(self.min_slots, int(max_slots))
+        self.limit = min(self.max_slots, max(self.min_slots, int(initial_slots)))
+        self.target_cpu = target_cpu
+        self.max_memory = max_memory
+        self.max_iowait = max_iowait
+        self.interval = interval
+        self.decrease_factor = decrease_factor
+        self.logger = logger or get_logger()
+        self._resource_manager = resource_manager
+        self._active_count = active_count
+
+        self.active = 0
+        self.decisions = deque(maxlen=DECISION_HISTORY)
+        self._listeners: List[Callable[[int], None]] = []
+        self._condition = threading.Condition()
+        self._last_swap_in = None
+        self._last_sample_time = None
+
+        # Memory utilization before the encodes, set by start()
+        self.baseline_memory: Optional[float] = None
+
+        # Sampling thread
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def resource_manager(self):
+        """Get the source of the metrics."""
+        if self._resource_manager is None:
+            # Import here so the controller can be built without psutil
+            from pyprocessor.utils.process.resource_manager import (
+                get_resource_manager,
+            )
+
+            self._resource_manager = get_resource_manager()
+        return self._resource_manager
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """
+        Register a function called with the new number of slots when it
+        changes. It runs on the sampling thread.
+
+        Args:
+            callback: Function taking the number of slots
+        """
+        self._listeners.append(callback)
+
+    def start(self) -> None:
+        """Start sampling on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.baseline_memory is None:
+            self.baseline_memory = self.resource_manager.get_memory_usage().utilization
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="ConcurrencyController"
+        )
+        self._thread.start()
+        self.logger.info(
+            f"Adaptive concurrency: starting with {self.limit} slots "
+            f"({self.min_slots}-{self.max_slots}), target CPU "
+            f"{self.target_cpu:.0%}, max memory {self.max_memory:.0%}"
+        )
+
+    def stop(self) -> None:
+        """Stop sampling and wake any worker waiting for a slot."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.interval + 1.0)
+        self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take a slot, waiting until one is open.
+
+        Args:
+            timeout: Seconds to wait (default: no limit)
+
+        Returns:
+            bool: True if a slot was taken; pass it to release() when the
+            encode ends
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.active < self.limit, timeout=timeout
+            ):
+                return False
+            self.active += 1
+            return True
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot if one is open.
+
+        Returns:
+            bool: True if a slot was taken
+        """
+        return self.acquire(timeout=0)
+
+    def release(self) -> None:
+        """Give back a slot taken with acquire()."""
+        with self._condition:
+            self.active = max(0, self.active - 1)
+            self._condition.notify_all()
+
+    def open_slots(self) -> int:
+        """
+        Get the slots that are still open, counting one just taken.
+
+        Returns:
+            int: Encodes that could start now, at least 1
+        """
+        with self._condition:
+            return max(1, self.limit - self.active + 1)
+
+    def _get_active(self) -> int:
+        if self._active_count is not None:
+            return self._active_count()
+        return self.active
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.step()
+            except Exception as e:
+                self.logger.error(f"Error in concurrency controller: {str(e)}")
+
+    def sample(self) -> Dict[str, float]:
+        """
+        Read the metrics the decisions are based on.
+
+        Returns:
+            Dict[str, float]: CPU, memory, swap and iowait utilization
+            (0.0-1.0) and the swap-in rate in bytes per second
+        """
+        cpu_usage = self.resource_manager.get_cpu_usage()
+        memory_usage = self.resource_manager.get_memory_usage()
+
+        now = time.time()
+        swap_in = memory_usage.details.get("swap_in") or 0
+        swap_in_rate = 0.0
+        if self._last_swap_in is not None and now > self._last_sample_time:
+            swap_in_rate = max(0, swap_in - self._last_swap_in) / (
+                now - self._last_sample_time
+            )
+        self._last_swap_in = swap_in
+        self._last_sample_time = now
+
+        return {
+            "cpu": cpu_usage.utilization,
+            "iowait": cpu_usage.details.get("iowait", 0.0),
+            "memory": memory_usage.utilization,
+            "swap": memory_usage.details.get("swap_percent", 0.0),
+            "swap_in_rate": swap_in_rate,
+        }
+
+    def decide(self, metrics: Dict[str, float], active: int) -> Dict[str, Any]:
+        """
+        Work out the number of slots for a sample.
+
+        Args:
+            metrics: Metrics from sample()
+            active: Encodes running now
+
+        Returns:
+            Dict[str, Any]: The decision, with its action ("increase",
+            "decrease" or "hold"), reason and new number of slots
+        """
+        limit = self.limit
+        # Memory the running encodes added since the start, per encode
+        encode_memory = 0.0
+        if active:
+            growth = metrics["memory"] - (self.baseline_memory or 0.0)
+            encode_memory = max(0.0, growth) / active
+        pressure = None
+        if metrics["memory"] >= self.max_memory:
+            pressure = "memory"
+        elif metrics["swap_in_rate"] >= SWAP_IN_THRESHOLD:
+            pressure = "swapping"
+        elif metrics["iowait"] >= self.max_iowait:
+            pressure = "iowait"
+
+        if pressure is not None:
+            if active > limit:
+                # An earlier cut has not taken effect yet
+                action, reason = "hold", f"{pressure}_draining"
+            elif limit <= self.min_slots:
+                action, reason = "hold", f"{pressure}_at_min"
+            else:
+                action, reason = "decrease", pressure
+                limit = max(self.min_slots, math.floor(limit * self.decrease_factor))
+        elif limit >= self.max_slots:
+            action, reason = "hold", "at_max"
+        elif active < limit:
+            action, reason = "hold", "slots_free"
+        elif metrics["cpu"] >= self.target_cpu:
+            action, reason = "hold", "cpu_at_target"
+        elif active and metrics["memory"] + encode_memory >= self.max_memory:
+            # One more encode like the running ones would not fit in memory
+            action, reason = "hold", "memory_headroom"
+        else:
+            action, reason = "increase", "cpu_headroom"
+            limit += 1
+
+        return {
+            "action": action,
+            "reason": reason,
+            "previous_limit": self.limit,
+            "limit": limit,
+            "active": active,
+            "encode_memory": encode_memory,
+            **metrics,
+        }
+
+    def step(self) -> Dict[str, Any]:
+        """
+        Sample the metrics once and apply the decision.
+
+        Returns:
+            Dict[str, Any]: The decision (see decide())
+        """
+        decision = self.decide(self.sample(), self._get_active())
+        decision["time"] = time.time()
+        self.decisions.append(decision)
+
+        if decision["limit"] != self.limit:
+            with self._condition:
+                self.limit = decision["limit"]
+                self._condition.notify_all()
+            for callback in self._listeners:
+                try:
+                    callback(self.limit)
+                except Exception as e:
+                    self.logger.error(f"Error in concurrency listener: {str(e)}")
+
+        log = self.logger.info if decision["action"] != "hold" else self.logger.debug
+        log(
+            f"Concurrency {decision['action']} to {decision['limit']} slots "
+            f"({decision['reason']}): CPU {decision['cpu']:.0%}, memory "
+            f"{decision['memory']:.0%}, iowait {decision['iowait']:.0%}, "
+            f"{decision['active']} active",
+            event="concurrency_decision",
+            **{k: v for k, v in decision.items() if k != "time"},
+        )
+        return decision
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the controller to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Controller information with the recent decisions
+        """
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "active": self._get_active(),
+                "min_slots": self.min_slots,
+                "max_slots": self.max_slots,
+                "target_cpu": self.target_cpu,
+                "max_memory": self.max_memory,
+                "max_iowait": self.max_iowait,
+                "baseline_memory": self.baseline_memory,
+                "decisions": list(self.decisions),
+            }
@@ -2,7 +2,20 @@ import json
 import os
 from pathlib import Path
 
+from pyprocessor.processing.chunked_encoder import (
+    ChunkedEncoder,
+    chunk_worker_count,
+    plan_chunked_encoding,
+)
+from pyprocessor.processing.hls_encryption import (
+    HLSKeyRotator,
+    is_hls_encryption_enabled,
+)
+from pyprocessor.processing.ladder import plan_ladder
+from pyprocessor.processing.segment_publisher import SegmentPublisher
+from pyprocessor.processing.video_task import build_hls_command
 from pyprocessor.utils.core.dependency_manager import check_ffmpeg
+from pyprocessor.utils.file_system.output_commit import commit_directory
 from pyprocessor.utils.file_system.temp_file_manager import (
     cleanup_temp_file,
     create_temp_dir,
@@ -30,6 +43,9 @@ class FFmpegEncoder:
         self.ffmpeg = FFmpegManager(logger)
         self.encryption_manager = get_encryption_manager()
         self.encoding_progress = 0
+        self.last_commit = None
+        self.last_hls_encryption = None
+        self.chunked_encoder = None
 
     def check_ffmpeg(self):
         """Check if FFmpeg is installed and available"""
@@ -101,19 +117,32 @@ class FFmpegEncoder:
         """Check if the video file has audio streams"""
         return self.ffmpeg.has_audio(file_path)
 
-    def build_command(self, input_file, output_folder):
+    def plan_ladder(self, input_file):
+        """Plan the rendition ladder for the input file from its probed video stream"""
+        video_info = None
+        try:
+            video_info = self.ffmpeg.get_video_info(input_file)
+        except Exception as e:
+            self.logger.warning(
+                f"Could not probe {input_file}, using the configured ladder: {str(e)}"
+            )
+
+        plan = plan_ladder(self.config.ffmpeg_params, video_info)
+        self.logger.debug(
+            f"Ladder for {Path(input_file).name}: "
+            + ", ".join(f"{r.name} ({r.width}x{r.height})" for r in plan.rungs)
+        )
+        return plan
+
+    def build_command(self, input_file, output_folder, key_rotator=None):
         """Build FFmpeg command for HLS encoding with audio option"""
         # Check for audio streams and respect the include_audio setting
         has_audio = self.has_audio(input_file) and self.config.ffmpeg_params.get(
             "include_audio", True
         )
 
-        # Calculate buffer sizes
-        bitrates = self.config.ffmpeg_params["bitrates"]
-        bufsizes = {}
-        for res, bitrate in bitrates.items():
-            bufsize_value = int(bitrate.rstrip("k")) * 2
-            bufsizes[res] = f"{bufsize_value}k"
+        # Plan the rendition ladder from the probed source
+        plan = self.plan_ladder(input_file)
 
         # Check GPU usage if using hardware encoding
         using_gpu = self.config.ffmpeg_params.get("video_encoder", "").endswith(
@@ -151,23 +180,8 @@ class FFmpegEncoder:
                     self.config.ffmpeg_params["video_encoder"] = "libx264"
                     using_gpu = False
 
-        # Build filter complex string
-        filter_complex = "[0:v]split=4[v1][v2][v3][v4];[v1]scale=1920:1080[v1out];[v2]scale=1280:720[v2out];[v3]scale=854:480[v3out];[v4]scale=640:360[v4out]"
-
-        # Build FFmpeg command
-        cmd = [
-            self.ffmpeg.get_ffmpeg_path(),
-            "-hide_banner",
-            "-loglevel",
-            "info",
-            "-stats",
-            "-i",
-            str(input_file),
-            "-filter_complex",
-            filter_complex,
-        ]
-
         # Add GPU-specific options if using hardware encoding
+        input_args = []
         if using_gpu:
             # Add CUDA device selection if multiple GPUs are available
             gpu_capabilities = self.check_gpu_capabilities()
@@ -178,100 +192,29 @@ class FFmpegEncoder:
                     best_gpu = max(
                         gpu_usages, key=lambda x: (x.memory_total - x.memory_used)
                     )
-                    cmd.extend(
-                        ["-hwaccel", "cuda", "-hwaccel_device", str(best_gpu.index)]
-                    )
-                    self.logger.info(f"Selected GPU {best_gpu.index} for encoding")
-
-        # Video streams for all resolutions
-        for i, (res, bitrate) in enumerate(
-            [
-                ("1080p", bitrates["1080p"]),
-                ("720p", bitrates["720p"]),
-                ("480p", bitrates["480p"]),
-                ("360p", bitrates["360p"]),
-            ]
-        ):
-            # Map video stream
-            cmd.extend(
-                [
-                    "-map",
-                    f"[v{i+1}out]",
-                    "-c:v:" + str(i),
-                    self.config.ffmpeg_params["video_encoder"],
-                ]
-            )
-
-            # Add preset and tune if applicable
-            if self.config.ffmpeg_params["preset"]:
-                cmd.extend([f"-preset:v:{i}", self.config.ffmpeg_params["preset"]])
-            if self.config.ffmpeg_params["tune"]:
-                cmd.extend([f"-tune:v:{i}", self.config.ffmpeg_params["tune"]])
-
-            # Bitrate settings
-            cmd.extend(
-                [
-                    f"-b:v:{i}",
-                    bitrate,
-                    f"-maxrate:v:{i}",
-                    bitrate,
-                    f"-bufsize:v:{i}",
-                    bufsizes[res],
-                ]
-            )
-
-        # Audio streams if available and enabled
-        audio_bitrates = self.config.ffmpeg_params["audio_bitrates"]
-        if has_audio:
-            for i, bitrate in enumerate(audio_bitrates):
-                cmd.extend(
-                    [
-                        "-map",
-                        "a:0",
-                        f"-c:a:{i}",
-                        "aac",
-                        f"-b:a:{i}",
-                        bitrate,
-                        "-ac",
-                        "2",
+                    input_args = [
+                        "-hwaccel",
+                        "cuda",
+                        "-hwaccel_device",
+                        str(best_gpu.index),
                     ]
-                )
-            var_stream_map = "v:0,a:0 v:1,a:1 v:2,a:2 v:3,a:3"
-        else:
-            var_stream_map = "v:0 v:1 v:2 v:3"
+                    self.logger.info(f"Selected GPU {best_gpu.index} for encoding")
 
+        if not has_audio and not self.config.ffmpeg_params.get("include_audio", True):
             # If we're intentionally excluding audio, log it
-            if not self.config.ffmpeg_params.get("include_audio", True):
-                self.logger.info(
-                    f"Audio excluded per user settings for {input_file.name}"
-                )
-
-        # HLS parameters
-        segment_path = str(output_folder) + "/%v/segment_%03d.ts"
-        playlist_path = str(output_folder) + "/%v/playlist.m3u8"
-
-        cmd.extend(
-            [
-                "-f",
-                "hls",
-                "-g",
-                str(self.config.ffmpeg_params["fps"]),
-                "-hls_time",
-                "1",
-                "-hls_playlist_type",
-                "vod",
-                "-hls_flags",
-                "independent_segments",
-                "-hls_segment_type",
-                "mpegts",
-                "-hls_segment_filename",
-                segment_path,
-                "-master_pl_name",
-                "master.m3u8",
-                "-var_stream_map",
-                var_stream_map,
-                playlist_path,
-            ]
+            self.logger.info(f"Audio excluded per user settings for {input_file.name}")
+
+        # Progressive publishing needs segments to be written as .tmp files
+        # and renamed once closed
+        cmd = build_hls_command(
+            input_file,
+            output_folder,
+            plan,
+            self.config.ffmpeg_params,
+            has_audio,
+            key_rotator=key_rotator,
+            input_args=input_args,
+            temp_segments=self.config.ffmpeg_params.get("progressive_publish", False),
         )
 
         return cmd
@@ -286,6 +229,8 @@ class FFmpegEncoder:
     ):
         """Encode a video file to HLS format with progress updates and optional encryption"""
         temp_dir = None
+        publisher = None
+        key_rotator = None
         try:
             # Check disk space before starting
             disk_info = get_disk_space_info(output_folder)
@@ -303,8 +248,11 @@ class FFmpegEncoder:
             output_folder = Path(output_folder)
             output_folder.mkdir(parents=True, exist_ok=True)
 
-            # Create temporary directory for intermediate files
-            temp_dir = create_temp_dir(prefix=f"ffmpeg_{input_file.stem}_")
+            # Create temporary directory for intermediate files next to the
+            # output folder, so committing the result can be a rename
+            temp_dir = create_temp_dir(
+                prefix=f".ffmpeg_{input_file.stem}_", parent_dir=output_folder.parent
+            )
             self.logger.debug(f"Created temporary directory: {temp_dir}")
 
             # Check if using GPU encoding
@@ -321,14 +269,27 @@ class FFmpegEncoder:
                         f"{gpu_usage.encoder_usage:.2%} encoder usage"
                     )
 
+            # Let FFmpeg encrypt segments as they are written if configured
+            if is_hls_encryption_enabled(self.config.ffmpeg_params):
+                key_rotator = HLSKeyRotator(
+                    temp_dir,
+                    rotation_segments=self.config.ffmpeg_params.get(
+                        "hls_key_rotation", 0
+                    ),
+                    key_uri=self.config.ffmpeg_params.get("hls_key_uri"),
+                    key_dir=self.config.ffmpeg_params.get("hls_key_dir"),
+                    logger=self.logger,
+                )
+
             # Build command - use temp_dir for intermediate files
-            cmd = self.build_command(input_file, temp_dir)
+            cmd = self.build_command(input_file, temp_dir, key_rotator)
 
             # Setup GPU monitoring during encoding if using GPU
             gpu_monitor_callback = None
             if using_gpu:
 
-                def gpu_monitor_callback(progress):
+                def gpu_monitor_callback(filename, percent):
+                    progress = percent / 100
                     # Check GPU usage every 10% progress
                     if int(progress * 10) > int(self.encoding_progress * 10):
                         gpu_usage = self.get_gpu_usage()
@@ -354,7 +315,8 @@ class FFmpegEncoder:
 
             else:
                 # If not using GPU, just use the provided progress callback but still monitor disk space
-                def disk_monitor_callback(progress):
+                def disk_monitor_callback(filename, percent):
+                    progress = percent / 100
                     # Check disk space every 20% progress
                     if int(progress * 5) > int(self.encoding_progress * 5):
                         disk_info = get_disk_space_info(temp_dir)
@@ -370,13 +332,43 @@ class FFmpegEncoder:
 
                 gpu_monitor_callback = disk_monitor_callback
 
-            # Execute FFmpeg command using the FFmpegManager
-            success = self.ffmpeg.execute_command(
-                cmd,
-                input_file=input_file.name,
-                output_folder=temp_dir,
-                progress_callback=gpu_monitor_callback,
-            )
+            # Publish closed segments to the output folder while FFmpeg encodes
+            if self.config.ffmpeg_params.get("progressive_publish", False):
+                publisher = SegmentPublisher(temp_dir, output_folder, self.logger)
+                publisher.start()
+            if key_rotator:
+                key_rotator.start()
+
+            # Long titles may be split into keyframe-aligned chunks that are
+            # encoded concurrently and stitched back together
+            chunks = plan_chunked_encoding(self.config.ffmpeg_params, input_file)
+            if chunks:
+                # Sized and retried like the chunks of process_video_task;
+                # this encoder runs one title at a time
+                self.chunked_encoder = ChunkedEncoder(
+                    temp_dir,
+                    chunks,
+                    max_workers=chunk_worker_count(
+                        self.config.ffmpeg_params, len(chunks), slots=1
+                    ),
+                    logger=self.logger,
+                    retries=self.config.get("batch_processing.encode_retries", 0),
+                )
+                success = self.chunked_encoder.run(
+                    cmd,
+                    input_file=input_file.name,
+                    progress_callback=gpu_monitor_callback,
+                )
+            else:
+                # Execute FFmpeg command using the FFmpegManager
+                success = self.ffmpeg.execute_command(
+                    cmd,
+                    input_file=input_file.name,
+                    output_folder=temp_dir,
+                    progress_callback=gpu_monitor_callback,
+                )
+            if key_rotator:
+                key_rotator.stop()
 
             # Log final GPU state if using GPU
             if using_gpu:
@@ -390,6 +382,8 @@ class FFmpegEncoder:
 
             if not success:
                 self.logger.error(f"FFmpeg encoding failed for {input_file.name}")
+                if publisher:
+                    publisher.abort()
                 return False
 
             # Check if output files were created in temp directory
@@ -398,42 +392,58 @@ class FFmpegEncoder:
                 self.logger.error(
                     f"Failed to create master playlist for {input_file.name}"
                 )
+                if publisher:
+                    publisher.abort()
                 return False
 
-            # Move files from temp directory to output folder
-            self.logger.info(
-                f"Moving encoded files from temporary directory to output folder"
-            )
-
-            # Check disk space in output folder before moving files
-            disk_info = get_disk_space_info(output_folder)
-            if disk_info.get("state") == "critical":
-                self.logger.error(
-                    f"Critical disk space in output folder: {disk_info.get('utilization', 0):.2%} used. Cannot move files."
+            if publisher:
+                # Segments are already in place; publish the rest and the
+                # playlists last
+                publisher.finish()
+                first_segment = publisher.time_to_first_segment
+                if first_segment is not None:
+                    self.logger.info(
+                        f"First segment of {input_file.name} published after {first_segment:.1f}s"
+                    )
+            else:
+                # Commit files from temp directory to output folder
+                self.logger.info(
+                    f"Committing encoded files from temporary directory to output folder"
                 )
-                return False
-
-            # Copy all files from temp_dir to output_folder
-            for item in temp_dir.glob("**/*"):
-                # Get the relative path from temp_dir
-                rel_path = item.relative_to(temp_dir)
-                # Create the destination path
-                dest_path = output_folder / rel_path
-
-                # Create parent directories if needed
-                if not dest_path.parent.exists():
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
 
-                # Copy file if it's a file
-                if item.is_file():
-                    import shutil
+                # Check disk space in output folder before moving files
+                disk_info = get_disk_space_info(output_folder)
+                if disk_info.get("state") == "critical":
+                    self.logger.error(
+                        f"Critical disk space in output folder: {disk_info.get('utilization', 0):.2%} used. Cannot move files."
+                    )
+                    return False
 
-                    shutil.copy2(item, dest_path)
+                # Rename, link, clone or copy temp_dir into output_folder
+                commit = commit_directory(temp_dir, output_folder)
+                self.last_commit = commit
+                self.logger.info(
+                    f"Committed {commit.files} files ({commit.bytes / (1024 * 1024):.1f} MB) "
+                    f"using {commit.strategy} in {commit.duration:.2f}s"
+                )
 
             self.logger.info(f"Successfully encoded {input_file.name}")
 
-            # Encrypt output if requested
-            if encrypt_output:
+            if key_rotator:
+                self.last_hls_encryption = key_rotator.to_dict()
+                self.logger.info(
+                    f"Segments of {input_file.name} encrypted with AES-128 using "
+                    f"{len(key_rotator.key_ids)} key(s)"
+                )
+
+            # Encrypt output if requested; segments that FFmpeg already
+            # encrypted are not encrypted a second time
+            if encrypt_output and key_rotator:
+                self.logger.info(
+                    f"Skipping file encryption for {output_folder}: "
+                    f"HLS segments are already encrypted"
+                )
+            elif encrypt_output:
                 self.logger.info(f"Encrypting output files in {output_folder}")
                 encryption_success = self.encrypt_output(
                     output_folder, encryption_key_id
@@ -447,8 +457,13 @@ class FFmpegEncoder:
 
         except Exception as e:
             self.logger.error(f"Encoding error for {input_file.name}: {str(e)}")
+            if publisher:
+                publisher.abort()
             return False
         finally:
+            if key_rotator is not None:
+                key_rotator.cleanup()
+
             # Clean up temporary directory
             if temp_dir is not None:
                 try:
@@ -478,57 +493,14 @@ class FFmpegEncoder:
                 self.logger.error(f"Output folder does not exist: {output_folder}")
                 return False
 
-            # Get all files in the output folder and subfolders
-            all_files = []
-            for root, _, files in os.walk(output_folder):
-                for file in files:
-                    if file.endswith(".m3u8") or file.endswith(".ts"):
-                        all_files.append(Path(root) / file)
-
-            if not all_files:
-                self.logger.warning(f"No files found to encrypt in {output_folder}")
-                return True  # Not an error, just nothing to do
-
-            # Create encryption metadata file
-            metadata_file = output_folder / "encryption.json"
-            encryption_metadata = {"encrypted": True, "files": {}}
-
-            # Encrypt each file
-            success_count = 0
-            for file_path in all_files:
-                # Encrypt the file
-                success, encrypted_path, file_metadata = (
-                    self.encryption_manager.encrypt_file(
-                        input_path=file_path,
-                        output_path=file_path.with_suffix(file_path.suffix + ".enc"),
-                        key_id=key_id,
-                    )
-                )
-
-                if success:
-                    # Store metadata
-                    rel_path = str(file_path.relative_to(output_folder))
-                    encryption_metadata["files"][rel_path] = {
-                        "encrypted_path": str(
-                            encrypted_path.relative_to(output_folder)
-                        ),
-                        "metadata": file_metadata,
-                    }
-
-                    # Remove original file
-                    os.remove(file_path)
-                    success_count += 1
-                else:
-                    self.logger.error(f"Failed to encrypt file: {file_path}")
-
-            # Write encryption metadata file
-            with open(metadata_file, "w") as f:
-                json.dump(encryption_metadata, f, indent=2)
-
-            self.logger.info(
-                f"Encrypted {success_count} of {len(all_files)} files in {output_folder}"
+            # Encrypt segments and playlists in parallel
+            workers = self.config.get("security.encryption.workers", 0)
+            success, stats = self.encryption_manager.encrypt_directory(
+                output_folder, key_id=key_id, workers=workers
             )
-            return success_count == len(all_files)
+            if stats["files"] == 0:
+                self.logger.warning(f"No files found to encrypt in {output_folder}")
+            return success
 
         except Exception as e:
             self.logger.error(f"Error encrypting output files: {str(e)}")
@@ -604,4 +576,6 @@ class FFmpegEncoder:
 
     def terminate(self):
         """Terminate any active FFmpeg process"""
+        if self.chunked_encoder is not None:
+            self.chunked_encoder.terminate()
         return self.ffmpeg.terminate()
@@ -0,0 +1,245 @@
+"""
+Native HLS AES-128 encryption for PyProcessor.
+
+Instead of encrypting finished files in a separate pass, FFmpeg's HLS muxer
+encrypts each segment as it is written. Keys are random per-output keys
+that never enter the EncryptionManager's key store, and FFmpeg reads them
+through an ``hls_key_info_file``.
+With key rotation enabled, FFmpeg runs with ``-hls_flags periodic_rekey``
+and a background thread issues a new key and rewrites the key info file
+every N segments.
+
+The output plays in any HLS player: playlists carry ``#EXT-X-KEY`` tags that
+point at the key URIs. Keys are published in a ``keys`` folder next to the
+variant folders, or written to ``hls_key_dir`` for a key server to serve from
+``hls_key_uri``.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Supported ffmpeg_params.hls_encryption values
+HLS_ENCRYPTION_MODES = ["none", "aes-128"]
+
+# Folder (inside the output) that holds published keys
+KEY_DIR_NAME = "keys"
+
+# AES-128 key length in bytes
+HLS_KEY_SIZE = 16
+
+# Segment files written by the HLS muxer (".tmp" while open with temp_file)
+SEGMENT_NUMBER_REGEX = re.compile(r"^segment_(\d+)\.ts")
+
+# Seconds between checks for new segments when rotating keys
+POLL_INTERVAL = 0.2
+
+
+def is_hls_encryption_enabled(ffmpeg_params: Dict[str, Any]) -> bool:
+    """
+    Check if native HLS encryption is configured.
+
+    Args:
+        ffmpeg_params: FFmpeg parameters from the configuration
+
+    Returns:
+        bool: True if segments should be encrypted by FFmpeg
+    """
+    return ffmpeg_params.get("hls_encryption", "none") == "aes-128"
+
+
+def default_key_dir() -> Path:
+    """
+    Get the directory keys are written to for a key server when none is configured.
+
+    Returns:
+        Path: The "security/hls_keys" folder in the user data directory
+    """
+    from pyprocessor.utils.file_system.path_manager import get_user_data_dir
+
+    return Path(get_user_data_dir()) / "security" / "hls_keys"
+
+
+class HLSKeyRotator:
+    """
+    Issues HLS keys and keeps FFmpeg's key info file up to date.
+    """
+
+    def __init__(
+        self,
+        staging_dir: Path,
+        rotation_segments: int = 0,
+        key_uri: Optional[str] = None,
+        key_dir: Optional[Path] = None,
+        logger=None,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        """
+        Initialize the key rotator.
+
+        Args:
+            staging_dir: Directory FFmpeg writes the HLS output into
+            rotation_segments: Segments per key (0 uses one key for the whole file)
+            key_uri: Base URI of a key server (keys are published with the
+                output and referenced by relative URIs if not set)
+            key_dir: Directory the key server publishes keys from (used with
+                key_uri; defaults to default_key_dir())
+            logger: Logger instance (optional)
+            poll_interval: Seconds between checks for new segments
+        """
+        self.staging_dir = Path(staging_dir)
+        self.rotation_segments = max(0, int(rotation_segments or 0))
+        self.key_uri = key_uri or None
+        self.key_dir = Path(key_dir) if key_dir else None
+        if self.key_uri and self.key_dir is None:
+            self.key_dir = default_key_dir()
+        self.logger = logger
+        self.poll_interval = poll_interval
+
+        self.key_ids: List[str] = []
+        self._private_dir = Path(tempfile.mkdtemp(prefix="pyprocessor_hls_keys_"))
+        self.key_info_file = self._private_dir / "key_info.txt"
+        self._next_rotation = self.rotation_segments
+        self._segments_started = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def hls_flags(self) -> List[str]:
+        """Get the extra -hls_flags values required by this rotator."""
+        return ["periodic_rekey"] if self.rotation_segments else []
+
+    def prepare(self) -> List[str]:
+        """
+        Issue the first key and write the key info file.
+
+        Returns:
+            List[str]: FFmpeg arguments that enable segment encryption
+        """
+        self._issue_key()
+        return ["-hls_key_info_file", str(self.key_info_file)]
+
+    def start(self) -> None:
+        """Start rotating keys in a background thread (if rotation is enabled)."""
+        if not self.rotation_segments:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="HLSKeyRotator", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop rotating keys."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def cleanup(self) -> None:
+        """Stop rotating and remove the private key info directory."""
+        self.stop()
+        shutil.rmtree(self._private_dir, ignore_errors=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the rotator state to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Encryption information
+        """
+        return {
+            "method": "AES-128",
+            "key_ids": list(self.key_ids),
+            "rotation_segments": self.rotation_segments,
+            "key_uri": self.key_uri,
+        }
+
+    def _segment_count(self) -> int:
+        """
+        Get the number of segments started so far in the busiest variant.
+
+        Segment numbers are used rather than file counts, since closed
+        segments may already have been moved out by progressive publishing.
+        """
+        for variant in self.staging_dir.iterdir():
+            if not variant.is_dir() or variant.name == KEY_DIR_NAME:
+                continue
+            for segment in variant.glob("segment_*.ts*"):
+                match = SEGMENT_NUMBER_REGEX.match(segment.name)
+                if match:
+                    self._segments_started = max(
+                        self._segments_started, int(match.group(1)) + 1
+                    )
+        return self._segments_started
+
+    def poll(self) -> bool:
+        """
+        Issue a new key if the current one has covered rotation_segments segments.
+
+        Called by the background thread, or periodically by a caller that
+        supervises FFmpeg itself (such as the asyncio engine).
+
+        Returns:
+            bool: True if a new key was issued
+        """
+        if not self.rotation_segments:
+            return False
+        try:
+            if self._segment_count() >= self._next_rotation:
+                self._issue_key()
+                self._next_rotation += self.rotation_segments
+                return True
+        except Exception as e:
+            self._log("warning", f"Error rotating HLS key: {str(e)}")
+        return False
+
+    def _run(self) -> None:
+        """Background loop that issues a new key every rotation_segments segments."""
+        while not self._stop_event.wait(self.poll_interval):
+            self.poll()
+
+    def _issue_key(self) -> str:
+        """
+        Issue a new key and point the key info file at it.
+
+        Keys only protect this output, so they are generated here rather than
+        by the EncryptionManager, whose persistent store holds long-lived keys
+        (one of which is the default for file encryption).
+
+        Returns:
+            str: The new key ID
+        """
+        key_id = str(uuid.uuid4())
+        key_data = os.urandom(HLS_KEY_SIZE)
+
+        if self.key_uri:
+            # Keys are served by a key server, so keep them out of the output
+            key_path = self.key_dir / f"{key_id}.key"
+            uri = f"{self.key_uri.rstrip('/')}/{key_id}.key"
+        else:
+            key_path = self.staging_dir / KEY_DIR_NAME / f"{key_id}.key"
+            uri = f"../{KEY_DIR_NAME}/{key_id}.key"
+
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        key_path.write_bytes(key_data)
+
+        # FFmpeg may re-read the key info file at any segment boundary, so
+        # replace it atomically
+        temp_path = self.key_info_file.with_suffix(".tmp")
+        temp_path.write_text(f"{uri}\n{key_path}\n")
+        os.replace(temp_path, self.key_info_file)
+
+        self.key_ids.append(key_id)
+        self._log("debug", f"Issued HLS key {key_id} ({uri})")
+        return key_id
+
+    def _log(self, level: str, message: str) -> None:
+        """Log a message if a logger was provided."""
+        if self.logger:
+            getattr(self.logger, level)(message)
@@ -0,0 +1,637 @@
+"""
+Adaptive bitrate ladder planning for PyProcessor.
+
+This module turns the configured bitrates and the probed source video into
+an HLS rendition ladder. Renditions that would upscale the source are dropped,
+and the filter graph, stream mappings and variant stream map used by the
+FFmpeg command builders are generated from the resulting plan.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from pyprocessor.processing.thread_budget import (
+    build_encoder_thread_args,
+    split_threads,
+)
+from pyprocessor.utils.logging.error_manager import EncodingError
+
+# Standard 16:9 frame widths for common rendition heights
+STANDARD_WIDTHS = {
+    2160: 3840,
+    1440: 2560,
+    1080: 1920,
+    720: 1280,
+    480: 854,
+    360: 640,
+    240: 426,
+    144: 256,
+}
+
+# Rendition names in the bitrates config are "<height>p", e.g. "1080p"
+RUNG_NAME_REGEX = re.compile(r"^(\d+)p$")
+
+# FFmpeg bitrates such as "6500k" or "5M"
+BITRATE_REGEX = re.compile(r"^\s*([\d.]+)\s*([kKmM]?)")
+
+# Filter graph layouts: "parallel" scales every rung from the decoded source,
+# "cascade" scales each rung from the previous (larger) rung
+SCALING_MODES = ["parallel", "cascade"]
+
+# Scaler algorithms accepted by FFmpeg's scale filter
+SCALER_FLAGS = [
+    "fast_bilinear",
+    "bilinear",
+    "bicubic",
+    "experimental",
+    "neighbor",
+    "area",
+    "bicublin",
+    "gauss",
+    "sinc",
+    "lanczos",
+    "spline",
+]
+
+# Audio layouts: "muxed" encodes one audio stream into every video variant,
+# "group" encodes a few audio renditions once into a single HLS audio group
+# (EXT-X-MEDIA) that every video variant references
+AUDIO_MODES = ["muxed", "group"]
+
+# Name of the shared audio group in "group" mode
+AUDIO_GROUP = "aud"
+
+# Rungs up to this much larger than the source are still kept (scaled to the
+# source size) so that e.g. a 1920x1072 source keeps its 1080p rendition
+UPSCALE_TOLERANCE = 1.05
+
+
+def _even(value: float) -> int:
+    """Round a dimension to the nearest even number (required by most encoders)."""
+    return max(2, int(round(value / 2.0)) * 2)
+
+
+def parse_frame_rate(value: Any) -> Optional[float]:
+    """
+    Parse an FFprobe frame rate value such as "30000/1001" or "25".
+
+    Args:
+        value: Frame rate value from FFprobe
+
+    Returns:
+        Optional[float]: Frame rate in frames per second, or None if unknown
+    """
+    if value is None:
+        return None
+
+    try:
+        if isinstance(value, str) and "/" in value:
+            num, den = value.split("/", 1)
+            num, den = float(num), float(den)
+            if den == 0:
+                return None
+            fps = num / den
+        else:
+            fps = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return fps if fps > 0 else None
+
+
+def get_source_video_stream(
+    video_info: Optional[Dict[str, Any]],
+) -> Tuple[Optional[int], Optional[int], Optional[float]]:
+    """
+    Extract the resolution and frame rate of the first video stream.
+
+    Args:
+        video_info: FFprobe JSON output (with "streams")
+
+    Returns:
+        Tuple of (width, height, fps); values are None if unknown
+    """
+    if not video_info:
+        return None, None, None
+
+    for stream in video_info.get("streams", []):
+        if stream.get("codec_type") != "video":
+            continue
+
+        width = stream.get("width")
+        height = stream.get("height")
+        fps = parse_frame_rate(stream.get("avg_frame_rate"))
+        if fps is None:
+            fps = parse_frame_rate(stream.get("r_frame_rate"))
+
+        return (
+            int(width) if width else None,
+            int(height) if height else None,
+            fps,
+        )
+
+    return None, None, None
+
+
+def parse_bitrate(value) -> float:
+    """
+    Parse an FFmpeg bitrate such as "6500k" or "5M".
+
+    Args:
+        value: Bitrate
+
+    Returns:
+        float: Bits per second (0 if it cannot be parsed)
+    """
+    match = BITRATE_REGEX.match(str(value))
+    if not match:
+        return 0.0
+    scale = {"": 1, "k": 1e3, "m": 1e6}[match.group(2).lower()]
+    return float(match.group(1)) * scale
+
+
+class LadderRung:
+    """
+    A single video rendition in the bitrate ladder.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        width: int,
+        height: int,
+        bitrate: str,
+        scaler: Optional[str] = None,
+    ):
+        """
+        Initialize a ladder rung.
+
+        Args:
+            name: Rendition name (used as the variant directory name)
+            width: Output width in pixels
+            height: Output height in pixels
+            bitrate: Target video bitrate (e.g. "6500k")
+            scaler: Scaler algorithm for this rung (FFmpeg default if None)
+        """
+        self.name = name
+        self.width = width
+        self.height = height
+        self.bitrate = bitrate
+        self.scaler = scaler
+
+    def build_scale_filter(self) -> str:
+        """
+        Build the scale filter for this rung.
+
+        Returns:
+            str: FFmpeg scale filter expression
+        """
+        if self.scaler:
+            return f"scale={self.width}:{self.height}:flags={self.scaler}"
+        return f"scale={self.width}:{self.height}"
+
+    @property
+    def bufsize(self) -> str:
+        """Get the VBV buffer size (twice the target bitrate)."""
+        return f"{int(parse_bitrate(self.bitrate) * 2 / 1000)}k"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the rung to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Rung information
+        """
+        return {
+            "name": self.name,
+            "width": self.width,
+            "height": self.height,
+            "bitrate": self.bitrate,
+            "bufsize": self.bufsize,
+            "scaler": self.scaler,
+        }
+
+
+class LadderPlan:
+    """
+    A rendition ladder planned for a specific source video.
+
+    The plan knows how to render the parts of the FFmpeg command that depend
+    on the ladder: the filter graph, the per-rendition stream mappings and the
+    HLS variant stream map.
+    """
+
+    def __init__(
+        self,
+        rungs: List[LadderRung],
+        fps: int,
+        source_width: Optional[int] = None,
+        source_height: Optional[int] = None,
+        source_fps: Optional[float] = None,
+        limit_fps: bool = False,
+        scaling_mode: str = "parallel",
+        audio_bitrates: Optional[List[str]] = None,
+        audio_mode: str = "muxed",
+        audio_group_renditions: int = 1,
+    ):
+        """
+        Initialize a ladder plan.
+
+        Args:
+            rungs: Renditions to produce, highest first
+            fps: Output frame rate (also used for the GOP size)
+            source_width: Probed source width
+            source_height: Probed source height
+            source_fps: Probed source frame rate
+            limit_fps: Whether the source frame rate must be reduced to fps
+            scaling_mode: Filter graph layout ("parallel" or "cascade")
+            audio_bitrates: Configured audio bitrates, highest quality first
+            audio_mode: Audio layout ("muxed" or "group")
+            audio_group_renditions: Audio renditions encoded in "group" mode,
+                taken from the start of audio_bitrates
+        """
+        self.rungs = rungs
+        self.fps = fps
+        self.source_width = source_width
+        self.source_height = source_height
+        self.source_fps = source_fps
+        self.limit_fps = limit_fps
+        self.scaling_mode = (
+            scaling_mode if scaling_mode in SCALING_MODES else "parallel"
+        )
+        self.audio_bitrates = list(audio_bitrates or [])
+        self.audio_mode = audio_mode if audio_mode in AUDIO_MODES else "muxed"
+        self.audio_group_renditions = max(1, int(audio_group_renditions or 1))
+
+    @property
+    def variant_names(self) -> List[str]:
+        """Get the variant (directory) names, video renditions first."""
+        names = [rung.name for rung in self.rungs]
+        if self.audio_mode == "group":
+            names.extend(f"audio_{bitrate}" for bitrate in self.audio_renditions)
+        return names
+
+    @property
+    def audio_renditions(self) -> List[str]:
+        """
+        Get the audio bitrates that are encoded.
+
+        In "muxed" mode every video rendition carries its own audio stream, so
+        there is one entry per rung. In "group" mode the first
+        audio_group_renditions distinct bitrates are encoded once, and every
+        rendition shares them. Without audio bitrates, no audio is encoded.
+        """
+        if not self.audio_bitrates:
+            return []
+        if self.audio_mode == "group":
+            distinct = list(dict.fromkeys(self.audio_bitrates))
+            return distinct[: self.audio_group_renditions]
+        return [self._audio_bitrate_for(i) for i in range(len(self.rungs))]
+
+    def _audio_bitrate_for(self, index: int) -> Optional[str]:
+        """Get the audio bitrate paired with a rung; extra rungs reuse the lowest."""
+        if not self.audio_bitrates:
+            return None
+        return self.audio_bitrates[min(index, len(self.audio_bitrates) - 1)]
+
+    @property
+    def gop_size(self) -> int:
+        """Get the GOP size in frames (one keyframe per second)."""
+        return max(1, int(self.fps))
+
+    def build_filter_complex(self) -> str:
+        """
+        Build the filter graph that scales the source video for every rung.
+
+        In "parallel" mode the decoded source is split once and every rung is
+        scaled from full resolution. In "cascade" mode each rung is scaled from
+        the rung above it (1080p -> 720p -> 480p -> 360p), so the lower rungs
+        read far fewer pixels. Both layouts label rung outputs [v1out]..[vNout].
+
+        Returns:
+            str: Value for FFmpeg's -filter_complex option
+
+        Raises:
+            EncodingError: If the plan has no rungs
+        """
+        if not self.rungs:
+            raise EncodingError("The rendition ladder has no video renditions")
+
+        source = "[0:v]"
+        if self.limit_fps:
+            source += f"fps={self.fps},"
+
+        if self.scaling_mode == "cascade":
+            return self._build_cascade_filter(source)
+
+        count = len(self.rungs)
+        labels = "".join(f"[v{i + 1}]" for i in range(count))
+        filters = [f"{source}split={count}{labels}"]
+        for i, rung in enumerate(self.rungs):
+            filters.append(f"[v{i + 1}]{rung.build_scale_filter()}[v{i + 1}out]")
+
+        return ";".join(filters)
+
+    def _build_cascade_filter(self, source: str) -> str:
+        """
+        Build a cascaded filter graph where each rung feeds the next.
+
+        Args:
+            source: Input pad (and any pre-scale filters) for the first rung
+
+        Returns:
+            str: Value for FFmpeg's -filter_complex option
+        """
+        filters = []
+        last = len(self.rungs) - 1
+        for i, rung in enumerate(self.rungs):
+            head = source if i == 0 else f"[c{i}]"
+            if i == last:
+                filters.append(f"{head}{rung.build_scale_filter()}[v{i + 1}out]")
+            else:
+                filters.append(
+                    f"{head}{rung.build_scale_filter()},split=2[v{i + 1}out][c{i + 1}]"
+                )
+
+        return ";".join(filters)
+
+    def build_video_args(
+        self, ffmpeg_params: Dict[str, Any], threads: Optional[int] = None
+    ) -> List[str]:
+        """
+        Build the mapping and encoder arguments for each video rendition.
+
+        Args:
+            ffmpeg_params: FFmpeg parameters from the configuration
+            threads: Encoder threads for the whole ladder, split across the
+                rungs by pixel count (FFmpeg default per encoder if None)
+
+        Returns:
+            List[str]: FFmpeg arguments
+        """
+        rung_threads = []
+        if threads:
+            rung_threads = split_threads(
+                threads, [rung.width * rung.height for rung in self.rungs]
+            )
+
+        args = []
+        for i, rung in enumerate(self.rungs):
+            # Map video stream
+            args.extend(
+                [
+                    "-map",
+                    f"[v{i + 1}out]",
+                    f"-c:v:{i}",
+                    ffmpeg_params["video_encoder"],
+                ]
+            )
+
+            # Add preset and tune if applicable
+            if ffmpeg_params.get("preset"):
+                args.extend([f"-preset:v:{i}", ffmpeg_params["preset"]])
+            if ffmpeg_params.get("tune"):
+                args.extend([f"-tune:v:{i}", ffmpeg_params["tune"]])
+
+            # Bitrate settings
+            args.extend(
+                [
+                    f"-b:v:{i}",
+                    rung.bitrate,
+                    f"-maxrate:v:{i}",
+                    rung.bitrate,
+                    f"-bufsize:v:{i}",
+                    rung.bufsize,
+                ]
+            )
+
+            if rung_threads:
+                args.extend(
+                    build_encoder_thread_args(
+                        ffmpeg_params["video_encoder"], i, rung_threads[i]
+                    )
+                )
+
+        return args
+
+    def build_audio_args(self) -> List[str]:
+        """
+        Build the audio mapping arguments.
+
+        Rungs beyond the number of configured audio bitrates reuse the lowest
+        configured bitrate.
+
+        Returns:
+            List[str]: FFmpeg arguments
+        """
+        if not self.audio_bitrates:
+            return []
+
+        args = []
+        for i, bitrate in enumerate(self.audio_renditions):
+            args.extend(
+                [
+                    "-map",
+                    "a:0",
+                    f"-c:a:{i}",
+                    "aac",
+                    f"-b:a:{i}",
+                    bitrate,
+                    "-ac",
+                    "2",
+                ]
+            )
+
+        return args
+
+    def build_var_stream_map(self, has_audio: bool) -> str:
+        """
+        Build the HLS variant stream map.
+
+        Variants are named after their rendition, so "%v" in the output paths
+        expands to e.g. "1080p". In "group" audio mode the audio streams become
+        audio-only variants of one rendition group, which every video variant
+        references, so players can switch between the audio renditions.
+
+        Args:
+            has_audio: Whether audio streams are mapped
+
+        Returns:
+            str: Value for FFmpeg's -var_stream_map option
+        """
+        has_audio = has_audio and bool(self.audio_bitrates)
+        variants = []
+
+        if has_audio and self.audio_mode == "group":
+            for i, bitrate in enumerate(self.audio_renditions):
+                variants.append(
+                    f"a:{i},agroup:{AUDIO_GROUP},name:audio_{bitrate}"
+                    + (",default:yes" if i == 0 else "")
+                )
+            for i, rung in enumerate(self.rungs):
+                variants.append(f"v:{i},agroup:{AUDIO_GROUP},name:{rung.name}")
+            return " ".join(variants)
+
+        for i, rung in enumerate(self.rungs):
+            if has_audio:
+                variants.append(f"v:{i},a:{i},name:{rung.name}")
+            else:
+                variants.append(f"v:{i},name:{rung.name}")
+        return " ".join(variants)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the plan to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Plan information
+        """
+        return {
+            "rungs": [rung.to_dict() for rung in self.rungs],
+            "fps": self.fps,
+            "gop_size": self.gop_size,
+            "source_width": self.source_width,
+            "source_height": self.source_height,
+            "source_fps": self.source_fps,
+            "limit_fps": self.limit_fps,
+            "scaling_mode": self.scaling_mode,
+            "audio_mode": self.audio_mode,
+            "audio_group_renditions": self.audio_group_renditions,
+            "audio_renditions": self.audio_renditions,
+        }
+
+
+def parse_ladder(
+    bitrates: Dict[str, str], scaler_flags: Optional[Dict[str, str]] = None
+) -> List[LadderRung]:
+    """
+    Build the configured ladder from the bitrates config.
+
+    Every "<height>p" key becomes a rung, so the ladder can have any number
+    of renditions (e.g. adding "1440p" or "240p"). Keys that do not follow
+    that form are ignored.
+
+    Args:
+        bitrates: Mapping of rendition name to bitrate
+        scaler_flags: Optional mapping of rendition name to scaler algorithm
+
+    Returns:
+        List[LadderRung]: Rungs ordered from highest to lowest resolution
+    """
+    scaler_flags = scaler_flags or {}
+    rungs = []
+    for name, bitrate in bitrates.items():
+        match = RUNG_NAME_REGEX.match(str(name))
+        if not match or not bitrate:
+            continue
+
+        height = int(match.group(1))
+        width = STANDARD_WIDTHS.get(height, _even(height * 16 / 9))
+        scaler = scaler_flags.get(name)
+        if scaler not in SCALER_FLAGS:
+            scaler = None
+        rungs.append(LadderRung(name, width, height, str(bitrate), scaler))
+
+    rungs.sort(key=lambda rung: rung.height, reverse=True)
+    return rungs
+
+
+def plan_ladder(
+    ffmpeg_params: Dict[str, Any],
+    video_info: Optional[Dict[str, Any]] = None,
+) -> LadderPlan:
+    """
+    Plan the rendition ladder for a source video.
+
+    Each configured rung is fitted to the source aspect ratio. Rungs that
+    would upscale the source are dropped; if the source is smaller than every
+    rung, the lowest rung is kept at the source resolution. Without probe data
+    the configured ladder is used as-is.
+
+    Args:
+        ffmpeg_params: FFmpeg parameters from the configuration
+        video_info: FFprobe JSON output for the source (optional)
+
+    Returns:
+        LadderPlan: The planned ladder
+
+    Raises:
+        EncodingError: If no configured bitrate names a rendition
+    """
+    configured = parse_ladder(
+        ffmpeg_params.get("bitrates", {}), ffmpeg_params.get("scaler_flags")
+    )
+    if not configured:
+        raise EncodingError(
+            "No video renditions configured: the bitrates need at least one "
+            '"<height>p" entry with a bitrate, such as "720p"'
+        )
+    scaling_mode = ffmpeg_params.get("scaling_mode", "parallel")
+    audio_bitrates = ffmpeg_params.get("audio_bitrates", [])
+    audio_mode = ffmpeg_params.get("audio_mode", "muxed")
+    audio_group_renditions = ffmpeg_params.get("audio_group_renditions", 1)
+    target_fps = int(ffmpeg_params.get("fps") or 30)
+    source_width, source_height, source_fps = get_source_video_stream(video_info)
+
+    # Never raise the frame rate; reduce it when the source exceeds the target
+    fps = target_fps
+    limit_fps = False
+    if source_fps:
+        if source_fps > target_fps + 0.01:
+            limit_fps = True
+        else:
+            fps = max(1, int(round(source_fps)))
+
+    if not source_width or not source_height:
+        return LadderPlan(
+            configured,
+            fps,
+            source_width,
+            source_height,
+            source_fps,
+            scaling_mode=scaling_mode,
+            audio_bitrates=audio_bitrates,
+            audio_mode=audio_mode,
+            audio_group_renditions=audio_group_renditions,
+        )
+
+    rungs = []
+    for rung in configured:
+        scale = min(rung.width / source_width, rung.height / source_height)
+        if scale > UPSCALE_TOLERANCE:
+            continue
+        scale = min(scale, 1.0)
+        rungs.append(
+            LadderRung(
+                rung.name,
+                _even(source_width * scale),
+                _even(source_height * scale),
+                rung.bitrate,
+                rung.scaler,
+            )
+        )
+
+    if not rungs and configured:
+        lowest = configured[-1]
+        rungs.append(
+            LadderRung(
+                lowest.name,
+                _even(source_width),
+                _even(source_height),
+                lowest.bitrate,
+                lowest.scaler,
+            )
+        )
+
+    return LadderPlan(
+        rungs,
+        fps,
+        source_width,
+        source_height,
+        source_fps,
+        limit_fps=limit_fps,
+        scaling_mode=scaling_mode,
+        audio_bitrates=audio_bitrates,
+        audio_mode=audio_mode,
+        audio_group_renditions=audio_group_renditions,
+    )
@@ -0,0 +1,348 @@
+"""
+File ordering policies for PyProcessor.
+
+Files used to be started in directory order. With few workers and a
+heavy-tailed mix of titles, a long file that happens to sort last starts
+last and finishes long after every other worker has gone idle.
+
+An OrderingPlan estimates the encoding cost of every file from its probe data
+(duration x width x height, i.e. pixels to encode) and orders the files by
+one of these policies:
+
+- ``lpt``: longest processing time first, which keeps the makespan (total
+  wall time) within 4/3 of the optimum on identical workers
+- ``spt``: shortest processing time first, which minimizes the average time
+  until a file is done
+- ``fifo``: directory order
+
+For ``lpt`` and ``spt`` the files are probed on a few threads before the run,
+and the plan predicts the makespan by replaying the order on the workers.
+Cost units are converted to seconds with the calibration of an earlier run
+with the same FFmpeg parameters and worker count, which is kept on disk next
+to the probe cache. As files complete, their durations calibrate the seconds
+per cost unit for the next run.
+
+``fifo`` needs no costs to order the files, so nothing is probed before the
+run and no makespan is predicted. The completed files are costed at the end
+of the run from the probe results their encodes cached, which still
+calibrates the next run.
+"""
+
+import hashlib
+import heapq
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pyprocessor.utils.core.cache_manager import CacheBackend, cache_get, cache_set
+from pyprocessor.utils.media.probe_manager import probe_file
+
+# Available ordering policies
+ORDERING_POLICIES = ["lpt", "spt", "fifo"]
+
+# Policy used when none is configured
+DEFAULT_ORDERING = "fifo"
+
+# Bump when the cost estimate changes so stale calibrations are ignored
+CALIBRATION_CACHE_VERSION = 1
+
+# Files probed at the same time when costs are estimated before a run
+ESTIMATE_THREADS = 8
+
+
+def estimate_cost(file_path) -> Optional[float]:
+    """
+    Estimate the encoding cost of a file from its probe data.
+
+    Args:
+        file_path: Path to the video file
+
+    Returns:
+        Optional[float]: Duration in seconds times the pixels per frame of the
+        first video stream, or None if the file cannot be probed
+    """
+    try:
+        result = probe_file(file_path)
+    except Exception:
+        return None
+
+    duration = result.duration
+    if not duration or not result.video_streams:
+        return None
+    stream = result.video_streams[0]
+    try:
+        pixels = int(stream["width"]) * int(stream["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return duration * pixels if pixels > 0 else None
+
+
+def _calibration_key(ffmpeg_params: Optional[Dict[str, Any]], workers: int) -> str:
+    """
+    Build the cache key for the calibration of an encoding setup.
+
+    Encode times depend on the FFmpeg parameters and on how many files share
+    the machine, so each combination is calibrated separately.
+    """
+    text = json.dumps(ffmpeg_params or {}, sort_keys=True, default=str)
+    params = hashlib.sha256(text.encode()).hexdigest()[:16]
+    workers = max(1, int(workers or 1))
+    return f"ordering:calibration:v{CALIBRATION_CACHE_VERSION}:{params}:{workers}"
+
+
+def load_calibration(
+    ffmpeg_params: Optional[Dict[str, Any]], workers: int
+) -> Optional[float]:
+    """
+    Load the seconds per cost unit measured by an earlier run.
+
+    Args:
+        ffmpeg_params: FFmpeg parameters of the run
+        workers: Files encoded at the same time
+
+    Returns:
+        Optional[float]: Seconds per cost unit, or None if no run with these
+        settings has completed a file
+    """
+    key = _calibration_key(ffmpeg_params, workers)
+    value = cache_get(key, backend=CacheBackend.DISK)
+    return float(value) if isinstance(value, (int, float)) and value > 0 else None
+
+
+def save_calibration(
+    seconds_per_unit: float, ffmpeg_params: Optional[Dict[str, Any]], workers: int
+) -> None:
+    """
+    Keep the seconds per cost unit of a run for the next run.
+
+    Args:
+        seconds_per_unit: Seconds per cost unit measured in the run
+        ffmpeg_params: FFmpeg parameters of the run
+        workers: Files encoded at the same time
+    """
+    key = _calibration_key(ffmpeg_params, workers)
+    cache_set(key, seconds_per_unit, backend=CacheBackend.DISK)
+
+
+def predict_makespan(
+    costs: List[float], workers: int, batch_size: Optional[int] = None
+) -> float:
+    """
+    Predict the makespan of running jobs in order on identical workers.
+
+    Each job starts on the first worker that becomes free. If batch_size is
+    given, every batch of that many jobs has to finish before the next one
+    starts.
+
+    Args:
+        costs: Job costs in start order
+        workers: Number of workers
+        batch_size: Jobs per batch (optional)
+
+    Returns:
+        float: Time at which the last job finishes, in the unit of costs
+    """
+    workers = max(1, workers)
+    batches = [costs]
+    if batch_size:
+        batches = [costs[i : i + batch_size] for i in range(0, len(costs), batch_size)]
+
+    makespan = 0.0
+    for batch in batches:
+        loads = [0.0] * min(workers, len(batch))
+        for cost in batch:
+            heapq.heapreplace(loads, loads[0] + cost)
+        makespan += max(loads, default=0.0)
+    return makespan
+
+
+class OrderingPlan:
+    """
+    Files of a run in the order of a policy, with the predicted makespan.
+    """
+
+    def __init__(
+        self,
+        files: List[Path],
+        policy: str = DEFAULT_ORDERING,
+        workers: int = 1,
+        batch_size: Optional[int] = None,
+        seconds_per_unit: Optional[float] = None,
+    ):
+        """
+        Order the files, estimating their costs first unless the policy is fifo.
+
+        Args:
+            files: Video files in directory order
+            policy: Ordering policy (one of ORDERING_POLICIES)
+            workers: Files encoded at the same time
+            batch_size: Files per batch if batches run one after another
+            seconds_per_unit: Seconds per cost unit measured in an earlier run
+                (optional, without it the makespan cannot be predicted)
+
+        Raises:
+            ValueError: If the policy is unknown
+        """
+        if policy not in ORDERING_POLICIES:
+            raise ValueError(
+                f"Unknown ordering policy '{policy}' "
+                f"(expected one of {', '.join(ORDERING_POLICIES)})"
+            )
+        self.policy = policy
+        self.workers = max(1, int(workers or 1))
+        self.batch_size = batch_size
+        # The prediction only uses the calibration known before the run, so it
+        # can be compared with the achieved makespan
+        self.prior_seconds_per_unit = seconds_per_unit
+        self.seconds_per_unit = seconds_per_unit
+
+        self.files = list(files)
+        self._paths = {file.name: file for file in files}
+        self.costs: Dict[str, float] = {}
+        self.predicted_units: Optional[float] = None
+        self.lower_bound_units: Optional[float] = None
+        if policy != "fifo":
+            self.costs = self._estimate_costs(self.files)
+            # The sort is stable, so equal costs keep their directory order
+            self.files.sort(key=lambda f: self.costs[f.name], reverse=policy == "lpt")
+
+            ordered_costs = [self.costs[f.name] for f in self.files]
+            self.predicted_units = predict_makespan(
+                ordered_costs, self.workers, self.batch_size
+            )
+            self.lower_bound_units = self._lower_bound_units(ordered_costs)
+
+        self.durations: Dict[str, float] = {}
+        self.started_at = time.time()
+        self.achieved_makespan: Optional[float] = None
+
+    def _lower_bound_units(self, costs: List[float]) -> float:
+        """Get the makespan no order of the costs can beat, in cost units."""
+        return max(sum(costs) / self.workers, max(costs, default=0.0))
+
+    @staticmethod
+    def _estimate_costs(files: List[Path]) -> Dict[str, float]:
+        """
+        Estimate the cost of every file.
+
+        Files are probed on ESTIMATE_THREADS threads. Files that cannot be
+        probed are estimated from their size, scaled by the median cost per
+        byte of the probed files.
+        """
+        sizes = {}
+        for file in files:
+            try:
+                sizes[file.name] = float(file.stat().st_size)
+            except OSError:
+                sizes[file.name] = 0.0
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(ESTIMATE_THREADS, len(files)))
+        ) as executor:
+            estimates = list(executor.map(estimate_cost, files))
+        costs = {file.name: cost for file, cost in zip(files, estimates)}
+        ratios = [
+            costs[name] / sizes[name]
+            for name in costs
+            if costs[name] is not None and sizes[name] > 0
+        ]
+        cost_per_byte = statistics.median(ratios) if ratios else 1.0
+        return {
+            name: cost if cost is not None else sizes[name] * cost_per_byte
+            for name, cost in costs.items()
+        }
+
+    def record_result(self, filename: str, success: bool, duration: float) -> None:
+        """
+        Record the encode time of a completed file.
+
+        Args:
+            filename: Name of the file
+            success: Whether the file was encoded
+            duration: Seconds the encode took
+        """
+        # Failed files stop early and would skew the calibration
+        if success and filename in self._paths:
+            self.durations[filename] = duration
+
+    def finish(self, makespan: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Close the run and compare the predicted with the achieved makespan.
+
+        Args:
+            makespan: Seconds the run took (default: since the plan was made)
+
+        Returns:
+            Dict[str, Any]: Report of the run (see to_dict)
+        """
+        if makespan is None:
+            makespan = time.time() - self.started_at
+        self.achieved_makespan = makespan
+
+        if self.policy == "fifo" and self.durations:
+            # Only the completed files are costed; their encodes have already
+            # probed them, so the probe cache answers
+            self.costs = self._estimate_costs(
+                [self._paths[name] for name in self.durations]
+            )
+            self.lower_bound_units = self._lower_bound_units(list(self.costs.values()))
+
+        # Calibrate the cost units with the files encoded in this run
+        encoded_units = sum(self.costs[name] for name in self.durations)
+        if encoded_units > 0:
+            self.seconds_per_unit = sum(self.durations.values()) / encoded_units
+        return self.to_dict()
+
+    @property
+    def unpredicted_reason(self) -> Optional[str]:
+        """Get why no makespan was predicted before the run, or None if it was."""
+        if self.predicted_units is None:
+            return f"'{self.policy}' does not estimate costs before the run"
+        if self.prior_seconds_per_unit is None:
+            return "no earlier run with these settings to calibrate it"
+        return None
+
+    @property
+    def predicted_makespan(self) -> Optional[float]:
+        """Get the makespan predicted before the run in seconds, or None (see
+        unpredicted_reason)."""
+        if self.unpredicted_reason is not None:
+            return None
+        return self.predicted_units * self.prior_seconds_per_unit
+
+    @property
+    def lower_bound(self) -> Optional[float]:
+        """Get the makespan no order can beat in seconds, or None before calibration."""
+        if self.seconds_per_unit is None or self.lower_bound_units is None:
+            return None
+        return self.lower_bound_units * self.seconds_per_unit
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the plan to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Plan and makespan information
+        """
+        predicted = self.predicted_makespan
+        achieved = self.achieved_makespan
+        return {
+            "policy": self.policy,
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "order": [file.name for file in self.files],
+            "costs": dict(self.costs),
+            "seconds_per_unit": self.seconds_per_unit,
+            "predicted_makespan": predicted,
+            "unpredicted_reason": self.unpredicted_reason,
+            "achieved_makespan": achieved,
+            "lower_bound": self.lower_bound,
+            "prediction_error": (
+                (achieved - predicted) / predicted
+                if predicted and achieved is not None
+                else None
+            ),
+        }
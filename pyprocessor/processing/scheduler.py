@@ -1,26 +1,69 @@
-import re
 import subprocess
 import sys
+import threading
 import time
-
-# Multiprocessing queue for progress updates
-from multiprocessing import Manager
 from pathlib import Path
 from threading import Lock
 
 # Import tqdm for CLI progress bars
 from tqdm import tqdm
 
-from pyprocessor.utils.media.ffmpeg_manager import get_ffmpeg_path, get_ffprobe_path
+from pyprocessor.processing.concurrency_controller import (
+    create_concurrency_controller,
+)
+from pyprocessor.processing.ordering import (
+    DEFAULT_ORDERING,
+    OrderingPlan,
+    load_calibration,
+    save_calibration,
+)
+from pyprocessor.processing.task_journal import create_task_journal
+from pyprocessor.processing.thread_budget import (
+    create_thread_budget,
+    get_encode_threads,
+)
+from pyprocessor.processing.video_task import (
+    VideoTask,
+    estimate_resources,
+    get_encryption_workers,
+)
+from pyprocessor.utils.media.ffmpeg_log import FFmpegLog
+from pyprocessor.utils.media.ffmpeg_progress import (
+    PROGRESS_INTERVAL,
+    ProgressParser,
+    add_progress_args,
+    get_command_duration,
+    read_progress,
+)
+from pyprocessor.utils.process.cpu_placement import create_cpu_placer, pinned
+from pyprocessor.utils.process.preemption import (
+    REQUEST_POLL_INTERVAL,
+    listen_for_priority_requests,
+    read_priority_requests,
+    stop_listening,
+)
+from pyprocessor.utils.process.process_manager import (
+    create_process_pool,
+    get_default_process_pool,
+    get_warm_process_pool,
+    shutdown_executor,
+)
+from pyprocessor.utils.process.progress_table import (
+    COMPLETED,
+    FAILED,
+    RUNNING,
+    ProgressTable,
+)
 from pyprocessor.utils.process.scheduler_manager import (
     get_scheduler_manager,
     schedule_task,
     wait_for_task,
 )
+from pyprocessor.utils.process.watchdog import get_watchdog, was_killed
 
-# Global queues that will be shared between processes
-progress_queue = None
-output_files_queue = None
+# Encodes that may be paused at once for files of higher priority in
+# individual process mode; the pool gets this many workers above the slots
+PREEMPT_WORKERS = 2
 
 
 # Standalone function for multiprocessing that doesn't require encoder or logger
@@ -33,6 +76,12 @@ def process_video_task(
     output_file_callback=None,
     encrypt_output=False,
     encryption_key_id=None,
+    progress_table=None,
+    threads=None,
+    cpus=None,
+    retries=0,
+    slots=None,
+    encryption_workers=None,
 ):
     """Process a single video file - standalone function for multiprocessing or batch processing
 
@@ -40,296 +89,146 @@ def process_video_task(
         file_path: Path to the video file
         output_folder_path: Path to the output folder
         ffmpeg_params: FFmpeg parameters
-        task_id: Task ID for progress tracking
+        task_id: Task ID for progress tracking (the slot in progress_table)
         progress_callback: Optional direct callback for progress updates (used in batch mode)
         output_file_callback: Optional direct callback for output file notifications (used in batch mode)
+        progress_table: Optional ProgressTable the progress is written to
+        threads: Optional number of threads FFmpeg may use (from a ThreadBudget)
+        cpus: Optional CPUs the FFmpeg processes are pinned to (from a CpuPlacer)
+        retries: How many times FFmpeg is run again after it was killed (by the
+            watchdog, which finds its process ID in progress_table)
+        slots: Optional number of files encoded at the same time (chunked
+            titles without threads split the CPUs by it)
+        encryption_workers: Optional number of threads the output is
+            encrypted with (from get_encryption_workers)
 
     Returns:
         Tuple of (filename, success, duration, error_message)
     """
-    # Convert string paths to Path objects
-    file = Path(file_path)
-    output_folder = Path(output_folder_path)
+    task = VideoTask(file_path, output_folder_path, ffmpeg_params)
+    task.cpus = cpus
+    task.slots = slots
+    start_time = time.time()
+    if task_id is None:
+        progress_table = None
+    if progress_table is not None:
+        progress_table.update(task_id, percent=0, state=RUNNING, pid=0)
 
-    base_name = file.stem
-    output_subfolder = output_folder / base_name
+    # Chunk threads share the file's slot, which takes one writer at a time
+    table_lock = Lock()
 
-    # Create output directory structure
-    output_subfolder.mkdir(parents=True, exist_ok=True)
+    # Report progress either through the table or direct callback
+    def report_progress(filename, progress, fps=None, speed=None):
+        if task_id is not None:
+            if progress_table is not None:
+                with table_lock:
+                    progress_table.update(task_id, progress, fps, speed)
 
-    start_time = time.time()
-    global progress_queue
+            # Use direct callback if provided (batch mode)
+            if progress_callback is not None:
+                progress_callback(filename, progress, task_id, None)
+
+    def finish(result):
+        if progress_table is not None:
+            progress_table.set_state(task_id, COMPLETED if result[1] else FAILED)
+        return result
 
     try:
-        # Build FFmpeg command directly here
-        # Check for audio streams
-        has_audio = check_for_audio(file)
-        if not ffmpeg_params.get("include_audio", True):
-            has_audio = False
-
-        # Calculate buffer sizes
-        bitrates = ffmpeg_params["bitrates"]
-        bufsizes = {}
-        for res, bitrate in bitrates.items():
-            bufsize_value = int(bitrate.rstrip("k")) * 2
-            bufsizes[res] = f"{bufsize_value}k"
-
-        # Build filter complex string
-        filter_complex = "[0:v]split=4[v1][v2][v3][v4];[v1]scale=1920:1080[v1out];[v2]scale=1280:720[v2out];[v3]scale=854:480[v3out];[v4]scale=640:360[v4out]"
-
-        # Build FFmpeg command
-        ffmpeg_path = get_ffmpeg_path()
-        cmd = [
-            ffmpeg_path,
-            "-hide_banner",
-            "-loglevel",
-            "info",
-            "-stats",
-            "-i",
-            str(file),
-            "-filter_complex",
-            filter_complex,
-        ]
-
-        # Video streams for all resolutions
-        for i, (res, bitrate) in enumerate(
-            [
-                ("1080p", bitrates["1080p"]),
-                ("720p", bitrates["720p"]),
-                ("480p", bitrates["480p"]),
-                ("360p", bitrates["360p"]),
-            ]
-        ):
-            # Map video stream
-            cmd.extend(
-                [
-                    "-map",
-                    f"[v{i+1}out]",
-                    "-c:v:" + str(i),
-                    ffmpeg_params["video_encoder"],
-                ]
-            )
+        cmd = task.prepare(threads)
 
-            # Add preset and tune if applicable
-            if ffmpeg_params["preset"]:
-                cmd.extend([f"-preset:v:{i}", ffmpeg_params["preset"]])
-            if ffmpeg_params["tune"]:
-                cmd.extend([f"-tune:v:{i}", ffmpeg_params["tune"]])
-
-            # Bitrate settings
-            cmd.extend(
-                [
-                    f"-b:v:{i}",
-                    bitrate,
-                    f"-maxrate:v:{i}",
-                    bitrate,
-                    f"-bufsize:v:{i}",
-                    bufsizes[res],
-                ]
-            )
+        if task.chunks:
+            # The watchdog sees the oldest running chunk as the file's process
+            pid_callback = None
+            if progress_table is not None:
 
-        # Audio streams if available and enabled
-        audio_bitrates = ffmpeg_params["audio_bitrates"]
-        if has_audio:
-            for i, bitrate in enumerate(audio_bitrates):
-                cmd.extend(
-                    [
-                        "-map",
-                        "a:0",
-                        f"-c:a:{i}",
-                        "aac",
-                        f"-b:a:{i}",
-                        bitrate,
-                        "-ac",
-                        "2",
-                    ]
-                )
-            var_stream_map = "v:0,a:0 v:1,a:1 v:2,a:2 v:3,a:3"
-        else:
-            var_stream_map = "v:0 v:1 v:2 v:3"
-
-        # HLS parameters
-        segment_path = str(output_subfolder) + "/%v/segment_%03d.ts"
-        playlist_path = str(output_subfolder) + "/%v/playlist.m3u8"
-
-        cmd.extend(
-            [
-                "-f",
-                "hls",
-                "-g",
-                str(ffmpeg_params["fps"]),
-                "-hls_time",
-                "1",
-                "-hls_playlist_type",
-                "vod",
-                "-hls_flags",
-                "independent_segments",
-                "-hls_segment_type",
-                "mpegts",
-                "-hls_segment_filename",
-                segment_path,
-                "-master_pl_name",
-                "master.m3u8",
-                "-var_stream_map",
-                var_stream_map,
-                playlist_path,
-            ]
-        )
+                def pid_callback(pid):
+                    with table_lock:
+                        progress_table.update(task_id, pid=pid)
 
-        # Execute FFmpeg
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            universal_newlines=True,
-            bufsize=1,  # Line buffered
-        )
-
-        # Process stderr in real-time to extract progress
-        duration_regex = re.compile(r"Duration: (\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-        time_regex = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-        duration_seconds = 0
-
-        # Read and process stderr line by line
-        for line in process.stderr:
-            # Extract total duration
-            duration_match = duration_regex.search(line)
-            if duration_match:
-                h, m, s, ms = map(int, duration_match.groups())
-                duration_seconds = h * 3600 + m * 60 + s + ms / 100
-                continue
-
-            # Extract current time
-            time_match = time_regex.search(line)
-            if time_match and duration_seconds > 0:
-                h, m, s, ms = map(int, time_match.groups())
-                current_seconds = h * 3600 + m * 60 + s + ms / 100
-                progress = min(int((current_seconds / duration_seconds) * 100), 100)
-
-                # Report progress either through queue or direct callback
-                if task_id is not None:
-                    # Put progress update in the queue if available
-                    if progress_queue is not None:
-                        progress_queue.put((task_id, file.name, progress))
-
-                    # Use direct callback if provided (batch mode)
-                    if progress_callback is not None:
-                        progress_callback(file.name, progress, task_id, None)
-
-        # Wait for process to complete
-        process.wait()
-
-        # Check for errors
-        if process.returncode != 0:
-            error_message = ""
-            for line in process.stderr:
-                error_message += line
-            return (file.name, False, time.time() - start_time, error_message.strip())
-
-        # Check if output files were created
-        m3u8_file = output_subfolder / "master.m3u8"
-        if not m3u8_file.exists():
-            return (
-                file.name,
-                False,
-                time.time() - start_time,
-                "Failed to create master playlist",
+            task.create_chunked_encoder(retries=retries, pid_callback=pid_callback).run(
+                cmd, input_file=task.name, progress_callback=report_progress
             )
+        else:
+            for attempt in range(retries + 1):
+                returncode, ffmpeg_log, progress = _run_ffmpeg(
+                    task, cmd, report_progress, progress_table, task_id
+                )
+                if not was_killed(returncode) or attempt == retries:
+                    break
+                # Killed from outside, most likely by the watchdog
+                report_progress(task.name, 0)
+
+            # Check for errors
+            if returncode != 0:
+                return finish(
+                    (
+                        task.name,
+                        False,
+                        time.time() - start_time,
+                        VideoTask.describe_failure(ffmpeg_log, returncode, progress),
+                    )
+                )
 
-        # Log created files
-        global output_files_queue
-
-        # Function to report output files (either through queue or direct callback)
-        def report_output_file(filename, resolution=None):
-            if output_files_queue is not None and task_id is not None:
-                output_files_queue.put((task_id, filename, resolution))
-            if output_file_callback is not None:
-                output_file_callback(filename, resolution)
-
-        # Log master playlist
-        report_output_file("master.m3u8", None)
-
-        # Log variant playlists and segments
-        resolutions = ["1080p", "720p", "480p", "360p"]
-        for res in resolutions:
-            variant_dir = output_subfolder / res
-            if variant_dir.exists():
-                # Log playlist
-                playlist_file = f"{res}/playlist.m3u8"
-                report_output_file(playlist_file, res)
-
-                # Log a few segments (not all to avoid cluttering)
-                segments = list(variant_dir.glob("segment_*.ts"))
-                for i, segment in enumerate(segments[:3]):  # Log first 3 segments
-                    segment_file = f"{res}/{segment.name}"
-                    report_output_file(segment_file, res)
-
-                # If there are more segments, log a summary
-                if len(segments) > 3:
-                    report_output_file(f"... and {len(segments)-3} more segments", res)
+        # Check if output files were created and log them
+        error_message = task.check_output(output_file_callback)
+        if error_message:
+            return finish((task.name, False, time.time() - start_time, error_message))
 
         # Ensure we report 100% at the end
-        if task_id is not None:
-            # Report through queue if available
-            if progress_queue is not None:
-                progress_queue.put((task_id, file.name, 100))
-
-            # Use direct callback if provided (batch mode)
-            if progress_callback is not None:
-                progress_callback(file.name, 100, task_id, None)
+        report_progress(task.name, 100)
 
         # Encrypt output if requested
-        if encrypt_output:
-            # Import here to avoid circular imports
-            from pyprocessor.utils.security.encryption_manager import (
-                get_encryption_manager,
-            )
+        task.encrypt_output(encrypt_output, encryption_key_id, encryption_workers)
 
-            # Get encryption manager
-            encryption_manager = get_encryption_manager()
+        return finish((task.name, True, time.time() - start_time, None))
 
-            # Encrypt output files
-            # Use print for standalone process mode (no logger available)
-            print(f"Encrypting output files in {output_subfolder}")
-            encryption_success = encryption_manager.encrypt_output(
-                output_subfolder, encryption_key_id
-            )
-            if not encryption_success:
-                print(
-                    f"Warning: Encryption of output files in {output_subfolder} was not fully successful"
-                )
+    except Exception as e:
+        return finish((task.name, False, time.time() - start_time, str(e)))
+    finally:
+        task.cleanup()
 
-        return (file.name, True, time.time() - start_time, None)
 
-    except Exception as e:
-        return (file.name, False, time.time() - start_time, str(e))
+def _run_ffmpeg(task, cmd, report_progress, progress_table=None, task_id=None):
+    """Run a file's FFmpeg command and wait for it
 
+    The process ID is published in the progress table while FFmpeg runs.
 
-# Helper function to check for audio streams
-def check_for_audio(file_path):
-    """Check if the video file has audio streams"""
-    try:
-        ffprobe_path = get_ffprobe_path()
-        result = subprocess.run(
-            [
-                ffprobe_path,
-                "-i",
-                str(file_path),
-                "-show_streams",
-                "-select_streams",
-                "a",
-                "-loglevel",
-                "error",
-            ],
+    Returns:
+        Tuple of (return code, FFmpegLog, final FFmpegProgress)
+    """
+    # Execute FFmpeg; progress is read from -progress pipe:1
+    with pinned(task.cpus):
+        process = subprocess.Popen(
+            add_progress_args(cmd),
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            timeout=10,
         )
-        return bool(result.stdout.strip())
-    except subprocess.SubprocessError:
-        return False
+    if progress_table is not None:
+        progress_table.update(task_id, pid=process.pid)
+    if task.key_rotator:
+        task.key_rotator.start()
+
+    # Only the end of the log on stderr is kept, for error reporting
+    ffmpeg_log = FFmpegLog()
+    ffmpeg_log.start(process.stderr)
+
+    def on_progress(progress):
+        if progress.percent is not None:
+            report_progress(task.name, progress.percent, progress.fps, progress.speed)
+
+    progress = read_progress(
+        process.stdout, ProgressParser(get_command_duration(cmd), on_progress)
+    )
+
+    # Wait for process to complete; its ID may be reused after this
+    process.wait()
+    if progress_table is not None:
+        progress_table.update(task_id, pid=0)
+    ffmpeg_log.join()
+    if task.key_rotator:
+        task.key_rotator.stop()
+
+    return process.returncode, ffmpeg_log, progress
 
 
 class ProcessingScheduler:
@@ -347,6 +246,12 @@ class ProcessingScheduler:
         self.output_file_callback = None
         self.is_running = False
         self.abort_requested = False
+        self.engine = None
+        self.ordering = None
+        self.last_run_report = None
+        self.journal = None
+        self._file_tasks = {}  # Scheduler task IDs by file name
+        self._priority_run_id = None  # Run ID --prioritize requests go to
 
     def set_progress_callback(self, callback):
         """Set a callback function for progress updates"""
@@ -366,87 +271,154 @@ class ProcessingScheduler:
                 f"Invalid output file callback: {callback} is not callable"
             )
 
-    def _monitor_progress_queue(self):
-        """Monitor the progress queue for file-level progress updates"""
-        global progress_queue
+    def _create_watchdog(self):
+        """Get the watchdog if encodes have a timeout or stall window
+
+        Returns:
+            Tuple of (Watchdog, timeout, stall timeout), or None
+        """
+        timeout = self.config.get("batch_processing.encode_timeout", 0)
+        stall_timeout = self.config.get("batch_processing.stall_timeout", 0)
+        if not timeout and not stall_timeout:
+            return None
+        return get_watchdog(), timeout, stall_timeout
+
+    def _watch_slot(self, watchdog, table, slot, file, progress):
+        """Keep the watchdog's view of a file's encode up to date
+
+        Args:
+            watchdog: Tuple from _create_watchdog
+            table: ProgressTable the workers write to
+            slot: Slot of the file
+            file: The file
+            progress: SlotProgress read from the table
+        """
+        watchdog, timeout, stall_timeout = watchdog
+        key = table.key(slot)
+        if progress.state != RUNNING:
+            watchdog.unwatch(key)
+        elif watchdog.is_watching(key):
+            watchdog.set_pid(key, progress.pid)
+            watchdog.touch(key, progress.percent)
+        else:
+            # First sample of the encode, or of a retry after a kill
+            watchdog.watch(
+                key,
+                timeout=timeout,
+                stall_timeout=stall_timeout,
+                pid=progress.pid,
+                name=file.name,
+            )
+
+    def _sample_progress(
+        self, table, files, stop, watchdog=None, on_process=None, on_tick=None
+    ):
+        """Sample the shared progress table until stop is set
 
-        # Keep track of the current progress for each task
-        file_progress = {}
+        Args:
+            table: ProgressTable the workers write to
+            files: Files by slot
+            stop: Event that ends the sampling
+            watchdog: Tuple from _create_watchdog the encodes are reported
+                to (optional)
+            on_process: Called with (slot, pid) when the FFmpeg process of a
+                slot changes; it returns False to be called again (optional)
+            on_tick: Called every REQUEST_POLL_INTERVAL seconds (optional)
+        """
         last_progress = {}
+        reported_pids = {}
+        started = set()
+        last_tick = time.monotonic()
 
-        while self.is_running and progress_queue is not None:
+        while not stop.wait(PROGRESS_INTERVAL):
             try:
-                # Non-blocking get with timeout
-                try:
-                    task_id, filename, progress = progress_queue.get(timeout=0.1)
-
-                    # Store the progress for this task
-                    file_progress[task_id] = (filename, progress)
+                if (
+                    on_tick is not None
+                    and time.monotonic() - last_tick >= REQUEST_POLL_INTERVAL
+                ):
+                    last_tick = time.monotonic()
+                    on_tick()
+
+                for slot, progress in table.changes().items():
+                    if watchdog is not None:
+                        self._watch_slot(watchdog, table, slot, files[slot], progress)
+                    if on_process is not None and reported_pids.get(slot) != (
+                        progress.pid
+                    ):
+                        if on_process(slot, progress.pid):
+                            reported_pids[slot] = progress.pid
+                    if progress.state == RUNNING and slot not in started:
+                        started.add(slot)
+                        self._journal_file_started(files[slot].name)
+                    if progress.state != RUNNING or progress.percent is None:
+                        continue
 
                     # Update CLI progress bar if progress has changed
-                    if (
-                        task_id not in last_progress
-                        or last_progress[task_id] != progress
-                    ):
-                        if (
-                            hasattr(self, "progress_bars")
-                            and "file" in self.progress_bars
-                        ):
-                            # Update the file progress bar
-                            self.progress_bars["file"].set_description(
-                                f"Processing: {filename}"
-                            )
-                            self.progress_bars["file"].n = progress
-                            self.progress_bars["file"].refresh()
-                        last_progress[task_id] = progress
+                    percent = int(progress.percent)
+                    if last_progress.get(slot) == percent:
+                        continue
+                    last_progress[slot] = percent
+                    filename = files[slot].name
+
+                    if hasattr(self, "progress_bars") and "file" in self.progress_bars:
+                        # Update the file progress bar
+                        self.progress_bars["file"].set_description(
+                            f"Processing: {filename}"
+                        )
+                        self.progress_bars["file"].n = percent
+                        self.progress_bars["file"].refresh()
 
                     # Call the progress callback with file-level progress
                     if self.progress_callback:
                         self.progress_callback(
-                            filename, progress, self.processed_count, self.total_files
+                            filename, percent, self.processed_count, self.total_files
                         )
 
-                except Exception:
-                    # Queue.Empty or other exception, just continue
-                    pass
-
             except Exception as e:
-                # Log any other errors but keep the thread running
-                if hasattr(self, "logger"):
-                    self.logger.error(f"Error in progress monitor: {str(e)}")
-
-            # Small sleep to prevent CPU spinning
-            import time
+                # Log any errors but keep the thread running
+                self.logger.error(f"Error in progress monitor: {str(e)}")
 
-            time.sleep(0.01)
+    def _start_progress_sampler(self, valid_files, on_process=None, on_tick=None):
+        """Create a progress table for the files and a thread that samples it
 
-    def _monitor_output_files_queue(self):
-        """Monitor the output files queue for file creation notifications"""
-        global output_files_queue
+        The sampler also reports each encode to the watchdog, which kills the
+        FFmpeg process of an encode that times out or stops making progress.
 
-        while self.is_running and output_files_queue is not None:
-            try:
-                # Non-blocking get with timeout
-                try:
-                    task_id, filename, resolution = output_files_queue.get(timeout=0.1)
-
-                    # Call the output file callback
-                    if self.output_file_callback:
-                        self.output_file_callback(filename, resolution)
-
-                except Exception:
-                    # Queue.Empty or other exception, just continue
-                    pass
-
-            except Exception as e:
-                # Log any other errors but keep the thread running
-                if hasattr(self, "logger"):
-                    self.logger.error(f"Error in output files monitor: {str(e)}")
-
-            # Small sleep to prevent CPU spinning
-            import time
+        Args:
+            valid_files: Files by slot
+            on_process: See _sample_progress (optional)
+            on_tick: See _sample_progress (optional)
 
-            time.sleep(0.01)
+        Returns:
+            Tuple of (table, stop event, sampler thread)
+        """
+        table = ProgressTable(len(valid_files))
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._sample_progress,
+            args=(
+                table,
+                valid_files,
+                stop,
+                self._create_watchdog(),
+                on_process,
+                on_tick,
+            ),
+            daemon=True,
+            name="ProgressSampler",
+        )
+        thread.start()
+        return table, stop, thread
+
+    def _stop_progress_sampler(self, table, stop, thread):
+        """Stop the sampler thread and free the progress table"""
+        stop.set()
+        thread.join()
+        watchdog = get_watchdog()
+        for slot in range(table.slots):
+            watchdog.unwatch(table.key(slot))
+        table.close()
+        table.unlink()
 
     def get_progress(self):
         """Get the current progress as a ratio (0.0 to 1.0)"""
@@ -454,6 +426,38 @@ class ProcessingScheduler:
             return 0.0
         return self.processed_count / self.total_files
 
+    def set_file_priority(self, name, priority):
+        """Change the priority of a file in the running batch
+
+        Only files processed in individual process mode are queued by
+        priority. A file moved above a running encode may pause it (see
+        batch_processing.preemption).
+
+        Args:
+            name: File name (the path is ignored)
+            priority: New priority (higher values start first)
+
+        Returns:
+            bool: True if the priority was changed
+        """
+        name = Path(name).name
+        task_id = self._file_tasks.get(name)
+        if task_id is None:
+            self.logger.warning(f"Cannot change the priority of {name}: not queued")
+            return False
+        if not get_scheduler_manager().set_priority(task_id, priority):
+            self.logger.warning(f"Cannot change the priority of {name}: finished")
+            return False
+        self.logger.info(f"Priority of {name} set to {priority}")
+        return True
+
+    def _apply_priority_requests(self):
+        """Apply the priority changes requested with --prioritize"""
+        if self._priority_run_id is None:
+            return
+        for name, priority in read_priority_requests(self._priority_run_id):
+            self.set_file_priority(name, priority)
+
     def request_abort(self):
         """Request abortion of the processing"""
         if not self.is_running:
@@ -461,6 +465,8 @@ class ProcessingScheduler:
 
         self.logger.warning("Processing abort requested")
         self.abort_requested = True
+        if self.engine is not None:
+            self.engine.request_abort()
         return True
 
     def process_videos(self, encrypt_output=None, encryption_key_id=None):
@@ -488,9 +494,59 @@ class ProcessingScheduler:
                 return False
 
             self.logger.info(f"Found {len(valid_files)} valid files to process")
+
+            # Record the files so an interrupted run can be resumed; resuming
+            # leaves out the files that already completed
+            self.journal = create_task_journal(self.config, self.logger)
+            if self.journal is not None:
+                valid_files = self.journal.start_run(
+                    valid_files,
+                    self.config.input_folder,
+                    self.config.output_folder,
+                    self.config.ffmpeg_params,
+                    resume=self.config.get("batch_processing.resume", False),
+                )
+                if not valid_files:
+                    self.logger.info("All files of the run have already completed")
+                    return True
+
             self.total_files = len(valid_files)
             self.processed_count = 0
 
+            # Check if batch processing is enabled
+            batch_enabled = self.config.get("batch_processing.enabled", True)
+            engine = self.config.get("batch_processing.engine", "threads")
+
+            # Order the files so the long ones do not start last
+            concurrency = self._get_concurrency(valid_files, batch_enabled)
+            self.ordering = OrderingPlan(
+                valid_files,
+                policy=self.config.get("file_ordering", DEFAULT_ORDERING),
+                workers=concurrency,
+                batch_size=(
+                    concurrency
+                    if batch_enabled
+                    and engine != "async"
+                    and not self.config.get("batch_processing.streaming", False)
+                    else None
+                ),
+                seconds_per_unit=load_calibration(
+                    self.config.ffmpeg_params, concurrency
+                ),
+            )
+            valid_files = self.ordering.files
+            predicted = self.ordering.predicted_makespan
+            self.logger.info(
+                f"Ordering {len(valid_files)} files by '{self.ordering.policy}' "
+                f"for {concurrency} workers"
+                + (
+                    f" (predicted makespan {predicted:.1f}s)"
+                    if predicted is not None
+                    else " (predicted makespan unavailable: "
+                    f"{self.ordering.unpredicted_reason})"
+                )
+            )
+
             # Create overall progress bar
             overall_progress = tqdm(
                 total=len(valid_files),
@@ -537,20 +593,35 @@ class ProcessingScheduler:
                 else:
                     self.logger.info("Using default encryption key")
 
-            # Check if batch processing is enabled
-            batch_enabled = self.config.get("batch_processing.enabled", True)
-
-            if batch_enabled:
+            if batch_enabled and engine == "async":
+                # Supervise all FFmpeg processes from one event loop
+                self.logger.info("Using asyncio processing engine")
+                return self._process_videos_async(
+                    valid_files,
+                    processing_start,
+                    encrypt_output,
+                    encryption_key_id,
+                    concurrency,
+                )
+            elif batch_enabled:
                 # Use batch processing
                 self.logger.info("Using batch processing mode")
                 return self._process_videos_batch(
-                    valid_files, processing_start, encrypt_output, encryption_key_id
+                    valid_files,
+                    processing_start,
+                    encrypt_output,
+                    encryption_key_id,
+                    concurrency,
                 )
             else:
                 # Use individual process mode
                 self.logger.info("Using individual process mode")
                 return self._process_videos_individual(
-                    valid_files, processing_start, encrypt_output, encryption_key_id
+                    valid_files,
+                    processing_start,
+                    encrypt_output,
+                    encryption_key_id,
+                    concurrency,
                 )
 
         except Exception as e:
@@ -559,6 +630,183 @@ class ProcessingScheduler:
             return False
 
         finally:
+            self._finish_ordering()
+            if self.journal is not None:
+                self.journal.finish_run()
+                self.journal = None
+            self.is_running = False
+
+    def _get_concurrency(self, valid_files, batch_enabled):
+        """Get the number of files encoded at the same time"""
+        if not batch_enabled:
+            return self.config.get("max_parallel_jobs", None) or 1
+
+        # Sized like a batch if not configured
+        concurrency = self.config.get("batch_processing.batch_size", None)
+        if concurrency is None:
+            from pyprocessor.utils.process.resource_calculator import (
+                get_optimal_batch_size,
+            )
+
+            concurrency = get_optimal_batch_size(valid_files, self.config, self.logger)
+        return concurrency
+
+    def _finish_ordering(self):
+        """Record the predicted and achieved makespan of the run"""
+        if self.ordering is None:
+            return
+        self.last_run_report = self.ordering.finish()
+        self.ordering = None
+
+        # Keep the calibration so the next run can predict its makespan
+        seconds_per_unit = self.last_run_report["seconds_per_unit"]
+        if seconds_per_unit:
+            save_calibration(
+                seconds_per_unit,
+                self.config.ffmpeg_params,
+                self.last_run_report["workers"],
+            )
+
+        predicted = self.last_run_report["predicted_makespan"]
+        achieved = self.last_run_report["achieved_makespan"]
+        if predicted is None:
+            self.logger.info(
+                f"Makespan: achieved {achieved:.1f}s (prediction unavailable: "
+                f"{self.last_run_report['unpredicted_reason']})"
+            )
+            return
+        self.logger.info(
+            f"Makespan: predicted {predicted:.1f}s, achieved {achieved:.1f}s "
+            f"(lower bound {self.last_run_report['lower_bound']:.1f}s, "
+            f"policy '{self.last_run_report['policy']}')"
+        )
+
+    def _journal_file_started(self, filename):
+        """Record in the task journal that a file started"""
+        if self.journal is not None:
+            self.journal.file_started(filename)
+
+    def _record_result(self, filename, success, duration, error_msg):
+        """Count a completed file and report it"""
+        with self.lock:
+            self.processed_count += 1
+            current = self.processed_count
+        if self.ordering is not None:
+            self.ordering.record_result(filename, success, duration)
+        if self.journal is not None:
+            self.journal.file_finished(filename, success, duration, error_msg)
+
+        # Call progress callback if set - this is for overall progress
+        if self.progress_callback:
+            self.progress_callback(filename, 100, current, self.total_files)
+
+        # Update overall progress bar
+        if hasattr(self, "progress_bars") and "overall" in self.progress_bars:
+            self.progress_bars["overall"].update(1)
+            self.progress_bars["file"].reset()
+            self.progress_bars["file"].set_description(f"Completed: {filename}")
+
+        if success:
+            self.logger.info(f"Completed processing: {filename} ({duration:.2f}s)")
+        elif error_msg:
+            self.logger.error(f"Error processing {filename}: {error_msg}")
+        else:
+            self.logger.error(f"Failed to process: {filename}")
+
+    def _process_videos_async(
+        self,
+        valid_files,
+        processing_start,
+        encrypt_output=False,
+        encryption_key_id=None,
+        concurrency=None,
+    ):
+        """Process videos with the asyncio engine, which supervises every
+        FFmpeg process from a single event loop"""
+        try:
+            # Import here to avoid circular imports
+            from pyprocessor.processing.async_engine import AsyncEncodeEngine
+
+            if concurrency is None:
+                concurrency = self._get_concurrency(valid_files, True)
+
+            # With adaptive concurrency, the engine gets the controller's
+            # maximum and the controller decides how many slots are open
+            controller = create_concurrency_controller(
+                self.config, concurrency, self.logger
+            )
+            if controller is not None:
+                concurrency = controller.max_slots
+
+            self.engine = AsyncEncodeEngine(
+                concurrency,
+                timeout=self.config.get("batch_processing.encode_timeout", 0),
+                logger=self.logger,
+                thread_budget=create_thread_budget(self.config, concurrency),
+                cpu_placer=create_cpu_placer(self.config, self.logger),
+                concurrency=controller,
+                stall_timeout=self.config.get("batch_processing.stall_timeout", 0),
+                retries=self.config.get("batch_processing.encode_retries", 0),
+                watchdog=get_watchdog(),
+                encryption_workers=get_encryption_workers(self.config, concurrency),
+            )
+
+            # Listeners run on the engine's loop thread, so no queues or
+            # monitor threads are needed
+            def on_progress(filename, progress):
+                if hasattr(self, "progress_bars") and "file" in self.progress_bars:
+                    self.progress_bars["file"].set_description(
+                        f"Processing: {filename}"
+                    )
+                    self.progress_bars["file"].n = progress
+                    self.progress_bars["file"].refresh()
+                if self.progress_callback:
+                    self.progress_callback(
+                        filename, progress, self.processed_count, self.total_files
+                    )
+
+            self.engine.add_progress_listener(on_progress)
+            self.engine.add_start_listener(self._journal_file_started)
+            self.engine.add_result_listener(lambda result: self._record_result(*result))
+            if self.output_file_callback:
+                self.engine.add_output_file_listener(self.output_file_callback)
+
+            results = self.engine.process_files(
+                valid_files,
+                self.config.output_folder,
+                self.config.ffmpeg_params,
+                encrypt_output=encrypt_output,
+                encryption_key_id=encryption_key_id,
+            )
+            successful_count = sum(1 for result in results if result[1])
+            failed_count = len(results) - successful_count
+
+            # Close progress bars
+            if hasattr(self, "progress_bars"):
+                for bar in self.progress_bars.values():
+                    bar.close()
+                del self.progress_bars
+
+            if self.abort_requested:
+                self.logger.warning("Processing aborted by user")
+                return False
+
+            # Calculate statistics
+            processing_minutes = (time.time() - processing_start) / 60
+
+            self.logger.info(
+                f"Processing completed: {successful_count} successful, {failed_count} failed"
+            )
+            self.logger.info(f"Total processing time: {processing_minutes:.2f} minutes")
+
+            return failed_count == 0
+
+        except Exception as e:
+            self.logger.error(f"Error in asyncio processing: {str(e)}")
+            return False
+
+        finally:
+            self.engine = None
             self.is_running = False
 
     def _process_videos_batch(
@@ -567,8 +815,10 @@ class ProcessingScheduler:
         processing_start,
         encrypt_output=False,
         encryption_key_id=None,
+        concurrency=None,
     ):
         """Process videos using batch processing"""
+        progress = None
         try:
             # Import batch processor here to avoid circular imports
             from pyprocessor.processing.batch_processor import (
@@ -576,44 +826,49 @@ class ProcessingScheduler:
                 create_batches,
             )
 
-            # Create a manager for sharing queues between processes
-            global progress_queue, output_files_queue
-            manager = Manager()
-            progress_queue = manager.Queue()
-            output_files_queue = manager.Queue()
-
-            # Create threads to monitor the queues
-            import threading
-
-            # Thread for progress updates
-            progress_thread = threading.Thread(
-                target=self._monitor_progress_queue, daemon=True
-            )
-            progress_thread.start()
-
-            # Thread for output file notifications
-            output_files_thread = threading.Thread(
-                target=self._monitor_output_files_queue, daemon=True
-            )
-            output_files_thread.start()
+            # Workers write per-file progress to a shared table, which one
+            # thread samples
+            progress = self._start_progress_sampler(valid_files)
+            first_slot = 0
 
             # Create batch processor
             batch_processor = BatchProcessor(self.config, self.logger)
+            self.engine = batch_processor
 
             # Get batch size if specified, otherwise use dynamic sizing
-            batch_size = self.config.get("batch_processing.batch_size", None)
+            batch_size = concurrency or self.config.get(
+                "batch_processing.batch_size", None
+            )
 
-            # Create batches with dynamic sizing if batch_size is None
-            batches = create_batches(valid_files, batch_size, self.config, self.logger)
+            def record_result(result):
+                self._record_result(*result)
 
-            # Log batch information
-            if batch_size is None:
-                self.logger.info(f"Created {len(batches)} batches with dynamic sizing")
-            else:
+            if self.config.get("batch_processing.streaming", False):
+                # One queue for the whole run: the batch size only limits how
+                # many files are encoded at once, and a worker starts the next
+                # file as soon as it finishes one
+                if batch_size is None:
+                    batch_size = self._get_concurrency(valid_files, True)
                 self.logger.info(
-                    f"Created {len(batches)} batches of up to {batch_size} files each"
+                    f"Streaming {len(valid_files)} files through {batch_size} workers"
+                )
+                batches = [valid_files]
+            else:
+                # Create batches with dynamic sizing if batch_size is None
+                batches = create_batches(
+                    valid_files, batch_size, self.config, self.logger
                 )
 
+                # Log batch information
+                if batch_size is None:
+                    self.logger.info(
+                        f"Created {len(batches)} batches with dynamic sizing"
+                    )
+                else:
+                    self.logger.info(
+                        f"Created {len(batches)} batches of up to {batch_size} files each"
+                    )
+
             # Process each batch
             successful_count = 0
             failed_count = 0
@@ -624,56 +879,38 @@ class ProcessingScheduler:
                     self.is_running = False
                     return False
 
-                self.logger.info(
-                    f"Processing batch {i+1}/{len(batches)} with {len(batch)} files"
-                )
+                if len(batches) > 1:
+                    self.logger.info(
+                        f"Processing batch {i+1}/{len(batches)} with {len(batch)} files"
+                    )
 
-                # Process the batch
+                # Process the batch; results are reported as files complete,
+                # and progress through the table
                 results = batch_processor.process_batch(
                     batch,
                     self.config.output_folder,
                     self.config.ffmpeg_params,
-                    self.progress_callback,
+                    None,
                     self.output_file_callback,
                     encrypt_output=encrypt_output,
                     encryption_key_id=encryption_key_id,
+                    result_callback=record_result,
+                    max_workers=batch_size or len(batch),
+                    progress_table=progress[0],
+                    first_slot=first_slot,
                 )
+                first_slot += len(batch)
 
-                # Process results
                 for filename, success, duration, error_msg in results:
-                    # Update progress counter
-                    with self.lock:
-                        self.processed_count += 1
-                        current = self.processed_count
-
-                    # Update overall progress bar
-                    if (
-                        hasattr(self, "progress_bars")
-                        and "overall" in self.progress_bars
-                    ):
-                        self.progress_bars["overall"].update(1)
-                        self.progress_bars["file"].reset()
-                        self.progress_bars["file"].set_description(
-                            f"Completed: {filename}"
-                        )
-
                     if success:
                         successful_count += 1
-                        self.logger.info(
-                            f"Completed processing: {filename} ({duration:.2f}s)"
-                        )
                     else:
                         failed_count += 1
-                        if error_msg:
-                            self.logger.error(
-                                f"Error processing {filename}: {error_msg}"
-                            )
-                        else:
-                            self.logger.error(f"Failed to process: {filename}")
 
-            # Clean up the queues
-            progress_queue = None
-            output_files_queue = None
+            if self.abort_requested:
+                self.logger.warning("Processing aborted by user")
+                self.is_running = False
+                return False
 
             # Close progress bars
             if hasattr(self, "progress_bars"):
@@ -698,76 +935,171 @@ class ProcessingScheduler:
             self.is_running = False
             return False
 
+        finally:
+            self.engine = None
+            if progress is not None:
+                self._stop_progress_sampler(*progress)
+
     def _process_videos_individual(
         self,
         valid_files,
         processing_start,
         encrypt_output=False,
         encryption_key_id=None,
+        concurrency=None,
     ):
         """Process videos using individual processes for each file"""
+        progress = None
+        controller = None
+        scheduler = None
+        executor_id = None
+        run_pool = None
         try:
-            # Create a manager for sharing queues between processes
-            global progress_queue, output_files_queue
-            manager = Manager()
-            progress_queue = manager.Queue()
-            output_files_queue = manager.Queue()
-
-            # Create threads to monitor the queues
-            import threading
-
-            # Thread for progress updates
-            progress_thread = threading.Thread(
-                target=self._monitor_progress_queue, daemon=True
+            # Get the scheduler manager; it starts queued files in priority
+            # order as slots free up. It is shared by the whole process, so
+            # its settings are restored when the run ends
+            scheduler = get_scheduler_manager()
+            previous_concurrent = scheduler.max_concurrent
+            previous_memory_percent = scheduler.max_memory_fraction * 100
+            previous_temp_dir = scheduler.temp_dir
+
+            # The scheduler pauses an encode through its FFmpeg process,
+            # which the workers publish in the progress table
+            slot_tasks = {}
+
+            def report_process(slot, pid):
+                task_id = slot_tasks.get(slot)
+                return task_id is not None and scheduler.report_process(task_id, pid)
+
+            # Workers write per-file progress to a shared table, which one
+            # thread samples; the pool workers cannot call back into this
+            # process, so output files are reported here when a file completes.
+            # The sampler also picks up priority changes made with --prioritize,
+            # which are only accepted while the run is registered
+            self._priority_run_id = listen_for_priority_requests()
+            progress = self._start_progress_sampler(
+                valid_files,
+                on_process=report_process,
+                on_tick=self._apply_priority_requests,
+            )
+
+            if concurrency:
+                scheduler.configure(max_concurrent=concurrency)
+
+            # Files run in separate processes, so each one gets a fixed
+            # share of the threads instead of drawing from a ThreadBudget
+            threads = None
+            if self.config.get("batch_processing.thread_budget", False):
+                threads = max(
+                    1, get_encode_threads(self.config) // scheduler.max_concurrent
+                )
+
+            # Files are placed when they start and their CPUs are freed when
+            # they end, so placements follow the encodes actually running
+            cpu_placer = create_cpu_placer(self.config, self.logger)
+            placements = {}
+
+            def place_task(task_id):
+                placement = cpu_placer.acquire(threads)
+                release_placement(placements.pop(task_id, None))
+                placements[task_id] = placement
+                return {"cpus": placement.cpus}
+
+            def release_placement(placement):
+                if placement is not None:
+                    cpu_placer.release(placement)
+                    cpu_placer.log_occupancy()
+
+            # Files declare the memory, CPU and disk they need, and start only
+            # when they fit, so large and small titles can share the host
+            admission = self.config.get("batch_processing.resource_admission", False)
+            if admission:
+                scheduler.configure(
+                    max_memory_percent=self.config.get(
+                        "batch_processing.max_memory_percent", 80
+                    ),
+                    temp_dir=self.config.output_folder,
+                )
+
+            # With adaptive concurrency, the controller resizes the
+            # scheduler's slots as resource usage changes
+            controller = create_concurrency_controller(
+                self.config,
+                scheduler.max_concurrent,
+                self.logger,
+                active_count=lambda: scheduler.get_stats()["running"],
+            )
+            if controller is not None:
+                controller.add_listener(
+                    lambda limit: scheduler.configure(max_concurrent=limit)
+                )
+                controller.start()
+
+            # A file moved up past a running encode pauses the encode with the
+            # lowest priority. The paused encode keeps its worker, so the files
+            # run on a pool with spare workers for the ones that preempt it.
+            # Encodes are also paused in place while memory is short
+            max_preempted = 0
+            if self.config.get("batch_processing.preemption", False):
+                max_preempted = PREEMPT_WORKERS
+            slots = (
+                controller.max_slots
+                if controller is not None
+                else scheduler.max_concurrent
             )
-            progress_thread.start()
 
-            # Thread for output file notifications
-            output_files_thread = threading.Thread(
-                target=self._monitor_output_files_queue, daemon=True
+            # A warm pool has its workers started with the encode path imported
+            # before the first file, and is kept for later runs
+            previous_executor = scheduler.executor_id or get_default_process_pool()
+            if self.config.get("batch_processing.warm_pool", False):
+                executor_id = get_warm_process_pool(
+                    max_workers=slots + max_preempted,
+                    start_method=self.config.get(
+                        "batch_processing.pool_start_method", "forkserver"
+                    ),
+                )
+            elif max_preempted:
+                executor_id = run_pool = create_process_pool(
+                    max_workers=slots + max_preempted
+                )
+            if executor_id is not None:
+                scheduler.configure(executor_id=executor_id)
+            scheduler.configure(
+                max_preempted=max_preempted,
+                pause_memory_percent=self.config.get(
+                    "batch_processing.pause_memory_percent", 0
+                ),
             )
-            output_files_thread.start()
 
-            # Get the scheduler manager
-            scheduler = get_scheduler_manager()
+            files_by_name = {file.name: file for file in valid_files}
 
             # Define task callback function
             def task_callback(task_id, success, result):
+                if cpu_placer is not None:
+                    release_placement(placements.pop(task_id, None))
                 if not success:
                     self.logger.error(f"Task {task_id} failed: {result}")
                     return
 
-                filename, success, duration, error_msg = result
-
-                # Update progress counter
-                with self.lock:
-                    self.processed_count += 1
-                    current = self.processed_count
-
-                # Call progress callback if set - this is for overall progress
-                # File-level progress is handled by the progress_queue thread
-                if self.progress_callback:
-                    self.progress_callback(filename, 100, current, self.total_files)
-
-                # Update overall progress bar
-                if hasattr(self, "progress_bars") and "overall" in self.progress_bars:
-                    self.progress_bars["overall"].update(1)
-                    self.progress_bars["file"].reset()
-                    self.progress_bars["file"].set_description(f"Completed: {filename}")
-
-                if success:
-                    self.logger.info(
-                        f"Completed processing: {filename} ({duration:.2f}s)"
-                    )
-                else:
-                    if error_msg:
-                        self.logger.error(f"Error processing {filename}: {error_msg}")
-                    else:
-                        self.logger.error(f"Failed to process: {filename}")
+                # File-level progress is handled by the progress sampler
+                filename, file_success = result[0], result[1]
+                if file_success and self.output_file_callback:
+                    VideoTask(
+                        files_by_name[filename],
+                        self.config.output_folder,
+                        self.config.ffmpeg_params,
+                    ).check_output(self.output_file_callback)
+                self._record_result(*result)
 
             # Schedule tasks for all files
             task_ids = []
             for i, file in enumerate(valid_files):
+                resources = None
+                if admission:
+                    resources = estimate_resources(
+                        file, self.config.ffmpeg_params, threads, slots
+                    )
+
                 # Schedule the task
                 task_id = schedule_task(
                     process_video_task,
@@ -776,11 +1108,21 @@ class ProcessingScheduler:
                     self.config.ffmpeg_params,
                     i,  # Task ID for progress tracking
                     callback=task_callback,
-                    priority=i,  # Lower index = higher priority
+                    # Higher values run first, so keep the planned order
+                    priority=len(valid_files) - i,
+                    resources=resources,
                     encrypt_output=encrypt_output,
                     encryption_key_id=encryption_key_id,
+                    progress_table=progress[0],
+                    threads=threads,
+                    retries=self.config.get("batch_processing.encode_retries", 0),
+                    slots=slots,
+                    encryption_workers=get_encryption_workers(self.config, slots),
+                    start_callback=place_task if cpu_placer is not None else None,
                 )
                 task_ids.append(task_id)
+                slot_tasks[i] = task_id
+                self._file_tasks[file.name] = task_id
 
             # Wait for all tasks to complete or abort
             successful_count = 0
@@ -806,10 +1148,6 @@ class ProcessingScheduler:
                     else:
                         failed_count += 1
 
-            # Clean up the queues
-            progress_queue = None
-            output_files_queue = None
-
             # Close progress bars
             if hasattr(self, "progress_bars"):
                 for bar in self.progress_bars.values():
@@ -832,3 +1170,28 @@ class ProcessingScheduler:
             self.logger.error(f"Error in individual processing: {str(e)}")
             self.is_running = False
             return False
+
+        finally:
+            if controller is not None:
+                controller.stop()
+            if scheduler is not None:
+                # Restore the slot count and admission capacity, and leave
+                # nothing stopped if the run ends early
+                scheduler.configure(
+                    max_concurrent=previous_concurrent,
+                    max_memory_percent=previous_memory_percent,
+                    temp_dir=previous_temp_dir,
+                    max_preempted=0,
+                    pause_memory_percent=0,
+                )
+                scheduler.resume_paused_tasks()
+            if executor_id is not None:
+                scheduler.configure(executor_id=previous_executor)
+            if run_pool is not None:
+                shutdown_executor(run_pool, wait=False)
+            self._file_tasks = {}
+            if self._priority_run_id is not None:
+                stop_listening(self._priority_run_id)
+                self._priority_run_id = None
+            if progress is not None:
+                self._stop_progress_sampler(*progress)
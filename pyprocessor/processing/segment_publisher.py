@@ -0,0 +1,194 @@
+"""
+Progressive HLS segment publishing for PyProcessor.
+
+While FFmpeg is still encoding, a background thread moves every finished
+segment from the staging directory into the output folder. Playlists are
+published last, each with an atomic rename and the master playlist at the very
+end, so players never see a playlist that references a missing segment.
+
+FFmpeg is run with ``-hls_flags temp_file``, which writes each segment as
+``segment_NNN.ts.tmp`` and renames it once the segment is closed, so any
+``segment_*.ts`` file in the staging directory is complete.
+"""
+
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Set
+
+# Seconds between scans of the staging directory
+POLL_INTERVAL = 0.5
+
+# Completed segment files written by the HLS muxer
+SEGMENT_PATTERN = "segment_*.ts"
+
+# Name of the master playlist, published after everything else
+MASTER_PLAYLIST = "master.m3u8"
+
+
+class SegmentPublisher:
+    """
+    Moves closed HLS segments to the output folder while FFmpeg is encoding.
+    """
+
+    def __init__(
+        self,
+        staging_dir: Path,
+        output_folder: Path,
+        logger=None,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        """
+        Initialize the segment publisher.
+
+        Args:
+            staging_dir: Directory FFmpeg writes into
+            output_folder: Final output folder
+            logger: Logger instance (optional)
+            poll_interval: Seconds between scans of the staging directory
+        """
+        self.staging_dir = Path(staging_dir)
+        self.output_folder = Path(output_folder)
+        self.logger = logger
+        self.poll_interval = poll_interval
+
+        self.published: List[Path] = []
+        self.published_bytes = 0
+        self.first_publish_time: Optional[float] = None
+        self.start_time: Optional[float] = None
+
+        self._seen: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start publishing segments in a background thread."""
+        self.start_time = time.time()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="SegmentPublisher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread without publishing anything else."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def finish(self) -> int:
+        """
+        Publish the remaining segments and then the playlists.
+
+        Call this after FFmpeg has exited successfully. Variant playlists are
+        published before the master playlist, each with an atomic rename.
+
+        Returns:
+            int: Total number of files published
+        """
+        self.stop()
+        self.publish_segments()
+
+        remaining = [
+            item
+            for item in self.staging_dir.glob("**/*")
+            if item.is_file() and not item.name.endswith(".tmp")
+        ]
+
+        # Non-playlist files first, then variant playlists, then the master
+        def publish_order(item: Path) -> int:
+            if item.name == MASTER_PLAYLIST and item.parent == self.staging_dir:
+                return 2
+            return 1 if item.suffix == ".m3u8" else 0
+
+        for item in sorted(remaining, key=publish_order):
+            self._publish(item)
+
+        self._log(
+            "info",
+            f"Published {len(self.published)} files "
+            f"({self.published_bytes / (1024 * 1024):.1f} MB) to {self.output_folder}",
+        )
+        return len(self.published)
+
+    def abort(self) -> None:
+        """Stop publishing and remove the segments published so far."""
+        self.stop()
+        with self._lock:
+            for path in self.published:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self.published = []
+            self.published_bytes = 0
+
+    def publish_segments(self) -> int:
+        """
+        Publish every closed segment that has not been published yet.
+
+        Returns:
+            int: Number of segments published by this call
+        """
+        count = 0
+        for segment in sorted(self.staging_dir.glob(f"*/{SEGMENT_PATTERN}")):
+            if segment in self._seen:
+                continue
+            self._publish(segment)
+            count += 1
+        return count
+
+    @property
+    def time_to_first_segment(self) -> Optional[float]:
+        """Get the seconds from start() until the first segment was published."""
+        if self.first_publish_time is None or self.start_time is None:
+            return None
+        return self.first_publish_time - self.start_time
+
+    def _run(self) -> None:
+        """Background loop that publishes segments until stopped."""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.publish_segments()
+            except Exception as e:
+                self._log("warning", f"Error publishing segments: {str(e)}")
+
+    def _publish(self, item: Path) -> None:
+        """
+        Move a file from the staging directory to the same place in the output.
+
+        The file is renamed into place when both directories share a
+        filesystem; otherwise it is copied beside the destination first and
+        then renamed, so the destination never holds a partial file.
+        """
+        with self._lock:
+            if item in self._seen:
+                return
+            self._seen.add(item)
+
+        destination = self.output_folder / item.relative_to(self.staging_dir)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        size = item.stat().st_size
+
+        try:
+            os.replace(item, destination)
+        except OSError:
+            temp_path = destination.with_name(f".{destination.name}.publish")
+            shutil.copy2(item, temp_path)
+            os.replace(temp_path, destination)
+            item.unlink()
+
+        with self._lock:
+            self.published.append(destination)
+            self.published_bytes += size
+            if self.first_publish_time is None:
+                self.first_publish_time = time.time()
+
+    def _log(self, level: str, message: str) -> None:
+        """Log a message if a logger was provided."""
+        if self.logger:
+            getattr(self.logger, level)(message)
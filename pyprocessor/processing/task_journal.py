@@ -0,0 +1,518 @@
+"""
+Crash-safe journal of the files of a run for PyProcessor.
+
+Which files of a run are done is only known to the memory of the process
+running it, so when the process dies midway through a long run, the next
+run starts over. TaskJournal writes every file of a run ahead into an
+SQLite database in WAL mode under the application data directory:
+
+- ``start_run()`` records the files of a run as queued
+- ``file_started()`` records that the encode of a file started
+- ``file_finished()`` records how it ended, with a fingerprint of its output
+
+Each change is committed before the call returns. A run started with
+``resume=True`` continues the last run of the same input and output
+folders: files that completed and whose output is unchanged are left out,
+and files that were queued, in flight or failed are queued again.
+
+Commits do not wait for the disk (``synchronous=NORMAL``), which WAL makes
+safe against the process dying. A power loss may lose the last changes,
+which only means those files are encoded again.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from pyprocessor.utils.file_system.path_manager import get_app_data_dir
+from pyprocessor.utils.logging.log_manager import get_logger
+
+JOURNAL_FILE_NAME = "task_journal.db"
+
+# States of a file
+QUEUED = "queued"
+STARTED = "started"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Runs kept per database; older runs are deleted when a run starts
+KEPT_RUNS = 20
+
+# Milliseconds a write waits for another process holding the database
+BUSY_TIMEOUT = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    params TEXT NOT NULL,
+    input_folder TEXT NOT NULL,
+    output_folder TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    resumed_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_job ON runs (job);
+CREATE TABLE IF NOT EXISTS files (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    state TEXT NOT NULL,
+    input_fingerprint TEXT,
+    output_fingerprint TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    error TEXT,
+    PRIMARY KEY (run_id, name)
+);
+"""
+
+
+# Columns of the files table, in order
+FILE_COLUMNS = (
+    "run_id, name, state, input_fingerprint, output_fingerprint, attempts, "
+    "submitted_at, started_at, finished_at, duration, error"
+)
+
+
+def get_journal_path() -> Path:
+    """
+    Get the database the journal is kept in.
+
+    Returns:
+        Path: File under the application data directory
+    """
+    return Path(get_app_data_dir()) / JOURNAL_FILE_NAME
+
+
+def digest(value: Any) -> str:
+    """
+    Get a stable digest of a JSON-serializable value.
+
+    Args:
+        value: Value such as the FFmpeg parameters
+
+    Returns:
+        str: SHA-256 hex digest of the value with its keys sorted
+    """
+    text = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def fingerprint_file(path: Path) -> Optional[str]:
+    """
+    Fingerprint a source file by its size and modification time.
+
+    Args:
+        path: File
+
+    Returns:
+        Optional[str]: Fingerprint, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def fingerprint_output(directory: Path) -> Optional[str]:
+    """
+    Fingerprint the output folder of a file.
+
+    The fingerprint covers the relative path, size and modification time of
+    every file in the folder, so the segments are not read. Moving the
+    folder keeps its fingerprint.
+
+    Args:
+        directory: Output folder
+
+    Returns:
+        Optional[str]: Fingerprint, or None if the folder is missing or empty
+    """
+    entries = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            relative = os.path.relpath(path, directory).replace(os.sep, "/")
+            entries.append(f"{relative}:{stat.st_size}:{stat.st_mtime_ns}")
+    if not entries:
+        return None
+    return digest(sorted(entries))
+
+
+def find_output_dir(output_folder: Path, name: str) -> Optional[Path]:
+    """
+    Find the output folder of a file, also where folder organization moved it.
+
+    Args:
+        output_folder: Output folder of the run
+        name: File name of the source
+
+    Returns:
+        Optional[Path]: The folder, or None if it does not exist
+    """
+    stem = Path(name).stem
+    directory = Path(output_folder) / stem
+    if directory.is_dir():
+        return directory
+    for directory in Path(output_folder).glob(f"*/{stem}"):
+        if directory.is_dir():
+            return directory
+    return None
+
+
+class TaskJournal:
+    """
+    Write-ahead journal of the files of a run.
+
+    Safe to use from several threads. Errors of the database are logged and
+    do not stop the run.
+    """
+
+    def __init__(self, path: Optional[Path] = None, logger=None):
+        """
+        Open the journal, creating the database if needed.
+
+        Args:
+            path: Database file (default: get_journal_path())
+            logger: Logger instance (optional)
+        """
+        self.path = Path(path or get_journal_path())
+        self.logger = logger or get_logger()
+        self.run_id: Optional[int] = None
+        self.output_folder: Optional[Path] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=BUSY_TIMEOUT / 1000
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(SCHEMA)
+
+    def start_run(
+        self,
+        files: Sequence[Path],
+        input_folder: Path,
+        output_folder: Path,
+        ffmpeg_params: Dict[str, Any],
+        resume: bool = False,
+    ) -> List[Path]:
+        """
+        Start recording a run.
+
+        Args:
+            files: Files found for the run
+            input_folder: Input folder of the run
+            output_folder: Output folder of the run
+            ffmpeg_params: FFmpeg parameters of the run
+            resume: Continue the last run of the same folders instead of
+                starting a new one
+
+        Returns:
+            List[Path]: Files to process, in the order given; without the
+            completed files of the resumed run
+        """
+        self.output_folder = Path(output_folder)
+        try:
+            with self._lock, self._connection:
+                return self._start_run(
+                    files, input_folder, output_folder, ffmpeg_params, resume
+                )
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing the task journal: {str(e)}")
+            self.run_id = None
+            return list(files)
+
+    def _start_run(
+        self,
+        files: Sequence[Path],
+        input_folder: Path,
+        output_folder: Path,
+        ffmpeg_params: Dict[str, Any],
+        resume: bool,
+    ) -> List[Path]:
+        """Record a new run or continue the last one (lock held)."""
+        job = digest(
+            [str(Path(input_folder).resolve()), str(self.output_folder.resolve())]
+        )
+        params = digest(ffmpeg_params)
+        now = time.time()
+
+        previous = self._connection.execute(
+            "SELECT * FROM runs WHERE job = ? ORDER BY run_id DESC LIMIT 1",
+            (job,),
+        ).fetchone()
+        if resume and previous is not None and previous["params"] != params:
+            self.logger.warning(
+                f"FFmpeg parameters changed since run {previous['run_id']}; "
+                f"starting a new run"
+            )
+        elif resume and previous is not None:
+            remaining = self._resume(previous["run_id"], params, files, now)
+            self._prune(job)
+            return remaining
+        elif resume:
+            self.logger.warning("No earlier run of these folders to resume")
+        elif previous is not None and previous["finished_at"] is None:
+            done = self._count(previous["run_id"], COMPLETED)
+            self.logger.info(
+                f"Run {previous['run_id']} of these folders did not finish; "
+                f"use --resume to skip its {done} completed files"
+            )
+
+        self.run_id = self._connection.execute(
+            "INSERT INTO runs (job, params, input_folder, output_folder, "
+            "started_at) VALUES (?, ?, ?, ?, ?)",
+            (job, params, str(input_folder), str(output_folder), now),
+        ).lastrowid
+        self._connection.executemany(
+            "INSERT INTO files (run_id, name, state, input_fingerprint, "
+            "submitted_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (self.run_id, file.name, QUEUED, fingerprint_file(file), now)
+                for file in files
+            ],
+        )
+        self._prune(job)
+
+        self.logger.info(f"Recording run {self.run_id} in {self.path}")
+        return list(files)
+
+    def _resume(
+        self, run_id: int, params: str, files: Sequence[Path], now: float
+    ) -> List[Path]:
+        """Continue a run and get its files still to process (lock held)."""
+        self.run_id = run_id
+
+        # The last state of each file in the runs of these folders and
+        # parameters, so files completed by an earlier run that was followed
+        # by one started without --resume are still skipped
+        recorded = {
+            row["name"]: row
+            for row in self._connection.execute(
+                "SELECT files.* FROM files JOIN runs USING (run_id) "
+                "WHERE runs.job = (SELECT job FROM runs WHERE run_id = ?) "
+                "AND runs.params = ? AND files.state != ? ORDER BY run_id",
+                (run_id, params, QUEUED),
+            )
+        }
+
+        remaining = []
+        rows = []
+        skipped = in_flight = failed = 0
+        for file in files:
+            row = recorded.get(file.name)
+            input_fingerprint = fingerprint_file(file)
+            if row is not None and row["state"] == COMPLETED:
+                if self._is_unchanged(row, input_fingerprint):
+                    skipped += 1
+                    rows.append((run_id, *tuple(row)[1:]))
+                    continue
+                self.logger.info(
+                    f"{file.name} or its output changed since it completed; "
+                    f"processing it again"
+                )
+            elif row is not None and row["state"] == STARTED:
+                in_flight += 1
+            elif row is not None and row["state"] == FAILED:
+                failed += 1
+            remaining.append(file)
+            rows.append(
+                (
+                    run_id,
+                    file.name,
+                    QUEUED,
+                    input_fingerprint,
+                    None,
+                    row["attempts"] if row is not None else 0,
+                    now,
+                    None,
+                    None,
+                    None,
+                    None,
+                )
+            )
+
+        self._connection.executemany(
+            f"INSERT OR REPLACE INTO files ({FILE_COLUMNS}) "
+            f"VALUES ({', '.join('?' * len(FILE_COLUMNS.split(', ')))})",
+            rows,
+        )
+        self._connection.execute(
+            "UPDATE runs SET resumed_at = ?, finished_at = NULL WHERE run_id = ?",
+            (now, run_id),
+        )
+
+        self.logger.info(
+            f"Resuming run {run_id}: skipping {skipped} completed files, "
+            f"requeueing {in_flight} in flight, {failed} failed and "
+            f"{len(remaining) - in_flight - failed} other files"
+        )
+        return remaining
+
+    def _is_unchanged(self, row: sqlite3.Row, input_fingerprint: Optional[str]) -> bool:
+        """Check that a completed file and its output are as recorded."""
+        if input_fingerprint is None or input_fingerprint != row["input_fingerprint"]:
+            return False
+        directory = find_output_dir(self.output_folder, row["name"])
+        return (
+            directory is not None
+            and row["output_fingerprint"] is not None
+            and fingerprint_output(directory) == row["output_fingerprint"]
+        )
+
+    def _count(self, run_id: int, state: str) -> int:
+        """Count the files of a run in a state (lock held)."""
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM files WHERE run_id = ? AND state = ?",
+            (run_id, state),
+        ).fetchone()[0]
+
+    def _prune(self, job: str) -> None:
+        """Delete the runs of a job beyond KEPT_RUNS (lock held)."""
+        self._connection.execute(
+            "DELETE FROM runs WHERE job = ? AND run_id NOT IN ("
+            "SELECT run_id FROM runs WHERE job = ? ORDER BY run_id DESC LIMIT ?)",
+            (job, job, KEPT_RUNS),
+        )
+
+    def _write(self, sql: str, parameters: Sequence[Any]) -> None:
+        """Commit one change of the current run, logging any error."""
+        if self.run_id is None:
+            return
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(sql, parameters)
+        except sqlite3.Error as e:
+            self.logger.error(f"Error writing the task journal: {str(e)}")
+
+    def file_started(self, name: str) -> None:
+        """
+        Record that the encode of a file started.
+
+        Args:
+            name: File name
+        """
+        self._write(
+            "UPDATE files SET state = ?, started_at = ?, attempts = attempts + 1 "
+            "WHERE run_id = ? AND name = ?",
+            (STARTED, time.time(), self.run_id, name),
+        )
+
+    def file_finished(
+        self,
+        name: str,
+        success: bool,
+        duration: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Record how a file ended, with the fingerprint of its output if it
+        completed.
+
+        Args:
+            name: File name
+            success: Whether the file completed
+            duration: Seconds the file took
+            error: Error message if it failed
+        """
+        output_fingerprint = None
+        if success and self.output_folder is not None:
+            directory = find_output_dir(self.output_folder, name)
+            if directory is not None:
+                output_fingerprint = fingerprint_output(directory)
+        self._write(
+            "UPDATE files SET state = ?, output_fingerprint = ?, finished_at = ?, "
+            "duration = ?, error = ? WHERE run_id = ? AND name = ?",
+            (
+                COMPLETED if success else FAILED,
+                output_fingerprint,
+                time.time(),
+                duration,
+                error,
+                self.run_id,
+                name,
+            ),
+        )
+
+    def finish_run(self) -> None:
+        """Record that the run ended and close the database."""
+        self._write(
+            "UPDATE runs SET finished_at = ? WHERE run_id = ?",
+            (time.time(), self.run_id),
+        )
+        self.close()
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self.run_id = None
+            self._connection.close()
+
+    def get_run(self, run_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a run and the number of its files in each state.
+
+        Args:
+            run_id: Run (default: the current run)
+
+        Returns:
+            Optional[Dict[str, Any]]: Run information, or None if it does
+            not exist
+        """
+        run_id = run_id or self.run_id
+        with self._lock:
+            run = self._connection.execute(
+                "SELECT * FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if run is None:
+                return None
+            counts = self._connection.execute(
+                "SELECT state, COUNT(*) FROM files WHERE run_id = ? GROUP BY state",
+                (run_id,),
+            ).fetchall()
+        return {**dict(run), "files": {state: count for state, count in counts}}
+
+
+def create_task_journal(config, logger=None) -> Optional[TaskJournal]:
+    """
+    Open the task journal for a run, if it is enabled.
+
+    Resuming a run opens the journal even when it is not enabled, so the
+    resumed run is recorded too.
+
+    Args:
+        config: Configuration object
+        logger: Logger instance (optional)
+
+    Returns:
+        Optional[TaskJournal]: Journal, or None if runs are not recorded
+    """
+    logger = logger or get_logger()
+    if not (
+        config.get("batch_processing.journal", False)
+        or config.get("batch_processing.resume", False)
+    ):
+        return None
+
+    try:
+        return TaskJournal(logger=logger)
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"Cannot open the task journal: {str(e)}")
+        return None
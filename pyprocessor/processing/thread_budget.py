@@ -0,0 +1,244 @@
+"""
+Per-job FFmpeg thread budgeting for PyProcessor.
+
+Left alone, every FFmpeg process sizes its encoder and filter threads to the
+full core count. With ten concurrent encodes on a 32-core host that means
+hundreds of runnable threads and the cache thrashing that goes with them.
+
+ThreadBudget splits a fixed number of threads across the jobs running at the
+same time. A job that starts gets an even share of the threads no running
+job holds, so when jobs finish, the jobs started after them get the freed
+threads. The share is turned into FFmpeg options:
+
+- ``-threads`` before ``-i``, so the decoder does not size itself to the host
+- ``-filter_threads`` and ``-filter_complex_threads`` for the scaling graph,
+  which gets FILTER_SHARE of the share
+- ``-threads:v:N`` per rendition for the rest, weighted by its pixel count
+- ``-x265-params:v:N pools=...:frame-threads=...`` for libx265, which does
+  not follow ``-threads``
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Encoders that size their thread pool from x265-params instead of -threads
+X265_ENCODERS = ("libx265",)
+
+# Part of a job's threads that goes to the filtergraph; the encoders get the
+# rest, so the two together stay within the job's share
+FILTER_SHARE = 0.25
+
+
+def get_encode_threads(config) -> int:
+    """
+    Get the number of threads the concurrent encodes share.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        int: Configured thread count, or the CPU count if not set
+    """
+    return config.get("batch_processing.encode_threads", 0) or os.cpu_count() or 1
+
+
+def create_thread_budget(config, max_jobs: int) -> Optional["ThreadBudget"]:
+    """
+    Create the thread budget for a run, if budgeting is enabled.
+
+    Args:
+        config: Configuration object
+        max_jobs: Encodes running at the same time
+
+    Returns:
+        Optional[ThreadBudget]: Budget, or None if FFmpeg sizes its own threads
+    """
+    if not config.get("batch_processing.thread_budget", False):
+        return None
+    return ThreadBudget(get_encode_threads(config), max_jobs)
+
+
+def split_threads(threads: int, weights: List[float]) -> List[int]:
+    """
+    Split threads in proportion to weights, giving each part at least one.
+
+    Args:
+        threads: Threads to split
+        weights: Relative weight of each part
+
+    Returns:
+        List[int]: Threads per part
+    """
+    total = sum(weights)
+    if total <= 0:
+        return [max(1, threads // len(weights))] * len(weights)
+    return [max(1, round(threads * weight / total)) for weight in weights]
+
+
+def x265_frame_threads(threads: int) -> int:
+    """
+    Get the number of frames libx265 encodes in parallel on a thread pool.
+
+    Mirrors x265's own choice for a machine with that many cores.
+
+    Args:
+        threads: Threads in the pool
+
+    Returns:
+        int: Frame threads
+    """
+    if threads >= 32:
+        return 6
+    if threads >= 16:
+        return 5
+    if threads >= 8:
+        return 4
+    if threads >= 4:
+        return 3
+    return 1 if threads < 2 else 2
+
+
+def split_job_threads(threads: int) -> Tuple[int, int]:
+    """
+    Split a job's threads between the filtergraph and the encoders.
+
+    Args:
+        threads: Threads of the job
+
+    Returns:
+        Tuple[int, int]: Filter threads and encoder threads (at least 1 each)
+    """
+    filter_threads = max(1, int(threads * FILTER_SHARE))
+    return filter_threads, max(1, threads - filter_threads)
+
+
+def build_input_thread_args(threads: int) -> List[str]:
+    """
+    Build the input options that size the decoder threads.
+
+    Args:
+        threads: Threads for the decoder
+
+    Returns:
+        List[str]: FFmpeg arguments (to go right before -i)
+    """
+    return ["-threads", str(threads)]
+
+
+def build_filter_thread_args(threads: int) -> List[str]:
+    """
+    Build the global options that size the filter threads.
+
+    Args:
+        threads: Threads for the filtergraph
+
+    Returns:
+        List[str]: FFmpeg arguments (to go before the first input)
+    """
+    return [
+        "-filter_threads",
+        str(threads),
+        "-filter_complex_threads",
+        str(threads),
+    ]
+
+
+def build_encoder_thread_args(encoder: str, index: int, threads: int) -> List[str]:
+    """
+    Build the options that size one video encoder's threads.
+
+    Args:
+        encoder: FFmpeg encoder name
+        index: Index of the video output stream
+        threads: Threads for the encoder
+
+    Returns:
+        List[str]: FFmpeg arguments
+    """
+    args = [f"-threads:v:{index}", str(threads)]
+    if encoder in X265_ENCODERS:
+        args.extend(
+            [
+                f"-x265-params:v:{index}",
+                f"pools={threads}:frame-threads={x265_frame_threads(threads)}",
+            ]
+        )
+    return args
+
+
+class ThreadBudget:
+    """
+    Splits a fixed number of threads across concurrent encode jobs.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(self, total_threads: int, max_jobs: int, min_threads: int = 1):
+        """
+        Initialize the budget.
+
+        Args:
+            total_threads: Threads shared by all running jobs
+            max_jobs: Jobs running at the same time
+            min_threads: Threads a job gets even when the budget is spent
+        """
+        self.total_threads = max(1, int(total_threads))
+        self.max_jobs = max(1, int(max_jobs))
+        self.min_threads = max(1, int(min_threads))
+        self.free_threads = self.total_threads
+        self.active_jobs = 0
+        self.jobs_started = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, waiting: Optional[int] = None) -> int:
+        """
+        Reserve threads for a job that is starting.
+
+        The job gets an even share of the free threads across the slots that
+        can still start a job. When fewer jobs are waiting than there are
+        open slots, the share is split only across the waiting jobs.
+
+        Args:
+            waiting: Jobs waiting to start, including this one (default:
+                enough to fill every open slot)
+
+        Returns:
+            int: Threads for the job; pass them to release() when it ends
+        """
+        with self._lock:
+            open_slots = max(1, self.max_jobs - self.active_jobs)
+            if waiting is not None:
+                open_slots = max(1, min(open_slots, waiting))
+            threads = max(self.min_threads, self.free_threads // open_slots)
+            self.free_threads -= threads
+            self.active_jobs += 1
+            self.jobs_started += 1
+            return threads
+
+    def release(self, threads: int) -> None:
+        """
+        Return the threads of a job that has ended.
+
+        Args:
+            threads: Threads returned by acquire()
+        """
+        with self._lock:
+            self.free_threads += threads
+            self.active_jobs = max(0, self.active_jobs - 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the budget to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Budget information
+        """
+        with self._lock:
+            return {
+                "total_threads": self.total_threads,
+                "max_jobs": self.max_jobs,
+                "free_threads": self.free_threads,
+                "active_jobs": self.active_jobs,
+                "jobs_started": self.jobs_started,
+            }
@@ -0,0 +1,486 @@
+"""
+Per-file encoding steps for PyProcessor.
+
+VideoTask holds the work for one source file around the FFmpeg run:
+
+- probing the source and building the FFmpeg command
+- checking and reporting the output files
+- encrypting the output
+
+Both the thread-based ``process_video_task`` and the asyncio engine use it,
+so they differ only in how the FFmpeg processes are supervised.
+"""
+
+import math
+import os
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from pyprocessor.processing.chunked_encoder import (
+    DEFAULT_CHUNK_DURATION,
+    DEFAULT_MIN_SOURCE_DURATION,
+    ChunkedEncoder,
+    EncodeChunk,
+    chunk_worker_count,
+    plan_chunked_encoding,
+)
+from pyprocessor.processing.hls_encryption import (
+    HLSKeyRotator,
+    is_hls_encryption_enabled,
+)
+from pyprocessor.processing.ladder import parse_bitrate, plan_ladder
+from pyprocessor.processing.thread_budget import (
+    build_filter_thread_args,
+    build_input_thread_args,
+    split_job_threads,
+)
+from pyprocessor.utils.logging.log_manager import get_logger
+from pyprocessor.utils.media.ffmpeg_log import FFmpegLog
+from pyprocessor.utils.media.ffmpeg_manager import get_ffmpeg_path
+from pyprocessor.utils.media.probe_manager import probe_file
+from pyprocessor.utils.process.scheduler_manager import ResourceRequest
+
+# Segments reported per variant (the rest are summarized)
+REPORTED_SEGMENTS = 3
+
+# Memory an FFmpeg encode needs regardless of resolution
+ENCODE_BASE_MEMORY = 200 * 1024 * 1024
+
+# Frames held in memory: decoded source frames queued in the filter graph,
+# and the lookahead and reference frames of each rendition's encoder
+SOURCE_BUFFERED_FRAMES = 16
+RENDITION_BUFFERED_FRAMES = 50
+
+# Bytes per pixel of an 8-bit 4:2:0 frame
+FRAME_BYTES_PER_PIXEL = 1.5
+
+
+# Helper function to probe the source video
+def get_video_info(file_path):
+    """Get FFprobe stream and format information for the video file"""
+    try:
+        return probe_file(file_path).info
+    except Exception:
+        return None
+
+
+# Helper function to check for audio streams
+def check_for_audio(file_path):
+    """Check if the video file has audio streams"""
+    try:
+        return probe_file(file_path).has_audio
+    except Exception:
+        return False
+
+
+def estimate_resources(
+    file_path,
+    ffmpeg_params,
+    threads: Optional[int] = None,
+    slots: Optional[int] = None,
+) -> ResourceRequest:
+    """
+    Estimate the resources encoding a file takes, for admission by the
+    SchedulerManager.
+
+    Memory follows the pixels of the source and of every rendition, so a 4K
+    title asks for several times what a 480p one does. Chunked titles run
+    several encoders at once and ask for each of them. The disk estimate is
+    the size of the output written at the ladder's bitrates.
+
+    Args:
+        file_path: Path to the video file
+        ffmpeg_params: FFmpeg parameters
+        threads: Threads the encode may use (CPU is not requested if None)
+        slots: Files encoded at the same time (sizes chunk workers without threads)
+
+    Returns:
+        ResourceRequest: Estimated resources
+    """
+    info = get_video_info(file_path)
+    plan = plan_ladder(ffmpeg_params, info)
+    try:
+        duration = float((info or {}).get("format", {}).get("duration") or 0)
+    except (TypeError, ValueError):
+        duration = 0.0
+
+    source_pixels = (plan.source_width or 0) * (plan.source_height or 0)
+    memory = (
+        ENCODE_BASE_MEMORY
+        + source_pixels * FRAME_BYTES_PER_PIXEL * SOURCE_BUFFERED_FRAMES
+        + sum(
+            rung.width * rung.height * FRAME_BYTES_PER_PIXEL * RENDITION_BUFFERED_FRAMES
+            for rung in plan.rungs
+        )
+    )
+
+    # Chunked titles encode chunk_workers chunks at the same time
+    encoders = 1
+    if ffmpeg_params.get("chunked_encoding", False) and duration >= ffmpeg_params.get(
+        "chunk_min_duration", DEFAULT_MIN_SOURCE_DURATION
+    ):
+        chunks = math.ceil(
+            duration / ffmpeg_params.get("chunk_duration", DEFAULT_CHUNK_DURATION)
+        )
+        encoders = chunk_worker_count(ffmpeg_params, chunks, threads, slots)
+
+    bitrate = sum(parse_bitrate(rung.bitrate) for rung in plan.rungs) + sum(
+        parse_bitrate(value) for value in plan.audio_bitrates
+    )
+
+    return ResourceRequest(
+        cpu_cores=threads or 0,
+        memory_bytes=int(memory * encoders),
+        temp_disk_bytes=int(bitrate * duration / 8),
+    )
+
+
+def get_encryption_workers(config, slots=1) -> int:
+    """
+    Get the threads each file's output is encrypted with.
+
+    The configured security.encryption.workers (0 = CPU count) is split
+    across the files processed at the same time, so files that finish
+    together do not each start a thread per CPU.
+
+    Args:
+        config: Configuration object
+        slots: Files processed at the same time
+
+    Returns:
+        int: Threads for one file's encrypt_directory call (at least 1)
+    """
+    workers = config.get("security.encryption.workers", 0) or os.cpu_count() or 1
+    return max(1, int(workers) // max(1, int(slots or 1)))
+
+
+def build_hls_command(
+    input_file,
+    output_dir,
+    plan,
+    ffmpeg_params,
+    has_audio: bool,
+    threads: Optional[int] = None,
+    key_rotator: Optional[HLSKeyRotator] = None,
+    input_args: Optional[List[str]] = None,
+    temp_segments: bool = False,
+) -> List[str]:
+    """
+    Build the FFmpeg command that encodes a title's ladder to HLS.
+
+    This is the only command builder; FFmpegEncoder and VideoTask both use it.
+
+    Args:
+        input_file: Path to the source
+        output_dir: Directory the variant folders and master playlist go to
+        plan: LadderPlan for the source
+        ffmpeg_params: FFmpeg parameters
+        has_audio: Whether audio renditions are encoded
+        threads: Threads FFmpeg may use (FFmpeg sizes its own threads if None)
+        key_rotator: HLSKeyRotator for native segment encryption (optional)
+        input_args: Options placed before -i, such as hardware decoding
+        temp_segments: Write segments as .tmp files renamed once closed
+            (needed for progressive publishing)
+
+    Returns:
+        List[str]: FFmpeg command
+    """
+    cmd = [
+        get_ffmpeg_path(),
+        "-hide_banner",
+        "-loglevel",
+        "info",
+        "-stats",
+    ]
+    # The decoder is capped at the job's threads, and the filtergraph and
+    # encoders split them
+    encoder_threads = None
+    if threads:
+        filter_threads, encoder_threads = split_job_threads(threads)
+        cmd.extend(build_filter_thread_args(filter_threads))
+    cmd.extend(input_args or [])
+    if threads:
+        cmd.extend(build_input_thread_args(threads))
+    cmd.extend(["-i", str(input_file), "-filter_complex", plan.build_filter_complex()])
+
+    # Video streams for all planned resolutions
+    cmd.extend(plan.build_video_args(ffmpeg_params, encoder_threads))
+
+    # Audio streams if available and enabled
+    if has_audio:
+        cmd.extend(plan.build_audio_args())
+    var_stream_map = plan.build_var_stream_map(has_audio)
+
+    # HLS parameters; the key rotator writes the key info file and needs
+    # periodic_rekey when keys are rotated
+    hls_flags = ["independent_segments"]
+    if temp_segments:
+        hls_flags.append("temp_file")
+    key_args = []
+    if key_rotator is not None:
+        key_args = key_rotator.prepare()
+        hls_flags.extend(key_rotator.hls_flags)
+    segment_path = str(output_dir) + "/%v/segment_%03d.ts"
+    playlist_path = str(output_dir) + "/%v/playlist.m3u8"
+
+    cmd.extend(
+        [
+            "-f",
+            "hls",
+            "-g",
+            str(plan.gop_size),
+            "-hls_time",
+            "1",
+            "-hls_playlist_type",
+            "vod",
+            "-hls_flags",
+            "+".join(hls_flags),
+            "-hls_segment_type",
+            "mpegts",
+            "-hls_segment_filename",
+            segment_path,
+            *key_args,
+            "-master_pl_name",
+            "master.m3u8",
+            "-var_stream_map",
+            var_stream_map,
+            playlist_path,
+        ]
+    )
+    return cmd
+
+
+class VideoTask:
+    """
+    The encoding work for one source file.
+    """
+
+    def __init__(self, file_path, output_folder_path, ffmpeg_params):
+        """
+        Initialize the task.
+
+        Args:
+            file_path: Path to the video file
+            output_folder_path: Path to the output folder
+            ffmpeg_params: FFmpeg parameters
+        """
+        self.file = Path(file_path)
+        self.output_folder = Path(output_folder_path)
+        self.output_subfolder = self.output_folder / self.file.stem
+        self.ffmpeg_params = ffmpeg_params
+
+        self.cmd: List[str] = []
+        self.plan = None
+        self.key_rotator: Optional[HLSKeyRotator] = None
+        self.chunks: Optional[List[EncodeChunk]] = None
+
+        # CPUs the FFmpeg processes are pinned to, if placed by a CpuPlacer
+        self.cpus: Optional[List[int]] = None
+
+        # Threads from a ThreadBudget, and the files encoded at the same time;
+        # chunked titles size their concurrent chunks from them
+        self.threads: Optional[int] = None
+        self.slots: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """Get the file name of the source."""
+        return self.file.name
+
+    def prepare(self, threads: Optional[int] = None) -> List[str]:
+        """
+        Probe the source, plan the ladder and build the FFmpeg command.
+
+        Args:
+            threads: Threads the encode may use, from a ThreadBudget (FFmpeg
+                sizes its own threads if None). Chunked titles split them
+                across the chunks encoded at the same time.
+
+        Returns:
+            List[str]: FFmpeg command that encodes the title into output_subfolder
+        """
+        # Create output directory structure
+        self.output_subfolder.mkdir(parents=True, exist_ok=True)
+
+        # Check for audio streams
+        has_audio = check_for_audio(self.file)
+        if not self.ffmpeg_params.get("include_audio", True):
+            has_audio = False
+
+        # Plan the rendition ladder from the probed source
+        self.plan = plan_ladder(self.ffmpeg_params, get_video_info(self.file))
+
+        # Long titles may be split into keyframe-aligned chunks that are
+        # encoded concurrently and stitched back together
+        self.chunks = plan_chunked_encoding(self.ffmpeg_params, self.file)
+        self.threads = threads
+        if threads and self.chunks:
+            threads = max(1, threads // self.chunk_workers)
+
+        # Native AES-128 segment encryption if configured
+        if is_hls_encryption_enabled(self.ffmpeg_params):
+            self.key_rotator = HLSKeyRotator(
+                self.output_subfolder,
+                rotation_segments=self.ffmpeg_params.get("hls_key_rotation", 0),
+                key_uri=self.ffmpeg_params.get("hls_key_uri"),
+                key_dir=self.ffmpeg_params.get("hls_key_dir"),
+            )
+
+        cmd = build_hls_command(
+            self.file,
+            self.output_subfolder,
+            self.plan,
+            self.ffmpeg_params,
+            has_audio,
+            threads=threads,
+            key_rotator=self.key_rotator,
+        )
+        self.cmd = cmd
+        return cmd
+
+    @property
+    def chunk_workers(self) -> int:
+        """Get the number of chunks encoded at the same time."""
+        return chunk_worker_count(
+            self.ffmpeg_params, len(self.chunks or ()), self.threads, self.slots
+        )
+
+    def create_chunked_encoder(
+        self,
+        logger=None,
+        retries: int = 0,
+        pid_callback: Optional[Callable[[int], None]] = None,
+    ) -> ChunkedEncoder:
+        """
+        Create the encoder for the planned chunks.
+
+        Args:
+            logger: Logger instance (optional)
+            retries: How many times a killed chunk is encoded again
+            pid_callback: Called with the chunk process the watchdog should
+                kill (see ChunkedEncoder)
+
+        Returns:
+            ChunkedEncoder: Encoder writing into output_subfolder
+        """
+        return ChunkedEncoder(
+            self.output_subfolder,
+            self.chunks,
+            max_workers=self.chunk_workers,
+            logger=logger,
+            cpus=self.cpus,
+            retries=retries,
+            pid_callback=pid_callback,
+        )
+
+    def check_output(
+        self, output_file_callback: Optional[Callable] = None
+    ) -> Optional[str]:
+        """
+        Check that the master playlist was written and report the output files.
+
+        Without a plan (when the files are reported by a process other than
+        the one that encoded them), every subfolder with a playlist is
+        reported as a variant.
+
+        Args:
+            output_file_callback: Called with (filename, resolution) per file
+
+        Returns:
+            Optional[str]: Error message, or None if the output is complete
+        """
+        if not (self.output_subfolder / "master.m3u8").exists():
+            return "Failed to create master playlist"
+        if output_file_callback is None:
+            return None
+
+        # Log master playlist
+        output_file_callback("master.m3u8", None)
+
+        # Log variant playlists and a few segments (not all to avoid cluttering)
+        if self.plan is not None:
+            variants = self.plan.variant_names
+        else:
+            variants = sorted(
+                path.parent.name
+                for path in self.output_subfolder.glob("*/playlist.m3u8")
+            )
+        for res in variants:
+            variant_dir = self.output_subfolder / res
+            if not variant_dir.exists():
+                continue
+            output_file_callback(f"{res}/playlist.m3u8", res)
+
+            segments = list(variant_dir.glob("segment_*.ts"))
+            for segment in segments[:REPORTED_SEGMENTS]:
+                output_file_callback(f"{res}/{segment.name}", res)
+
+            # If there are more segments, log a summary
+            if len(segments) > REPORTED_SEGMENTS:
+                output_file_callback(
+                    f"... and {len(segments) - REPORTED_SEGMENTS} more segments", res
+                )
+        return None
+
+    def encrypt_output(
+        self, encrypt_output=False, encryption_key_id=None, workers=None
+    ) -> None:
+        """
+        Encrypt the output files if requested.
+
+        Segments that FFmpeg already encrypted are not encrypted a second time.
+
+        Args:
+            encrypt_output: Whether to encrypt the output files
+            encryption_key_id: Encryption key ID (default key if None)
+            workers: Threads the files are encrypted with (from
+                get_encryption_workers; the encryption manager's count if None)
+        """
+        if not encrypt_output:
+            return
+        logger = get_logger()
+        if self.key_rotator:
+            logger.info(
+                f"Skipping file encryption for {self.output_subfolder}: "
+                f"HLS segments are already encrypted"
+            )
+            return
+
+        # Import here to avoid circular imports
+        from pyprocessor.utils.security.encryption_manager import (
+            get_encryption_manager,
+        )
+
+        logger.info(f"Encrypting output files in {self.output_subfolder}")
+        encryption_success, stats = get_encryption_manager().encrypt_directory(
+            self.output_subfolder, encryption_key_id, workers=workers
+        )
+        if not encryption_success:
+            logger.warning(
+                f"Encryption of output files in {self.output_subfolder} was not "
+                f"fully successful ({stats['failed']} of {stats['files']} files failed)"
+            )
+
+    def cleanup(self) -> None:
+        """Release the resources held for the encode."""
+        if self.key_rotator is not None:
+            self.key_rotator.cleanup()
+
+    @staticmethod
+    def describe_failure(ffmpeg_log: FFmpegLog, returncode: int, progress=None) -> str:
+        """
+        Build the error message of a failed FFmpeg run.
+
+        Args:
+            ffmpeg_log: Log captured from the run
+            returncode: Exit code of the FFmpeg process
+            progress: Last FFmpegProgress of the run (optional)
+
+        Returns:
+            str: One-line summary followed by the end of the log
+        """
+        failure = ffmpeg_log.failure_details(returncode, progress)
+        error_message = ffmpeg_log.failure_message(returncode)
+        if failure["last_progress_time"] is not None:
+            error_message += f" (last progress at {failure['last_progress_time']:.2f}s)"
+        return "\n".join([error_message, failure["error_message"]]).strip()
@@ -1032,6 +1032,36 @@ class ConfigManager:
         if hasattr(args, "no_audio") and args.no_audio:
             self.set("ffmpeg_params.include_audio", False)
 
+        if hasattr(args, "scaling_mode") and args.scaling_mode:
+            self.set("ffmpeg_params.scaling_mode", args.scaling_mode)
+
+        if hasattr(args, "audio_mode") and args.audio_mode:
+            self.set("ffmpeg_params.audio_mode", args.audio_mode)
+
+        if hasattr(args, "progressive_publish") and args.progressive_publish:
+            self.set("ffmpeg_params.progressive_publish", True)
+
+        if hasattr(args, "hls_encryption") and args.hls_encryption:
+            self.set("ffmpeg_params.hls_encryption", args.hls_encryption)
+
+        if hasattr(args, "hls_key_rotation") and args.hls_key_rotation is not None:
+            self.set("ffmpeg_params.hls_key_rotation", args.hls_key_rotation)
+
+        if hasattr(args, "hls_key_uri") and args.hls_key_uri is not None:
+            self.set("ffmpeg_params.hls_key_uri", args.hls_key_uri)
+
+        if hasattr(args, "hls_key_dir") and args.hls_key_dir is not None:
+            self.set("ffmpeg_params.hls_key_dir", args.hls_key_dir)
+
+        if hasattr(args, "chunked_encoding") and args.chunked_encoding:
+            self.set("ffmpeg_params.chunked_encoding", True)
+
+        if hasattr(args, "chunk_duration") and args.chunk_duration is not None:
+            self.set("ffmpeg_params.chunk_duration", args.chunk_duration)
+
+        if hasattr(args, "chunk_workers") and args.chunk_workers is not None:
+            self.set("ffmpeg_params.chunk_workers", args.chunk_workers)
+
         if hasattr(args, "parallel") and args.parallel is not None:
             self.set("max_parallel_jobs", args.parallel)
 
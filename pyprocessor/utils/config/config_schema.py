@@ -166,6 +166,110 @@ class ConfigSchema:
                             "type": ConfigValueType.STRING,
                         },
                     },
+                    "scaling_mode": {
+                        "type": ConfigValueType.ENUM,
+                        "default": "parallel",
+                        "description": "Filter graph layout for the rendition ladder "
+                        "(parallel scales every rung from the source, cascade scales "
+                        "each rung from the one above it)",
+                        "enum": ["parallel", "cascade"],
+                        "env_var": "PYPROCESSOR_SCALING_MODE",
+                    },
+                    "audio_mode": {
+                        "type": ConfigValueType.ENUM,
+                        "default": "muxed",
+                        "description": "Audio layout (muxed into every video variant, "
+                        "or group to encode audio once into an HLS audio rendition "
+                        "group shared by every variant)",
+                        "enum": ["muxed", "group"],
+                        "env_var": "PYPROCESSOR_AUDIO_MODE",
+                    },
+                    "audio_group_renditions": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 1,
+                        "description": "Audio renditions in the shared group of "
+                        "group audio mode, taken from the start of audio_bitrates",
+                        "min": 1,
+                        "env_var": "PYPROCESSOR_AUDIO_GROUP_RENDITIONS",
+                    },
+                    "scaler_flags": {
+                        "type": ConfigValueType.OBJECT,
+                        "default": {},
+                        "description": "Scaler algorithm per resolution "
+                        "(e.g. fast_bilinear for the low rungs)",
+                    },
+                    "progressive_publish": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Move each HLS segment to the output folder "
+                        "as soon as FFmpeg closes it, publishing playlists last "
+                        "(FFmpegEncoder.encode_video only; process_videos writes "
+                        "into the output folder directly)",
+                        "env_var": "PYPROCESSOR_PROGRESSIVE_PUBLISH",
+                    },
+                    "hls_encryption": {
+                        "type": ConfigValueType.ENUM,
+                        "default": "none",
+                        "description": "Encrypt HLS segments while encoding "
+                        "(aes-128 uses FFmpeg's HLS muxer with keys issued by the "
+                        "EncryptionManager)",
+                        "enum": ["none", "aes-128"],
+                        "env_var": "PYPROCESSOR_HLS_ENCRYPTION",
+                    },
+                    "hls_key_rotation": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "Issue a new HLS key every N segments "
+                        "(0 uses one key per file)",
+                        "min": 0,
+                        "env_var": "PYPROCESSOR_HLS_KEY_ROTATION",
+                    },
+                    "hls_key_uri": {
+                        "type": ConfigValueType.STRING,
+                        "default": "",
+                        "description": "Base URI of a key server for HLS keys "
+                        "(keys are published with the output if empty)",
+                        "env_var": "PYPROCESSOR_HLS_KEY_URI",
+                    },
+                    "hls_key_dir": {
+                        "type": ConfigValueType.STRING,
+                        "default": "",
+                        "description": "Folder HLS keys are written to for the key "
+                        "server when hls_key_uri is set (security/hls_keys in the "
+                        "user data directory if empty)",
+                        "env_var": "PYPROCESSOR_HLS_KEY_DIR",
+                    },
+                    "chunked_encoding": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Split long titles into keyframe-aligned "
+                        "chunks, encode them concurrently and stitch the playlists",
+                        "env_var": "PYPROCESSOR_CHUNKED_ENCODING",
+                    },
+                    "chunk_duration": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 120,
+                        "description": "Target chunk length in seconds",
+                        "min": 10,
+                        "env_var": "PYPROCESSOR_CHUNK_DURATION",
+                    },
+                    "chunk_min_duration": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 600,
+                        "description": "Minimum source duration in seconds for "
+                        "chunked encoding",
+                        "min": 0,
+                    },
+                    "chunk_workers": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "Chunks of a title encoded at the same "
+                        "time (0 uses the title's thread share, or its part of the "
+                        "CPUs when several files are encoded at once)",
+                        "min": 0,
+                        "max": 64,
+                        "env_var": "PYPROCESSOR_CHUNK_WORKERS",
+                    },
                 },
             },
             "max_parallel_jobs": {
@@ -176,6 +280,14 @@ class ConfigSchema:
                 "max": 32,
                 "env_var": "PYPROCESSOR_MAX_PARALLEL_JOBS",
             },
+            "file_ordering": {
+                "type": ConfigValueType.ENUM,
+                "default": "fifo",
+                "description": "Order in which files are started (lpt starts the "
+                "longest first, spt the shortest first, fifo keeps directory order)",
+                "enum": ["lpt", "spt", "fifo"],
+                "env_var": "PYPROCESSOR_FILE_ORDERING",
+            },
             "batch_processing": {
                 "type": ConfigValueType.OBJECT,
                 "description": "Batch processing settings",
@@ -203,6 +315,174 @@ class ConfigSchema:
                         "max": 95,
                         "env_var": "PYPROCESSOR_MAX_MEMORY_PERCENT",
                     },
+                    "streaming": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Pull files from one queue for the whole run "
+                        "(batch_size only limits concurrency) instead of waiting for "
+                        "each batch to finish",
+                        "env_var": "PYPROCESSOR_BATCH_STREAMING",
+                    },
+                    "engine": {
+                        "type": ConfigValueType.ENUM,
+                        "default": "threads",
+                        "description": "How batch encodes are supervised (async runs "
+                        "every FFmpeg process from one event loop, threads uses one "
+                        "thread per file)",
+                        "enum": ["async", "threads"],
+                        "env_var": "PYPROCESSOR_BATCH_ENGINE",
+                    },
+                    "encode_timeout": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "Seconds an FFmpeg process may run before "
+                        "it is killed (0 for no limit; with the threads engine and "
+                        "in individual mode, the limit is per file)",
+                        "min": 0,
+                        "env_var": "PYPROCESSOR_ENCODE_TIMEOUT",
+                    },
+                    "stall_timeout": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "Seconds an encode may go without progress "
+                        "before the watchdog kills its FFmpeg process (0 to "
+                        "disable)",
+                        "min": 0,
+                        "env_var": "PYPROCESSOR_STALL_TIMEOUT",
+                    },
+                    "encode_retries": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "How many times an encode is started again "
+                        "after its FFmpeg process was killed for a timeout or a stall",
+                        "min": 0,
+                        "env_var": "PYPROCESSOR_ENCODE_RETRIES",
+                    },
+                    "thread_budget": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Split encode_threads across the concurrent "
+                        "encodes and set each FFmpeg process's encoder and filter "
+                        "threads, instead of letting every process use all cores",
+                        "env_var": "PYPROCESSOR_THREAD_BUDGET",
+                    },
+                    "encode_threads": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "Threads shared by the concurrent encodes "
+                        "(0 for the CPU count)",
+                        "min": 0,
+                        "env_var": "PYPROCESSOR_ENCODE_THREADS",
+                    },
+                    "cpu_placement": {
+                        "type": ConfigValueType.ENUM,
+                        "default": "off",
+                        "description": "Pin each encode to a NUMA node (node) or to "
+                        "as many CPUs of a node as it has threads (cores)",
+                        "enum": ["off", "node", "cores"],
+                        "env_var": "PYPROCESSOR_CPU_PLACEMENT",
+                    },
+                    "adaptive_concurrency": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Raise or lower the number of concurrent "
+                        "encodes during the run from CPU, memory and iowait usage",
+                        "env_var": "PYPROCESSOR_ADAPTIVE_CONCURRENCY",
+                    },
+                    "max_concurrency": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "Most concurrent encodes adaptive "
+                        "concurrency may open (0 for the CPU count)",
+                        "min": 0,
+                        "env_var": "PYPROCESSOR_MAX_CONCURRENCY",
+                    },
+                    "target_cpu_percent": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 85,
+                        "description": "CPU utilization below which adaptive "
+                        "concurrency adds encodes",
+                        "min": 10,
+                        "max": 100,
+                        "env_var": "PYPROCESSOR_TARGET_CPU_PERCENT",
+                    },
+                    "max_iowait_percent": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 20,
+                        "description": "iowait above which adaptive concurrency "
+                        "removes encodes",
+                        "min": 1,
+                        "max": 100,
+                        "env_var": "PYPROCESSOR_MAX_IOWAIT_PERCENT",
+                    },
+                    "adaptive_interval": {
+                        "type": ConfigValueType.FLOAT,
+                        "default": 5.0,
+                        "description": "Seconds between adaptive concurrency "
+                        "decisions",
+                        "min": 1.0,
+                        "env_var": "PYPROCESSOR_ADAPTIVE_INTERVAL",
+                    },
+                    "resource_admission": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "In individual process mode, start a file "
+                        "only when its estimated memory, CPU and disk fit the "
+                        "capacity left on the host",
+                        "env_var": "PYPROCESSOR_RESOURCE_ADMISSION",
+                    },
+                    "preemption": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "In individual process mode, pause the "
+                        "lowest-priority running encode (SIGSTOP) when a file of "
+                        "higher priority is waiting for a slot",
+                        "env_var": "PYPROCESSOR_PREEMPTION",
+                    },
+                    "pause_memory_percent": {
+                        "type": ConfigValueType.INTEGER,
+                        "default": 0,
+                        "description": "In individual process mode, memory usage "
+                        "percentage at which running encodes are paused until it "
+                        "falls below max_memory_percent (0 to disable)",
+                        "min": 0,
+                        "max": 100,
+                        "env_var": "PYPROCESSOR_PAUSE_MEMORY_PERCENT",
+                    },
+                    "warm_pool": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "In individual process mode, start the "
+                        "worker processes with the encode path imported before "
+                        "the first file, and keep them for later runs in the "
+                        "same process",
+                        "env_var": "PYPROCESSOR_WARM_POOL",
+                    },
+                    "pool_start_method": {
+                        "type": ConfigValueType.ENUM,
+                        "default": "forkserver",
+                        "description": "How the workers of the warm pool are "
+                        "started (spawn where forkserver is not available)",
+                        "enum": ["forkserver", "spawn"],
+                        "env_var": "PYPROCESSOR_POOL_START_METHOD",
+                    },
+                    "journal": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Record the queued, started and completed "
+                        "files of each run in a journal under the application "
+                        "data directory, so an interrupted run can be resumed",
+                        "env_var": "PYPROCESSOR_JOURNAL",
+                    },
+                    "resume": {
+                        "type": ConfigValueType.BOOLEAN,
+                        "default": False,
+                        "description": "Continue the last run of the same input "
+                        "and output folders: skip the files it completed and "
+                        "process the others again (records the run in the "
+                        "journal even if it is disabled)",
+                        "env_var": "PYPROCESSOR_RESUME",
+                    },
                 },
             },
             "auto_rename_files": {
@@ -445,6 +725,16 @@ class ConfigSchema:
                                 "max": 1000000,
                                 "env_var": "PYPROCESSOR_PBKDF2_ITERATIONS",
                             },
+                            "workers": {
+                                "type": ConfigValueType.INTEGER,
+                                "default": 0,
+                                "description": "Number of threads used to encrypt output "
+                                "files (0 uses one per CPU), split across the files "
+                                "processed at the same time",
+                                "min": 0,
+                                "max": 64,
+                                "env_var": "PYPROCESSOR_ENCRYPTION_WORKERS",
+                            },
                         },
                     },
                 },
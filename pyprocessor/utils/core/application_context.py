@@ -140,6 +140,9 @@ class ApplicationContext:
         # Use the apply_args method from the Config class
         self.config.apply_args(args)
 
+        if hasattr(args, "order") and args.order:
+            self.config.config_manager.set("file_ordering", args.order)
+
         # Handle batch processing options
         if hasattr(args, "batch_mode") and args.batch_mode:
             if args.batch_mode == "enabled":
@@ -157,6 +160,89 @@ class ApplicationContext:
                 "batch_processing.max_memory_percent", args.max_memory
             )
 
+        if hasattr(args, "batch_streaming") and args.batch_streaming:
+            self.config.config_manager.set(
+                "batch_processing.streaming", args.batch_streaming == "enabled"
+            )
+
+        if hasattr(args, "engine") and args.engine:
+            self.config.config_manager.set("batch_processing.engine", args.engine)
+
+        if hasattr(args, "encode_timeout") and args.encode_timeout is not None:
+            self.config.config_manager.set(
+                "batch_processing.encode_timeout", args.encode_timeout
+            )
+
+        if hasattr(args, "stall_timeout") and args.stall_timeout is not None:
+            self.config.config_manager.set(
+                "batch_processing.stall_timeout", args.stall_timeout
+            )
+
+        if hasattr(args, "encode_retries") and args.encode_retries is not None:
+            self.config.config_manager.set(
+                "batch_processing.encode_retries", args.encode_retries
+            )
+
+        if hasattr(args, "thread_budget") and args.thread_budget:
+            self.config.config_manager.set(
+                "batch_processing.thread_budget", args.thread_budget == "enabled"
+            )
+
+        if hasattr(args, "encode_threads") and args.encode_threads is not None:
+            self.config.config_manager.set(
+                "batch_processing.encode_threads", args.encode_threads
+            )
+
+        if hasattr(args, "cpu_placement") and args.cpu_placement:
+            self.config.config_manager.set(
+                "batch_processing.cpu_placement", args.cpu_placement
+            )
+
+        if hasattr(args, "adaptive_concurrency") and args.adaptive_concurrency:
+            self.config.config_manager.set(
+                "batch_processing.adaptive_concurrency",
+                args.adaptive_concurrency == "enabled",
+            )
+
+        if hasattr(args, "max_concurrency") and args.max_concurrency is not None:
+            self.config.config_manager.set(
+                "batch_processing.max_concurrency", args.max_concurrency
+            )
+
+        if hasattr(args, "target_cpu") and args.target_cpu is not None:
+            self.config.config_manager.set(
+                "batch_processing.target_cpu_percent", args.target_cpu
+            )
+
+        if hasattr(args, "resource_admission") and args.resource_admission:
+            self.config.config_manager.set(
+                "batch_processing.resource_admission",
+                args.resource_admission == "enabled",
+            )
+
+        if hasattr(args, "preemption") and args.preemption:
+            self.config.config_manager.set(
+                "batch_processing.preemption", args.preemption == "enabled"
+            )
+
+        if hasattr(args, "pause_memory") and args.pause_memory is not None:
+            self.config.config_manager.set(
+                "batch_processing.pause_memory_percent", args.pause_memory
+            )
+
+        if hasattr(args, "warm_pool") and args.warm_pool:
+            self.config.config_manager.set(
+                "batch_processing.warm_pool", args.warm_pool == "enabled"
+            )
+
+        if hasattr(args, "journal") and args.journal:
+            self.config.config_manager.set(
+                "batch_processing.journal", args.journal == "enabled"
+            )
+
+        if hasattr(args, "resume") and args.resume:
+            self.config.config_manager.set("batch_processing.resume", True)
+
         # Handle server optimization options
         if hasattr(args, "optimize_server") and args.optimize_server:
             # Set server optimization enabled and type
@@ -227,6 +313,11 @@ class ApplicationContext:
                 "security.encryption.key_id", args.encryption_key
             )
 
+        if hasattr(args, "encryption_workers") and args.encryption_workers is not None:
+            self.config.config_manager.set(
+                "security.encryption.workers", args.encryption_workers
+            )
+
     def _register_signal_handlers(self):
         """Register signal handlers for clean shutdown."""
         signal.signal(signal.SIGINT, self._signal_handler)  # Ctrl+C
@@ -17,8 +17,11 @@ from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
-from pyprocessor.utils.log_manager import get_logger
-from pyprocessor.utils.path_manager import ensure_dir_exists, get_user_cache_dir
+from pyprocessor.utils.logging.log_manager import get_logger
+from pyprocessor.utils.file_system.path_manager import (
+    ensure_dir_exists,
+    get_user_cache_dir,
+)
 
 
 class CacheBackend(Enum):
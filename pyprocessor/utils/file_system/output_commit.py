@@ -0,0 +1,310 @@
+"""
+Output commit utilities for PyProcessor.
+
+Encoders write into a staging directory and then commit it to the final output
+folder. Committing avoids rewriting the encoded data wherever the filesystem
+allows it, trying these strategies in order:
+
+1. rename   - atomic rename of the whole staging directory (same filesystem,
+              output folder absent or empty)
+2. hardlink - link each file into place (same filesystem)
+3. reflink  - copy-on-write clone via the FICLONE ioctl (Btrfs, XFS, ...)
+4. copy     - parallel in-kernel copy with copy_file_range where available
+
+The strategy that was actually used is reported in the CommitResult.
+"""
+
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; reflinks are skipped
+    fcntl = None
+
+# Strategies from cheapest to most expensive
+COMMIT_STRATEGIES = ["rename", "hardlink", "reflink", "copy"]
+
+# Linux ioctl request number for FICLONE (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Bytes per copy_file_range call
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Errors that mean a strategy is unsupported here rather than a real failure
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.ENOSYS,
+    errno.EBADF,
+    errno.ENOTTY,
+}
+
+
+def _read_umask() -> int:
+    """Read the process umask (os.umask can only be read by setting it)."""
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Read once at import, before worker threads start creating files
+UMASK = _read_umask()
+
+
+class CommitResult:
+    """
+    Result of committing a staging directory to its output folder.
+    """
+
+    def __init__(self, source: Path, destination: Path):
+        """
+        Initialize a commit result.
+
+        Args:
+            source: Staging directory
+            destination: Output folder
+        """
+        self.source = source
+        self.destination = destination
+        self.strategy = None
+        self.files = 0
+        self.bytes = 0
+        self.duration = 0.0
+        self.strategy_counts: Dict[str, int] = {}
+
+    def record(self, strategy: str, size: int) -> None:
+        """
+        Record a committed file.
+
+        Args:
+            strategy: Strategy used for the file
+            size: File size in bytes
+        """
+        self.files += 1
+        self.bytes += size
+        self.strategy_counts[strategy] = self.strategy_counts.get(strategy, 0) + 1
+
+        # Report the most expensive strategy that had to be used
+        if self.strategy is None or COMMIT_STRATEGIES.index(
+            strategy
+        ) > COMMIT_STRATEGIES.index(self.strategy):
+            self.strategy = strategy
+
+    @property
+    def copied_bytes(self) -> int:
+        """Get the number of bytes that were physically rewritten."""
+        return self.bytes if self.strategy == "copy" else 0
+
+    def to_dict(self) -> Dict:
+        """
+        Convert the result to a dictionary.
+
+        Returns:
+            Dict: Commit information
+        """
+        return {
+            "source": str(self.source),
+            "destination": str(self.destination),
+            "strategy": self.strategy,
+            "strategy_counts": dict(self.strategy_counts),
+            "files": self.files,
+            "bytes": self.bytes,
+            "duration": self.duration,
+        }
+
+
+def _is_unsupported(error: OSError) -> bool:
+    """Check if an OSError means the strategy is not available here."""
+    return error.errno in UNSUPPORTED_ERRNOS
+
+
+def _same_filesystem(source: Path, destination: Path) -> bool:
+    """Check if a path and the (possibly not yet created) destination share a device."""
+    target = destination
+    while not target.exists():
+        if target.parent == target:
+            return False
+        target = target.parent
+    return os.stat(source).st_dev == os.stat(target).st_dev
+
+
+def _try_rename_directory(source: Path, destination: Path) -> bool:
+    """
+    Rename the staging directory into place.
+
+    Returns:
+        bool: True if the directory was renamed
+    """
+    if destination.exists():
+        if not destination.is_dir() or any(destination.iterdir()):
+            return False
+        destination.rmdir()
+    else:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+    # Staging directories come from mkdtemp (mode 0700); give the committed
+    # folder the mode a plain mkdir would have
+    os.chmod(source, 0o777 & ~UMASK)
+
+    try:
+        os.rename(source, destination)
+        return True
+    except OSError as e:
+        if not _is_unsupported(e) and e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
+        destination.mkdir(parents=True, exist_ok=True)
+        return False
+
+
+def _hardlink_file(source: Path, destination: Path) -> None:
+    """Hard link a file into place."""
+    temp_path = destination.with_name(f".{destination.name}.commit")
+    if temp_path.exists():
+        temp_path.unlink()
+    os.link(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+def _reflink_file(source: Path, destination: Path) -> None:
+    """Clone a file into place with the FICLONE ioctl."""
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "Reflinks are not supported on this platform")
+
+    temp_path = destination.with_name(f".{destination.name}.commit")
+    try:
+        with open(source, "rb") as src, open(temp_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    shutil.copystat(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+def _copy_file(source: Path, destination: Path) -> None:
+    """Copy a file into place, in-kernel when copy_file_range is available."""
+    temp_path = destination.with_name(f".{destination.name}.commit")
+    try:
+        with open(source, "rb") as src, open(temp_path, "wb") as dst:
+            copied = False
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while os.copy_file_range(
+                        src.fileno(), dst.fileno(), COPY_CHUNK_SIZE
+                    ):
+                        pass
+                    copied = True
+                except OSError as e:
+                    if not _is_unsupported(e):
+                        raise
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+            if not copied:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+    except OSError:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    shutil.copystat(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+_FILE_STRATEGIES = [
+    ("hardlink", _hardlink_file),
+    ("reflink", _reflink_file),
+    ("copy", _copy_file),
+]
+
+
+def _collect_files(source: Path, destination: Path) -> List[Tuple[Path, Path]]:
+    """List (source, destination) file pairs, creating destination directories."""
+    pairs = []
+    for item in source.glob("**/*"):
+        dest_path = destination / item.relative_to(source)
+        if item.is_dir():
+            dest_path.mkdir(parents=True, exist_ok=True)
+        elif item.is_file():
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            pairs.append((item, dest_path))
+    return pairs
+
+
+def commit_directory(
+    source: Union[str, Path],
+    destination: Union[str, Path],
+    max_workers: Optional[int] = None,
+) -> CommitResult:
+    """
+    Commit a staging directory to the output folder.
+
+    After a "rename" commit the staging directory no longer exists; after the
+    other strategies it still holds the original files and can be removed.
+
+    Args:
+        source: Staging directory holding the finished output
+        destination: Final output folder
+        max_workers: Threads used for the per-file strategies (default: CPU count)
+
+    Returns:
+        CommitResult: The strategy used and the amount of data committed
+
+    Raises:
+        OSError: If a file could not be committed with any strategy
+    """
+    source = Path(source)
+    destination = Path(destination)
+    result = CommitResult(source, destination)
+    start_time = time.time()
+
+    if _same_filesystem(source, destination):
+        sizes = [p.stat().st_size for p in source.glob("**/*") if p.is_file()]
+        if _try_rename_directory(source, destination):
+            for size in sizes:
+                result.record("rename", size)
+            result.strategy = "rename"
+            result.duration = time.time() - start_time
+            return result
+
+    pairs = _collect_files(source, destination)
+
+    # Strategies that failed as unsupported are skipped for the remaining files
+    first_strategy = [0]
+
+    def commit_file(pair: Tuple[Path, Path]) -> Tuple[str, int]:
+        src, dst = pair
+        size = src.stat().st_size
+        for index in range(first_strategy[0], len(_FILE_STRATEGIES)):
+            name, func = _FILE_STRATEGIES[index]
+            try:
+                func(src, dst)
+                return name, size
+            except OSError as e:
+                if index == len(_FILE_STRATEGIES) - 1 or not _is_unsupported(e):
+                    raise
+                first_strategy[0] = max(first_strategy[0], index + 1)
+        raise OSError(errno.EIO, f"Could not commit {src}")
+
+    if pairs:
+        # Settle on a working strategy with the first file before fanning out
+        strategy, size = commit_file(pairs[0])
+        result.record(strategy, size)
+
+        workers = max_workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for strategy, size in executor.map(commit_file, pairs[1:]):
+                result.record(strategy, size)
+
+    result.duration = time.time() - start_time
+    return result
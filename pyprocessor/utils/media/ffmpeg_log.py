@@ -0,0 +1,127 @@
+"""
+Bounded capture of FFmpeg's log output for PyProcessor.
+
+FFmpeg writes its log to stderr. The pipe has to be emptied while an encode
+runs, or FFmpeg blocks once the pipe buffer is full, but keeping the whole log
+for a long encode costs megabytes per job. FFmpegLog reads stderr on a
+background thread and keeps only:
+
+- the last N lines in a ring buffer
+- the first line that looks like an error
+- the number of lines seen
+
+Together with the exit code and the last progress timestamp, these are the
+structured facts reported when an encode fails.
+"""
+
+import re
+import threading
+from collections import deque
+from typing import Any, BinaryIO, Dict, List, Optional
+
+# Lines kept from the end of the log
+STDERR_TAIL_LINES = 50
+
+# Log lines that describe a failure
+ERROR_LINE_REGEX = re.compile(
+    r"error|invalid|failed|no such file|not found|unable to|cannot|could not"
+    r"|permission denied|unrecognized|unknown encoder|does not support",
+    re.IGNORECASE,
+)
+
+
+class FFmpegLog:
+    """
+    Ring buffer of FFmpeg's stderr with the facts needed to report a failure.
+    """
+
+    def __init__(self, max_lines: int = STDERR_TAIL_LINES):
+        """
+        Initialize the log capture.
+
+        Args:
+            max_lines: Number of lines kept from the end of the log
+        """
+        self.lines = deque(maxlen=max_lines)
+        self.line_count = 0
+        self.first_error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def add_line(self, line: str) -> None:
+        """
+        Record a log line.
+
+        Args:
+            line: Line without its line ending
+        """
+        if not line:
+            return
+        self.lines.append(line)
+        self.line_count += 1
+        if self.first_error is None and ERROR_LINE_REGEX.search(line):
+            self.first_error = line
+
+    def start(self, stream: BinaryIO) -> None:
+        """
+        Read a binary pipe in a background thread until it is closed.
+
+        Args:
+            stream: stderr pipe of the FFmpeg process
+        """
+
+        def reader():
+            for line in stream:
+                self.add_line(line.decode("utf-8", "replace").rstrip())
+
+        self._thread = threading.Thread(target=reader, name="FFmpegLog", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for the reader thread to reach the end of the pipe."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def tail(self) -> List[str]:
+        """Get the buffered lines, oldest first."""
+        return list(self.lines)
+
+    def failure_message(self, returncode: int) -> str:
+        """
+        Summarize a failed run in one line.
+
+        Args:
+            returncode: Exit code of the FFmpeg process
+
+        Returns:
+            str: The first error line (or the last log line) and the exit code
+        """
+        reason = self.first_error or (self.lines[-1] if self.lines else None)
+        if reason:
+            return f"FFmpeg exited with code {returncode}: {reason}"
+        return f"FFmpeg exited with code {returncode}"
+
+    def failure_details(self, returncode: int, progress=None) -> Dict[str, Any]:
+        """
+        Collect the structured facts about a failed run.
+
+        Args:
+            returncode: Exit code of the FFmpeg process
+            progress: Last FFmpegProgress of the run (optional)
+
+        Returns:
+            Dict[str, Any]: Exit code, first error line, last progress
+            timestamp and the buffered end of the log
+        """
+        details = {
+            "returncode": returncode,
+            "first_error": self.first_error,
+            "last_progress_time": None,
+            "last_frame": None,
+            "stderr_lines": self.line_count,
+            "error_message": "\n".join(self.lines),
+        }
+        if progress is not None and progress.updates:
+            details["last_progress_time"] = progress.out_time
+            details["last_frame"] = progress.frame
+        return details
@@ -8,7 +8,6 @@ and executing FFmpeg commands.
 
 import os  # Keep os for chmod and other operations
 import platform
-import re
 import subprocess
 import sys
 import tarfile
@@ -37,6 +36,15 @@ from pyprocessor.utils.logging.error_manager import (
     ValidationError,
     with_error_handling,
 )
+from pyprocessor.utils.media.ffmpeg_log import FFmpegLog
+from pyprocessor.utils.media.ffmpeg_progress import (
+    FFmpegProgress,
+    ProgressParser,
+    add_progress_args,
+    get_command_duration,
+    read_progress,
+)
+from pyprocessor.utils.media.probe_manager import ProbeResult, probe_file
 
 
 class FFmpegManager:
@@ -61,6 +69,8 @@ class FFmpegManager:
         self.logger = logger
         self.process = None
         self.encoding_progress = 0
+        self.last_progress = None
+        self.last_failure = None
         self.file_manager = get_file_manager()
 
         # If logger is a function, create a wrapper
@@ -357,68 +367,39 @@ class FFmpegManager:
         return dependency_check_ffmpeg()
 
     @with_error_handling
-    def has_audio(self, file_path: Union[str, Path]) -> bool:
+    def probe(self, file_path: Union[str, Path]) -> ProbeResult:
         """
-        Check if the video file has audio streams.
+        Probe a media file once and return the shared, cached result.
 
         Args:
-            file_path: Path to the video file
+            file_path: Path to the media file
 
         Returns:
-            bool: True if the file has audio streams, False otherwise
+            ProbeResult: Parsed FFprobe output for the file
 
         Raises:
             FileSystemError: If the file does not exist
             ProcessError: If FFprobe fails to analyze the file
+            EncodingError: If the JSON output cannot be parsed
         """
-        # Convert to string and check if file exists
-        file_path_str = str(file_path)
-        if not file_exists(file_path_str):
-            raise FileSystemError(
-                f"File not found: {file_path_str}",
-                severity=ErrorSeverity.ERROR,
-                details={"file_path": file_path_str},
-            )
+        return probe_file(file_path)
 
-        try:
-            ffprobe_path = self.get_ffprobe_path()
-            result = subprocess.run(
-                [
-                    ffprobe_path,
-                    "-i",
-                    file_path_str,
-                    "-show_streams",
-                    "-select_streams",
-                    "a",
-                    "-loglevel",
-                    "error",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=10,
-            )
+    @with_error_handling
+    def has_audio(self, file_path: Union[str, Path]) -> bool:
+        """
+        Check if the video file has audio streams.
 
-            if result.returncode != 0:
-                raise ProcessError(
-                    f"FFprobe failed to analyze audio streams with return code {result.returncode}",
-                    severity=ErrorSeverity.ERROR,
-                    details={
-                        "file_path": file_path_str,
-                        "stderr": result.stderr,
-                        "returncode": result.returncode,
-                    },
-                )
+        Args:
+            file_path: Path to the video file
 
-            return bool(result.stdout.strip())
+        Returns:
+            bool: True if the file has audio streams, False otherwise
 
-        except subprocess.SubprocessError as e:
-            raise ProcessError(
-                f"Error checking audio streams: {str(e)}",
-                severity=ErrorSeverity.ERROR,
-                original_exception=e,
-                details={"file_path": file_path_str},
-            )
+        Raises:
+            FileSystemError: If the file does not exist
+            ProcessError: If FFprobe fails to analyze the file
+        """
+        return self.probe(file_path).has_audio
 
     @with_error_handling
     def get_video_info(self, file_path: Union[str, Path]) -> Dict[str, Any]:
@@ -436,64 +417,7 @@ class FFmpegManager:
             ProcessError: If FFprobe fails to analyze the file
             EncodingError: If the JSON output cannot be parsed
         """
-        # Convert to string and check if file exists
-        file_path_str = str(file_path)
-        if not file_exists(file_path_str):
-            raise FileSystemError(
-                f"File not found: {file_path_str}",
-                severity=ErrorSeverity.ERROR,
-                details={"file_path": file_path_str},
-            )
-
-        try:
-            ffprobe_path = self.get_ffprobe_path()
-            result = subprocess.run(
-                [
-                    ffprobe_path,
-                    "-v",
-                    "quiet",
-                    "-print_format",
-                    "json",
-                    "-show_format",
-                    "-show_streams",
-                    file_path_str,
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=10,
-            )
-
-            if result.returncode != 0:
-                raise ProcessError(
-                    f"FFprobe failed to analyze video with return code {result.returncode}",
-                    severity=ErrorSeverity.ERROR,
-                    details={
-                        "file_path": file_path_str,
-                        "stderr": result.stderr,
-                        "returncode": result.returncode,
-                    },
-                )
-
-            try:
-                import json
-
-                return json.loads(result.stdout)
-            except json.JSONDecodeError as e:
-                raise EncodingError(
-                    f"Failed to parse FFprobe JSON output: {str(e)}",
-                    severity=ErrorSeverity.ERROR,
-                    original_exception=e,
-                    details={"file_path": file_path_str, "stdout": result.stdout},
-                )
-
-        except subprocess.SubprocessError as e:
-            raise ProcessError(
-                f"Error running FFprobe: {str(e)}",
-                severity=ErrorSeverity.ERROR,
-                original_exception=e,
-                details={"file_path": file_path_str},
-            )
+        return self.probe(file_path).info
 
     def get_ffmpeg_download_url(self):
         """
@@ -829,15 +753,21 @@ These binaries are included for convenience and are not modified in any way from
         input_file: Optional[Union[str, Path]] = None,
         output_folder: Optional[Union[str, Path]] = None,
         progress_callback: Optional[Callable[[Union[str, Path], int], None]] = None,
+        stats_callback: Optional[Callable[[FFmpegProgress], None]] = None,
     ) -> bool:
         """
         Execute an FFmpeg command with progress monitoring.
 
+        Progress is read from ``-progress pipe:1`` rather than parsed from the
+        log on stderr. Callbacks fire at most every PROGRESS_INTERVAL seconds.
+
         Args:
             cmd: FFmpeg command to execute
             input_file: Input file path (for progress reporting)
             output_folder: Output folder path
             progress_callback: Callback function for progress updates
+            stats_callback: Callback receiving the FFmpegProgress (frame, fps,
+                bitrate, speed, out_time) with each update
 
         Returns:
             bool: True if command execution was successful
@@ -846,80 +776,61 @@ These binaries are included for convenience and are not modified in any way from
             ProcessError: If the FFmpeg process fails to start or returns an error
             EncodingError: If there's an error during the encoding process
         """
+        cmd = add_progress_args(cmd)
         self.log("debug", f"Executing: {' '.join(cmd)}")
 
         # Convert input file to string if provided
         input_file_str = str(input_file) if input_file else None
 
+        def on_progress(progress: FFmpegProgress) -> None:
+            self.last_progress = progress
+            if progress.percent is not None:
+                self.encoding_progress = progress.percent
+                if progress_callback and input_file_str:
+                    progress_callback(input_file_str, progress.percent)
+            if stats_callback:
+                stats_callback(progress)
+
+        self.last_failure = None
         try:
+            parser = ProgressParser(get_command_duration(cmd), on_progress)
+
             # Execute FFmpeg
             self.process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                universal_newlines=True,
-                bufsize=1,  # Line buffered
             )
 
-            # Process stderr in real-time to extract progress
-            duration_regex = re.compile(r"Duration: (\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-            time_regex = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
-            duration_seconds = 0
-            error_lines = []
-
-            # Parse output in real-time
-            for line in self.process.stderr:
-                # Store error lines for potential error reporting
-                error_lines.append(line.strip())
-
-                # Check for duration information
-                duration_match = duration_regex.search(line)
-                if duration_match and duration_seconds == 0:
-                    hours, minutes, seconds, centiseconds = map(
-                        int, duration_match.groups()
-                    )
-                    duration_seconds = (
-                        hours * 3600 + minutes * 60 + seconds + centiseconds / 100
-                    )
-                    self.log("debug", f"Video duration: {duration_seconds:.2f} seconds")
+            # Only the end of the log on stderr is kept, for error reporting
+            ffmpeg_log = FFmpegLog()
+            ffmpeg_log.start(self.process.stderr)
 
-                # Check for progress information
-                time_match = time_regex.search(line)
-                if time_match and duration_seconds > 0:
-                    hours, minutes, seconds, centiseconds = map(
-                        int, time_match.groups()
-                    )
-                    current_seconds = (
-                        hours * 3600 + minutes * 60 + seconds + centiseconds / 100
-                    )
-                    progress = min(int((current_seconds / duration_seconds) * 100), 100)
-                    self.encoding_progress = progress
-
-                    # Call progress callback if provided
-                    if progress_callback and input_file_str:
-                        progress_callback(input_file_str, progress)
-
-                # Log FFmpeg output
-                self.log("debug", line.strip())
+            progress = read_progress(self.process.stdout, parser)
 
             # Wait for process to complete
             self.process.wait()
+            ffmpeg_log.join()
+
+            if progress.speed is not None:
+                self.log(
+                    "debug",
+                    f"FFmpeg finished: {progress.frame} frames, "
+                    f"{progress.fps:.1f} fps, speed {progress.speed:.2f}x",
+                )
 
             # Check for errors
             if self.process.returncode != 0:
-                error_message = "\n".join(
-                    error_lines[-10:]
-                )  # Last 10 lines of error output
+                self.last_failure = ffmpeg_log.failure_details(
+                    self.process.returncode, progress
+                )
                 raise EncodingError(
-                    f"FFmpeg encoding failed with return code {self.process.returncode}",
+                    ffmpeg_log.failure_message(self.process.returncode),
                     severity=ErrorSeverity.ERROR,
                     details={
                         "command": " ".join(cmd),
                         "input_file": input_file_str,
-                        "returncode": self.process.returncode,
-                        "error_message": error_message,
-                        "full_error": "\n".join(error_lines),
+                        **self.last_failure,
                     },
                 )
 
@@ -1003,3 +914,56 @@ These binaries are included for convenience and are not modified in any way from
 
         # No process was running
         return False
+
+
+# Executable paths located once per process. Locating them checks several
+# install locations, and each command needs them. The name-only fallback is
+# not kept, so a binary downloaded later is still found.
+_executable_paths: Dict[str, str] = {}
+
+
+def get_ffmpeg_path() -> str:
+    """
+    Get the path to the FFmpeg executable, located on first use.
+
+    Returns:
+        str: Path to the FFmpeg executable
+    """
+    path = _executable_paths.get("ffmpeg")
+    if path is None:
+        path = FFmpegManager().get_ffmpeg_path()
+        if path != "ffmpeg":
+            _executable_paths["ffmpeg"] = path
+    return path
+
+
+def get_ffprobe_path() -> str:
+    """
+    Get the path to the FFprobe executable, located on first use.
+
+    Returns:
+        str: Path to the FFprobe executable
+    """
+    path = _executable_paths.get("ffprobe")
+    if path is None:
+        path = FFmpegManager().get_ffprobe_path()
+        if path != "ffprobe":
+            _executable_paths["ffprobe"] = path
+    return path
+
+
+def set_executable_paths(
+    ffmpeg_path: Optional[str] = None, ffprobe_path: Optional[str] = None
+) -> None:
+    """
+    Set the executable paths instead of locating them, for example in a
+    worker process with the paths its parent has located.
+
+    Args:
+        ffmpeg_path: Path to the FFmpeg executable (optional)
+        ffprobe_path: Path to the FFprobe executable (optional)
+    """
+    if ffmpeg_path:
+        _executable_paths["ffmpeg"] = ffmpeg_path
+    if ffprobe_path:
+        _executable_paths["ffprobe"] = ffprobe_path
@@ -0,0 +1,301 @@
+"""
+FFmpeg progress parsing for PyProcessor.
+
+FFmpeg is run with ``-progress pipe:1 -nostats``, which makes it write a block
+of ``key=value`` lines to stdout at every stats update, ending with
+``progress=continue`` (or ``progress=end`` when it is done):
+
+    frame=240
+    fps=59.94
+    bitrate=1543.2kbits/s
+    total_size=1929216
+    out_time_us=10000000
+    speed=2.49x
+    progress=continue
+
+The pipe is read in binary chunks and parsed incrementally, so no per-line
+text decoding or regular expression matching is done on stderr. Each
+completed block updates an FFmpegProgress object, and callbacks are throttled
+to a bounded rate.
+"""
+
+import os
+import time
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+# Minimum seconds between progress callbacks (the final update always fires)
+PROGRESS_INTERVAL = 0.5
+
+# Bytes read from the progress pipe per call
+READ_SIZE = 64 * 1024
+
+# Arguments that make FFmpeg report progress on stdout instead of stderr
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_float(value: Optional[str], suffix: str = "") -> Optional[float]:
+    if value is None:
+        return None
+    if suffix and value.endswith(suffix):
+        value = value[: -len(suffix)]
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_clock(value: Optional[str]) -> Optional[float]:
+    """Parse an HH:MM:SS.micro timestamp into seconds."""
+    if not value:
+        return None
+    try:
+        hours, minutes, seconds = value.split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return None
+
+
+class FFmpegProgress:
+    """
+    Latest progress reported by a running FFmpeg process.
+    """
+
+    def __init__(self, duration: Optional[float] = None):
+        """
+        Initialize a progress object.
+
+        Args:
+            duration: Expected output duration in seconds (for percentages)
+        """
+        self.duration = duration
+        self.frame = 0
+        self.fps = 0.0
+        self.bitrate: Optional[float] = None
+        self.total_size = 0
+        self.out_time = 0.0
+        self.speed: Optional[float] = None
+        self.dup_frames = 0
+        self.drop_frames = 0
+        self.state = "continue"
+        self.updates = 0
+        self.updated_at: Optional[float] = None
+
+    def update(self, fields: Dict[str, str], state: str) -> None:
+        """
+        Apply a completed key=value block.
+
+        Args:
+            fields: Keys and values of the block
+            state: Value of the closing "progress" key
+        """
+        self.frame = _parse_int(fields.get("frame")) or self.frame
+        fps = _parse_float(fields.get("fps"))
+        if fps is not None:
+            self.fps = fps
+        bitrate = _parse_float(fields.get("bitrate"), "kbits/s")
+        if bitrate is not None:
+            self.bitrate = bitrate
+        self.total_size = _parse_int(fields.get("total_size")) or self.total_size
+
+        # out_time_ms is also in microseconds (a long-standing FFmpeg quirk)
+        out_time_us = _parse_int(fields.get("out_time_us"))
+        if out_time_us is None:
+            out_time_us = _parse_int(fields.get("out_time_ms"))
+        if out_time_us is not None and out_time_us >= 0:
+            self.out_time = out_time_us / 1e6
+        else:
+            out_time = _parse_clock(fields.get("out_time"))
+            if out_time is not None and out_time >= 0:
+                self.out_time = out_time
+
+        speed = _parse_float(fields.get("speed"), "x")
+        if speed is not None:
+            self.speed = speed
+        self.dup_frames = _parse_int(fields.get("dup_frames")) or self.dup_frames
+        self.drop_frames = _parse_int(fields.get("drop_frames")) or self.drop_frames
+
+        self.state = state
+        self.updates += 1
+        self.updated_at = time.time()
+
+    @property
+    def finished(self) -> bool:
+        """Check if FFmpeg reported the end of processing."""
+        return self.state == "end"
+
+    @property
+    def percent(self) -> Optional[int]:
+        """Get the completion percentage, or None if the duration is unknown."""
+        if self.finished:
+            return 100
+        if not self.duration:
+            return None
+        return max(0, min(int(self.out_time / self.duration * 100), 100))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the progress to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Progress information
+        """
+        return {
+            "frame": self.frame,
+            "fps": self.fps,
+            "bitrate": self.bitrate,
+            "total_size": self.total_size,
+            "out_time": self.out_time,
+            "speed": self.speed,
+            "dup_frames": self.dup_frames,
+            "drop_frames": self.drop_frames,
+            "duration": self.duration,
+            "percent": self.percent,
+            "state": self.state,
+        }
+
+
+class ProgressParser:
+    """
+    Incremental parser for FFmpeg's ``-progress`` output.
+    """
+
+    def __init__(
+        self,
+        duration: Optional[float] = None,
+        callback: Optional[Callable[[FFmpegProgress], None]] = None,
+        min_interval: float = PROGRESS_INTERVAL,
+    ):
+        """
+        Initialize the parser.
+
+        Args:
+            duration: Expected output duration in seconds (for percentages)
+            callback: Called with the FFmpegProgress after throttling
+            min_interval: Minimum seconds between callbacks
+        """
+        self.progress = FFmpegProgress(duration)
+        self.callback = callback
+        self.min_interval = min_interval
+        self._buffer = b""
+        self._fields: Dict[str, str] = {}
+        self._last_callback = 0.0
+
+    def feed(self, data: bytes) -> None:
+        """
+        Parse a chunk of output; incomplete lines are kept for the next chunk.
+
+        Args:
+            data: Bytes read from the progress pipe
+        """
+        self._buffer += data
+        lines = self._buffer.split(b"\n")
+        self._buffer = lines.pop()
+
+        for line in lines:
+            key, separator, value = line.partition(b"=")
+            if not separator:
+                continue
+            key = key.strip().decode("ascii", "replace")
+            value = value.strip().decode("ascii", "replace")
+            if key == "progress":
+                self._complete_block(value)
+            else:
+                self._fields[key] = value
+
+    def _complete_block(self, state: str) -> None:
+        """Apply the collected block and fire the callback if it is due."""
+        self.progress.update(self._fields, state)
+        self._fields = {}
+
+        now = time.monotonic()
+        if self.callback and (
+            self.progress.finished or now - self._last_callback >= self.min_interval
+        ):
+            self._last_callback = now
+            self.callback(self.progress)
+
+
+def read_progress(stream: BinaryIO, parser: ProgressParser) -> FFmpegProgress:
+    """
+    Read a progress pipe until FFmpeg closes it.
+
+    Args:
+        stream: Binary stdout pipe of the FFmpeg process
+        parser: Parser that receives the output
+
+    Returns:
+        FFmpegProgress: The final progress
+    """
+    fd = stream.fileno()
+    while True:
+        data = os.read(fd, READ_SIZE)
+        if not data:
+            break
+        parser.feed(data)
+    return parser.progress
+
+
+def add_progress_args(cmd: List[str]) -> List[str]:
+    """
+    Make an FFmpeg command report progress on stdout.
+
+    ``-stats`` is removed and ``-progress pipe:1 -nostats`` is added after
+    the executable unless the command already sets ``-progress``.
+
+    Args:
+        cmd: FFmpeg command
+
+    Returns:
+        List[str]: Command with the progress options
+    """
+    args = [arg for arg in cmd if arg != "-stats"]
+    if "-progress" not in args:
+        args[1:1] = PROGRESS_ARGS
+    return args
+
+
+def get_command_duration(cmd: List[str]) -> Optional[float]:
+    """
+    Get the expected output duration of an FFmpeg command.
+
+    The duration of the first input is probed, then reduced by any ``-ss``
+    and limited by any ``-t`` given before it.
+
+    Args:
+        cmd: FFmpeg command
+
+    Returns:
+        Optional[float]: Duration in seconds, or None if it cannot be determined
+    """
+    if "-i" not in cmd:
+        return None
+    index = cmd.index("-i")
+    if index + 1 >= len(cmd):
+        return None
+
+    input_options = dict(zip(cmd[:index], cmd[1 : index + 1]))
+    limit = _parse_float(input_options.get("-t"))
+
+    try:
+        # Imported here so the parser can be used without the probe service
+        from pyprocessor.utils.media.probe_manager import probe_file
+
+        duration = probe_file(cmd[index + 1]).duration
+    except Exception:
+        duration = None
+
+    if duration is not None:
+        duration -= _parse_float(input_options.get("-ss")) or 0.0
+        if limit is not None:
+            duration = min(duration, limit)
+    else:
+        duration = limit
+
+    return duration if duration and duration > 0 else None
@@ -0,0 +1,736 @@
+"""
+In-process container header parser for PyProcessor.
+
+This module reads stream metadata directly from MP4/MOV ``moov`` atoms and
+Matroska/WebM EBML headers, so common sources can be analyzed without starting
+an FFprobe subprocess. The result uses the same layout as FFprobe's JSON output
+("format" and "streams"), so it can be used anywhere FFprobe output is expected.
+
+Only the header is read: MP4 files are scanned box by box (skipping ``mdat``)
+and Matroska files are read up to the first cluster, or through the SeekHead
+when the Info and Tracks elements come after the clusters. Containers that are
+not recognized, or headers that cannot be parsed, return None so the caller can
+fall back to FFprobe.
+"""
+
+import os
+import struct
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+# Format names as reported by FFprobe
+MP4_FORMAT_NAME = "mov,mp4,m4a,3gp,3g2,mj2"
+MATROSKA_FORMAT_NAME = "matroska,webm"
+
+# Top-level box types that may start an MP4/MOV file
+MP4_LEADING_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pdin"}
+
+# Upper bound on the header bytes read into memory; larger headers fall back
+# to FFprobe
+MAX_HEADER_SIZE = 128 * 1024 * 1024
+
+# MP4 sample entry fourcc -> FFprobe codec name
+MP4_CODECS = {
+    "avc1": "h264",
+    "avc3": "h264",
+    "hvc1": "hevc",
+    "hev1": "hevc",
+    "av01": "av1",
+    "vp08": "vp8",
+    "vp09": "vp9",
+    "mp4v": "mpeg4",
+    "mp4a": "aac",
+    "ac-3": "ac3",
+    "ec-3": "eac3",
+    "Opus": "opus",
+    "fLaC": "flac",
+    ".mp3": "mp3",
+    "tx3g": "mov_text",
+    "wvtt": "webvtt",
+}
+
+# MP4 handler type -> FFprobe codec type
+MP4_HANDLERS = {
+    "vide": "video",
+    "soun": "audio",
+    "subt": "subtitle",
+    "sbtl": "subtitle",
+    "text": "subtitle",
+}
+
+# Matroska CodecID -> FFprobe codec name (prefix matches are tried last)
+MATROSKA_CODECS = {
+    "V_MPEG4/ISO/AVC": "h264",
+    "V_MPEGH/ISO/HEVC": "hevc",
+    "V_AV1": "av1",
+    "V_VP8": "vp8",
+    "V_VP9": "vp9",
+    "V_MPEG2": "mpeg2video",
+    "V_MPEG4/ISO/ASP": "mpeg4",
+    "V_THEORA": "theora",
+    "A_AAC": "aac",
+    "A_OPUS": "opus",
+    "A_VORBIS": "vorbis",
+    "A_AC3": "ac3",
+    "A_EAC3": "eac3",
+    "A_DTS": "dts",
+    "A_FLAC": "flac",
+    "A_MPEG/L3": "mp3",
+    "A_MPEG/L2": "mp2",
+    "S_TEXT/UTF8": "subrip",
+    "S_TEXT/ASS": "ass",
+    "S_TEXT/SSA": "ssa",
+    "S_TEXT/WEBVTT": "webvtt",
+    "S_HDMV/PGS": "hdmv_pgs_subtitle",
+    "S_VOBSUB": "dvd_subtitle",
+}
+
+# Matroska TrackType -> FFprobe codec type
+MATROSKA_TRACK_TYPES = {1: "video", 2: "audio", 17: "subtitle"}
+
+# Matroska element IDs (with their length marker bits, as written in the file)
+EBML_HEADER = 0x1A45DFA3
+EBML_DOC_TYPE = 0x4282
+MKV_SEGMENT = 0x18538067
+MKV_SEEK_HEAD = 0x114D9B74
+MKV_SEEK = 0x4DBB
+MKV_SEEK_ID = 0x53AB
+MKV_SEEK_POSITION = 0x53AC
+MKV_INFO = 0x1549A966
+MKV_TIMESTAMP_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_DEFAULT_DURATION = 0x23E383
+MKV_VIDEO = 0xE0
+MKV_PIXEL_WIDTH = 0xB0
+MKV_PIXEL_HEIGHT = 0xBA
+MKV_AUDIO = 0xE1
+MKV_SAMPLING_FREQUENCY = 0xB5
+MKV_CHANNELS = 0x9F
+MKV_CLUSTER = 0x1F43B675
+
+
+class HeaderParseError(Exception):
+    """Raised internally when a container header is malformed or truncated."""
+
+
+def _format_rate(rate: Optional[Fraction]) -> str:
+    """Format a frame rate as an FFprobe-style fraction ("0/0" if unknown)."""
+    if not rate or rate <= 0:
+        return "0/0"
+    rate = rate.limit_denominator(1001)
+    return f"{rate.numerator}/{rate.denominator}"
+
+
+def _format_duration(seconds: Optional[float]) -> Optional[str]:
+    """Format a duration in seconds the way FFprobe does."""
+    if seconds is None or seconds <= 0:
+        return None
+    return f"{seconds:.6f}"
+
+
+def _build_info(
+    path: str,
+    size: int,
+    format_name: str,
+    duration: Optional[float],
+    streams: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Build FFprobe-compatible output from parsed header data.
+
+    Args:
+        path: File path
+        size: File size in bytes
+        format_name: FFprobe format name
+        duration: Container duration in seconds (None if unknown)
+        streams: Parsed streams
+
+    Returns:
+        Dict[str, Any]: Output with "format" and "streams" sections
+    """
+    for index, stream in enumerate(streams):
+        stream["index"] = index
+
+    format_info = {
+        "filename": path,
+        "nb_streams": len(streams),
+        "format_name": format_name,
+        "size": str(size),
+    }
+    formatted = _format_duration(duration)
+    if formatted:
+        format_info["duration"] = formatted
+        if size:
+            format_info["bit_rate"] = str(int(size * 8 / duration))
+
+    return {"streams": streams, "format": format_info}
+
+
+# MP4 / MOV
+
+
+def _iter_boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Iterate over the boxes in a byte range.
+
+    Yields:
+        Tuple of (box type, body start, body end)
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise HeaderParseError("Truncated box header")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise HeaderParseError(f"Invalid size for box {box_type!r}")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find_box(
+    data: bytes, start: int, end: int, box_type: bytes
+) -> Optional[Tuple[int, int]]:
+    """Find the first child box of a type, returning its body range."""
+    for child_type, body_start, body_end in _iter_boxes(data, start, end):
+        if child_type == box_type:
+            return body_start, body_end
+    return None
+
+
+def _read_mp4_moov(f: BinaryIO, file_size: int) -> Optional[bytes]:
+    """
+    Locate and read the moov box, seeking over mdat and other top-level boxes.
+
+    Returns:
+        Optional[bytes]: The moov box body, or None if the file is not MP4
+    """
+    offset = 0
+    first = True
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack_from(">I4s", header, 0)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return None
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+
+        if first and box_type not in MP4_LEADING_BOXES:
+            return None
+        first = False
+
+        if size < header_size:
+            raise HeaderParseError(f"Invalid size for box {box_type!r}")
+
+        if box_type == b"moov":
+            body_size = size - header_size
+            if body_size > MAX_HEADER_SIZE:
+                return None
+            f.seek(offset + header_size)
+            body = f.read(body_size)
+            if len(body) < body_size:
+                raise HeaderParseError("Truncated moov box")
+            return body
+
+        offset += size
+
+    return None
+
+
+def _parse_mp4_track(data: bytes, start: int, end: int) -> Optional[Dict[str, Any]]:
+    """
+    Parse a trak box into an FFprobe-style stream.
+
+    Returns:
+        Optional[Dict[str, Any]]: Stream information, or None for tracks without media
+    """
+    tkhd = _find_box(data, start, end, b"tkhd")
+    mdia = _find_box(data, start, end, b"mdia")
+    if not mdia:
+        return None
+
+    hdlr = _find_box(data, mdia[0], mdia[1], b"hdlr")
+    handler = data[hdlr[0] + 8 : hdlr[0] + 12].decode("latin-1") if hdlr else ""
+    stream: Dict[str, Any] = {"codec_type": MP4_HANDLERS.get(handler, "data")}
+
+    # Media timescale and duration
+    timescale = 0
+    mdhd = _find_box(data, mdia[0], mdia[1], b"mdhd")
+    if mdhd:
+        if data[mdhd[0]] == 1:
+            timescale, duration = struct.unpack_from(">IQ", data, mdhd[0] + 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", data, mdhd[0] + 12)
+        if timescale and duration:
+            formatted = _format_duration(duration / timescale)
+            if formatted:
+                stream["duration"] = formatted
+
+    minf = _find_box(data, mdia[0], mdia[1], b"minf")
+    stbl = _find_box(data, minf[0], minf[1], b"stbl") if minf else None
+
+    # Codec from the first sample description entry
+    width = height = None
+    if stbl:
+        stsd = _find_box(data, stbl[0], stbl[1], b"stsd")
+        if stsd and stsd[1] - stsd[0] >= 16:
+            entry = stsd[0] + 8
+            fourcc = data[entry + 4 : entry + 8].decode("latin-1")
+            stream["codec_tag_string"] = fourcc
+            stream["codec_name"] = MP4_CODECS.get(fourcc, fourcc.strip().lower())
+            if stream["codec_type"] == "video" and entry + 36 <= stsd[1]:
+                width, height = struct.unpack_from(">HH", data, entry + 32)
+            elif stream["codec_type"] == "audio" and entry + 36 <= stsd[1]:
+                channels = struct.unpack_from(">H", data, entry + 24)[0]
+                sample_rate = struct.unpack_from(">I", data, entry + 32)[0] >> 16
+                stream["channels"] = channels
+                stream["sample_rate"] = str(sample_rate)
+
+    if stream["codec_type"] != "video":
+        return stream
+
+    # Fall back to the track header's presentation size (16.16 fixed point)
+    if (not width or not height) and tkhd:
+        offset = tkhd[0] + (88 if data[tkhd[0]] == 1 else 76)
+        if offset + 8 <= tkhd[1]:
+            width, height = (v >> 16 for v in struct.unpack_from(">II", data, offset))
+    if width and height:
+        stream["width"] = width
+        stream["height"] = height
+
+    # Average frame rate from the decoding time-to-sample table
+    rate = None
+    stts = _find_box(data, stbl[0], stbl[1], b"stts") if stbl else None
+    if stts and timescale:
+        entry_count = struct.unpack_from(">I", data, stts[0] + 4)[0]
+        entry_count = min(entry_count, (stts[1] - stts[0] - 8) // 8)
+        samples = total = 0
+        for i in range(entry_count):
+            count, delta = struct.unpack_from(">II", data, stts[0] + 8 + i * 8)
+            samples += count
+            total += count * delta
+        if samples and total:
+            rate = Fraction(samples * timescale, total)
+
+    stream["avg_frame_rate"] = _format_rate(rate)
+    stream["r_frame_rate"] = stream["avg_frame_rate"]
+    return stream
+
+
+def _parse_mp4(f: BinaryIO, path: str, file_size: int) -> Optional[Dict[str, Any]]:
+    """Parse an MP4/MOV file header into FFprobe-compatible output."""
+    moov = _read_mp4_moov(f, file_size)
+    if moov is None:
+        return None
+
+    duration = None
+    mvhd = _find_box(moov, 0, len(moov), b"mvhd")
+    if mvhd:
+        if moov[mvhd[0]] == 1:
+            timescale, movie_duration = struct.unpack_from(">IQ", moov, mvhd[0] + 20)
+        else:
+            timescale, movie_duration = struct.unpack_from(">II", moov, mvhd[0] + 12)
+        if timescale and movie_duration:
+            duration = movie_duration / timescale
+
+        # Fragmented files carry the overall duration in mvex/mehd
+        mvex = _find_box(moov, 0, len(moov), b"mvex")
+        mehd = _find_box(moov, mvex[0], mvex[1], b"mehd") if mvex else None
+        if not duration and mehd and timescale:
+            fmt = ">Q" if moov[mehd[0]] == 1 else ">I"
+            duration = struct.unpack_from(fmt, moov, mehd[0] + 4)[0] / timescale
+
+    streams = []
+    for box_type, start, end in _iter_boxes(moov, 0, len(moov)):
+        if box_type == b"trak":
+            stream = _parse_mp4_track(moov, start, end)
+            if stream:
+                streams.append(stream)
+
+    return _build_info(path, file_size, MP4_FORMAT_NAME, duration, streams)
+
+
+def _mp4_keyframe_times(data: bytes, start: int, end: int) -> Optional[List[float]]:
+    """
+    Read the keyframe decode times of an MP4 video track from stss and stts.
+
+    Returns:
+        Optional[List[float]]: Keyframe times in seconds, or None if the track
+        has no sync sample table (every sample is a keyframe)
+    """
+    mdia = _find_box(data, start, end, b"mdia")
+    mdhd = _find_box(data, mdia[0], mdia[1], b"mdhd") if mdia else None
+    minf = _find_box(data, mdia[0], mdia[1], b"minf") if mdia else None
+    stbl = _find_box(data, minf[0], minf[1], b"stbl") if minf else None
+    if not mdhd or not stbl:
+        return None
+
+    offset = mdhd[0] + (20 if data[mdhd[0]] == 1 else 12)
+    timescale = struct.unpack_from(">I", data, offset)[0]
+    stss = _find_box(data, stbl[0], stbl[1], b"stss")
+    stts = _find_box(data, stbl[0], stbl[1], b"stts")
+    if not timescale or not stss or not stts:
+        return None
+
+    count = struct.unpack_from(">I", data, stss[0] + 4)[0]
+    count = min(count, (stss[1] - stss[0] - 8) // 4)
+    sync_samples = struct.unpack_from(f">{count}I", data, stss[0] + 8)
+
+    # Walk the time-to-sample runs alongside the (ascending) sync sample numbers
+    times = []
+    index = 0
+    sample = 1
+    decode_time = 0
+    entry_count = struct.unpack_from(">I", data, stts[0] + 4)[0]
+    entry_count = min(entry_count, (stts[1] - stts[0] - 8) // 8)
+    for i in range(entry_count):
+        run, delta = struct.unpack_from(">II", data, stts[0] + 8 + i * 8)
+        while index < count and sync_samples[index] < sample + run:
+            offset = sync_samples[index] - sample
+            times.append((decode_time + offset * delta) / timescale)
+            index += 1
+        sample += run
+        decode_time += run * delta
+
+    return times
+
+
+# Matroska / WebM
+
+
+def _read_vint(
+    data: bytes, offset: int, keep_marker: bool
+) -> Tuple[Optional[int], int]:
+    """
+    Read an EBML variable-length integer.
+
+    Args:
+        data: Buffer
+        offset: Offset of the first byte
+        keep_marker: Keep the length marker bit (element IDs) or strip it (sizes)
+
+    Returns:
+        Tuple of (value, length); value is None for the reserved "unknown size"
+    """
+    if offset >= len(data):
+        raise HeaderParseError("Truncated EBML integer")
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or offset + length > len(data):
+        raise HeaderParseError("Invalid EBML integer")
+
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[offset + 1 : offset + length]:
+        value = (value << 8) | byte
+
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def _read_element_header(f: BinaryIO) -> Optional[Tuple[int, Optional[int]]]:
+    """Read an element ID and size from a file, or None at end of file."""
+    head = f.read(12)
+    if len(head) < 2:
+        return None
+    element_id, id_length = _read_vint(head, 0, keep_marker=True)
+    size, size_length = _read_vint(head, id_length, keep_marker=False)
+    f.seek(id_length + size_length - len(head), os.SEEK_CUR)
+    return element_id, size
+
+
+def _iter_elements(data: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Iterate over the EBML elements in a byte range.
+
+    Yields:
+        Tuple of (element ID, body start, body end)
+    """
+    offset = start
+    while offset < end:
+        element_id, id_length = _read_vint(data, offset, keep_marker=True)
+        size, size_length = _read_vint(data, offset + id_length, keep_marker=False)
+        body_start = offset + id_length + size_length
+        body_end = end if size is None else min(body_start + size, end)
+        yield element_id, body_start, body_end
+        offset = body_end
+
+
+def _ebml_uint(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], "big")
+
+
+def _ebml_float(data: bytes, start: int, end: int) -> Optional[float]:
+    if end - start == 4:
+        return struct.unpack_from(">f", data, start)[0]
+    if end - start == 8:
+        return struct.unpack_from(">d", data, start)[0]
+    return None
+
+
+def _ebml_string(data: bytes, start: int, end: int) -> str:
+    return data[start:end].split(b"\x00", 1)[0].decode("utf-8", "replace")
+
+
+def _matroska_codec(codec_id: str) -> str:
+    """Map a Matroska CodecID to an FFprobe codec name."""
+    if codec_id in MATROSKA_CODECS:
+        return MATROSKA_CODECS[codec_id]
+    for prefix, name in MATROSKA_CODECS.items():
+        if codec_id.startswith(prefix):
+            return name
+    return codec_id.lower()
+
+
+def _parse_matroska_info(data: bytes) -> Optional[float]:
+    """Parse the Info element body, returning the duration in seconds."""
+    timestamp_scale = 1000000
+    duration = None
+    for element_id, start, end in _iter_elements(data, 0, len(data)):
+        if element_id == MKV_TIMESTAMP_SCALE:
+            timestamp_scale = _ebml_uint(data, start, end) or timestamp_scale
+        elif element_id == MKV_DURATION:
+            duration = _ebml_float(data, start, end)
+    if duration is None:
+        return None
+    return duration * timestamp_scale / 1e9
+
+
+def _parse_matroska_tracks(data: bytes) -> List[Dict[str, Any]]:
+    """Parse the Tracks element body into FFprobe-style streams."""
+    streams = []
+    for element_id, start, end in _iter_elements(data, 0, len(data)):
+        if element_id != MKV_TRACK_ENTRY:
+            continue
+
+        track_type = 0
+        codec_id = ""
+        default_duration = None
+        video = audio = None
+        for child_id, child_start, child_end in _iter_elements(data, start, end):
+            if child_id == MKV_TRACK_TYPE:
+                track_type = _ebml_uint(data, child_start, child_end)
+            elif child_id == MKV_CODEC_ID:
+                codec_id = _ebml_string(data, child_start, child_end)
+            elif child_id == MKV_DEFAULT_DURATION:
+                default_duration = _ebml_uint(data, child_start, child_end)
+            elif child_id == MKV_VIDEO:
+                video = (child_start, child_end)
+            elif child_id == MKV_AUDIO:
+                audio = (child_start, child_end)
+
+        stream: Dict[str, Any] = {
+            "codec_type": MATROSKA_TRACK_TYPES.get(track_type, "data"),
+            "codec_name": _matroska_codec(codec_id),
+            "codec_tag_string": codec_id,
+        }
+
+        if stream["codec_type"] == "video":
+            if video:
+                for child_id, child_start, child_end in _iter_elements(data, *video):
+                    if child_id == MKV_PIXEL_WIDTH:
+                        stream["width"] = _ebml_uint(data, child_start, child_end)
+                    elif child_id == MKV_PIXEL_HEIGHT:
+                        stream["height"] = _ebml_uint(data, child_start, child_end)
+            rate = Fraction(10**9, default_duration) if default_duration else None
+            stream["avg_frame_rate"] = _format_rate(rate)
+            stream["r_frame_rate"] = stream["avg_frame_rate"]
+
+        elif stream["codec_type"] == "audio":
+            stream["channels"] = 1
+            stream["sample_rate"] = "8000"
+            if audio:
+                for child_id, child_start, child_end in _iter_elements(data, *audio):
+                    if child_id == MKV_CHANNELS:
+                        stream["channels"] = _ebml_uint(data, child_start, child_end)
+                    elif child_id == MKV_SAMPLING_FREQUENCY:
+                        frequency = _ebml_float(data, child_start, child_end)
+                        if frequency:
+                            stream["sample_rate"] = str(int(frequency))
+
+        streams.append(stream)
+
+    return streams
+
+
+def _read_matroska_element(f: BinaryIO, size: Optional[int]) -> bytes:
+    """Read an element body of a known size."""
+    if size is None or size > MAX_HEADER_SIZE:
+        raise HeaderParseError("Matroska header element too large")
+    body = f.read(size)
+    if len(body) < size:
+        raise HeaderParseError("Truncated Matroska element")
+    return body
+
+
+def _parse_matroska(f: BinaryIO, path: str, file_size: int) -> Optional[Dict[str, Any]]:
+    """Parse a Matroska/WebM file header into FFprobe-compatible output."""
+    f.seek(0)
+    header = _read_element_header(f)
+    if not header or header[0] != EBML_HEADER:
+        return None
+
+    body = _read_matroska_element(f, header[1])
+    doc_type = ""
+    for element_id, start, end in _iter_elements(body, 0, len(body)):
+        if element_id == EBML_DOC_TYPE:
+            doc_type = _ebml_string(body, start, end)
+    if doc_type not in ("matroska", "webm"):
+        return None
+
+    segment = _read_element_header(f)
+    if not segment or segment[0] != MKV_SEGMENT:
+        return None
+    segment_start = f.tell()
+
+    info = tracks = None
+    seek_positions: Dict[int, int] = {}
+    while info is None or tracks is None:
+        element = _read_element_header(f)
+        if element is None:
+            break
+        element_id, size = element
+
+        if element_id == MKV_INFO:
+            info = _read_matroska_element(f, size)
+        elif element_id == MKV_TRACKS:
+            tracks = _read_matroska_element(f, size)
+        elif element_id == MKV_SEEK_HEAD:
+            seek_head = _read_matroska_element(f, size)
+            for seek_id, start, end in _iter_elements(seek_head, 0, len(seek_head)):
+                if seek_id != MKV_SEEK:
+                    continue
+                target = position = None
+                for child_id, child_start, child_end in _iter_elements(
+                    seek_head, start, end
+                ):
+                    if child_id == MKV_SEEK_ID:
+                        target = _ebml_uint(seek_head, child_start, child_end)
+                    elif child_id == MKV_SEEK_POSITION:
+                        position = _ebml_uint(seek_head, child_start, child_end)
+                if target is not None and position is not None:
+                    seek_positions[target] = position
+        elif element_id == MKV_CLUSTER or size is None:
+            # Media data reached; anything else must be found via the SeekHead
+            break
+        else:
+            f.seek(size, os.SEEK_CUR)
+
+    # Info and Tracks written after the clusters are located via the SeekHead
+    for element_id in (MKV_INFO, MKV_TRACKS):
+        if (element_id == MKV_INFO and info is not None) or (
+            element_id == MKV_TRACKS and tracks is not None
+        ):
+            continue
+        if element_id not in seek_positions:
+            continue
+        f.seek(segment_start + seek_positions[element_id])
+        element = _read_element_header(f)
+        if not element or element[0] != element_id:
+            continue
+        if element_id == MKV_INFO:
+            info = _read_matroska_element(f, element[1])
+        else:
+            tracks = _read_matroska_element(f, element[1])
+
+    if tracks is None:
+        return None
+
+    duration = _parse_matroska_info(info) if info is not None else None
+    streams = _parse_matroska_tracks(tracks)
+    return _build_info(path, file_size, MATROSKA_FORMAT_NAME, duration, streams)
+
+
+def parse_media_header(file_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """
+    Read stream metadata from an MP4/MOV or Matroska/WebM header.
+
+    Args:
+        file_path: Path to the media file
+
+    Returns:
+        Optional[Dict[str, Any]]: FFprobe-compatible output with "format" and
+        "streams", or None if the container is not supported or the header
+        could not be parsed
+    """
+    path = str(file_path)
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            magic = f.read(8)
+            if len(magic) < 8:
+                return None
+            if int.from_bytes(magic[:4], "big") == EBML_HEADER:
+                info = _parse_matroska(f, path, file_size)
+            elif magic[4:8] in MP4_LEADING_BOXES:
+                info = _parse_mp4(f, path, file_size)
+            else:
+                return None
+    except (OSError, HeaderParseError, struct.error, IndexError, ValueError):
+        return None
+
+    # Without streams or a duration (e.g. fragmented or live-written files)
+    # the header is not enough; let FFprobe read the media data instead
+    if not info or not info["streams"] or "duration" not in info["format"]:
+        return None
+    return info
+
+
+def read_keyframe_times(file_path: Union[str, Path]) -> Optional[List[float]]:
+    """
+    Read the keyframe times of the first video track of an MP4/MOV file.
+
+    Times come from the sync sample (stss) and time-to-sample (stts) tables,
+    so only the header is read. They are decode times, which is precise
+    enough to place cut points next to keyframes.
+
+    Args:
+        file_path: Path to the media file
+
+    Returns:
+        Optional[List[float]]: Keyframe times in seconds, or None if they are
+        not available from the header (other containers, fragmented files or
+        tracks where every frame is a keyframe)
+    """
+    path = str(file_path)
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            magic = f.read(8)
+            if len(magic) < 8 or magic[4:8] not in MP4_LEADING_BOXES:
+                return None
+            moov = _read_mp4_moov(f, file_size)
+        if moov is None:
+            return None
+
+        for box_type, start, end in _iter_boxes(moov, 0, len(moov)):
+            if box_type != b"trak":
+                continue
+            stream = _parse_mp4_track(moov, start, end)
+            if stream and stream["codec_type"] == "video":
+                return _mp4_keyframe_times(moov, start, end) or None
+    except (OSError, HeaderParseError, struct.error, IndexError, ValueError):
+        return None
+
+    return None
@@ -0,0 +1,428 @@
+"""
+Media probe service for PyProcessor.
+
+This module analyzes each source file once and shares the parsed result with
+every consumer (audio detection, ladder planning, batch sizing). MP4/MOV and
+Matroska/WebM headers are read in-process; other containers fall back to a
+single FFprobe call. Results are cached in memory and on disk through the
+CacheManager, keyed by the file's path, size, modification time and inode, so
+an unchanged file is never analyzed twice, even across runs or worker
+processes.
+"""
+
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from pyprocessor.utils.core.cache_manager import CacheBackend, cache_get, cache_set
+from pyprocessor.utils.logging.error_manager import (
+    EncodingError,
+    ErrorSeverity,
+    FileSystemError,
+    ProcessError,
+)
+from pyprocessor.utils.media.header_parser import parse_media_header
+
+# Bump when the cached representation changes so stale entries are ignored
+PROBE_CACHE_VERSION = 2
+
+# Seconds FFprobe may take to analyze a file
+PROBE_TIMEOUT = 10
+
+
+class ProbeResult:
+    """
+    Parsed FFprobe output for a single media file.
+
+    The raw FFprobe JSON (with "format" and "streams") is kept in ``info`` so
+    callers that need fields not exposed here can still read them. Results from
+    the in-process header parser use the same layout but only carry the fields
+    that parser reads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        inode: int,
+        info: Optional[Dict[str, Any]] = None,
+        parser: str = "ffprobe",
+    ):
+        """
+        Initialize a probe result.
+
+        Args:
+            path: Absolute path of the probed file
+            size: File size in bytes at probe time
+            mtime_ns: Modification time in nanoseconds at probe time
+            inode: Inode number at probe time (0 where unsupported)
+            info: FFprobe JSON output
+            parser: How the file was analyzed ("native" or "ffprobe")
+        """
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+        self.info = info or {}
+        self.parser = parser
+
+    @property
+    def streams(self) -> List[Dict[str, Any]]:
+        """Get all streams reported by FFprobe."""
+        return self.info.get("streams", [])
+
+    @property
+    def format(self) -> Dict[str, Any]:
+        """Get the container format section reported by FFprobe."""
+        return self.info.get("format", {})
+
+    @property
+    def video_streams(self) -> List[Dict[str, Any]]:
+        """Get the video streams."""
+        return [s for s in self.streams if s.get("codec_type") == "video"]
+
+    @property
+    def audio_streams(self) -> List[Dict[str, Any]]:
+        """Get the audio streams."""
+        return [s for s in self.streams if s.get("codec_type") == "audio"]
+
+    @property
+    def has_video(self) -> bool:
+        """Check if the file has at least one video stream."""
+        return bool(self.video_streams)
+
+    @property
+    def has_audio(self) -> bool:
+        """Check if the file has at least one audio stream."""
+        return bool(self.audio_streams)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Get the container duration in seconds, or None if unknown."""
+        try:
+            return float(self.format["duration"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @property
+    def bit_rate(self) -> Optional[int]:
+        """Get the overall bit rate in bits per second, or None if unknown."""
+        try:
+            return int(self.format["bit_rate"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the probe result to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Probe result information
+        """
+        return {
+            "version": PROBE_CACHE_VERSION,
+            "path": self.path,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "inode": self.inode,
+            "info": self.info,
+            "parser": self.parser,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProbeResult":
+        """
+        Create a probe result from a dictionary.
+
+        Args:
+            data: Dictionary produced by to_dict()
+
+        Returns:
+            ProbeResult: The probe result
+        """
+        return cls(
+            path=data["path"],
+            size=data["size"],
+            mtime_ns=data["mtime_ns"],
+            inode=data.get("inode", 0),
+            info=data.get("info"),
+            parser=data.get("parser", "ffprobe"),
+        )
+
+
+class ProbeManager:
+    """
+    Centralized manager for probing media files.
+
+    This class:
+    - Reads MP4/MOV and Matroska/WebM headers in-process
+    - Runs a single FFprobe call (-show_format -show_streams) for other files
+    - Caches results in memory and on disk through the CacheManager
+    - Invalidates results when a file's size, mtime or inode changes
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(ProbeManager, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self, ffprobe_path: Optional[str] = None, native_parser: bool = True):
+        """
+        Initialize the probe manager.
+
+        Args:
+            ffprobe_path: Path to the FFprobe executable (located on first use if None)
+            native_parser: Whether to try the in-process header parser before FFprobe
+        """
+        # Only initialize once
+        if getattr(self, "_initialized", False):
+            return
+
+        self._ffprobe_path = ffprobe_path
+        self.native_parser = native_parser
+        self._results: Dict[str, ProbeResult] = {}
+        self._results_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "native": 0, "probes": 0}
+
+        # Mark as initialized
+        self._initialized = True
+
+    @property
+    def ffprobe_path(self) -> str:
+        """Get the FFprobe executable path, locating it on first use."""
+        if not self._ffprobe_path:
+            # Imported here as FFmpegManager itself probes through this module
+            from pyprocessor.utils.media.ffmpeg_manager import get_ffprobe_path
+
+            self._ffprobe_path = get_ffprobe_path()
+        return self._ffprobe_path
+
+    @staticmethod
+    def _make_key(path: str, stat_result: os.stat_result) -> str:
+        """
+        Build the cache key for a file.
+
+        Args:
+            path: Absolute file path
+            stat_result: Result of os.stat() for the file
+
+        Returns:
+            str: Cache key
+        """
+        return (
+            f"probe:v{PROBE_CACHE_VERSION}:{path}:{stat_result.st_size}:"
+            f"{stat_result.st_mtime_ns}:{stat_result.st_ino}"
+        )
+
+    def probe(self, file_path: Union[str, Path], use_cache: bool = True) -> ProbeResult:
+        """
+        Probe a media file, returning a cached result when the file is unchanged.
+
+        Args:
+            file_path: Path to the media file
+            use_cache: Whether cached results may be used
+
+        Returns:
+            ProbeResult: Parsed probe result
+
+        Raises:
+            FileSystemError: If the file does not exist
+            ProcessError: If FFprobe fails to analyze the file
+            EncodingError: If the JSON output cannot be parsed
+        """
+        path = os.path.abspath(str(file_path))
+        try:
+            stat_result = os.stat(path)
+        except OSError as e:
+            raise FileSystemError(
+                f"File not found: {path}",
+                severity=ErrorSeverity.ERROR,
+                original_exception=e,
+                details={"file_path": path},
+            )
+
+        key = self._make_key(path, stat_result)
+
+        if use_cache:
+            result = self._get_cached(key)
+            if result is not None:
+                return result
+
+        info = parse_media_header(path) if self.native_parser else None
+        parser = "native"
+        if info is None:
+            info = self._run_ffprobe(path)
+            parser = "ffprobe"
+
+        with self._results_lock:
+            self._stats["misses"] += 1
+            self._stats["native" if parser == "native" else "probes"] += 1
+
+        result = ProbeResult(
+            path,
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+            info,
+            parser,
+        )
+
+        with self._results_lock:
+            self._results[key] = result
+        cache_set(key, result.to_dict(), backend=CacheBackend.DISK)
+
+        return result
+
+    def _get_cached(self, key: str) -> Optional[ProbeResult]:
+        """
+        Look up a probe result in memory, then on disk.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[ProbeResult]: Cached result, or None if not cached
+        """
+        with self._results_lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._stats["hits"] += 1
+                return result
+
+        data = cache_get(key, backend=CacheBackend.DISK)
+        if not data or data.get("version") != PROBE_CACHE_VERSION:
+            return None
+
+        result = ProbeResult.from_dict(data)
+        with self._results_lock:
+            self._results[key] = result
+            self._stats["hits"] += 1
+        return result
+
+    def _run_ffprobe(self, path: str) -> Dict[str, Any]:
+        """
+        Run FFprobe on a file.
+
+        Args:
+            path: Absolute file path
+
+        Returns:
+            Dict[str, Any]: FFprobe JSON output
+
+        Raises:
+            ProcessError: If FFprobe fails to analyze the file
+            EncodingError: If the JSON output cannot be parsed
+        """
+        try:
+            result = subprocess.run(
+                [
+                    self.ffprobe_path,
+                    "-v",
+                    "quiet",
+                    "-print_format",
+                    "json",
+                    "-show_format",
+                    "-show_streams",
+                    path,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=PROBE_TIMEOUT,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            raise ProcessError(
+                f"Error running FFprobe: {str(e)}",
+                severity=ErrorSeverity.ERROR,
+                original_exception=e,
+                details={"file_path": path},
+            )
+
+        if result.returncode != 0:
+            raise ProcessError(
+                f"FFprobe failed to analyze file with return code {result.returncode}",
+                severity=ErrorSeverity.ERROR,
+                details={
+                    "file_path": path,
+                    "stderr": result.stderr,
+                    "returncode": result.returncode,
+                },
+            )
+
+        try:
+            return json.loads(result.stdout)
+        except json.JSONDecodeError as e:
+            raise EncodingError(
+                f"Failed to parse FFprobe JSON output: {str(e)}",
+                severity=ErrorSeverity.ERROR,
+                original_exception=e,
+                details={"file_path": path, "stdout": result.stdout},
+            )
+
+    def clear(self) -> None:
+        """Clear the in-memory probe results (disk entries expire on file change)."""
+        with self._results_lock:
+            self._results.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get probe statistics.
+
+        Returns:
+            Dict[str, int]: Cache hits, misses, native parses and FFprobe invocations
+        """
+        with self._results_lock:
+            return dict(self._stats)
+
+
+# Singleton instance
+_probe_manager = None
+
+
+def get_probe_manager() -> ProbeManager:
+    """
+    Get the singleton probe manager instance.
+
+    Returns:
+        ProbeManager: The singleton probe manager instance
+    """
+    global _probe_manager
+    if _probe_manager is None:
+        _probe_manager = ProbeManager()
+    return _probe_manager
+
+
+# Module-level functions for convenience
+
+
+def probe_file(file_path: Union[str, Path], use_cache: bool = True) -> ProbeResult:
+    """
+    Probe a media file.
+
+    Args:
+        file_path: Path to the media file
+        use_cache: Whether cached results may be used
+
+    Returns:
+        ProbeResult: Parsed probe result
+    """
+    return get_probe_manager().probe(file_path, use_cache)
+
+
+def get_probe_stats() -> Dict[str, int]:
+    """
+    Get probe statistics.
+
+    Returns:
+        Dict[str, int]: Cache hits, misses, native parses and FFprobe invocations
+    """
+    return get_probe_manager().get_stats()
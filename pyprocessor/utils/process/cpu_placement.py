@@ -0,0 +1,327 @@
+"""
+CPU affinity and NUMA-aware placement of encode processes for PyProcessor.
+
+On multi-socket hosts the scheduler migrates FFmpeg processes across sockets,
+and they lose their caches and the locality of the memory they allocated.
+CpuPlacer reads the NUMA topology from ``/sys/devices/system/node`` and gives
+each encode a set of CPUs:
+
+- ``node``: all CPUs of one NUMA node
+- ``cores``: as many CPUs of one node as the encode has threads
+
+Encodes are spread across nodes by load, and within a node the least used
+CPUs are handed out first.
+
+Processes are pinned by setting the affinity of the thread that starts them
+for the duration of the spawn (see ``pinned``). A child inherits the mask of
+the thread that forked it, so FFmpeg and every thread it creates stay on the
+CPU set, and no code has to run in the child between fork and exec.
+
+Placement needs ``os.sched_setaffinity`` (Linux). Elsewhere, or with a
+single node and ``node`` mode, it does nothing.
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
+
+from pyprocessor.utils.logging.log_manager import get_logger
+
+# Where Linux describes the NUMA nodes
+NODE_ROOT = "/sys/devices/system/node"
+
+# "off" disables placement, "node" pins to a whole node, "cores" pins to as
+# many CPUs of a node as the encode has threads
+PLACEMENT_MODES = ["off", "node", "cores"]
+
+NODE_DIR_REGEX = re.compile(r"^node(\d+)$")
+
+
+def is_affinity_supported() -> bool:
+    """Check if processes can be pinned to CPUs on this platform."""
+    return hasattr(os, "sched_setaffinity") and hasattr(os, "sched_getaffinity")
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """
+    Parse a kernel CPU list such as "0-7,16-23".
+
+    Args:
+        text: CPU list
+
+    Returns:
+        List[int]: CPU numbers in ascending order
+    """
+    cpus = set()
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def get_allowed_cpus() -> List[int]:
+    """
+    Get the CPUs this process may run on.
+
+    Returns:
+        List[int]: CPU numbers in ascending order
+    """
+    if is_affinity_supported():
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def read_numa_topology(root: str = NODE_ROOT) -> Dict[int, List[int]]:
+    """
+    Read the CPUs of each NUMA node.
+
+    Only CPUs this process may run on are included, and nodes without any
+    are left out. Without NUMA information, all CPUs form node 0.
+
+    Args:
+        root: Directory with the nodeN subdirectories
+
+    Returns:
+        Dict[int, List[int]]: CPU numbers by node
+    """
+    allowed = set(get_allowed_cpus())
+    nodes = {}
+    try:
+        for path in Path(root).iterdir():
+            match = NODE_DIR_REGEX.match(path.name)
+            if not match:
+                continue
+            try:
+                cpus = parse_cpu_list((path / "cpulist").read_text())
+            except (OSError, ValueError):
+                continue
+            cpus = [cpu for cpu in cpus if cpu in allowed]
+            if cpus:
+                nodes[int(match.group(1))] = cpus
+    except OSError:
+        pass
+
+    if not nodes:
+        nodes = {0: sorted(allowed)}
+    return dict(sorted(nodes.items()))
+
+
+@contextmanager
+def pinned(
+    cpus: Optional[Sequence[int]], restore: Optional[Set[int]] = None
+) -> Iterator[None]:
+    """
+    Run the body with the calling thread pinned to a set of CPUs.
+
+    Processes started in the body inherit the CPU set. The previous affinity
+    of the thread is restored afterwards.
+
+    Args:
+        cpus: CPUs to pin to (nothing is changed if None or unsupported)
+        restore: Affinity to set afterwards instead of the previous one.
+            Coroutines that pin the event loop thread across an await must
+            pass the same mask, or they could restore each other's CPU sets.
+    """
+    if not cpus or not is_affinity_supported():
+        yield
+        return
+
+    previous = restore or os.sched_getaffinity(0)
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        get_logger().debug(f"Could not set CPU affinity: {str(e)}")
+        yield
+        return
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+class CpuPlacement:
+    """
+    The CPUs an encode was placed on.
+    """
+
+    def __init__(self, node: int, cpus: List[int], threads: int):
+        """
+        Initialize a placement.
+
+        Args:
+            node: NUMA node
+            cpus: CPUs of the node the encode may run on
+            threads: Threads the encode counts for on the node
+        """
+        self.node = node
+        self.cpus = cpus
+        self.threads = threads
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the placement to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Placement information
+        """
+        return {"node": self.node, "cpus": self.cpus, "threads": self.threads}
+
+
+class CpuPlacer:
+    """
+    Places encodes on NUMA nodes and CPU sets.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        mode: str = "node",
+        topology: Optional[Dict[int, List[int]]] = None,
+        logger=None,
+    ):
+        """
+        Initialize the placer.
+
+        Args:
+            mode: "node" or "cores" (see PLACEMENT_MODES)
+            topology: CPUs by node (default: read from the system)
+            logger: Logger instance (optional)
+        """
+        self.mode = mode
+        self.topology = topology or read_numa_topology()
+        self.logger = logger or get_logger()
+
+        # Jobs and threads placed on each node, and jobs on each CPU
+        self._jobs = {node: 0 for node in self.topology}
+        self._threads = {node: 0 for node in self.topology}
+        self._cpu_jobs = {cpu: 0 for cpus in self.topology.values() for cpu in cpus}
+        self._lock = threading.Lock()
+
+    def acquire(self, threads: Optional[int] = None) -> CpuPlacement:
+        """
+        Place an encode that is starting.
+
+        The encode goes to the node with the least threads per CPU. In cores
+        mode it gets the least used CPUs of that node.
+
+        Args:
+            threads: Threads the encode uses (default: one per CPU of a node)
+
+        Returns:
+            CpuPlacement: Placement; pass it to release() when the encode ends
+        """
+        with self._lock:
+            node = min(
+                self.topology,
+                key=lambda n: (self._threads[n] / len(self.topology[n]), n),
+            )
+            node_cpus = self.topology[node]
+            if self.mode == "cores" and threads and threads < len(node_cpus):
+                least_used = sorted(
+                    node_cpus, key=lambda cpu: (self._cpu_jobs[cpu], cpu)
+                )
+                cpus = sorted(least_used[:threads])
+            else:
+                cpus = list(node_cpus)
+
+            placement = CpuPlacement(node, cpus, threads or len(node_cpus))
+            self._jobs[node] += 1
+            self._threads[node] += placement.threads
+            for cpu in cpus:
+                self._cpu_jobs[cpu] += 1
+            return placement
+
+    def release(self, placement: CpuPlacement) -> None:
+        """
+        Free the placement of an encode that has ended.
+
+        Args:
+            placement: Placement returned by acquire()
+        """
+        with self._lock:
+            self._jobs[placement.node] -= 1
+            self._threads[placement.node] -= placement.threads
+            for cpu in placement.cpus:
+                self._cpu_jobs[cpu] -= 1
+
+    def occupancy(self) -> Dict[int, Dict[str, int]]:
+        """
+        Get the occupancy of each node.
+
+        Returns:
+            Dict[int, Dict[str, int]]: For each node, its CPU count, the
+            encodes and threads placed on it and the CPUs in use
+        """
+        with self._lock:
+            return {
+                node: {
+                    "cpus": len(cpus),
+                    "jobs": self._jobs[node],
+                    "threads": self._threads[node],
+                    "busy_cpus": sum(1 for cpu in cpus if self._cpu_jobs[cpu]),
+                }
+                for node, cpus in self.topology.items()
+            }
+
+    def log_occupancy(self) -> None:
+        """Log the occupancy of each node on one line."""
+        self.logger.info(
+            "NUMA occupancy: "
+            + "; ".join(
+                f"node {node}: {info['jobs']} encodes, {info['threads']} threads, "
+                f"{info['busy_cpus']}/{info['cpus']} CPUs in use"
+                for node, info in self.occupancy().items()
+            )
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the placer to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Placer information
+        """
+        return {
+            "mode": self.mode,
+            "topology": self.topology,
+            "occupancy": self.occupancy(),
+        }
+
+
+def create_cpu_placer(config, logger=None) -> Optional[CpuPlacer]:
+    """
+    Create the CPU placer for a run, if placement is enabled.
+
+    Args:
+        config: Configuration object
+        logger: Logger instance (optional)
+
+    Returns:
+        Optional[CpuPlacer]: Placer, or None if encodes are not pinned
+    """
+    mode = config.get("batch_processing.cpu_placement", "off")
+    if mode not in PLACEMENT_MODES or mode == "off":
+        return None
+
+    logger = logger or get_logger()
+    if not is_affinity_supported():
+        logger.warning("CPU placement is not supported on this platform")
+        return None
+
+    placer = CpuPlacer(mode, logger=logger)
+    logger.info(
+        f"Placing encodes on {len(placer.topology)} NUMA node(s) ({mode} mode): "
+        + ", ".join(
+            f"node {node}: {len(cpus)} CPUs" for node, cpus in placer.topology.items()
+        )
+    )
+    return placer
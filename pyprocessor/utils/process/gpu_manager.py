@@ -18,7 +18,7 @@ try:
 except ImportError:
     PYNVML_AVAILABLE = False
 
-from pyprocessor.utils.log_manager import get_logger
+from pyprocessor.utils.logging.log_manager import get_logger
 
 
 class GPUVendor(Enum):
@@ -0,0 +1,244 @@
+"""
+Pausing encodes and changing their priority during a run, for PyProcessor.
+
+A running FFmpeg process can be paused with SIGSTOP and resumed with
+SIGCONT. It keeps its memory and open files while it is stopped, but gives
+up its CPUs, so the scheduler can hand them to an urgent job (preemption)
+or stop a job from growing while memory is short.
+
+Another PyProcessor process, such as ``pyprocessor --prioritize FILE``,
+changes the priority of a file in a running batch by dropping a request
+into the control directory under the application data directory. A run
+that takes requests registers itself with ``listen_for_priority_requests()``
+and picks up the requests addressed to it with ``read_priority_requests()``.
+Requests are only made for registered runs that are still alive, and the
+ones left for runs that are gone are dropped when the next run registers.
+
+Pausing needs POSIX signals. On Windows, is_pause_supported() is False and
+nothing is paused.
+"""
+
+import json
+import os
+import signal
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import psutil
+
+from pyprocessor.utils.file_system.path_manager import get_app_data_dir
+from pyprocessor.utils.logging.log_manager import get_logger
+
+# Priority a file gets from --prioritize without --priority; above any
+# priority a run gives its files
+URGENT_PRIORITY = 1_000_000
+
+# Where priority requests wait until the run reads them
+CONTROL_DIR_NAME = "control"
+PRIORITY_DIR_NAME = "priority"
+
+# Where the runs that take priority requests are registered, under the
+# priority request directory
+LISTENER_DIR_NAME = "runs"
+
+# Seconds between two looks for new requests
+REQUEST_POLL_INTERVAL = 1.0
+
+
+def is_pause_supported() -> bool:
+    """Check if processes can be paused on this platform."""
+    return hasattr(signal, "SIGSTOP") and hasattr(signal, "SIGCONT")
+
+
+def pause_process(pid: int) -> bool:
+    """
+    Pause a process with SIGSTOP.
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        bool: True if the signal was sent
+    """
+    if not is_pause_supported():
+        return False
+    try:
+        os.kill(pid, signal.SIGSTOP)
+        return True
+    except OSError:
+        return False
+
+
+def resume_process(pid: int) -> bool:
+    """
+    Resume a process paused with pause_process().
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        bool: True if the signal was sent
+    """
+    if not is_pause_supported():
+        return False
+    try:
+        os.kill(pid, signal.SIGCONT)
+        return True
+    except OSError:
+        return False
+
+
+def get_priority_request_dir() -> Path:
+    """
+    Get the directory priority requests are dropped into.
+
+    Returns:
+        Path: Directory under the application data directory
+    """
+    return Path(get_app_data_dir()) / CONTROL_DIR_NAME / PRIORITY_DIR_NAME
+
+
+def _remove(path: Path) -> None:
+    """Delete a control file that may already be gone."""
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def get_listening_runs(directory: Optional[Path] = None) -> List[str]:
+    """
+    Get the runs that take priority requests.
+
+    Registrations of processes that are gone are deleted.
+
+    Args:
+        directory: Control directory (default: get_priority_request_dir())
+
+    Returns:
+        List[str]: Run IDs of the registered runs that are still alive
+    """
+    directory = Path(directory or get_priority_request_dir())
+    runs = []
+    for path in sorted((directory / LISTENER_DIR_NAME).glob("*.json")):
+        try:
+            pid = int(json.loads(path.read_text())["pid"])
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        if psutil.pid_exists(pid):
+            runs.append(path.stem)
+        else:
+            _remove(path)
+    return runs
+
+
+def listen_for_priority_requests(directory: Optional[Path] = None) -> str:
+    """
+    Register the current process as a run that takes priority requests.
+
+    Requests left for runs that are no longer registered are dropped, so a
+    request made while no run was listening never reaches a later run.
+
+    Args:
+        directory: Control directory (default: get_priority_request_dir())
+
+    Returns:
+        str: Run ID the requests are addressed to
+    """
+    directory = Path(directory or get_priority_request_dir())
+    listener_dir = directory / LISTENER_DIR_NAME
+    listener_dir.mkdir(parents=True, exist_ok=True)
+
+    run_id = uuid.uuid4().hex
+    path = listener_dir / f"{run_id}.json"
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps({"pid": os.getpid(), "started": time.time()}))
+    os.replace(temp_path, path)
+
+    runs = set(get_listening_runs(directory))
+    for request in directory.glob("*.json"):
+        if request.name.split("-", 1)[0] not in runs:
+            _remove(request)
+    return run_id
+
+
+def stop_listening(run_id: str, directory: Optional[Path] = None) -> None:
+    """
+    Unregister a run and drop the requests nobody picked up.
+
+    Args:
+        run_id: Run ID from listen_for_priority_requests()
+        directory: Control directory (default: get_priority_request_dir())
+    """
+    directory = Path(directory or get_priority_request_dir())
+    _remove(directory / LISTENER_DIR_NAME / f"{run_id}.json")
+    for request in directory.glob(f"{run_id}-*.json"):
+        _remove(request)
+
+
+def request_priority(
+    name: str, priority: int = URGENT_PRIORITY, directory: Optional[Path] = None
+) -> List[Path]:
+    """
+    Ask the running batches to change the priority of a file.
+
+    One request is made for each run that takes requests.
+
+    Args:
+        name: File name (the path is ignored)
+        priority: New priority (higher values start first)
+        directory: Control directory (default: get_priority_request_dir())
+
+    Returns:
+        List[Path]: The request files, empty if no run takes requests
+    """
+    directory = Path(directory or get_priority_request_dir())
+    paths = []
+    for run_id in get_listening_runs(directory):
+        # Written under a temporary name so the run never reads half a request
+        path = directory / f"{run_id}-{uuid.uuid4().hex}.json"
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps({"name": Path(name).name, "priority": int(priority)})
+        )
+        os.replace(temp_path, path)
+        paths.append(path)
+    return paths
+
+
+def read_priority_requests(
+    run_id: str,
+    directory: Optional[Path] = None,
+) -> List[Tuple[str, int]]:
+    """
+    Take the priority requests addressed to a run.
+
+    Each request is deleted once it has been read.
+
+    Args:
+        run_id: Run ID from listen_for_priority_requests()
+        directory: Control directory (default: get_priority_request_dir())
+
+    Returns:
+        List[Tuple[str, int]]: (file name, priority) in the order they were made
+    """
+    directory = Path(directory or get_priority_request_dir())
+    try:
+        paths = sorted(
+            directory.glob(f"{run_id}-*.json"), key=lambda p: p.stat().st_mtime
+        )
+    except OSError:
+        return []
+
+    requests = []
+    for path in paths:
+        try:
+            request = json.loads(path.read_text())
+            path.unlink()
+            requests.append((request["name"], int(request["priority"])))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            get_logger().warning(f"Ignoring priority request {path.name}: {str(e)}")
+            _remove(path)
+    return requests
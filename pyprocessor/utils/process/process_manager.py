@@ -6,8 +6,16 @@ This module provides a centralized way to manage processes, including:
 - Process monitoring and status tracking
 - Process termination and cleanup
 - Inter-process communication
+
+A warm process pool (get_warm_process_pool) starts its workers before the
+first task. The workers run from a forkserver (or spawn) context, import the
+encode path and take the FFmpeg and FFprobe paths located by the parent in
+their initializer. The pool is reused by later runs in the same process.
 """
 
+import importlib
+import multiprocessing
+import os
 import pickle
 import subprocess
 import threading
@@ -20,6 +28,7 @@ from concurrent.futures import (
     ThreadPoolExecutor,
     TimeoutError,
 )
+from concurrent.futures import wait as wait_futures
 from contextlib import contextmanager
 from multiprocessing import (
     Event,
@@ -32,23 +41,84 @@ from multiprocessing import Value as SharedValue
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Union
 
-from pyprocessor.utils.error_manager import (
+from pyprocessor.utils.logging.error_manager import (
     ErrorSeverity,
     PyProcessorError,
     with_error_handling,
 )
-from pyprocessor.utils.log_manager import get_logger
-from pyprocessor.utils.path_manager import normalize_path
+from pyprocessor.utils.logging.log_manager import get_logger
+from pyprocessor.utils.file_system.path_manager import normalize_path
+from pyprocessor.utils.process.cpu_placement import pinned
 from pyprocessor.utils.security.process_sandbox import (
     run_sandboxed_process,
     terminate_sandboxed_process,
 )
 
+# Start methods of warm pools, best first. A forkserver imports the preloaded
+# modules once and forks each worker from itself; spawn starts a fresh
+# interpreter. Neither copies the threads and locks of this process, as fork
+# does.
+WARM_START_METHODS = ["forkserver", "spawn"]
+
+# Modules a warm worker imports before its first task: the encode path
+WARM_MODULES = ["pyprocessor.processing.scheduler"]
+
 
 class ProcessError(PyProcessorError):
     """Error related to process management."""
 
 
+def get_start_method(start_method: Optional[str] = None) -> str:
+    """
+    Get the start method for a warm pool.
+
+    Args:
+        start_method: Preferred start method (default: the first of
+            WARM_START_METHODS available on this platform)
+
+    Returns:
+        str: The preferred start method if it is available, otherwise the
+        first available one of WARM_START_METHODS
+    """
+    available = multiprocessing.get_all_start_methods()
+    if start_method in available:
+        return start_method
+    return next(method for method in WARM_START_METHODS if method in available)
+
+
+def initialize_worker(
+    modules: List[str],
+    ffmpeg_path: Optional[str] = None,
+    ffprobe_path: Optional[str] = None,
+) -> None:
+    """
+    Prepare a warm pool worker before its first task.
+
+    Runs in the worker. A module that fails to import is left to the tasks,
+    which report the error when they import it themselves.
+
+    Args:
+        modules: Modules to import
+        ffmpeg_path: FFmpeg executable located by the parent (optional)
+        ffprobe_path: FFprobe executable located by the parent (optional)
+    """
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+
+    # Imported here, as the media utilities import this module
+    from pyprocessor.utils.media.ffmpeg_manager import set_executable_paths
+
+    set_executable_paths(ffmpeg_path, ffprobe_path)
+
+
+def _worker_started() -> int:
+    """Task that returns once a worker is up (used to start warm pools)."""
+    return os.getpid()
+
+
 class ProcessManager:
     """
     Centralized manager for process-related operations.
@@ -91,12 +161,14 @@ class ProcessManager:
 
         # Initialize locks
         self._process_lock = threading.Lock()
-        self._executor_lock = threading.Lock()
+        # Reentrant: the default pools are created while it is held
+        self._executor_lock = threading.RLock()
         self._queue_lock = threading.Lock()
 
         # Initialize default executors
         self._default_process_executor = None
         self._default_thread_executor = None
+        self._warm_process_executor = None
 
         # Mark as initialized
         self._initialized = True
@@ -114,6 +186,7 @@ class ProcessManager:
         capture_output: bool = True,
         process_id: Optional[str] = None,
         callback: Optional[Callable] = None,
+        cpus: Optional[List[int]] = None,
     ) -> Dict[str, Any]:
         """
         Run a process and return its output.
@@ -128,6 +201,7 @@ class ProcessManager:
             capture_output: Whether to capture stdout and stderr
             process_id: Optional ID for the process (auto-generated if None)
             callback: Optional callback function to call when the process completes
+            cpus: Optional CPUs the process is pinned to
 
         Returns:
             Dict with process information including:
@@ -159,19 +233,20 @@ class ProcessManager:
         start_time = time.time()
 
         try:
-            # Start the process
-            process = subprocess.Popen(
-                cmd,
-                shell=shell,
-                cwd=cwd,
-                env=env,
-                stdin=subprocess.PIPE if input_data is not None else None,
-                stdout=stdout,
-                stderr=stderr,
-                text=True,
-                universal_newlines=True,
-                bufsize=1,  # Line buffered
-            )
+            # Start the process (children inherit the CPU set)
+            with pinned(cpus):
+                process = subprocess.Popen(
+                    cmd,
+                    shell=shell,
+                    cwd=cwd,
+                    env=env,
+                    stdin=subprocess.PIPE if input_data is not None else None,
+                    stdout=stdout,
+                    stderr=stderr,
+                    text=True,
+                    universal_newlines=True,
+                    bufsize=1,  # Line buffered
+                )
 
             # Store the process
             with self._process_lock:
@@ -181,6 +256,7 @@ class ProcessManager:
                     "start_time": start_time,
                     "status": "running",
                     "pid": process.pid,
+                    "cpus": cpus,
                 }
 
             # Send input data if provided
@@ -306,6 +382,7 @@ class ProcessManager:
         input_data: Optional[str] = None,
         process_id: Optional[str] = None,
         callback: Optional[Callable] = None,
+        cpus: Optional[List[int]] = None,
     ) -> str:
         """
         Run a process asynchronously.
@@ -318,6 +395,7 @@ class ProcessManager:
             input_data: Input data to pass to the process
             process_id: Optional ID for the process (auto-generated if None)
             callback: Optional callback function to call when the process completes
+            cpus: Optional CPUs the process is pinned to
 
         Returns:
             Process ID that can be used to check status or terminate the process
@@ -338,19 +416,20 @@ class ProcessManager:
         start_time = time.time()
 
         try:
-            # Start the process
-            process = subprocess.Popen(
-                cmd,
-                shell=shell,
-                cwd=cwd,
-                env=env,
-                stdin=subprocess.PIPE if input_data is not None else None,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                universal_newlines=True,
-                bufsize=1,  # Line buffered
-            )
+            # Start the process (children inherit the CPU set)
+            with pinned(cpus):
+                process = subprocess.Popen(
+                    cmd,
+                    shell=shell,
+                    cwd=cwd,
+                    env=env,
+                    stdin=subprocess.PIPE if input_data is not None else None,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    universal_newlines=True,
+                    bufsize=1,  # Line buffered
+                )
 
             # Store the process
             with self._process_lock:
@@ -360,6 +439,7 @@ class ProcessManager:
                     "start_time": start_time,
                     "status": "running",
                     "pid": process.pid,
+                    "cpus": cpus,
                     "callback": callback,
                 }
 
@@ -796,7 +876,12 @@ class ProcessManager:
 
     @with_error_handling
     def create_process_pool(
-        self, max_workers: int = None, executor_id: str = None
+        self,
+        max_workers: int = None,
+        executor_id: str = None,
+        start_method: Optional[str] = None,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
     ) -> str:
         """
         Create a process pool executor.
@@ -804,6 +889,10 @@ class ProcessManager:
         Args:
             max_workers: Maximum number of worker processes (default: CPU count)
             executor_id: Optional ID for the executor (auto-generated if None)
+            start_method: How workers are started, "fork", "forkserver" or
+                "spawn" (default: the multiprocessing default)
+            initializer: Function each worker runs when it starts (optional)
+            initargs: Arguments of the initializer
 
         Returns:
             Executor ID that can be used to submit tasks or shutdown the executor
@@ -813,7 +902,14 @@ class ProcessManager:
             executor_id = f"process_pool_{str(uuid.uuid4())}"
 
         # Create the executor
-        executor = ProcessPoolExecutor(max_workers=max_workers)
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=(
+                multiprocessing.get_context(start_method) if start_method else None
+            ),
+            initializer=initializer,
+            initargs=initargs,
+        )
 
         # Store the executor
         with self._executor_lock:
@@ -821,6 +917,7 @@ class ProcessManager:
                 "executor": executor,
                 "type": "process",
                 "max_workers": max_workers,
+                "start_method": start_method or multiprocessing.get_start_method(),
                 "created_at": time.time(),
                 "futures": {},
             }
@@ -830,6 +927,86 @@ class ProcessManager:
         )
         return executor_id
 
+    @with_error_handling
+    def get_warm_process_pool(
+        self,
+        max_workers: Optional[int] = None,
+        start_method: Optional[str] = None,
+        modules: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Get a process pool whose workers are started and ready for the
+        encode path, creating it if necessary.
+
+        The workers import the modules and take the FFmpeg and FFprobe paths
+        located here before they are counted as started, so the first tasks
+        start as fast as later ones. The pool is kept for later calls and
+        replaced only when a call needs more workers, another start method
+        or other modules. Returns once every worker is up.
+
+        Args:
+            max_workers: Worker processes (default: CPU count)
+            start_method: "forkserver" or "spawn" (default: forkserver where
+                available, see get_start_method())
+            modules: Modules the workers import (default: WARM_MODULES)
+
+        Returns:
+            Executor ID of the warm pool
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        start_method = get_start_method(start_method)
+        modules = list(modules or WARM_MODULES)
+
+        with self._executor_lock:
+            previous = self._warm_process_executor
+            info = self._executors.get(previous) if previous else None
+            if (
+                info is not None
+                and info["max_workers"] >= max_workers
+                and info["start_method"] == start_method
+                and info["modules"] == modules
+            ):
+                return previous
+
+            if start_method == "forkserver":
+                # The server imports the modules once and every worker forks
+                # from it. Only applies before the server first starts.
+                # __main__ stays preloaded, as tasks may be defined there.
+                multiprocessing.get_context("forkserver").set_forkserver_preload(
+                    ["__main__"] + modules
+                )
+
+            # Imported here, as the media utilities import this module
+            from pyprocessor.utils.media.ffmpeg_manager import (
+                get_ffmpeg_path,
+                get_ffprobe_path,
+            )
+
+            executor_id = self.create_process_pool(
+                max_workers=max_workers,
+                executor_id=f"warm_process_pool_{str(uuid.uuid4())}",
+                start_method=start_method,
+                initializer=initialize_worker,
+                initargs=(modules, get_ffmpeg_path(), get_ffprobe_path()),
+            )
+            info = self._executors[executor_id]
+            info["modules"] = modules
+            self._warm_process_executor = executor_id
+
+        if previous is not None:
+            self.shutdown_executor(previous, wait=False)
+
+        # Workers are started on demand, one per task that finds none idle
+        start = time.perf_counter()
+        executor = info["executor"]
+        wait_futures([executor.submit(_worker_started) for _ in range(max_workers)])
+        self.logger.info(
+            f"Started {max_workers} warm {start_method} workers in "
+            f"{time.perf_counter() - start:.2f}s",
+            executor_id=executor_id,
+        )
+        return executor_id
+
     @with_error_handling
     def create_thread_pool(
         self, max_workers: int = None, executor_id: str = None
@@ -1138,6 +1315,37 @@ class ProcessManager:
 
             return task_info
 
+    @with_error_handling
+    def add_task_done_callback(
+        self, task_id: str, callback: Callable[[str, Future], None]
+    ) -> None:
+        """
+        Call a function when a task completes, fails or is cancelled.
+
+        The callback runs on the executor's thread, or immediately if the
+        task is already done.
+
+        Args:
+            task_id: ID of the task
+            callback: Called with (task_id, future)
+
+        Raises:
+            ProcessError: If the task is not found
+        """
+        with self._executor_lock:
+            executor_id = self._futures.get(task_id, {}).get("executor_id")
+            futures = self._executors.get(executor_id, {}).get("futures", {})
+            if task_id not in futures:
+                raise ProcessError(
+                    f"Task not found: {task_id}",
+                    severity=ErrorSeverity.ERROR,
+                    details={"task_id": task_id},
+                )
+            future = futures[task_id]["future"]
+
+        # Added outside the lock, since a done future calls back immediately
+        future.add_done_callback(lambda f: callback(task_id, f))
+
     @with_error_handling
     def cancel_task(self, task_id: str) -> bool:
         """
@@ -1236,6 +1444,8 @@ class ProcessManager:
                 self._default_process_executor = None
             elif executor_id == self._default_thread_executor:
                 self._default_thread_executor = None
+            elif executor_id == self._warm_process_executor:
+                self._warm_process_executor = None
 
             self.logger.debug(
                 f"Shutdown executor {executor_id}", executor_id=executor_id
@@ -1259,6 +1469,7 @@ class ProcessManager:
                     "executor_id": executor_id,
                     "type": executor_info["type"],
                     "max_workers": executor_info["max_workers"],
+                    "start_method": executor_info.get("start_method"),
                     "created_at": executor_info["created_at"],
                     "task_count": len(executor_info["futures"]),
                 }
@@ -1983,6 +2194,7 @@ def run_process(
     capture_output: bool = True,
     process_id: Optional[str] = None,
     callback: Optional[Callable] = None,
+    cpus: Optional[List[int]] = None,
 ) -> Dict[str, Any]:
     """
     Run a process and return its output.
@@ -1997,12 +2209,22 @@ def run_process(
         capture_output: Whether to capture stdout and stderr
         process_id: Optional ID for the process (auto-generated if None)
         callback: Optional callback function to call when the process completes
+        cpus: Optional CPUs the process is pinned to
 
     Returns:
         Dict with process information
     """
     return get_process_manager().run_process(
-        cmd, shell, cwd, env, input_data, timeout, capture_output, process_id, callback
+        cmd,
+        shell,
+        cwd,
+        env,
+        input_data,
+        timeout,
+        capture_output,
+        process_id,
+        callback,
+        cpus,
     )
 
 
@@ -2014,6 +2236,7 @@ def run_process_async(
     input_data: Optional[str] = None,
     process_id: Optional[str] = None,
     callback: Optional[Callable] = None,
+    cpus: Optional[List[int]] = None,
 ) -> str:
     """
     Run a process asynchronously.
@@ -2026,12 +2249,13 @@ def run_process_async(
         input_data: Input data to pass to the process
         process_id: Optional ID for the process (auto-generated if None)
         callback: Optional callback function to call when the process completes
+        cpus: Optional CPUs the process is pinned to
 
     Returns:
         Process ID that can be used to check status or terminate the process
     """
     return get_process_manager().run_process_async(
-        cmd, shell, cwd, env, input_data, process_id, callback
+        cmd, shell, cwd, env, input_data, process_id, callback, cpus
     )
 
 
@@ -2144,18 +2368,53 @@ def terminate_sandboxed_process(process_id: str, timeout: float = 5.0) -> bool:
 # Process Pool Management Functions
 
 
-def create_process_pool(max_workers: int = None, executor_id: str = None) -> str:
+def create_process_pool(
+    max_workers: int = None,
+    executor_id: str = None,
+    start_method: Optional[str] = None,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+) -> str:
     """
     Create a process pool executor.
 
     Args:
         max_workers: Maximum number of worker processes (default: CPU count)
         executor_id: Optional ID for the executor (auto-generated if None)
+        start_method: How workers are started (default: the multiprocessing
+            default)
+        initializer: Function each worker runs when it starts (optional)
+        initargs: Arguments of the initializer
 
     Returns:
         Executor ID that can be used to submit tasks or shutdown the executor
     """
-    return get_process_manager().create_process_pool(max_workers, executor_id)
+    return get_process_manager().create_process_pool(
+        max_workers, executor_id, start_method, initializer, initargs
+    )
+
+
+def get_warm_process_pool(
+    max_workers: Optional[int] = None,
+    start_method: Optional[str] = None,
+    modules: Optional[List[str]] = None,
+) -> str:
+    """
+    Get a process pool whose workers are started and ready for the encode
+    path, reused across runs.
+
+    Args:
+        max_workers: Worker processes (default: CPU count)
+        start_method: "forkserver" or "spawn" (default: forkserver where
+            available)
+        modules: Modules the workers import (default: WARM_MODULES)
+
+    Returns:
+        Executor ID of the warm pool
+    """
+    return get_process_manager().get_warm_process_pool(
+        max_workers, start_method, modules
+    )
 
 
 def create_thread_pool(max_workers: int = None, executor_id: str = None) -> str:
@@ -2243,6 +2502,22 @@ def get_task_status(task_id: str) -> Optional[Dict[str, Any]]:
     return get_process_manager().get_task_status(task_id)
 
 
+def add_task_done_callback(
+    task_id: str, callback: Callable[[str, Future], None]
+) -> None:
+    """
+    Call a function when a task completes, fails or is cancelled.
+
+    Args:
+        task_id: ID of the task
+        callback: Called with (task_id, future)
+
+    Raises:
+        ProcessError: If the task is not found
+    """
+    return get_process_manager().add_task_done_callback(task_id, callback)
+
+
 def cancel_task(task_id: str) -> bool:
     """
     Cancel a task.
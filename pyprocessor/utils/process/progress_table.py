@@ -0,0 +1,231 @@
+"""
+Shared-memory progress table for PyProcessor.
+
+Encode workers run in other processes (or threads), and every progress update
+used to travel through a ``multiprocessing.Manager`` queue proxy, which costs
+a round trip through the manager process. The progress table instead keeps
+one fixed slot per task in a shared memory block:
+
+    head (u32) | state (u32) | percent (f64) | fps (f64) | speed (f64) | pid (u32) | tail (u32)
+
+A slot has a single writer, the worker running its task. The writer bumps
+``tail``, writes the fields and then sets ``head`` to the same value, so a
+reader that copies the slot front to back sees ``head == tail`` only when the
+copy is consistent. The parent samples the whole table at its own pace and
+gets only the slots that changed since the last sample. ``pid`` is the FFmpeg
+process the task is waiting on (0 if none), so the parent can kill an encode
+that hangs.
+
+The table pickles by name, so it can be passed to process pool workers as an
+ordinary argument; the worker attaches to the existing block.
+"""
+
+import math
+import struct
+from multiprocessing import shared_memory
+from typing import Dict, NamedTuple, Optional
+
+# Slot states
+IDLE = 0
+RUNNING = 1
+COMPLETED = 2
+FAILED = 3
+
+STATE_NAMES = {
+    IDLE: "idle",
+    RUNNING: "running",
+    COMPLETED: "completed",
+    FAILED: "failed",
+}
+
+# head, state, percent, fps, speed, pid, tail
+_SLOT = struct.Struct("<IIdddII")
+_SEQ = struct.Struct("<I")
+_FIELDS = struct.Struct("<IdddI")
+_FIELDS_OFFSET = 4
+_TAIL_OFFSET = 36
+
+
+class SlotProgress(NamedTuple):
+    """Progress of one task as read from the table."""
+
+    state: int
+    percent: Optional[float]
+    fps: Optional[float]
+    speed: Optional[float]
+    pid: Optional[int] = None
+
+    @property
+    def state_name(self) -> str:
+        """Get the name of the state."""
+        return STATE_NAMES.get(self.state, "unknown")
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class ProgressTable:
+    """
+    Fixed-size table of task progress in shared memory.
+    """
+
+    def __init__(self, slots: int, name: Optional[str] = None):
+        """
+        Create a table, or attach to an existing one.
+
+        Args:
+            slots: Number of task slots
+            name: Name of an existing table to attach to (default: create
+                a new table, which the caller must unlink)
+        """
+        self.slots = max(1, slots)
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(
+                create=True, size=self.slots * _SLOT.size
+            )
+            for slot in range(self.slots):
+                _SLOT.pack_into(
+                    self._shm.buf,
+                    slot * _SLOT.size,
+                    0,
+                    IDLE,
+                    math.nan,
+                    math.nan,
+                    math.nan,
+                    0,
+                    0,
+                )
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+
+        # Last sequence number seen per slot by changes()
+        self._seen: Dict[int, int] = {}
+
+    def __reduce__(self):
+        # Workers attach to the block by name instead of copying it
+        return (self.__class__, (self.slots, self.name))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    def update(
+        self,
+        slot: int,
+        percent: Optional[float] = None,
+        fps: Optional[float] = None,
+        speed: Optional[float] = None,
+        state: int = RUNNING,
+        pid: Optional[int] = None,
+    ) -> None:
+        """
+        Write the progress of a task. Fields left as None keep their value.
+
+        Args:
+            slot: Slot of the task
+            percent: Completion percentage
+            fps: Encoding frames per second
+            speed: Encoding speed as a multiple of real time
+            state: State of the task
+            pid: FFmpeg process the task is waiting on (0 once it has exited)
+        """
+        buf = self._shm.buf
+        offset = (slot % self.slots) * _SLOT.size
+        seq, _, old_percent, old_fps, old_speed, old_pid, _ = _SLOT.unpack_from(
+            buf, offset
+        )
+        seq = (seq + 1) & 0xFFFFFFFF
+
+        _SEQ.pack_into(buf, offset + _TAIL_OFFSET, seq)
+        _FIELDS.pack_into(
+            buf,
+            offset + _FIELDS_OFFSET,
+            state,
+            old_percent if percent is None else float(percent),
+            old_fps if fps is None else float(fps),
+            old_speed if speed is None else float(speed),
+            old_pid if pid is None else int(pid),
+        )
+        _SEQ.pack_into(buf, offset, seq)
+
+    def set_state(self, slot: int, state: int) -> None:
+        """
+        Change the state of a task without touching its progress.
+
+        Args:
+            slot: Slot of the task
+            state: New state
+        """
+        self.update(slot, state=state)
+
+    def read(self, slot: int) -> Optional[SlotProgress]:
+        """
+        Read the progress of one task.
+
+        Args:
+            slot: Slot of the task
+
+        Returns:
+            Optional[SlotProgress]: Progress, or None if the slot is being written
+        """
+        head, state, percent, fps, speed, pid, tail = _SLOT.unpack_from(
+            self._shm.buf, (slot % self.slots) * _SLOT.size
+        )
+        if head != tail:
+            return None
+        return SlotProgress(
+            state, _optional(percent), _optional(fps), _optional(speed), pid or None
+        )
+
+    def changes(self) -> Dict[int, SlotProgress]:
+        """
+        Sample the table and get the slots written since the last sample.
+
+        Slots that are being written are skipped and picked up by the next
+        sample.
+
+        Returns:
+            Dict[int, SlotProgress]: Progress of the changed slots by slot
+        """
+        changed = {}
+        # The block can be larger than requested, so only the slots are copied
+        snapshot = bytes(self._shm.buf[: self.slots * _SLOT.size])
+        for slot, values in enumerate(_SLOT.iter_unpack(snapshot)):
+            head, state, percent, fps, speed, pid, tail = values
+            if head != tail or head == self._seen.get(slot, 0):
+                continue
+            self._seen[slot] = head
+            changed[slot] = SlotProgress(
+                state, _optional(percent), _optional(fps), _optional(speed), pid or None
+            )
+        return changed
+
+    def key(self, slot: int) -> str:
+        """
+        Get a name for a slot that is unique across tables.
+
+        Args:
+            slot: Slot of the task
+
+        Returns:
+            str: Table name and slot
+        """
+        return f"{self.name}/{slot % self.slots}"
+
+    def close(self) -> None:
+        """Detach from the shared memory block."""
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory block (only the creator should call this)."""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
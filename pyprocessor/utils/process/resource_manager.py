@@ -18,7 +18,7 @@ from typing import Any, Callable, Dict, List, Optional
 
 import psutil
 
-from pyprocessor.utils.log_manager import get_logger
+from pyprocessor.utils.logging.log_manager import get_logger
 from pyprocessor.utils.process.gpu_manager import (
     get_all_gpu_usage,
     start_gpu_monitoring,
@@ -448,6 +448,11 @@ class ResourceManager:
             cpu_freq = psutil.cpu_freq()
             current_freq = cpu_freq.current if cpu_freq else None
 
+            # Share of time CPUs sat idle waiting for I/O since the last call
+            # (Linux only)
+            cpu_times = psutil.cpu_times_percent(interval=None)
+            iowait = getattr(cpu_times, "iowait", 0.0) / 100.0
+
             # Get CPU state
             state = self._thresholds[ResourceType.CPU].get_state(cpu_percent)
 
@@ -462,6 +467,7 @@ class ResourceManager:
                     "count": cpu_count,
                     "frequency": current_freq,
                     "per_cpu": psutil.cpu_percent(interval=0.1, percpu=True),
+                    "iowait": iowait,
                 },
             )
 
@@ -488,6 +494,7 @@ class ResourceManager:
         try:
             # Get memory usage
             memory = psutil.virtual_memory()
+            swap = psutil.swap_memory()
 
             # Calculate utilization
             memory_percent = memory.percent / 100.0
@@ -507,6 +514,8 @@ class ResourceManager:
                     "free": memory.free,
                     "cached": getattr(memory, "cached", None),
                     "buffers": getattr(memory, "buffers", None),
+                    "swap_percent": swap.percent / 100.0,
+                    "swap_in": swap.sin,  # Bytes swapped in since boot
                 },
             )
 
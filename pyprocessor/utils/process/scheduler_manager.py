@@ -6,26 +6,123 @@ This module provides a centralized way to manage scheduling of tasks, including:
 - Task prioritization and dependencies
 - Task monitoring and status tracking
 - Task cancellation and cleanup
+
+The scheduler is event-driven. Ready tasks wait in a priority heap, and a
+reverse-dependency index releases the dependents of a task when it
+finishes. Completions arrive through future done-callbacks. The scheduler
+thread sleeps until a task is scheduled or completes, so dispatching does
+not depend on the number of queued tasks or on a polling interval.
+
+Tasks can declare a ResourceRequest (CPU cores, memory, temporary disk and
+an exclusive I/O device). A task starts only when its request fits both the
+capacity not yet reserved by running tasks and the live free memory and
+disk reported by the ResourceManager. When the highest-priority task does
+not fit, smaller tasks behind it are started in its place (backfilling)
+until it has waited max_head_wait seconds.
+
+A task with a timeout is reported to the Watchdog when it starts. If it is
+still running when the timeout passes, it fails (or goes back to the queue
+if it has retries left) and its slot and resources are freed at once. The
+function itself cannot be stopped inside a pool worker; it runs on and its
+result is discarded.
+
+A running task whose process ID was reported with report_process() can be
+paused. With max_preempted set, a ready task of higher priority than a
+running one pauses the lowest-priority running task (SIGSTOP) and takes its
+slot and CPU cores; the paused task resumes (SIGCONT) when a slot frees up
+and no ready task outranks it. It keeps its memory, disk and device, and its
+executor worker, while it is paused. Above pause_memory_percent, the
+lowest-priority running task is paused in place until memory falls below
+max_memory_percent. Priorities can be changed with set_priority() while
+tasks wait or run.
 """
 
+import heapq
+import itertools
+import os
+import queue
+import tempfile
 import threading
 import time
 import uuid
+from collections import deque
 from typing import Any, Callable, Dict, List, Optional
 
-from pyprocessor.utils.error_manager import (
+from pyprocessor.utils.logging.error_manager import (
     ErrorSeverity,
     PyProcessorError,
     with_error_handling,
 )
-from pyprocessor.utils.log_manager import get_logger
-from pyprocessor.utils.process_manager import get_process_manager, submit_task
+from pyprocessor.utils.logging.log_manager import get_logger
+from pyprocessor.utils.process.preemption import pause_process, resume_process
+from pyprocessor.utils.process.process_manager import get_process_manager
+from pyprocessor.utils.process.resource_manager import get_resource_manager
+from pyprocessor.utils.process.watchdog import get_watchdog
+
+# Task states after which a task never runs again
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+# Ready tasks looked at per dispatch when the first ones do not fit
+ADMISSION_SCAN_DEPTH = 64
+
+# Why a running task is paused
+PREEMPTED = "preempted"
+MEMORY_PAUSED = "memory"
+
+# Seconds between two tasks paused for memory; a paused process keeps its
+# memory, so the next one is paused only if usage is still high after this
+MEMORY_PAUSE_INTERVAL = 5.0
+
+# Latest dispatch latencies kept for the p99 in the statistics
+LATENCY_SAMPLES = 10000
 
 
 class SchedulerError(PyProcessorError):
     """Error related to scheduler management."""
 
 
+class ResourceRequest:
+    """
+    Resources a task needs while it runs.
+    """
+
+    def __init__(
+        self,
+        cpu_cores: float = 1.0,
+        memory_bytes: int = 0,
+        temp_disk_bytes: int = 0,
+        io_device: Optional[str] = None,
+    ):
+        """
+        Initialize a resource request.
+
+        Args:
+            cpu_cores: CPU cores the task keeps busy
+            memory_bytes: Estimated peak resident memory in bytes
+            temp_disk_bytes: Bytes the task writes to the temporary directory
+            io_device: I/O device the task needs to itself (e.g. a disk or
+                capture card); tasks naming the same device never overlap
+        """
+        self.cpu_cores = cpu_cores
+        self.memory_bytes = memory_bytes
+        self.temp_disk_bytes = temp_disk_bytes
+        self.io_device = io_device
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the request to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Request information
+        """
+        return {
+            "cpu_cores": self.cpu_cores,
+            "memory_bytes": self.memory_bytes,
+            "temp_disk_bytes": self.temp_disk_bytes,
+            "io_device": self.io_device,
+        }
+
+
 class Task:
     """
     Represents a scheduled task.
@@ -43,6 +140,9 @@ class Task:
         dependencies: List[str] = None,
         timeout: Optional[float] = None,
         callback: Optional[Callable] = None,
+        resources: Optional[ResourceRequest] = None,
+        max_retries: int = 0,
+        start_callback: Optional[Callable] = None,
     ):
         """
         Initialize a task.
@@ -54,8 +154,16 @@ class Task:
             kwargs: Keyword arguments to pass to the function
             priority: Priority of the task (higher values = higher priority)
             dependencies: List of task IDs that must complete before this task
-            timeout: Timeout in seconds
+            timeout: Seconds the task may run before it fails (None for no
+                limit)
             callback: Function to call when the task completes
+            resources: Resources the task needs (only concurrency limits it
+                if None)
+            max_retries: How many times the task is queued again after it
+                timed out
+            start_callback: Function called with the task ID each time the
+                task starts; it may return keyword arguments to add to that
+                call of the function
         """
         self.task_id = task_id
         self.func = func
@@ -65,6 +173,9 @@ class Task:
         self.dependencies = dependencies or []
         self.timeout = timeout
         self.callback = callback
+        self.resources = resources
+        self.max_retries = max_retries
+        self.start_callback = start_callback
 
         # Task status
         self.status = "pending"  # pending, running, completed, failed, cancelled
@@ -75,6 +186,16 @@ class Task:
         self.completed_at = None
         self.process_task_id = None  # ID of the task in the process manager
 
+        # Scheduling state
+        self.unmet_dependencies = 0  # Dependencies that have not finished yet
+        self.ready_at = None  # perf_counter() when the task became runnable
+        self.reserved = False  # Whether its resources are reserved
+        self.holds_slot = False  # Whether it counts against max_concurrent
+        self.attempts = 0  # Times the task was started
+        self.heap_seq = None  # Sequence of its current ready heap entry
+        self.pid = None  # Process doing the work, if reported
+        self.paused = None  # PREEMPTED or MEMORY_PAUSED while it is paused
+
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert the task to a dictionary.
@@ -90,7 +211,12 @@ class Task:
             "priority": self.priority,
             "dependencies": self.dependencies,
             "timeout": self.timeout,
+            "resources": self.resources.to_dict() if self.resources else None,
+            "max_retries": self.max_retries,
+            "attempts": self.attempts,
             "status": self.status,
+            "pid": self.pid,
+            "paused": self.paused,
             "submitted_at": self.submitted_at,
             "started_at": self.started_at,
             "completed_at": self.completed_at,
@@ -138,10 +264,63 @@ class SchedulerManager:
         self._running_tasks = {}  # Dict of running tasks
         self._completed_tasks = {}  # Dict of completed tasks
 
+        # Runnable tasks as (-priority, sequence, task); cancelled tasks and
+        # entries left behind by a priority change are skipped when they
+        # reach the top
+        self._ready_heap = []
+        self._sequence = itertools.count()
+
+        # Task IDs waiting for each dependency
+        self._dependents: Dict[str, List[str]] = {}
+
+        # Events for tasks that someone is waiting for
+        self._waiters: Dict[str, threading.Event] = {}
+
+        # Executor the tasks run on and how many may run at once
+        self.executor_id = None
+        self.max_concurrent = os.cpu_count() or 1
+        self._in_flight = 0
+
+        # Capacity that resource requests are packed against
+        self.cpu_cores = os.cpu_count() or 1
+        self.max_memory_fraction = 0.8
+        self.temp_dir = tempfile.gettempdir()
+        self.max_head_wait = 60.0  # Seconds smaller tasks may jump a blocked one
+        self.admission_retry = 1.0  # Seconds between retries while blocked
+        self._reserved = {"cpu_cores": 0.0, "memory_bytes": 0, "temp_disk_bytes": 0}
+        self._busy_devices = set()
+        self._head_blocked_since = None
+        self._blocked = False
+
+        # Pausing running tasks
+        self.max_preempted = 0  # Tasks that may be preempted at once
+        self.pause_memory_fraction = None  # Memory usage tasks are paused at
+        self._paused: Dict[str, Task] = {}
+        self._last_memory_pause = None
+        self._dispatch_latencies = deque(maxlen=LATENCY_SAMPLES)
+
+        # Statistics
+        self._stats = {
+            "scheduled": 0,
+            "dispatched": 0,
+            "finished": 0,
+            "max_queued": 0,
+            "dispatch_latency_total": 0.0,
+            "dispatch_latency_max": 0.0,
+            "admission_blocked": 0,
+            "backfilled": 0,
+            "timed_out": 0,
+            "retried": 0,
+            "preempted": 0,
+            "memory_paused": 0,
+            "resumed": 0,
+        }
+
         # Initialize locks
         self._task_lock = threading.Lock()
 
-        # Initialize scheduler thread
+        # Initialize scheduler thread; it sleeps on the event queue
+        self._events = queue.SimpleQueue()
         self._scheduler_thread = None
         self._scheduler_running = False
 
@@ -149,6 +328,63 @@ class SchedulerManager:
         self._initialized = True
         self.logger.debug("Scheduler manager initialized")
 
+    def configure(
+        self,
+        max_concurrent=None,
+        executor_id=None,
+        cpu_cores=None,
+        max_memory_percent=None,
+        temp_dir=None,
+        max_head_wait=None,
+        max_preempted=None,
+        pause_memory_percent=None,
+    ):
+        """
+        Set where tasks run, how many run at once and the capacity their
+        resource requests are packed against.
+
+        Tasks are handed to the executor only when a slot is free, so the
+        queued tasks stay in priority order until they start.
+
+        Args:
+            max_concurrent: Tasks running at the same time (default: CPU
+                count, the size of the default process pool)
+            executor_id: Process manager executor for the tasks (default:
+                the default process pool)
+            cpu_cores: CPU cores the running tasks may request in total
+                (default: CPU count)
+            max_memory_percent: Memory usage the running tasks may bring
+                the system to (default: 80)
+            temp_dir: Directory whose disk holds the temporary files
+                (default: the system temporary directory)
+            max_head_wait: Seconds smaller tasks may start ahead of a
+                higher-priority task that does not fit (default: 60)
+            max_preempted: Running tasks a ready task of higher priority
+                may pause at once (default: 0, no preemption). A paused task
+                keeps its worker, so the executor needs max_concurrent +
+                max_preempted workers.
+            pause_memory_percent: Memory usage at which running tasks are
+                paused (default: 0, never)
+        """
+        with self._task_lock:
+            if max_concurrent is not None:
+                self.max_concurrent = max(1, int(max_concurrent))
+            if executor_id is not None:
+                self.executor_id = executor_id
+            if cpu_cores is not None:
+                self.cpu_cores = max(1, cpu_cores)
+            if max_memory_percent is not None:
+                self.max_memory_fraction = max_memory_percent / 100.0
+            if temp_dir is not None:
+                self.temp_dir = str(temp_dir)
+            if max_head_wait is not None:
+                self.max_head_wait = max_head_wait
+            if max_preempted is not None:
+                self.max_preempted = max(0, int(max_preempted))
+            if pause_memory_percent is not None:
+                self.pause_memory_fraction = pause_memory_percent / 100.0 or None
+        self._wakeup()
+
     @with_error_handling
     def start_scheduler(self):
         """Start the scheduler thread."""
@@ -172,221 +408,622 @@ class SchedulerManager:
 
             self._scheduler_running = False
 
-            # Wait for the scheduler thread to stop
-            if self._scheduler_thread and self._scheduler_thread.is_alive():
-                self._scheduler_thread.join(timeout=5.0)
+        # Wake the scheduler thread so it sees the flag
+        self._wakeup()
 
-            self.logger.debug("Scheduler thread stopped")
+        # Wait for the scheduler thread to stop
+        if self._scheduler_thread and self._scheduler_thread.is_alive():
+            self._scheduler_thread.join(timeout=5.0)
+
+        self.logger.debug("Scheduler thread stopped")
+
+    def _wakeup(self, task=None, future=None):
+        """Queue an event for the scheduler thread."""
+        self._events.put((time.perf_counter(), task, future))
 
     def _scheduler_loop(self):
-        """Main scheduler loop that processes pending tasks."""
+        """Main scheduler loop that handles completions and dispatches tasks."""
         while self._scheduler_running:
+            # While a task waits for capacity that may free up without an
+            # event (memory or disk used by other processes), or memory is
+            # watched for pausing, retry on a timer
+            timed = self._blocked or (
+                self.pause_memory_fraction is not None
+                and bool(self._running_tasks or self._paused)
+            )
             try:
-                # Process pending tasks
-                self._process_pending_tasks()
-
-                # Check running tasks
-                self._check_running_tasks()
-
-                # Sleep to avoid CPU spinning
-                time.sleep(0.1)
+                event_at, task, future = self._events.get(
+                    timeout=self.admission_retry if timed else None
+                )
+            except queue.Empty:
+                event_at, task, future = time.perf_counter(), None, None
+            try:
+                if task is not None:
+                    self._handle_done(task, future)
+                self._dispatch(event_at)
 
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {str(e)}")
-                time.sleep(1.0)  # Sleep longer on error
 
-    def _process_pending_tasks(self):
-        """Process pending tasks and submit them for execution."""
-        with self._task_lock:
-            # Get all pending tasks
-            pending_tasks = list(self._pending_tasks.values())
+    def _push_ready(self, task):
+        """Put a task whose dependencies have finished on the ready heap."""
+        task.ready_at = time.perf_counter()
+        self._push_heap(task)
+
+    def _push_heap(self, task):
+        """Add a heap entry for a task at its current priority."""
+        task.heap_seq = next(self._sequence)
+        heapq.heappush(self._ready_heap, (-task.priority, task.heap_seq, task))
+
+    @staticmethod
+    def _is_current(entry):
+        """Check if a heap entry is for a pending task at its priority."""
+        task = entry[2]
+        return task.status == "pending" and entry[1] == task.heap_seq
+
+    def _pop_ready(self):
+        """Take the highest-priority pending task off the ready heap."""
+        while self._ready_heap:
+            entry = heapq.heappop(self._ready_heap)
+            if self._is_current(entry):
+                return entry[2]
+        return None
+
+    def _peek_ready(self):
+        """Get the highest-priority pending task without taking it."""
+        while self._ready_heap and not self._is_current(self._ready_heap[0]):
+            heapq.heappop(self._ready_heap)
+        return self._ready_heap[0][2] if self._ready_heap else None
+
+    def _read_capacity(self) -> Dict[str, float]:
+        """
+        Read the live free memory and temporary disk space.
 
-            # Sort by priority (higher values first)
-            pending_tasks.sort(key=lambda t: t.priority, reverse=True)
+        Returns:
+            Dict[str, float]: Total and available memory and available disk
+            in bytes (unlimited if they cannot be read)
+        """
+        capacity = {
+            "memory_total": float("inf"),
+            "memory_available": float("inf"),
+            "disk_available": float("inf"),
+        }
+        try:
+            resource_manager = get_resource_manager()
+            memory = resource_manager.get_memory_usage()
+            if memory.total > 1:
+                capacity["memory_total"] = memory.total
+                capacity["memory_available"] = memory.available
+            disk = resource_manager.get_disk_usage(self.temp_dir)
+            if disk.total > 1:
+                capacity["disk_available"] = disk.available
+        except Exception as e:
+            self.logger.debug(f"Could not read resource capacity: {str(e)}")
+        return capacity
+
+    def _fits(self, request, capacity):
+        """
+        Check if a resource request fits the capacity that is left.
 
-            for task in pending_tasks:
-                # Skip if task is no longer pending
-                if task.status != "pending":
-                    continue
+        Args:
+            request: ResourceRequest of the task
+            capacity: Live capacity from _read_capacity()
 
-                # Check if all dependencies are completed
-                dependencies_met = True
-                for dep_id in task.dependencies:
-                    if dep_id not in self._completed_tasks:
-                        dependencies_met = False
-                        break
+        Returns:
+            Optional[str]: None if it fits, otherwise the resource that is short
+        """
+        if request.io_device is not None and request.io_device in self._busy_devices:
+            return "io_device"
+        if self._reserved["cpu_cores"] + request.cpu_cores > self.cpu_cores:
+            return "cpu"
+        if request.memory_bytes:
+            # Neither the reservations nor the live usage may pass the limit
+            limit = capacity["memory_total"] * self.max_memory_fraction
+            headroom = capacity["memory_available"] - capacity["memory_total"] * (
+                1 - self.max_memory_fraction
+            )
+            if (
+                self._reserved["memory_bytes"] + request.memory_bytes > limit
+                or request.memory_bytes > headroom
+            ):
+                return "memory"
+        if request.temp_disk_bytes and (
+            self._reserved["temp_disk_bytes"] + request.temp_disk_bytes
+            > capacity["disk_available"]
+        ):
+            return "temp_disk"
+        return None
+
+    def _pop_admissible(self):
+        """
+        Take the highest-priority ready task whose resources fit.
 
-                if not dependencies_met:
-                    continue
+        Tasks that do not fit stay on the heap in their order. Tasks behind a
+        blocked one are only looked at until it has waited max_head_wait
+        seconds. With nothing running, the first task always starts, so a
+        request larger than the whole host cannot block the queue.
 
-                # Submit the task to the process manager
-                try:
-                    # Update task status
-                    task.status = "running"
-                    task.started_at = time.time()
+        Returns:
+            Optional[Task]: Task to start, or None
+        """
+        skipped = []
+        chosen = None
+        capacity = None
+        while len(skipped) < ADMISSION_SCAN_DEPTH and self._ready_heap:
+            entry = heapq.heappop(self._ready_heap)
+            task = entry[2]
+            if not self._is_current(entry):
+                continue
+
+            request = task.resources
+            if request is None or (self._in_flight == 0 and not skipped):
+                chosen = task
+                break
+            if capacity is None and (request.memory_bytes or request.temp_disk_bytes):
+                capacity = self._read_capacity()
+            short = self._fits(request, capacity or {})
+            if short is None:
+                chosen = task
+                break
+
+            skipped.append(entry)
+            if len(skipped) == 1:
+                self._stats["admission_blocked"] += 1
+                if self._head_blocked_since is None:
+                    self._head_blocked_since = time.perf_counter()
+                    self.logger.debug(
+                        f"Task {task.task_id} waits for {short}",
+                        task_id=task.task_id,
+                        resource=short,
+                    )
+                if time.perf_counter() - self._head_blocked_since > self.max_head_wait:
+                    # Hold the others back until the first task fits
+                    break
+
+        for entry in skipped:
+            heapq.heappush(self._ready_heap, entry)
+
+        if chosen is not None:
+            if skipped:
+                self._stats["backfilled"] += 1
+            else:
+                self._head_blocked_since = None
+        self._blocked = chosen is None and bool(skipped)
+        return chosen
+
+    def _reserve(self, task):
+        """Reserve the resources of a task that starts (lock held)."""
+        request = task.resources
+        if request is None:
+            return
+        self._reserved["cpu_cores"] += request.cpu_cores
+        self._reserved["memory_bytes"] += request.memory_bytes
+        self._reserved["temp_disk_bytes"] += request.temp_disk_bytes
+        if request.io_device is not None:
+            self._busy_devices.add(request.io_device)
+        task.reserved = True
+
+    def _release(self, task):
+        """Release the resources of a task that ended (lock held)."""
+        request = task.resources
+        if not task.reserved:
+            return
+        if task.paused != PREEMPTED:
+            # A preempted task gave its cores back when it was paused
+            self._reserved["cpu_cores"] -= request.cpu_cores
+        self._reserved["memory_bytes"] -= request.memory_bytes
+        self._reserved["temp_disk_bytes"] -= request.temp_disk_bytes
+        self._busy_devices.discard(request.io_device)
+        task.reserved = False
+
+    def _pause(self, task, reason):
+        """
+        Pause the process of a running task (lock held).
 
-                    # Submit the task
-                    process_task_id = submit_task(task.func, *task.args, **task.kwargs)
+        A preempted task gives up its slot and CPU cores; a task paused for
+        memory keeps them, so nothing starts in its place.
 
-                    # Update task with process task ID
-                    task.process_task_id = process_task_id
+        Args:
+            task: The task; its process ID must be known
+            reason: PREEMPTED or MEMORY_PAUSED
 
-                    # Move task from pending to running
-                    self._running_tasks[task.task_id] = task
-                    del self._pending_tasks[task.task_id]
+        Returns:
+            bool: True if the task was paused
+        """
+        if not pause_process(task.pid):
+            return False
+        task.paused = reason
+        self._paused[task.task_id] = task
+        if reason == PREEMPTED:
+            if task.holds_slot:
+                task.holds_slot = False
+                self._in_flight -= 1
+            if task.reserved:
+                self._reserved["cpu_cores"] -= task.resources.cpu_cores
+            self._stats["preempted"] += 1
+        else:
+            self._last_memory_pause = time.perf_counter()
+            self._stats["memory_paused"] += 1
+
+        # Time spent paused counts neither towards a timeout nor as a stall
+        watchdog = get_watchdog()
+        watchdog.hold(f"task/{task.task_id}")
+        watchdog.hold(pid=task.pid)
+
+        self.logger.info(
+            f"Task {task.task_id} paused ({reason})",
+            event="task_paused",
+            task_id=task.task_id,
+            reason=reason,
+            pid=task.pid,
+            priority=task.priority,
+        )
+        return True
+
+    def _resume(self, task):
+        """Resume a paused task and take back what it gave up (lock held)."""
+        if task.pid is not None:
+            resume_process(task.pid)
+        if task.paused == PREEMPTED:
+            if task.status == "running" and not task.holds_slot:
+                task.holds_slot = True
+                self._in_flight += 1
+            if task.reserved:
+                self._reserved["cpu_cores"] += task.resources.cpu_cores
+        reason = task.paused
+        task.paused = None
+        self._paused.pop(task.task_id, None)
+        self._stats["resumed"] += 1
+
+        watchdog = get_watchdog()
+        watchdog.release(f"task/{task.task_id}")
+        if task.pid is not None:
+            watchdog.release(pid=task.pid)
+
+        self.logger.info(
+            f"Task {task.task_id} resumed",
+            event="task_resumed",
+            task_id=task.task_id,
+            reason=reason,
+            pid=task.pid,
+        )
 
-                    self.logger.debug(
-                        f"Task {task.task_id} submitted for execution",
-                        task_id=task.task_id,
-                        process_task_id=process_task_id,
-                    )
+    def _preempt(self):
+        """
+        Pause the lowest-priority running task for a ready task that
+        outranks it (lock held).
 
-                except Exception as e:
-                    # Update task status on error
-                    task.status = "failed"
-                    task.error = str(e)
-                    task.completed_at = time.time()
+        Returns:
+            bool: True if a task was paused and its slot freed
+        """
+        preempted = sum(1 for task in self._paused.values() if task.paused == PREEMPTED)
+        if preempted >= self.max_preempted:
+            return False
+        ready = self._peek_ready()
+        if ready is None:
+            return False
+        running = [
+            task
+            for task in self._running_tasks.values()
+            if task.pid is not None and task.paused is None and task.holds_slot
+        ]
+        if not running:
+            return False
+        victim = min(running, key=lambda task: (task.priority, -task.started_at))
+        if victim.priority >= ready.priority:
+            return False
 
-                    # Move task from pending to completed
-                    self._completed_tasks[task.task_id] = task
-                    del self._pending_tasks[task.task_id]
+        request = ready.resources
+        if request is not None:
+            # Pausing only frees CPU cores; the rest must fit already
+            cores = victim.resources.cpu_cores if victim.reserved else 0
+            capacity = {}
+            if request.memory_bytes or request.temp_disk_bytes:
+                capacity = self._read_capacity()
+            self._reserved["cpu_cores"] -= cores
+            short = self._fits(request, capacity)
+            self._reserved["cpu_cores"] += cores
+            if short is not None:
+                return False
 
-                    self.logger.error(
-                        f"Error submitting task {task.task_id}: {str(e)}",
-                        task_id=task.task_id,
-                        error=str(e),
-                    )
+        return self._pause(victim, PREEMPTED)
 
-    def _check_running_tasks(self):
-        """Check the status of running tasks and update their status."""
+    def _resume_preempted(self):
+        """
+        Resume preempted tasks while slots are free and no ready task
+        outranks them (lock held).
+        """
+        while self._in_flight < self.max_concurrent:
+            preempted = [
+                task for task in self._paused.values() if task.paused == PREEMPTED
+            ]
+            if not preempted:
+                return
+            task = max(preempted, key=lambda task: (task.priority, -task.started_at))
+            ready = self._peek_ready()
+            if ready is not None and ready.priority > task.priority:
+                return
+            self._resume(task)
+
+    def _check_memory(self):
+        """Pause or resume tasks for the memory usage (lock held)."""
+        memory_paused = [
+            task for task in self._paused.values() if task.paused == MEMORY_PAUSED
+        ]
+        if self.pause_memory_fraction is None and not memory_paused:
+            return
+        capacity = self._read_capacity()
+        if capacity["memory_total"] == float("inf"):
+            return
+        usage = 1 - capacity["memory_available"] / capacity["memory_total"]
+
+        if self.pause_memory_fraction is not None and (
+            usage >= self.pause_memory_fraction
+        ):
+            if (
+                self._last_memory_pause is not None
+                and time.perf_counter() - self._last_memory_pause
+                < MEMORY_PAUSE_INTERVAL
+            ):
+                return
+            running = [
+                task
+                for task in self._running_tasks.values()
+                if task.pid is not None and task.paused is None
+            ]
+            # One task keeps running so that memory is freed at some point
+            if len(running) > 1:
+                victim = min(
+                    running, key=lambda task: (task.priority, -task.started_at)
+                )
+                self._pause(victim, MEMORY_PAUSED)
+        elif memory_paused and (
+            self.pause_memory_fraction is None
+            or usage < min(self.max_memory_fraction, self.pause_memory_fraction)
+        ):
+            # One at a time, highest priority first
+            self._resume(
+                max(memory_paused, key=lambda task: (task.priority, -task.started_at))
+            )
+
+    def _free_slot(self, task):
+        """Give back the slot and resources of a task that stopped (lock held)."""
+        if task.holds_slot:
+            task.holds_slot = False
+            self._in_flight -= 1
+        self._release(task)
+
+    def _expire_task(self, task, description):
+        """
+        Fail or requeue a task that ran past its timeout.
+
+        Runs on the watchdog thread. The slot is freed right away; a
+        completion that arrives later for this run is ignored.
+
+        Args:
+            task: The task
+            description: Why the watchdog expired it
+        """
         with self._task_lock:
-            # Get all running tasks
-            running_tasks = list(self._running_tasks.values())
+            if task.status != "running":
+                return
+            process_task_id = task.process_task_id
+            task.process_task_id = None
+            if task.paused is not None:
+                self._resume(task)
+            self._free_slot(task)
+            self._stats["timed_out"] += 1
+
+            retry = task.attempts <= task.max_retries
+            if retry:
+                task.status = "pending"
+                del self._running_tasks[task.task_id]
+                self._pending_tasks[task.task_id] = task
+                self._push_ready(task)
+                self._stats["retried"] += 1
+
+        # Stops the run only if it has not started in the executor yet
+        self.process_manager.cancel_task(process_task_id)
+
+        self.logger.warning(
+            f"Task {task.task_id} {description}"
+            + (f", retrying ({task.attempts}/{task.max_retries})" if retry else ""),
+            task_id=task.task_id,
+            process_task_id=process_task_id,
+            attempts=task.attempts,
+        )
+        if not retry:
+            self._finish_task(task, "failed", error=f"Task {description}")
+        self._wakeup()
 
-            for task in running_tasks:
-                # Skip if task is no longer running
-                if task.status != "running":
-                    continue
+    def _dispatch(self, event_at):
+        """
+        Submit ready tasks until every slot is taken.
 
-                # Get task status from process manager
-                process_status = self.process_manager.get_task_status(
-                    task.process_task_id
-                )
+        Args:
+            event_at: perf_counter() of the event that triggered the dispatch
+        """
+        with self._task_lock:
+            self._check_memory()
+
+        while True:
+            with self._task_lock:
+                self._resume_preempted()
+                if self._in_flight >= self.max_concurrent and not self._preempt():
+                    return
+                task = self._pop_admissible()
+                if task is None:
+                    return
+
+                # Update task status
+                task.status = "running"
+                task.started_at = time.time()
+
+                # Move task from pending to running
+                self._running_tasks[task.task_id] = task
+                del self._pending_tasks[task.task_id]
+                self._in_flight += 1
+                task.holds_slot = True
+                task.attempts += 1
+                self._reserve(task)
+                executor_id = self.executor_id
 
-                # If process task is not found, mark as failed
-                if process_status is None:
-                    task.status = "failed"
-                    task.error = "Process task not found"
-                    task.completed_at = time.time()
+            try:
+                # Arguments only known when the task starts
+                kwargs = task.kwargs
+                if task.start_callback is not None:
+                    kwargs = {**kwargs, **(task.start_callback(task.task_id) or {})}
+
+                # Submit the task
+                process_task_id = self.process_manager.submit_task(
+                    task.func, *task.args, executor_id=executor_id, **kwargs
+                )
 
-                    # Move task from running to completed
-                    self._completed_tasks[task.task_id] = task
-                    del self._running_tasks[task.task_id]
+                # Update task with process task ID
+                task.process_task_id = process_task_id
 
-                    self.logger.error(
-                        f"Process task not found for task {task.task_id}",
-                        task_id=task.task_id,
-                        process_task_id=task.process_task_id,
+                latency = time.perf_counter() - max(event_at, task.ready_at)
+                with self._task_lock:
+                    self._stats["dispatched"] += 1
+                    self._stats["dispatch_latency_total"] += latency
+                    self._stats["dispatch_latency_max"] = max(
+                        self._stats["dispatch_latency_max"], latency
+                    )
+                    self._dispatch_latencies.append(latency)
+
+                # Enforce the timeout from the watchdog's thread
+                if task.timeout:
+                    get_watchdog().watch(
+                        f"task/{task.task_id}",
+                        timeout=task.timeout,
+                        on_expire=lambda _, description, task=task: (
+                            self._expire_task(task, description)
+                        ),
+                        name=f"Task {task.task_id}",
                     )
 
-                    # Call callback if provided
-                    if task.callback:
-                        try:
-                            task.callback(task.task_id, False, task.error)
-                        except Exception as e:
-                            self.logger.error(
-                                f"Error in task callback: {str(e)}",
-                                task_id=task.task_id,
-                                error=str(e),
-                            )
+                # Report the completion to the scheduler thread, unless the
+                # run was abandoned after a timeout
+                self.process_manager.add_task_done_callback(
+                    process_task_id,
+                    lambda process_task_id, future, task=task: (
+                        self._wakeup(task, future)
+                        if process_task_id == task.process_task_id
+                        else None
+                    ),
+                )
 
-                    continue
+                self.logger.debug(
+                    f"Task {task.task_id} submitted for execution",
+                    task_id=task.task_id,
+                    process_task_id=process_task_id,
+                )
 
-                # Check if process task is completed
-                if process_status["status"] in ["completed", "error", "cancelled"]:
-                    # Get the result or error
-                    try:
-                        if process_status["status"] == "completed":
-                            # Get the result
-                            result = self.process_manager.get_task_result(
-                                task.process_task_id
-                            )
-
-                            # Update task status
-                            task.status = "completed"
-                            task.result = result
-                            task.completed_at = time.time()
-
-                            self.logger.debug(
-                                f"Task {task.task_id} completed successfully",
-                                task_id=task.task_id,
-                                process_task_id=task.process_task_id,
-                            )
-
-                            # Call callback if provided
-                            if task.callback:
-                                try:
-                                    task.callback(task.task_id, True, result)
-                                except Exception as e:
-                                    self.logger.error(
-                                        f"Error in task callback: {str(e)}",
-                                        task_id=task.task_id,
-                                        error=str(e),
-                                    )
-                        else:
-                            # Update task status on error or cancellation
-                            task.status = (
-                                "failed"
-                                if process_status["status"] == "error"
-                                else "cancelled"
-                            )
-                            task.error = process_status.get("error", "Unknown error")
-                            task.completed_at = time.time()
-
-                            self.logger.error(
-                                f"Task {task.task_id} {task.status}: {task.error}",
-                                task_id=task.task_id,
-                                process_task_id=task.process_task_id,
-                                error=task.error,
-                            )
-
-                            # Call callback if provided
-                            if task.callback:
-                                try:
-                                    task.callback(task.task_id, False, task.error)
-                                except Exception as e:
-                                    self.logger.error(
-                                        f"Error in task callback: {str(e)}",
-                                        task_id=task.task_id,
-                                        error=str(e),
-                                    )
-                    except Exception as e:
-                        # Update task status on error
-                        task.status = "failed"
-                        task.error = str(e)
-                        task.completed_at = time.time()
-
-                        self.logger.error(
-                            f"Error getting task result: {str(e)}",
-                            task_id=task.task_id,
-                            process_task_id=task.process_task_id,
-                            error=str(e),
-                        )
-
-                        # Call callback if provided
-                        if task.callback:
-                            try:
-                                task.callback(task.task_id, False, str(e))
-                            except Exception as e:
-                                self.logger.error(
-                                    f"Error in task callback: {str(e)}",
-                                    task_id=task.task_id,
-                                    error=str(e),
-                                )
-
-                    # Move task from running to completed
-                    self._completed_tasks[task.task_id] = task
-                    del self._running_tasks[task.task_id]
+            except Exception as e:
+                with self._task_lock:
+                    self._free_slot(task)
+
+                self.logger.error(
+                    f"Error submitting task {task.task_id}: {str(e)}",
+                    task_id=task.task_id,
+                    error=str(e),
+                )
+                self._finish_task(task, "failed", error=str(e))
+
+    def _handle_done(self, task, future):
+        """
+        Record the outcome of a task whose future is done.
+
+        Args:
+            task: The task
+            future: Future of the task in the process manager
+        """
+        with self._task_lock:
+            self._free_slot(task)
+
+        # Cancelled while it was queued in the executor
+        if task.status != "running":
+            return
+
+        if future.cancelled():
+            self._finish_task(task, "cancelled", error="Task cancelled")
+            return
+
+        error = future.exception()
+        if error is None:
+            self.logger.debug(
+                f"Task {task.task_id} completed successfully",
+                task_id=task.task_id,
+                process_task_id=task.process_task_id,
+            )
+            self._finish_task(task, "completed", result=future.result())
+        else:
+            self.logger.error(
+                f"Task {task.task_id} failed: {str(error)}",
+                task_id=task.task_id,
+                process_task_id=task.process_task_id,
+                error=str(error),
+            )
+            self._finish_task(task, "failed", error=str(error))
+
+    def _finish_task(self, task, status, result=None, error=None):
+        """
+        Move a task to the completed tasks and release its dependents.
+
+        Args:
+            task: The task
+            status: Final status (completed, failed or cancelled)
+            result: Result of the task if it completed
+            error: Error message if it did not
+        """
+        with self._task_lock:
+            if task.paused is not None:
+                self._resume(task)
+            task.status = status
+            task.result = result
+            task.error = error
+            task.completed_at = time.time()
+            self._free_slot(task)
+
+            # Move task from pending or running to completed
+            self._pending_tasks.pop(task.task_id, None)
+            self._running_tasks.pop(task.task_id, None)
+            self._completed_tasks[task.task_id] = task
+            self._stats["finished"] += 1
+
+            # Any finished dependency counts as met
+            released = False
+            for dependent_id in self._dependents.pop(task.task_id, ()):
+                dependent = self._pending_tasks.get(dependent_id)
+                if dependent is None:
+                    continue
+                dependent.unmet_dependencies -= 1
+                if dependent.unmet_dependencies == 0:
+                    self._push_ready(dependent)
+                    released = True
+
+            waiter = self._waiters.pop(task.task_id, None)
+
+        if task.timeout:
+            get_watchdog().unwatch(f"task/{task.task_id}")
+        if released and threading.current_thread() is not self._scheduler_thread:
+            self._wakeup()
+        if waiter is not None:
+            waiter.set()
+
+        # Call callback if provided
+        if task.callback:
+            try:
+                if status == "completed":
+                    task.callback(task.task_id, True, result)
+                else:
+                    task.callback(task.task_id, False, error)
+            except Exception as e:
+                self.logger.error(
+                    f"Error in task callback: {str(e)}",
+                    task_id=task.task_id,
+                    error=str(e),
+                )
 
     @with_error_handling
     def schedule_task(
@@ -398,6 +1035,9 @@ class SchedulerManager:
         dependencies=None,
         timeout=None,
         callback=None,
+        resources=None,
+        max_retries=0,
+        start_callback=None,
         **kwargs,
     ):
         """
@@ -409,8 +1049,15 @@ class SchedulerManager:
             task_id: Optional ID for the task (auto-generated if None)
             priority: Priority of the task (higher values = higher priority)
             dependencies: List of task IDs that must complete before this task
-            timeout: Timeout in seconds
+            timeout: Seconds the task may run before it fails and its slot is
+                freed (None for no limit)
             callback: Function to call when the task completes
+            resources: ResourceRequest the task is admitted against (only
+                concurrency limits it if None)
+            max_retries: How many times the task is queued again after it
+                timed out
+            start_callback: Function called with the task ID when the task
+                starts, returning keyword arguments for the function (or None)
             **kwargs: Keyword arguments to pass to the function
 
         Returns:
@@ -430,15 +1077,30 @@ class SchedulerManager:
             dependencies=dependencies or [],
             timeout=timeout,
             callback=callback,
+            resources=resources,
+            max_retries=max_retries,
+            start_callback=start_callback,
         )
 
         # Set submission time
         task.submitted_at = time.time()
 
-        # Add the task to the pending queue
+        # Add the task to the pending tasks, and to the ready heap once
+        # its dependencies have finished
         with self._task_lock:
             self._tasks[task_id] = task
             self._pending_tasks[task_id] = task
+            for dep_id in task.dependencies:
+                if dep_id not in self._completed_tasks:
+                    task.unmet_dependencies += 1
+                    self._dependents.setdefault(dep_id, []).append(task_id)
+            if task.unmet_dependencies == 0:
+                self._push_ready(task)
+
+            self._stats["scheduled"] += 1
+            self._stats["max_queued"] = max(
+                self._stats["max_queued"], len(self._pending_tasks)
+            )
 
         self.logger.debug(
             f"Task {task_id} scheduled",
@@ -450,6 +1112,7 @@ class SchedulerManager:
         # Start the scheduler if not already running
         if not self._scheduler_running:
             self.start_scheduler()
+        self._wakeup()
 
         return task_id
 
@@ -470,72 +1133,118 @@ class SchedulerManager:
                 return False
 
             task = self._tasks[task_id]
+            status = task.status
+            process_task_id = task.process_task_id
 
-            # If task is pending, just remove it
-            if task.status == "pending":
+            # Mark a pending task now so it cannot be dispatched anymore
+            if status == "pending":
                 task.status = "cancelled"
-                task.completed_at = time.time()
 
-                # Move task from pending to completed
-                self._completed_tasks[task_id] = task
-                del self._pending_tasks[task_id]
+            # A paused process could never run out
+            if status == "running" and task.paused is not None:
+                self._resume(task)
 
-                self.logger.debug(f"Pending task {task_id} cancelled", task_id=task_id)
+        # If task is pending, it has not been submitted yet
+        if status == "pending":
+            self.logger.debug(f"Pending task {task_id} cancelled", task_id=task_id)
+            self._finish_task(task, "cancelled", error="Task cancelled")
+            return True
 
-                # Call callback if provided
-                if task.callback:
-                    try:
-                        task.callback(task_id, False, "Task cancelled")
-                    except Exception as e:
-                        self.logger.error(
-                            f"Error in task callback: {str(e)}",
-                            task_id=task_id,
-                            error=str(e),
-                        )
+        # If task is running, cancel the process task
+        elif status == "running" and process_task_id:
+            # Cancel the process task
+            cancelled = self.process_manager.cancel_task(process_task_id)
 
+            if cancelled:
+                self.logger.debug(
+                    f"Running task {task_id} cancelled",
+                    task_id=task_id,
+                    process_task_id=process_task_id,
+                )
+                self._finish_task(task, "cancelled", error="Task cancelled")
                 return True
+            else:
+                self.logger.warning(
+                    f"Failed to cancel running task {task_id}",
+                    task_id=task_id,
+                    process_task_id=process_task_id,
+                )
+                return False
 
-            # If task is running, cancel the process task
-            elif task.status == "running" and task.process_task_id:
-                # Cancel the process task
-                cancelled = self.process_manager.cancel_task(task.process_task_id)
+        # Task is already completed or cancelled
+        return False
 
-                if cancelled:
-                    task.status = "cancelled"
-                    task.completed_at = time.time()
+    @with_error_handling
+    def set_priority(self, task_id, priority):
+        """
+        Change the priority of a task that has not finished.
 
-                    # Move task from running to completed
-                    self._completed_tasks[task_id] = task
-                    del self._running_tasks[task_id]
+        A pending task moves to its new place in the queue. A running task
+        keeps running; its new priority decides whether it can be preempted
+        and, if it is paused, when it resumes.
 
-                    self.logger.debug(
-                        f"Running task {task_id} cancelled",
-                        task_id=task_id,
-                        process_task_id=task.process_task_id,
-                    )
+        Args:
+            task_id: ID of the task
+            priority: New priority (higher values = higher priority)
 
-                    # Call callback if provided
-                    if task.callback:
-                        try:
-                            task.callback(task_id, False, "Task cancelled")
-                        except Exception as e:
-                            self.logger.error(
-                                f"Error in task callback: {str(e)}",
-                                task_id=task_id,
-                                error=str(e),
-                            )
-
-                    return True
-                else:
-                    self.logger.warning(
-                        f"Failed to cancel running task {task_id}",
-                        task_id=task_id,
-                        process_task_id=task.process_task_id,
-                    )
-                    return False
+        Returns:
+            bool: True if the priority was changed
+        """
+        with self._task_lock:
+            task = self._tasks.get(task_id)
+            if task is None or task.status in FINISHED_STATES:
+                return False
+            previous = task.priority
+            task.priority = priority
+            if task.status == "pending" and task.unmet_dependencies == 0:
+                # The old heap entry is skipped when it reaches the top
+                self._push_heap(task)
+
+        self.logger.info(
+            f"Task {task_id} priority changed from {previous} to {priority}",
+            task_id=task_id,
+            priority=priority,
+        )
+        self._wakeup()
+        return True
 
-            # Task is already completed or cancelled
-            return False
+    def report_process(self, task_id, pid):
+        """
+        Record the process doing the work of a running task, which is what
+        gets paused.
+
+        Args:
+            task_id: ID of the task
+            pid: Process ID (None or 0 when the process has exited)
+
+        Returns:
+            bool: True if the task is running
+        """
+        with self._task_lock:
+            task = self._running_tasks.get(task_id)
+            if task is None:
+                return False
+            pid = pid or None
+            if task.paused is not None and pid != task.pid:
+                # The paused process was replaced; the new one runs
+                self._resume(task)
+            task.pid = pid
+            return True
+
+    def resume_paused_tasks(self):
+        """
+        Resume every paused task, for example before a run ends early.
+
+        Returns:
+            int: Number of tasks resumed
+        """
+        with self._task_lock:
+            paused = list(self._paused.values())
+            for task in paused:
+                self._resume(task)
+        if paused:
+            self._wakeup()
+        return len(paused)
 
     @with_error_handling
     def get_task_status(self, task_id):
@@ -627,6 +1336,58 @@ class SchedulerManager:
 
             return count
 
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Dispatch latency is the time from the event that let a task run (its
+        last dependency finishing, a slot freeing up or the task being
+        scheduled) until it was handed to the executor; the p99 covers the
+        latest LATENCY_SAMPLES dispatches. admission_blocked
+        counts the dispatches where the first ready task did not fit, and
+        backfilled the tasks started ahead of one that did not. timed_out
+        counts the runs stopped by their timeout and retried the ones of
+        those that were queued again. paused is the number of tasks paused
+        now; preempted and memory_paused count the pauses by reason.
+
+        Returns:
+            Dict[str, Any]: Task counts, dispatch latencies in milliseconds
+            and the reserved resources
+        """
+        with self._task_lock:
+            dispatched = self._stats["dispatched"]
+            latencies = sorted(self._dispatch_latencies)
+            return {
+                "scheduled": self._stats["scheduled"],
+                "dispatched": dispatched,
+                "finished": self._stats["finished"],
+                "pending": len(self._pending_tasks),
+                "running": len(self._running_tasks),
+                "max_queued": self._stats["max_queued"],
+                "max_concurrent": self.max_concurrent,
+                "dispatch_latency_avg_ms": (
+                    self._stats["dispatch_latency_total"] / dispatched * 1000
+                    if dispatched
+                    else 0.0
+                ),
+                "dispatch_latency_p99_ms": (
+                    latencies[int(0.99 * (len(latencies) - 1))] * 1000
+                    if latencies
+                    else 0.0
+                ),
+                "dispatch_latency_max_ms": self._stats["dispatch_latency_max"] * 1000,
+                "admission_blocked": self._stats["admission_blocked"],
+                "backfilled": self._stats["backfilled"],
+                "timed_out": self._stats["timed_out"],
+                "retried": self._stats["retried"],
+                "paused": len(self._paused),
+                "preempted": self._stats["preempted"],
+                "memory_paused": self._stats["memory_paused"],
+                "resumed": self._stats["resumed"],
+                "reserved": dict(self._reserved),
+                "busy_devices": sorted(self._busy_devices),
+            }
+
     @with_error_handling
     def wait_for_task(self, task_id, timeout=None):
         """
@@ -654,56 +1415,21 @@ class SchedulerManager:
             task = self._tasks[task_id]
 
             # If task is already completed, return the result
-            if task.status in ["completed", "failed", "cancelled"]:
+            if task.status in FINISHED_STATES:
                 return task.result if task.status == "completed" else None
 
-            # If task is running, get the process task ID
-            process_task_id = task.process_task_id if task.status == "running" else None
+            # The event is set when the task finishes
+            waiter = self._waiters.setdefault(task_id, threading.Event())
 
-        # If task is running, wait for the process task to complete
-        if process_task_id:
-            try:
-                return self.process_manager.get_task_result(
-                    process_task_id, timeout=timeout
-                )
-            except Exception as e:
-                self.logger.error(
-                    f"Error waiting for task {task_id}: {str(e)}",
-                    task_id=task_id,
-                    process_task_id=process_task_id,
-                    error=str(e),
-                )
-                return None
-
-        # Task is pending, wait for it to complete
-        start_time = time.time()
-        while True:
-            # Check if timeout has expired
-            if timeout is not None and time.time() - start_time > timeout:
-                self.logger.warning(
-                    f"Timeout waiting for task {task_id}",
-                    task_id=task_id,
-                    timeout=timeout,
-                )
-                return None
-
-            # Get task status
-            with self._task_lock:
-                if task_id not in self._tasks:
-                    raise SchedulerError(
-                        f"Task not found: {task_id}",
-                        severity=ErrorSeverity.ERROR,
-                        details={"task_id": task_id},
-                    )
-
-                task = self._tasks[task_id]
-
-                # If task is completed, return the result
-                if task.status in ["completed", "failed", "cancelled"]:
-                    return task.result if task.status == "completed" else None
+        if not waiter.wait(timeout):
+            self.logger.warning(
+                f"Timeout waiting for task {task_id}",
+                task_id=task_id,
+                timeout=timeout,
+            )
+            return None
 
-            # Sleep before checking again
-            time.sleep(0.1)
+        return task.result if task.status == "completed" else None
 
 
 # Singleton instance
@@ -726,6 +1452,47 @@ def get_scheduler_manager() -> SchedulerManager:
 # Module-level functions for convenience
 
 
+def configure_scheduler(
+    max_concurrent=None,
+    executor_id=None,
+    cpu_cores=None,
+    max_memory_percent=None,
+    temp_dir=None,
+    max_head_wait=None,
+    max_preempted=None,
+    pause_memory_percent=None,
+):
+    """
+    Set where tasks run, how many run at once and the capacity their
+    resource requests are packed against.
+
+    Args:
+        max_concurrent: Tasks running at the same time (default: CPU count)
+        executor_id: Process manager executor for the tasks (default: the
+            default process pool)
+        cpu_cores: CPU cores the running tasks may request in total
+        max_memory_percent: Memory usage the running tasks may bring the
+            system to
+        temp_dir: Directory whose disk holds the temporary files
+        max_head_wait: Seconds smaller tasks may start ahead of a
+            higher-priority task that does not fit
+        max_preempted: Running tasks a ready task of higher priority may
+            pause at once
+        pause_memory_percent: Memory usage at which running tasks are paused
+            (0 for never)
+    """
+    return get_scheduler_manager().configure(
+        max_concurrent,
+        executor_id,
+        cpu_cores,
+        max_memory_percent,
+        temp_dir,
+        max_head_wait,
+        max_preempted,
+        pause_memory_percent,
+    )
+
+
 def start_scheduler():
     """
     Start the scheduler thread.
@@ -748,6 +1515,9 @@ def schedule_task(
     dependencies=None,
     timeout=None,
     callback=None,
+    resources=None,
+    max_retries=0,
+    start_callback=None,
     **kwargs,
 ):
     """
@@ -759,8 +1529,12 @@ def schedule_task(
         task_id: Optional ID for the task (auto-generated if None)
         priority: Priority of the task (higher values = higher priority)
         dependencies: List of task IDs that must complete before this task
-        timeout: Timeout in seconds
+        timeout: Seconds the task may run before it fails (None for no limit)
         callback: Function to call when the task completes
+        resources: ResourceRequest the task is admitted against (optional)
+        max_retries: How many times the task is queued again after it timed out
+        start_callback: Function called with the task ID when the task starts,
+            returning keyword arguments for the function (optional)
         **kwargs: Keyword arguments to pass to the function
 
     Returns:
@@ -774,6 +1548,9 @@ def schedule_task(
         dependencies=dependencies,
         timeout=timeout,
         callback=callback,
+        resources=resources,
+        max_retries=max_retries,
+        start_callback=start_callback,
         **kwargs,
     )
 
@@ -791,6 +1568,20 @@ def cancel_task(task_id):
     return get_scheduler_manager().cancel_task(task_id)
 
 
+def set_task_priority(task_id, priority):
+    """
+    Change the priority of a task that has not finished.
+
+    Args:
+        task_id: ID of the task
+        priority: New priority (higher values = higher priority)
+
+    Returns:
+        bool: True if the priority was changed
+    """
+    return get_scheduler_manager().set_priority(task_id, priority)
+
+
 def get_task_status(task_id):
     """
     Get the status of a task.
@@ -854,6 +1645,16 @@ def clear_completed_tasks():
     return get_scheduler_manager().clear_completed_tasks()
 
 
+def get_scheduler_stats():
+    """
+    Get scheduler statistics.
+
+    Returns:
+        Dict[str, Any]: Task counts and dispatch latencies in milliseconds
+    """
+    return get_scheduler_manager().get_stats()
+
+
 def wait_for_task(task_id, timeout=None):
     """
     Wait for a task to complete.
@@ -0,0 +1,444 @@
+"""
+Stuck-encode watchdog for PyProcessor.
+
+An FFmpeg process that hangs on a corrupt input or a stalled source holds
+its worker slot until someone kills it. The Watchdog keeps the start time
+and the time of the last progress of every running job, and kills the jobs
+that run longer than their timeout or make no progress for their stall
+window.
+
+One monitor thread checks all jobs, however many there are:
+
+- ``watch()`` registers a job with its limits and, if known, its process ID
+- ``touch()`` records progress
+- ``unwatch()`` removes the job when it ends and tells whether it expired
+- ``hold()`` and ``release()`` stop and restart the clocks of a job whose
+  process is paused
+
+A job that expires is killed with SIGKILL if its process ID is known, and
+its ``on_expire`` callback is called with a description of the reason.
+"""
+
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyprocessor.utils.logging.log_manager import get_logger
+
+# Reasons a job expires
+TIMED_OUT = "timeout"
+STALLED = "stalled"
+
+# Signal expired processes are killed with (os.kill terminates the process
+# on Windows, where SIGKILL does not exist)
+KILL_SIGNAL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+# Return code of a process killed with KILL_SIGNAL. On Windows the exit
+# code is the signal number.
+KILLED_RETURNCODE = -KILL_SIGNAL if hasattr(signal, "SIGKILL") else KILL_SIGNAL
+
+# Seconds between checks
+CHECK_INTERVAL = 1.0
+
+
+def was_killed(returncode: Optional[int]) -> bool:
+    """
+    Check if a process was killed the way the watchdog kills processes.
+
+    The OOM killer and an administrator's ``kill -9`` look the same.
+
+    Args:
+        returncode: Return code of the process
+
+    Returns:
+        bool: True if the process was killed with KILL_SIGNAL
+    """
+    return returncode == KILLED_RETURNCODE
+
+
+def kill_process(pid: int) -> bool:
+    """
+    Kill a process with KILL_SIGNAL.
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        bool: True if the signal was sent
+    """
+    try:
+        os.kill(pid, KILL_SIGNAL)
+        return True
+    except OSError:
+        # Already gone, or not ours
+        return False
+
+
+class WatchedJob:
+    """
+    A job the watchdog checks.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        pid: Optional[int] = None,
+        on_expire: Optional[Callable[[str, str], None]] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        Initialize a watched job.
+
+        Args:
+            key: Unique key of the job
+            timeout: Seconds the job may run (None for no limit)
+            stall_timeout: Seconds the job may go without progress (None
+                for no limit)
+            pid: Process to kill when the job expires (optional)
+            on_expire: Called with (key, description) when the job expires
+            name: Name of the job for the log (default: the key)
+        """
+        self.key = key
+        self.timeout = timeout or None
+        self.stall_timeout = stall_timeout or None
+        self.pid = pid or None
+        self.on_expire = on_expire
+        self.name = name or key
+
+        self.started_at = time.monotonic()
+        self.last_progress = self.started_at
+        self.position = None
+        self.held_since = None
+
+    def check(self, now: float) -> Optional[str]:
+        """
+        Check the job against its limits.
+
+        Args:
+            now: time.monotonic() of the check
+
+        Returns:
+            Optional[str]: TIMED_OUT or STALLED, or None if the job may go on
+        """
+        if self.held_since is not None:
+            return None
+        if self.timeout and now - self.started_at >= self.timeout:
+            return TIMED_OUT
+        if self.stall_timeout and now - self.last_progress >= self.stall_timeout:
+            return STALLED
+        return None
+
+    def describe(self, reason: str) -> str:
+        """
+        Describe why the job expired.
+
+        Args:
+            reason: TIMED_OUT or STALLED
+
+        Returns:
+            str: Description such as "timed out after 7200s"
+        """
+        if reason == TIMED_OUT:
+            return f"timed out after {self.timeout:g}s"
+        return f"made no progress for {self.stall_timeout:g}s"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the job to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Job information with its run time and the
+            seconds since its last progress
+        """
+        now = time.monotonic()
+        return {
+            "key": self.key,
+            "name": self.name,
+            "pid": self.pid,
+            "timeout": self.timeout,
+            "stall_timeout": self.stall_timeout,
+            "running_for": now - self.started_at,
+            "idle_for": now - self.last_progress,
+            "held": self.held_since is not None,
+        }
+
+
+class Watchdog:
+    """
+    Kills jobs that run too long or stop making progress.
+
+    Safe to use from several threads.
+    """
+
+    def __init__(self, interval: float = CHECK_INTERVAL, logger=None):
+        """
+        Initialize the watchdog.
+
+        Args:
+            interval: Seconds between checks
+            logger: Logger instance (optional)
+        """
+        self.interval = interval
+        self.logger = logger or get_logger()
+
+        self._jobs: Dict[str, WatchedJob] = {}
+        self._expired: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats = {"watched": 0, "timed_out": 0, "stalled": 0}
+
+        # Monitor thread
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def watch(
+        self,
+        key: str,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        pid: Optional[int] = None,
+        on_expire: Optional[Callable[[str, str], None]] = None,
+        name: Optional[str] = None,
+    ) -> bool:
+        """
+        Start watching a job. Its clocks start now.
+
+        Args:
+            key: Unique key of the job
+            timeout: Seconds the job may run (None or 0 for no limit)
+            stall_timeout: Seconds the job may go without progress (None or
+                0 for no limit)
+            pid: Process to kill when the job expires (optional)
+            on_expire: Called with (key, description) when the job expires;
+                it runs on the monitor thread
+            name: Name of the job for the log (default: the key)
+
+        Returns:
+            bool: True if the job is watched, False if it has no limits
+        """
+        if not timeout and not stall_timeout:
+            return False
+
+        job = WatchedJob(key, timeout, stall_timeout, pid, on_expire, name)
+        with self._lock:
+            self._jobs[key] = job
+            self._expired.pop(key, None)
+            self._stats["watched"] += 1
+        self.start()
+        return True
+
+    def is_watching(self, key: str) -> bool:
+        """
+        Check if a job is being watched.
+
+        Args:
+            key: Key of the job
+
+        Returns:
+            bool: True if the job is watched and has not expired
+        """
+        with self._lock:
+            return key in self._jobs
+
+    def set_pid(self, key: str, pid: Optional[int]) -> None:
+        """
+        Change the process killed when a job expires.
+
+        Args:
+            key: Key of the job
+            pid: Process ID (None or 0 once the process has exited)
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                job.pid = pid or None
+
+    def touch(self, key: str, position: Optional[float] = None) -> None:
+        """
+        Record progress of a job.
+
+        Args:
+            key: Key of the job
+            position: How far the job has got (e.g. the output time). If
+                given, the touch only counts when it differs from the last.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return
+            if position is not None:
+                if position == job.position:
+                    return
+                job.position = position
+            job.last_progress = time.monotonic()
+
+    def hold(self, key: Optional[str] = None, pid: Optional[int] = None) -> int:
+        """
+        Stop the clocks of a job while its process is paused.
+
+        Args:
+            key: Key of the job
+            pid: Or the process of the jobs
+
+        Returns:
+            int: Number of jobs held
+        """
+        now = time.monotonic()
+        held = 0
+        with self._lock:
+            for job in self._find(key, pid):
+                if job.held_since is None:
+                    job.held_since = now
+                    held += 1
+        return held
+
+    def release(self, key: Optional[str] = None, pid: Optional[int] = None) -> int:
+        """
+        Restart the clocks of a job held with hold(). The time it was held
+        counts neither towards its timeout nor as a stall.
+
+        Args:
+            key: Key of the job
+            pid: Or the process of the jobs
+
+        Returns:
+            int: Number of jobs released
+        """
+        now = time.monotonic()
+        released = 0
+        with self._lock:
+            for job in self._find(key, pid):
+                if job.held_since is not None:
+                    job.started_at += now - job.held_since
+                    job.last_progress += now - job.held_since
+                    job.held_since = None
+                    released += 1
+        return released
+
+    def _find(self, key: Optional[str], pid: Optional[int]) -> List[WatchedJob]:
+        """Get the jobs with a key or a process (lock held)."""
+        if key is not None:
+            job = self._jobs.get(key)
+            return [job] if job is not None else []
+        return [job for job in self._jobs.values() if pid and job.pid == pid]
+
+    def unwatch(self, key: str) -> Optional[str]:
+        """
+        Stop watching a job that has ended.
+
+        Args:
+            key: Key of the job
+
+        Returns:
+            Optional[str]: Description of why the job expired, or None if
+            it did not
+        """
+        with self._lock:
+            self._jobs.pop(key, None)
+            return self._expired.pop(key, None)
+
+    def check(self, now: Optional[float] = None) -> List[Tuple[WatchedJob, str]]:
+        """
+        Check every job once and expire the ones over their limits.
+
+        Args:
+            now: time.monotonic() of the check (default: now)
+
+        Returns:
+            List[Tuple[WatchedJob, str]]: Expired jobs and their reasons
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                reason = job.check(now)
+                if reason is None:
+                    continue
+                del self._jobs[key]
+                self._expired[key] = job.describe(reason)
+                self._stats["timed_out" if reason == TIMED_OUT else "stalled"] += 1
+                expired.append((job, reason))
+
+        for job, reason in expired:
+            self._expire(job, reason)
+        return expired
+
+    def _expire(self, job: WatchedJob, reason: str) -> None:
+        """Kill an expired job's process and report it."""
+        description = job.describe(reason)
+        killed = job.pid is not None and kill_process(job.pid)
+        self.logger.warning(
+            f"Watchdog: {job.name} {description}"
+            + (f", killed process {job.pid}" if killed else ""),
+            event="watchdog_expired",
+            key=job.key,
+            reason=reason,
+            pid=job.pid,
+            killed=killed,
+        )
+        if job.on_expire is not None:
+            try:
+                job.on_expire(job.key, description)
+            except Exception as e:
+                self.logger.error(f"Error in watchdog callback: {str(e)}")
+
+    def start(self) -> None:
+        """Start the monitor thread if it is not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, daemon=True, name="Watchdog"
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the monitor thread. Watched jobs are kept."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.interval + 1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Error in watchdog: {str(e)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the watchdog to a dictionary.
+
+        Returns:
+            Dict[str, Any]: Watched jobs and counts of expired jobs
+        """
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "jobs": [job.to_dict() for job in self._jobs.values()],
+                **self._stats,
+            }
+
+
+# Singleton instance
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+
+def get_watchdog() -> Watchdog:
+    """
+    Get the watchdog shared by all jobs of the process.
+
+    Returns:
+        Watchdog: The singleton watchdog instance
+    """
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = Watchdog()
+        return _watchdog
@@ -11,7 +11,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from pyprocessor.utils.file_system.path_utils import (
+from pyprocessor.utils.file_system.path_manager import (
     ensure_dir_exists,
     get_user_data_dir,
     normalize_path,
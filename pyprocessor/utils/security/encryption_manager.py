@@ -11,6 +11,7 @@ import os
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 
@@ -97,6 +98,7 @@ class EncryptionManager:
         # Initialize configuration
         self.key_rotation_interval = 90 * 24 * 60 * 60  # 90 days in seconds
         self.pbkdf2_iterations = 100000  # Number of iterations for PBKDF2
+        self.encryption_workers = 0  # Threads for encrypt_directory (0 = CPU count)
 
         # Mark as initialized
         self._initialized = True
@@ -130,6 +132,10 @@ class EncryptionManager:
                 self.data_dir = normalize_path(encryption_config.keys_dir)
                 self.keys_file = self.data_dir / "keys.json"
 
+        # Update encryption worker count
+        if hasattr(config, "get"):
+            self.encryption_workers = config.get("security.encryption.workers", 0) or 0
+
         # Ensure data directory exists
         ensure_dir_exists(self.data_dir)
 
@@ -662,6 +668,149 @@ class EncryptionManager:
             self.logger.error(f"Error encrypting file {input_path}: {str(e)}")
             return False, None, {}
 
+    def encrypt_directory(
+        self,
+        folder: Union[str, Path],
+        key_id: Optional[str] = None,
+        workers: Optional[int] = None,
+        extensions: Tuple[str, ...] = (".m3u8", ".ts"),
+        chunk_size: int = 1024 * 1024,
+        metadata_filename: str = "encryption.json",
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Encrypt every matching file in a folder using a pool of worker threads.
+
+        Files are encrypted in parallel (the cryptography backend releases the
+        GIL while encrypting), and each original is removed once its encrypted
+        copy is written. Metadata entries are streamed to a temporary file as
+        files complete, which replaces the metadata file once every file has
+        been handled, so an interrupted run never leaves a truncated document.
+        A file that fails is reported in the statistics and skipped; the other
+        files are still encrypted.
+
+        Args:
+            folder: Folder containing the files to encrypt
+            key_id: Key ID to use for encryption (uses default key if not provided)
+            workers: Number of worker threads (defaults to the configured count)
+            extensions: File extensions to encrypt
+            chunk_size: Size of chunks to process at a time (default: 1MB)
+            metadata_filename: Name of the metadata file written to the folder
+
+        Returns:
+            Tuple containing:
+            - bool: True if every file was encrypted, False otherwise
+            - Dict[str, Any]: Statistics (files, encrypted, failed, bytes,
+              duration, throughput_mb_s, workers, failed_files)
+        """
+        folder = normalize_path(folder)
+        workers = workers or self.encryption_workers or os.cpu_count() or 1
+        stats = {
+            "files": 0,
+            "encrypted": 0,
+            "failed": 0,
+            "bytes": 0,
+            "duration": 0.0,
+            "throughput_mb_s": 0.0,
+            "workers": workers,
+            "failed_files": {},
+        }
+
+        if not folder.exists() or not folder.is_dir():
+            self.logger.error(f"Folder does not exist: {folder}")
+            return False, stats
+
+        files = [
+            Path(root) / name
+            for root, _, names in os.walk(folder)
+            for name in names
+            if name.endswith(extensions)
+        ]
+        stats["files"] = len(files)
+        if not files:
+            return True, stats
+
+        def encrypt_one(file_path: Path) -> Tuple[Path, int, Any, Dict, Optional[str]]:
+            try:
+                size = file_path.stat().st_size
+                success, encrypted_path, file_metadata = self.encrypt_file(
+                    input_path=file_path,
+                    output_path=file_path.with_suffix(file_path.suffix + ".enc"),
+                    key_id=key_id,
+                    chunk_size=chunk_size,
+                )
+                if not success:
+                    return file_path, size, None, {}, "encryption failed"
+                os.remove(file_path)
+                return file_path, size, encrypted_path, file_metadata, None
+            except Exception as e:
+                return file_path, 0, None, {}, str(e)
+
+        start_time = time.time()
+        metadata_file = folder / metadata_filename
+        temp_file = folder / f".{metadata_filename}.tmp"
+        try:
+            with open(temp_file, "w") as meta, ThreadPoolExecutor(
+                max_workers=workers
+            ) as executor:
+                futures = [executor.submit(encrypt_one, path) for path in files]
+                results = (future.result() for future in as_completed(futures))
+                self._write_directory_metadata(meta, folder, results, stats)
+            os.replace(temp_file, metadata_file)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+
+        stats["duration"] = time.time() - start_time
+        if stats["duration"] > 0:
+            stats["throughput_mb_s"] = (
+                stats["bytes"] / (1024 * 1024) / stats["duration"]
+            )
+
+        self.logger.info(
+            f"Encrypted {stats['encrypted']} of {stats['files']} files in {folder} "
+            f"({stats['bytes'] / (1024 * 1024):.1f} MB at "
+            f"{stats['throughput_mb_s']:.1f} MB/s with {workers} workers)"
+        )
+        return stats["failed"] == 0, stats
+
+    def _write_directory_metadata(
+        self,
+        meta: Any,
+        folder: Path,
+        results: Any,
+        stats: Dict[str, Any],
+    ) -> None:
+        """
+        Stream encrypt_directory results into a metadata document.
+
+        Args:
+            meta: Open metadata file
+            folder: Folder being encrypted
+            results: Iterable of encrypt_directory worker results
+            stats: Statistics to update
+        """
+        # Write the {"encrypted": true, "files": {...}} document entry by entry;
+        # only the calling thread writes to the file
+        meta.write('{\n  "encrypted": true,\n  "files": {')
+        separator = "\n"
+        for file_path, size, encrypted_path, file_metadata, error in results:
+            rel_path = str(file_path.relative_to(folder))
+            if error:
+                stats["failed"] += 1
+                stats["failed_files"][rel_path] = error
+                self.logger.error(f"Failed to encrypt file {file_path}: {error}")
+                continue
+
+            entry = {
+                "encrypted_path": str(encrypted_path.relative_to(folder)),
+                "metadata": file_metadata,
+            }
+            meta.write(f"{separator}    {json.dumps(rel_path)}: {json.dumps(entry)}")
+            separator = ",\n"
+            stats["encrypted"] += 1
+            stats["bytes"] += size
+        meta.write("\n  }\n}\n")
+
     def decrypt_file(
         self,
         input_path: Union[str, Path],
@@ -0,0 +1,968 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for PyProcessor.
+
+This script provides benchmarks for comparing processing strategies:
+
+Commands:
+    scaling     - Compare CPU time of the parallel and cascaded scaling graphs
+    probe       - Compare files/sec of the in-process header parser and FFprobe
+    progress    - Compare Python CPU time of stderr regex and -progress pipe monitoring
+    makespan    - Compare makespan of batch-by-batch and streaming work queues
+    scheduler   - Measure SchedulerManager dispatch latency with up to 100k queued tasks
+    threads     - Compare throughput of concurrent encodes with fixed and budgeted threads
+    pool        - Compare task-start latency of per-run process pools and a warm pool
+
+Usage:
+    python scripts/benchmark_tools.py scaling [--duration SECONDS] [--runs N] [--encode]
+    python scripts/benchmark_tools.py probe [--files N] [--rounds N] [--dir PATH]
+    python scripts/benchmark_tools.py progress [--duration SECONDS] [--runs N]
+    python scripts/benchmark_tools.py makespan [--files N] [--workers N] [--mean SECONDS] [--alpha A] [--seed N]
+    python scripts/benchmark_tools.py scheduler [--tasks N [N ...]] [--workers N] [--dependencies P] [--seed N]
+    python scripts/benchmark_tools.py threads [--files N] [--jobs N] [--duration SECONDS] [--threads N]
+    python scripts/benchmark_tools.py pool [--runs N] [--workers N] [--module NAME]
+
+Options:
+    scaling:
+        --duration    Length of the generated 1080p sample in seconds
+        --runs        Number of runs per graph (the median is reported)
+        --encode      Include libx264 encoding instead of discarding raw frames
+        --low-scaler  Scaler used for the 480p and 360p rungs in cascade mode
+    probe:
+        --files       Number of samples to generate (half MP4, half MKV)
+        --rounds      Number of passes over the samples (the best is reported)
+        --dir         Probe an existing directory instead of generating samples
+    progress:
+        --duration    Length of the generated sample in seconds
+        --runs        Number of encodes per monitor (the median is reported)
+    makespan:
+        --files       Number of simulated files
+        --workers     Files processed at the same time (also the batch size)
+        --mean        Mean simulated encode time in seconds
+        --alpha       Pareto shape of the encode times (lower is heavier-tailed)
+        --seed        Random seed for the encode times
+    scheduler:
+        --tasks       Numbers of queued tasks to measure
+        --workers     Tasks running at the same time
+        --dependencies  Share of tasks that depend on an earlier task
+        --seed        Random seed for priorities and dependencies
+    threads:
+        --files       Number of files to encode
+        --jobs        Encodes running at the same time
+        --duration    Duration of the sample in seconds
+        --threads     Threads shared by the encodes (default: CPU count)
+    pool:
+        --runs        Number of simulated runs per pool
+        --workers     Worker processes, and tasks started per run
+        --module      Module each task imports before it can start (the encode path)
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyprocessor.processing.ladder import plan_ladder  # noqa: E402
+from pyprocessor.processing.thread_budget import (  # noqa: E402
+    ThreadBudget,
+    build_filter_thread_args,
+    build_input_thread_args,
+    split_job_threads,
+)
+from pyprocessor.utils.media.ffmpeg_log import FFmpegLog  # noqa: E402
+from pyprocessor.utils.media.ffmpeg_progress import (  # noqa: E402
+    ProgressParser,
+    add_progress_args,
+    read_progress,
+)
+from pyprocessor.utils.media.header_parser import parse_media_header  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; wall-clock time is reported instead
+    resource = None
+
+DEFAULT_BITRATES = {
+    "1080p": "11000k",
+    "720p": "6500k",
+    "480p": "4000k",
+    "360p": "1500k",
+}
+
+
+def find_ffmpeg():
+    """Find the FFmpeg executable, or None if it is not installed."""
+    return shutil.which("ffmpeg")
+
+
+def generate_sample(ffmpeg, path, duration, width=1920, height=1080, fps=30):
+    """Generate a synthetic test video with FFmpeg's testsrc2 source."""
+    cmd = [
+        ffmpeg,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc2=size={width}x{height}:rate={fps}:duration={duration}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-pix_fmt",
+        "yuv420p",
+        str(path),
+    ]
+    subprocess.run(cmd, check=True)
+    return {
+        "streams": [
+            {
+                "codec_type": "video",
+                "width": width,
+                "height": height,
+                "avg_frame_rate": f"{fps}/1",
+            }
+        ]
+    }
+
+
+def run_timed(cmd):
+    """
+    Run a command and measure the CPU time it consumed.
+
+    Returns:
+        tuple: (cpu_seconds, wall_seconds); cpu_seconds is the wall time when
+        child CPU accounting is unavailable
+    """
+    before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+    wall = time.perf_counter() - start
+
+    if resource is None:
+        return wall, wall
+
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return cpu, wall
+
+
+def build_scaling_command(ffmpeg, sample, plan, encode=False):
+    """Build an FFmpeg command that runs the plan's filter graph into null outputs."""
+    cmd = [
+        ffmpeg,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        str(sample),
+        "-filter_complex",
+        plan.build_filter_complex(),
+    ]
+    for i in range(len(plan.rungs)):
+        cmd.extend(["-map", f"[v{i + 1}out]"])
+        if encode:
+            cmd.extend(["-c:v", "libx264", "-preset", "ultrafast"])
+        else:
+            cmd.extend(["-c:v", "rawvideo"])
+        cmd.extend(["-f", "null", "-"])
+    return cmd
+
+
+def benchmark_scaling(args):
+    """Compare CPU time per source minute of the parallel and cascaded graphs."""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        print("FFmpeg not found in PATH")
+        return False
+
+    with tempfile.TemporaryDirectory(prefix="pyprocessor_bench_") as temp_dir:
+        sample = Path(temp_dir) / "sample_1080p.mp4"
+        print(f"Generating {args.duration}s 1080p sample...")
+        video_info = generate_sample(ffmpeg, sample, args.duration)
+        source_minutes = args.duration / 60.0
+
+        variants = {
+            "parallel": {"scaling_mode": "parallel"},
+            "cascade": {
+                "scaling_mode": "cascade",
+                "scaler_flags": {"480p": args.low_scaler, "360p": args.low_scaler},
+            },
+        }
+
+        results = {}
+        for name, overrides in variants.items():
+            params = {"fps": 30, "bitrates": DEFAULT_BITRATES}
+            params.update(overrides)
+            plan = plan_ladder(params, video_info)
+            cmd = build_scaling_command(ffmpeg, sample, plan, args.encode)
+
+            cpu_times = []
+            wall_times = []
+            for _ in range(args.runs):
+                cpu, wall = run_timed(cmd)
+                cpu_times.append(cpu)
+                wall_times.append(wall)
+
+            results[name] = (
+                statistics.median(cpu_times) / source_minutes,
+                statistics.median(wall_times) / source_minutes,
+            )
+            print(f"  {name:<9} {plan.build_filter_complex()}")
+
+    print()
+    print(f"{'graph':<10}{'cpu s/min':>12}{'wall s/min':>12}")
+    for name, (cpu, wall) in results.items():
+        print(f"{name:<10}{cpu:>12.2f}{wall:>12.2f}")
+
+    baseline = results["parallel"][0]
+    if baseline > 0:
+        saving = 1.0 - results["cascade"][0] / baseline
+        print(f"\nCascade CPU saving vs parallel: {saving:.1%}")
+    return True
+
+
+def run_ffprobe(ffprobe, path):
+    """Run FFprobe the way the probe service does and return its JSON output."""
+    result = subprocess.run(
+        [
+            ffprobe,
+            "-v",
+            "quiet",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            str(path),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return json.loads(result.stdout) if result.returncode == 0 else None
+
+
+def summarize_probe(info):
+    """Reduce probe output to the fields both readers must agree on."""
+    if not info:
+        return None
+    video = next(
+        (s for s in info.get("streams", []) if s.get("codec_type") == "video"), {}
+    )
+    duration = info.get("format", {}).get("duration")
+    return (
+        video.get("codec_name"),
+        video.get("width"),
+        video.get("height"),
+        round(float(duration), 1) if duration else None,
+        sorted(s.get("codec_type") for s in info.get("streams", [])),
+    )
+
+
+def time_reader(reader, files, rounds):
+    """Return (best files/sec, results) for a reader over all files."""
+    best = None
+    results = {}
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for path in files:
+            results[path] = reader(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(files) / best if best else 0.0, results
+
+
+def benchmark_probe(args):
+    """Compare files/sec of the in-process header parser and FFprobe."""
+    ffprobe = shutil.which("ffprobe")
+    with tempfile.TemporaryDirectory(prefix="pyprocessor_bench_") as temp_dir:
+        if args.dir:
+            sample_dir = Path(args.dir)
+        else:
+            ffmpeg = find_ffmpeg()
+            if not ffmpeg:
+                print("FFmpeg not found in PATH")
+                return False
+            sample_dir = Path(temp_dir)
+            print(f"Generating {args.files} samples...")
+            for i in range(args.files):
+                extension = "mp4" if i % 2 == 0 else "mkv"
+                generate_sample(
+                    ffmpeg, sample_dir / f"sample_{i:04d}.{extension}", 1, 320, 180
+                )
+
+        files = sorted(p for p in sample_dir.iterdir() if p.is_file())
+        if not files:
+            print(f"No files found in {sample_dir}")
+            return False
+
+        native_rate, native = time_reader(parse_media_header, files, args.rounds)
+        parsed = sum(1 for info in native.values() if info)
+        print(f"\n{'reader':<10}{'files/sec':>12}")
+        print(f"{'native':<10}{native_rate:>12.1f}  ({parsed}/{len(files)} parsed)")
+
+        if not ffprobe:
+            print("FFprobe not found in PATH; skipping the FFprobe comparison")
+            return True
+
+        probe_rate, probed = time_reader(
+            lambda path: run_ffprobe(ffprobe, path), files, args.rounds
+        )
+        print(f"{'ffprobe':<10}{probe_rate:>12.1f}")
+        if probe_rate > 0:
+            print(f"\nNative speedup vs FFprobe: {native_rate / probe_rate:.1f}x")
+
+        mismatches = [
+            path.name
+            for path in files
+            if native[path]
+            and summarize_probe(native[path]) != summarize_probe(probed[path])
+        ]
+        if mismatches:
+            print(f"Results differ from FFprobe for: {', '.join(mismatches)}")
+            return False
+        print("Native results match FFprobe for all parsed files")
+
+    return True
+
+
+def monitor_stderr(cmd, duration):
+    """
+    Monitor an encode the way FFmpegManager did before -progress was used.
+
+    Returns:
+        int: Number of progress updates
+    """
+    duration_regex = re.compile(r"Duration: (\d{2}):(\d{2}):(\d{2})\.(\d{2})")
+    time_regex = re.compile(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})")
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        universal_newlines=True,
+        bufsize=1,
+    )
+    lines = []
+    updates = 0
+    for line in process.stderr:
+        lines.append(line.strip())
+        duration_regex.search(line)
+        if time_regex.search(line):
+            updates += 1
+    process.wait()
+    return updates
+
+
+def monitor_progress_pipe(cmd, duration):
+    """
+    Monitor an encode through -progress pipe:1.
+
+    Returns:
+        int: Number of progress updates
+    """
+    process = subprocess.Popen(
+        add_progress_args(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    ffmpeg_log = FFmpegLog()
+    ffmpeg_log.start(process.stderr)
+    progress = read_progress(process.stdout, ProgressParser(duration))
+    process.wait()
+    ffmpeg_log.join()
+    return progress.updates
+
+
+def benchmark_progress(args):
+    """Compare Python CPU time of stderr regex and -progress pipe monitoring."""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        print("FFmpeg not found in PATH")
+        return False
+
+    with tempfile.TemporaryDirectory(prefix="pyprocessor_bench_") as temp_dir:
+        sample = Path(temp_dir) / "sample.mp4"
+        print(f"Generating {args.duration}s 360p sample...")
+        generate_sample(ffmpeg, sample, args.duration, 640, 360)
+
+        cmd = [
+            ffmpeg,
+            "-hide_banner",
+            "-loglevel",
+            "info",
+            "-stats",
+            "-i",
+            str(sample),
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-f",
+            "null",
+            "-",
+        ]
+
+        print(
+            f"\n{'monitor':<10}{'python cpu (ms)':>17}{'updates':>10}{'wall (s)':>10}"
+        )
+        results = {}
+        for name, monitor in (
+            ("stderr", monitor_stderr),
+            ("pipe", monitor_progress_pipe),
+        ):
+            cpu_times = []
+            walls = []
+            updates = 0
+            for _ in range(args.runs):
+                cpu_start = time.process_time()
+                wall_start = time.perf_counter()
+                updates = monitor(cmd, args.duration)
+                walls.append(time.perf_counter() - wall_start)
+                cpu_times.append(time.process_time() - cpu_start)
+            results[name] = statistics.median(cpu_times)
+            print(
+                f"{name:<10}{results[name] * 1000:>17.1f}{updates:>10}"
+                f"{statistics.median(walls):>10.2f}"
+            )
+
+        if results["pipe"] > 0:
+            print(
+                f"\nPython CPU per encode, stderr vs pipe: "
+                f"{results['stderr'] / results['pipe']:.1f}x"
+            )
+    return True
+
+
+class BenchmarkConfig:
+    """Minimal configuration object for BatchProcessor."""
+
+    def get(self, key, default=None):
+        return default
+
+
+def heavy_tailed_durations(count, mean, alpha, seed):
+    """Pareto-distributed encode times scaled to the given mean."""
+    rng = random.Random(seed)
+    samples = [rng.paretovariate(alpha) for _ in range(count)]
+    scale = mean / statistics.mean(samples)
+    return [sample * scale for sample in samples]
+
+
+def run_work_queue(durations, workers, streaming):
+    """
+    Run simulated encodes through BatchProcessor.
+
+    Each simulated encode holds its worker for its duration, like an FFmpeg
+    process would.
+
+    Returns:
+        float: Makespan in seconds
+    """
+    # Imported here so the other benchmarks run without psutil
+    from pyprocessor.processing.batch_processor import BatchProcessor, create_batches
+
+    files = [Path(f"{i:03d}-01.mp4") for i in range(len(durations))]
+    encode_times = {file.name: duration for file, duration in zip(files, durations)}
+
+    def simulated_encode(file_path, output_folder, ffmpeg_params, task_id, **kwargs):
+        name = Path(file_path).name
+        time.sleep(encode_times[name])
+        return (name, True, encode_times[name], None)
+
+    logger = logging.getLogger("pyprocessor.benchmark")
+    logger.setLevel(logging.WARNING)
+    processor = BatchProcessor(BenchmarkConfig(), logger, simulated_encode)
+
+    batches = [files] if streaming else create_batches(files, workers)
+    start = time.perf_counter()
+    for batch in batches:
+        processor.process_batch(batch, Path("."), {}, max_workers=workers)
+    return time.perf_counter() - start
+
+
+def benchmark_makespan(args):
+    """Compare makespan of batch-by-batch and streaming work queues."""
+    durations = heavy_tailed_durations(args.files, args.mean, args.alpha, args.seed)
+    total = sum(durations)
+    lower_bound = max(total / args.workers, max(durations))
+    print(
+        f"{args.files} simulated files, {args.workers} workers, "
+        f"encode times {min(durations):.2f}-{max(durations):.2f}s "
+        f"(mean {args.mean:.2f}s, alpha {args.alpha})"
+    )
+    print(f"Lower bound on makespan: {lower_bound:.2f}s")
+
+    print(f"\n{'mode':<12}{'makespan (s)':>14}{'utilization':>13}")
+    results = {}
+    for name, streaming in (("batches", False), ("streaming", True)):
+        results[name] = run_work_queue(durations, args.workers, streaming)
+        utilization = total / (args.workers * results[name])
+        print(f"{name:<12}{results[name]:>14.2f}{utilization:>12.0%}")
+
+    print(
+        f"\nMakespan reduction with streaming: "
+        f"{1 - results['streaming'] / results['batches']:.0%}"
+    )
+    return True
+
+
+def noop_task():
+    """Task that returns immediately, so only scheduling is measured."""
+    return None
+
+
+def polling_tick(tasks):
+    """
+    Time one pass of a polling scheduler over the queued tasks.
+
+    The pass copies and sorts the pending tasks by priority and checks every
+    dependency, like the loop that used to run every 100 ms.
+
+    Returns:
+        float: Seconds the pass took
+    """
+    completed = set()
+    start = time.perf_counter()
+    pending = sorted(list(tasks), key=lambda t: t.priority, reverse=True)
+    for task in pending:
+        all(dep_id in completed for dep_id in task.dependencies)
+    return time.perf_counter() - start
+
+
+def run_scheduler(manager, count, dependencies, rng):
+    """
+    Queue tasks on the scheduler and wait until all of them are done.
+
+    Returns:
+        Tuple of (seconds to queue, seconds until done, scheduler statistics)
+    """
+    task_ids = []
+    start = time.perf_counter()
+    for i in range(count):
+        deps = []
+        if task_ids and rng.random() < dependencies:
+            deps = [task_ids[rng.randrange(len(task_ids))]]
+        task_ids.append(
+            manager.schedule_task(
+                noop_task, priority=rng.randrange(100), dependencies=deps
+            )
+        )
+    queued = time.perf_counter() - start
+    for task_id in task_ids:
+        manager.wait_for_task(task_id)
+    return queued, time.perf_counter() - start, manager.get_stats()
+
+
+def benchmark_scheduler(args):
+    """Measure SchedulerManager dispatch latency with many queued tasks."""
+    # Imported here so the other benchmarks run without psutil
+    from pyprocessor.utils.process.process_manager import get_process_manager
+    from pyprocessor.utils.process.scheduler_manager import SchedulerManager, Task
+
+    logging.getLogger("pyprocessor").setLevel(logging.WARNING)
+    pool = get_process_manager().create_thread_pool(max_workers=args.workers)
+    rng = random.Random(args.seed)
+
+    print(
+        f"No-op tasks on {args.workers} threads, "
+        f"{args.dependencies:.0%} with a dependency, random priorities"
+    )
+    print(
+        f"\n{'tasks':>8}{'queue (us/task)':>17}{'run (s)':>9}"
+        f"{'dispatch avg (ms)':>19}{'p99 (ms)':>10}{'max (ms)':>10}"
+        f"{'poll tick (ms)':>16}"
+    )
+    for count in args.tasks:
+        # A fresh scheduler per size, so the statistics are per run
+        SchedulerManager._instance = None
+        manager = SchedulerManager()
+        manager.configure(max_concurrent=args.workers, executor_id=pool)
+
+        queued, elapsed, stats = run_scheduler(manager, count, args.dependencies, rng)
+        with manager._task_lock:
+            tasks = list(manager._tasks.values())
+        tick = polling_tick(tasks)
+        manager.stop_scheduler()
+
+        print(
+            f"{count:>8}{queued / count * 1e6:>17.1f}{elapsed:>9.2f}"
+            f"{stats['dispatch_latency_avg_ms']:>19.3f}"
+            f"{stats['dispatch_latency_p99_ms']:>10.2f}"
+            f"{stats['dispatch_latency_max_ms']:>10.2f}{tick * 1000:>16.1f}"
+        )
+
+    print(
+        "\npoll tick: one pass of the old 100 ms polling loop over the same tasks "
+        f"({Task.__name__} objects, sorted and dependency-checked)"
+    )
+    return True
+
+
+def build_ladder_command(ffmpeg, sample, plan, params, threads=None):
+    """Build an FFmpeg command that encodes the whole ladder into a null output."""
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error"]
+    encoder_threads = None
+    if threads:
+        filter_threads, encoder_threads = split_job_threads(threads)
+        cmd.extend(build_filter_thread_args(filter_threads))
+        cmd.extend(build_input_thread_args(threads))
+    cmd.extend(["-i", str(sample), "-filter_complex", plan.build_filter_complex()])
+    cmd.extend(plan.build_video_args(params, encoder_threads))
+    cmd.extend(["-f", "null", "-"])
+    return cmd
+
+
+def run_encodes(ffmpeg, sample, plan, params, files, jobs, budget=None):
+    """
+    Encode the sample files times, with up to jobs encodes at once.
+
+    Returns:
+        tuple: (wall_seconds, cpu_seconds)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def encode(_):
+        threads = budget.acquire() if budget else None
+        try:
+            subprocess.run(
+                build_ladder_command(ffmpeg, sample, plan, params, threads),
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+        finally:
+            if threads is not None:
+                budget.release(threads)
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(encode, range(files)))
+    wall = time.perf_counter() - start
+
+    if resource is None:
+        return wall, wall
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return wall, cpu
+
+
+def benchmark_threads(args):
+    """Compare throughput of concurrent encodes with fixed and budgeted threads."""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        print("FFmpeg not found in PATH")
+        return False
+
+    total_threads = args.threads or os.cpu_count() or 1
+    params = {
+        "fps": 30,
+        "bitrates": DEFAULT_BITRATES,
+        "video_encoder": "libx264",
+        "preset": "veryfast",
+    }
+
+    with tempfile.TemporaryDirectory(prefix="pyprocessor_bench_") as temp_dir:
+        sample = Path(temp_dir) / "sample_1080p.mp4"
+        print(f"Generating {args.duration}s 1080p sample...")
+        plan = plan_ladder(params, generate_sample(ffmpeg, sample, args.duration))
+
+        print(
+            f"Encoding {args.files} files, {args.jobs} at a time, "
+            f"{len(plan.rungs)}-rung libx264 ladder, {total_threads} threads"
+        )
+        results = {
+            "fixed": run_encodes(ffmpeg, sample, plan, params, args.files, args.jobs),
+            "budgeted": run_encodes(
+                ffmpeg,
+                sample,
+                plan,
+                params,
+                args.files,
+                args.jobs,
+                ThreadBudget(total_threads, args.jobs),
+            ),
+        }
+
+    print()
+    print(f"{'threads':<10}{'wall s':>10}{'cpu s':>10}{'files/min':>12}")
+    for name, (wall, cpu) in results.items():
+        print(f"{name:<10}{wall:>10.2f}{cpu:>10.2f}{args.files / wall * 60:>12.2f}")
+
+    speedup = results["fixed"][0] / results["budgeted"][0]
+    print(f"\nBudgeted throughput vs fixed: {speedup:.2f}x")
+    return True
+
+
+def pool_start_task(run_started, module):
+    """
+    Task that pays what the first encode in a worker pays before FFmpeg runs:
+    importing the encode path and locating FFmpeg.
+
+    Returns:
+        float: Seconds from the start of the run until the task was ready
+    """
+    importlib.import_module(module)
+    from pyprocessor.utils.media.ffmpeg_manager import get_ffmpeg_path
+
+    get_ffmpeg_path()
+    return time.time() - run_started
+
+
+def run_pool(manager, get_pool, workers, module, shutdown):
+    """
+    Simulate a run: get a pool and start one task per worker.
+
+    Returns:
+        List[float]: Start latency of each task in seconds
+    """
+    run_started = time.time()
+    pool = get_pool()
+    task_ids = [
+        manager.submit_task(pool_start_task, run_started, module, executor_id=pool)
+        for _ in range(workers)
+    ]
+    latencies = [manager.get_task_result(task_id) for task_id in task_ids]
+    if shutdown:
+        manager.shutdown_executor(pool)
+    return latencies
+
+
+def benchmark_pool(args):
+    """Compare task-start latency of per-run process pools and a warm pool."""
+    # Imported here so the other benchmarks run without psutil
+    from pyprocessor.utils.process.process_manager import (
+        get_process_manager,
+        get_start_method,
+    )
+
+    logging.getLogger("pyprocessor").setLevel(logging.WARNING)
+    manager = get_process_manager()
+
+    # The parent has the encode path imported, as in a real run, so fork
+    # workers inherit it
+    importlib.import_module(args.module)
+
+    pools = {}
+    if "fork" in multiprocessing.get_all_start_methods():
+        # The default on Linux before Python 3.14
+        pools["fork per run"] = lambda: manager.create_process_pool(
+            args.workers, start_method="fork"
+        )
+    pools["spawn per run"] = lambda: manager.create_process_pool(
+        args.workers, start_method="spawn"
+    )
+    pools[f"warm {get_start_method()}"] = lambda: manager.get_warm_process_pool(
+        args.workers, modules=[args.module]
+    )
+
+    print(
+        f"{args.runs} runs of {args.workers} tasks importing {args.module}; "
+        "latency from the start of the run until each task is ready"
+    )
+    print(
+        f"\n{'pool':<18}{'first run avg ms':>18}{'first run max ms':>18}"
+        f"{'later avg ms':>14}{'later max ms':>14}"
+    )
+    for name, get_pool in pools.items():
+        runs = [
+            run_pool(manager, get_pool, args.workers, args.module, "per run" in name)
+            for _ in range(args.runs)
+        ]
+        first, later = runs[0], [x for run in runs[1:] for x in run] or runs[0]
+        print(
+            f"{name:<18}{statistics.mean(first) * 1000:>18.1f}"
+            f"{max(first) * 1000:>18.1f}{statistics.mean(later) * 1000:>14.1f}"
+            f"{max(later) * 1000:>14.1f}"
+        )
+
+    print(
+        "\nThe warm pool's first run includes starting its workers; later runs "
+        "reuse them"
+    )
+    return True
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="PyProcessor benchmarks")
+    subparsers = parser.add_subparsers(dest="command", help="Benchmark to run")
+
+    # Scaling command
+    scaling_parser = subparsers.add_parser(
+        "scaling", help="Compare parallel and cascaded scaling graphs"
+    )
+    scaling_parser.add_argument(
+        "--duration", type=int, default=30, help="Sample length in seconds"
+    )
+    scaling_parser.add_argument(
+        "--runs", type=int, default=3, help="Runs per graph (median is reported)"
+    )
+    scaling_parser.add_argument(
+        "--encode",
+        action="store_true",
+        help="Encode each rung with libx264 instead of discarding raw frames",
+    )
+    scaling_parser.add_argument(
+        "--low-scaler",
+        default="fast_bilinear",
+        help="Scaler for the 480p and 360p rungs in cascade mode",
+    )
+
+    # Probe command
+    probe_parser = subparsers.add_parser(
+        "probe", help="Compare the in-process header parser with FFprobe"
+    )
+    probe_parser.add_argument(
+        "--files", type=int, default=50, help="Number of samples to generate"
+    )
+    probe_parser.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="Passes over the samples (best is reported)",
+    )
+    probe_parser.add_argument(
+        "--dir", help="Probe the files in an existing directory instead"
+    )
+
+    # Progress command
+    progress_parser = subparsers.add_parser(
+        "progress", help="Compare stderr regex and -progress pipe monitoring"
+    )
+    progress_parser.add_argument(
+        "--duration", type=int, default=60, help="Sample length in seconds"
+    )
+    progress_parser.add_argument(
+        "--runs", type=int, default=3, help="Encodes per monitor (median is reported)"
+    )
+
+    # Makespan command
+    makespan_parser = subparsers.add_parser(
+        "makespan", help="Compare batch-by-batch and streaming work queues"
+    )
+    makespan_parser.add_argument(
+        "--files", type=int, default=40, help="Number of simulated files"
+    )
+    makespan_parser.add_argument(
+        "--workers", type=int, default=4, help="Files processed at the same time"
+    )
+    makespan_parser.add_argument(
+        "--mean", type=float, default=0.25, help="Mean encode time in seconds"
+    )
+    makespan_parser.add_argument(
+        "--alpha", type=float, default=1.5, help="Pareto shape of the encode times"
+    )
+    makespan_parser.add_argument(
+        "--seed", type=int, default=1, help="Random seed for the encode times"
+    )
+
+    # Scheduler command
+    scheduler_parser = subparsers.add_parser(
+        "scheduler", help="Measure SchedulerManager dispatch latency"
+    )
+    scheduler_parser.add_argument(
+        "--tasks",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Numbers of queued tasks to measure",
+    )
+    scheduler_parser.add_argument(
+        "--workers", type=int, default=4, help="Tasks running at the same time"
+    )
+    scheduler_parser.add_argument(
+        "--dependencies",
+        type=float,
+        default=0.5,
+        help="Share of tasks that depend on an earlier task",
+    )
+    scheduler_parser.add_argument(
+        "--seed",
+        type=int,
+        default=1,
+        help="Random seed for priorities and dependencies",
+    )
+
+    # Threads command
+    threads_parser = subparsers.add_parser(
+        "threads",
+        help="Compare throughput of concurrent encodes with fixed and budgeted threads",
+    )
+    threads_parser.add_argument(
+        "--files", type=int, default=8, help="Number of files to encode"
+    )
+    threads_parser.add_argument(
+        "--jobs", type=int, default=4, help="Encodes running at the same time"
+    )
+    threads_parser.add_argument(
+        "--duration", type=int, default=10, help="Duration of the sample in seconds"
+    )
+    threads_parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Threads shared by the encodes (default: CPU count)",
+    )
+
+    # Pool command
+    pool_parser = subparsers.add_parser(
+        "pool", help="Compare task-start latency of per-run and warm process pools"
+    )
+    pool_parser.add_argument(
+        "--runs", type=int, default=5, help="Number of simulated runs per pool"
+    )
+    pool_parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Worker processes, and tasks started per run",
+    )
+    pool_parser.add_argument(
+        "--module",
+        default="pyprocessor.processing.scheduler",
+        help="Module each task imports before it can start",
+    )
+
+    args = parser.parse_args()
+
+    # Run the appropriate command
+    if args.command == "scaling":
+        success = benchmark_scaling(args)
+    elif args.command == "probe":
+        success = benchmark_probe(args)
+    elif args.command == "progress":
+        success = benchmark_progress(args)
+    elif args.command == "makespan":
+        success = benchmark_makespan(args)
+    elif args.command == "scheduler":
+        success = benchmark_scheduler(args)
+    elif args.command == "threads":
+        success = benchmark_threads(args)
+    elif args.command == "pool":
+        success = benchmark_pool(args)
+    else:
+        parser.print_help()
+        return True
+
+    return success
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
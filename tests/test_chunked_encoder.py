@@ -0,0 +1,76 @@
+"""
+Tests for chunk worker sizing and the chunk retry loop.
+"""
+
+import os
+import sys
+
+import pytest
+
+from pyprocessor.processing.chunked_encoder import (
+    ChunkedEncoder,
+    EncodeChunk,
+    chunk_worker_count,
+)
+from pyprocessor.utils.process.watchdog import was_killed
+
+# Killed by SIGKILL on its first run (like a watchdog kill), succeeds after
+KILLED_ONCE = """
+import os, signal, sys
+marker = sys.argv[-1]
+if not os.path.exists(marker):
+    open(marker, "w").close()
+    os.kill(os.getpid(), signal.SIGKILL)
+"""
+
+
+def test_configured_chunk_workers_win():
+    assert chunk_worker_count({"chunk_workers": 3}, 10, threads=8, slots=2) == 3
+
+
+def test_chunk_workers_follow_the_thread_share():
+    assert chunk_worker_count({}, 10, threads=4) == 4
+
+
+def test_chunk_workers_split_the_cpus_between_slots(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+
+    assert chunk_worker_count({}, 10, slots=4) == 4
+    assert chunk_worker_count({}, 10, slots=32) == 1
+
+
+def test_chunk_workers_never_exceed_the_chunks():
+    assert chunk_worker_count({}, 2, threads=8) == 2
+
+
+def encode_chunk(tmp_path, retries):
+    marker = tmp_path / "killed"
+    cmd = [sys.executable, "-c", KILLED_ONCE, "-progress", "pipe:1", str(marker)]
+    pids = []
+    encoder = ChunkedEncoder(
+        tmp_path,
+        [EncodeChunk(0, 0.0, 10.0, last=True)],
+        retries=retries,
+        pid_callback=pids.append,
+    )
+    returncode, _ = encoder._encode_chunk(cmd, encoder.chunks[0], None, None)
+    return returncode, pids
+
+
+@pytest.mark.skipif(os.name != "posix", reason="SIGKILL")
+def test_killed_chunk_is_encoded_again(tmp_path):
+    returncode, pids = encode_chunk(tmp_path, retries=1)
+
+    assert returncode == 0
+    # Each run publishes its process, then 0 once it exits
+    assert len(pids) == 4
+    assert pids[1] == pids[3] == 0
+    assert pids[0] and pids[2] and pids[0] != pids[2]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="SIGKILL")
+def test_killed_chunk_fails_without_retries(tmp_path):
+    returncode, pids = encode_chunk(tmp_path, retries=0)
+
+    assert was_killed(returncode)
+    assert pids[-1] == 0
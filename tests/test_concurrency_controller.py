@@ -0,0 +1,141 @@
+"""
+Tests for the AIMD rule of the adaptive concurrency controller.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from pyprocessor.processing.concurrency_controller import (
+    SWAP_IN_THRESHOLD,
+    ConcurrencyController,
+)
+
+
+class Logger:
+    """Logger stub that keeps the structured fields of each message."""
+
+    def __init__(self):
+        self.records = []
+
+    def _log(self, message, **fields):
+        self.records.append((message, fields))
+
+    info = debug = error = _log
+
+
+class ResourceManager:
+    """Resource manager stub reporting fixed utilization."""
+
+    def __init__(self, cpu, memory, iowait=0.0):
+        self.cpu = SimpleNamespace(utilization=cpu, details={"iowait": iowait})
+        self.memory = SimpleNamespace(utilization=memory, details={})
+
+    def get_cpu_usage(self):
+        return self.cpu
+
+    def get_memory_usage(self):
+        return self.memory
+
+
+def controller(limit=4, **kwargs):
+    return ConcurrencyController(limit, 8, min_slots=1, logger=Logger(), **kwargs)
+
+
+def metrics(cpu=0.5, memory=0.4, iowait=0.0, swap_in_rate=0.0):
+    return {
+        "cpu": cpu,
+        "memory": memory,
+        "iowait": iowait,
+        "swap": 0.0,
+        "swap_in_rate": swap_in_rate,
+    }
+
+
+@pytest.mark.parametrize(
+    "sample, active, action, reason, limit",
+    [
+        (metrics(), 4, "increase", "cpu_headroom", 5),
+        (metrics(memory=0.85), 4, "decrease", "memory", 2),
+        (metrics(swap_in_rate=SWAP_IN_THRESHOLD), 4, "decrease", "swapping", 2),
+        (metrics(iowait=0.3), 4, "decrease", "iowait", 2),
+        (metrics(memory=0.85), 6, "hold", "memory_draining", 4),
+        (metrics(), 3, "hold", "slots_free", 4),
+        (metrics(cpu=0.9), 4, "hold", "cpu_at_target", 4),
+        # Without a baseline a fifth encode like the running ones needs
+        # 0.7 / 4 more memory
+        (metrics(memory=0.7), 4, "hold", "memory_headroom", 4),
+    ],
+)
+def test_decide(sample, active, action, reason, limit):
+    decision = controller().decide(sample, active)
+
+    assert (decision["action"], decision["reason"], decision["limit"]) == (
+        action,
+        reason,
+        limit,
+    )
+    assert decision["previous_limit"] == 4
+
+
+def test_memory_in_use_before_the_run_is_not_counted_per_encode():
+    adaptive = controller(limit=1)
+    adaptive.baseline_memory = 0.45
+
+    decision = adaptive.decide(metrics(memory=0.5), 1)
+
+    assert decision["encode_memory"] == pytest.approx(0.05)
+    assert (decision["action"], decision["limit"]) == ("increase", 2)
+    assert adaptive.decide(metrics(memory=0.65), 1)["reason"] == "memory_headroom"
+
+
+def test_start_records_the_baseline():
+    adaptive = controller(resource_manager=ResourceManager(cpu=0.5, memory=0.45))
+    adaptive.interval = 60
+    adaptive.start()
+    adaptive.stop()
+
+    assert adaptive.baseline_memory == 0.45
+
+
+def test_decide_keeps_the_bounds():
+    low = controller(limit=1)
+    high = controller(limit=8)
+
+    assert low.decide(metrics(memory=0.9), 1)["reason"] == "memory_at_min"
+    assert high.decide(metrics(), 8)["reason"] == "at_max"
+
+
+def test_cut_rounds_down_but_keeps_the_minimum():
+    assert controller(limit=3).decide(metrics(memory=0.9), 3)["limit"] == 1
+    assert controller(limit=2).decide(metrics(memory=0.9), 2)["limit"] == 1
+
+
+def test_step_applies_the_decision_and_notifies_listeners():
+    limits = []
+    adaptive = controller(
+        resource_manager=ResourceManager(cpu=0.5, memory=0.4),
+        active_count=lambda: 4,
+    )
+    adaptive.add_listener(limits.append)
+
+    decision = adaptive.step()
+
+    assert decision["action"] == "increase"
+    assert adaptive.limit == 5
+    assert limits == [5]
+    assert adaptive.to_dict()["decisions"] == [decision]
+    _, fields = adaptive.logger.records[-1]
+    assert fields["event"] == "concurrency_decision"
+
+
+def test_slots_follow_the_limit():
+    adaptive = controller(limit=2)
+
+    assert adaptive.try_acquire()
+    assert adaptive.try_acquire()
+    assert not adaptive.try_acquire()
+
+    adaptive.release()
+    assert adaptive.open_slots() == 2
+    assert adaptive.try_acquire()
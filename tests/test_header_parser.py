@@ -0,0 +1,341 @@
+"""
+Tests for the MP4 and Matroska header parser.
+
+Fixtures are built byte by byte so the tests do not need FFmpeg or sample media.
+"""
+
+import struct
+
+from pyprocessor.utils.media import header_parser
+from pyprocessor.utils.media.header_parser import (
+    parse_media_header,
+    read_keyframe_times,
+)
+
+# MP4 / MOV
+
+
+def box(box_type, *children):
+    """Build an MP4 box from its type and body parts."""
+    body = b"".join(children)
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def full_box(box_type, body, version=0):
+    """Build an MP4 full box (version and flags before the body)."""
+    return box(box_type, struct.pack(">B3x", version), body)
+
+
+def mvhd(timescale, duration):
+    return full_box(
+        b"mvhd",
+        struct.pack(">II", 0, 0) + struct.pack(">II", timescale, duration) + bytes(80),
+    )
+
+
+def mdhd(timescale, duration):
+    return full_box(b"mdhd", struct.pack(">IIII", 0, 0, timescale, duration) + bytes(4))
+
+
+def hdlr(handler):
+    return full_box(b"hdlr", bytes(4) + handler + bytes(12) + b"\x00")
+
+
+def tkhd(width, height):
+    body = bytearray(80)
+    struct.pack_into(">II", body, 72, width << 16, height << 16)
+    return full_box(b"tkhd", bytes(body))
+
+
+def video_entry(fourcc, width, height):
+    """Build a visual sample entry (width and height at offset 32)."""
+    body = bytearray(70)
+    struct.pack_into(">HH", body, 24, width, height)
+    return box(fourcc, bytes(body))
+
+
+def audio_entry(fourcc, channels, sample_rate):
+    """Build an audio sample entry (channels at 24, 16.16 rate at 32)."""
+    body = bytearray(28)
+    struct.pack_into(">H", body, 16, channels)
+    struct.pack_into(">I", body, 24, sample_rate << 16)
+    return box(fourcc, bytes(body))
+
+
+def stsd(entry):
+    return full_box(b"stsd", struct.pack(">I", 1) + entry)
+
+
+def stts(*runs):
+    body = struct.pack(">I", len(runs))
+    for count, delta in runs:
+        body += struct.pack(">II", count, delta)
+    return full_box(b"stts", body)
+
+
+def stss(*samples):
+    return full_box(b"stss", struct.pack(f">I{len(samples)}I", len(samples), *samples))
+
+
+def trak(handler, timescale, duration, entry, *tables, header=b""):
+    stbl = box(b"stbl", stsd(entry), *tables)
+    mdia = box(b"mdia", mdhd(timescale, duration), hdlr(handler), box(b"minf", stbl))
+    return box(b"trak", header, mdia)
+
+
+def mp4_file(*moov_children, leading=b""):
+    ftyp = box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomavc1")
+    mdat = box(b"mdat", bytes(64))
+    return ftyp + leading + box(b"moov", *moov_children) + mdat
+
+
+def video_trak(entry=None, header=None):
+    return trak(
+        b"vide",
+        30000,
+        300000,
+        entry or video_entry(b"avc1", 1280, 720),
+        stts((300, 1000)),
+        stss(1, 31, 61),
+        header=header if header is not None else tkhd(1280, 720),
+    )
+
+
+def audio_trak():
+    return trak(b"soun", 48000, 480000, audio_entry(b"mp4a", 2, 48000))
+
+
+def write(tmp_path, data, name="input.mp4"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+def test_mp4_header_is_parsed_into_ffprobe_output(tmp_path):
+    data = mp4_file(mvhd(1000, 10000), video_trak(), audio_trak())
+    path = write(tmp_path, data)
+
+    info = parse_media_header(path)
+
+    assert info["format"]["format_name"] == "mov,mp4,m4a,3gp,3g2,mj2"
+    assert info["format"]["duration"] == "10.000000"
+    assert info["format"]["size"] == str(len(data))
+    video, audio = info["streams"]
+    assert video["index"] == 0
+    assert video["codec_type"] == "video"
+    assert video["codec_name"] == "h264"
+    assert (video["width"], video["height"]) == (1280, 720)
+    assert video["avg_frame_rate"] == "30/1"
+    assert video["duration"] == "10.000000"
+    assert audio["index"] == 1
+    assert audio["codec_name"] == "aac"
+    assert audio["channels"] == 2
+    assert audio["sample_rate"] == "48000"
+
+
+def test_mp4_size_falls_back_to_the_track_header(tmp_path):
+    # A sample entry too short to hold the visual dimensions
+    entry = box(b"avc1", bytes(16))
+    path = write(
+        tmp_path, mp4_file(mvhd(1000, 10000), video_trak(entry, tkhd(640, 360)))
+    )
+
+    video = parse_media_header(path)["streams"][0]
+
+    assert (video["width"], video["height"]) == (640, 360)
+
+
+def test_mp4_largesize_box_before_moov_is_skipped(tmp_path):
+    free = struct.pack(">I4sQ", 1, b"free", 16 + 32) + bytes(32)
+    path = write(tmp_path, mp4_file(mvhd(1000, 10000), video_trak(), leading=free))
+
+    assert parse_media_header(path)["format"]["duration"] == "10.000000"
+
+
+def test_mp4_keyframe_times_come_from_stss(tmp_path):
+    path = write(tmp_path, mp4_file(mvhd(1000, 10000), audio_trak(), video_trak()))
+
+    assert read_keyframe_times(path) == [0.0, 1.0, 2.0]
+
+
+def test_mp4_without_duration_is_left_to_ffprobe(tmp_path):
+    path = write(tmp_path, mp4_file(mvhd(1000, 0), video_trak()))
+
+    assert parse_media_header(path) is None
+
+
+def test_truncated_moov_returns_none(tmp_path):
+    data = mp4_file(mvhd(1000, 10000), video_trak())
+    moov_end = data.index(b"mdat") - 4
+    path = write(tmp_path, data[: moov_end - 20])
+
+    assert parse_media_header(path) is None
+    assert read_keyframe_times(path) is None
+
+
+def test_child_box_larger_than_its_parent_returns_none(tmp_path):
+    broken = struct.pack(">I4s", 4096, b"trak") + bytes(16)
+    path = write(tmp_path, mp4_file(mvhd(1000, 10000), broken))
+
+    assert parse_media_header(path) is None
+
+
+def test_box_size_smaller_than_its_header_returns_none(tmp_path):
+    ftyp = box(b"ftyp", b"isom", bytes(4))
+    path = write(tmp_path, ftyp + struct.pack(">I4s", 4, b"free") + bytes(32))
+
+    assert parse_media_header(path) is None
+
+
+def test_oversize_moov_is_not_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(header_parser, "MAX_HEADER_SIZE", 64)
+    path = write(tmp_path, mp4_file(mvhd(1000, 10000), video_trak()))
+
+    assert parse_media_header(path) is None
+
+
+def test_unknown_container_returns_none(tmp_path):
+    path = write(tmp_path, b"RIFF\x00\x00\x00\x00AVI LIST" + bytes(64), "input.avi")
+
+    assert parse_media_header(path) is None
+    assert read_keyframe_times(path) is None
+
+
+# Matroska / WebM
+
+
+def vint_size(size):
+    """Encode an element size as an 8-byte EBML integer."""
+    return b"\x01" + size.to_bytes(7, "big")
+
+
+def element(element_id, *children):
+    body = b"".join(children)
+    return (
+        element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+        + vint_size(len(body))
+        + body
+    )
+
+
+def uint(element_id, value, length=4):
+    return element(element_id, value.to_bytes(length, "big"))
+
+
+def double(element_id, value):
+    return element(element_id, struct.pack(">d", value))
+
+
+def string(element_id, value):
+    return element(element_id, value.encode())
+
+
+def ebml_header(doc_type="matroska"):
+    return element(0x1A45DFA3, uint(0x4286, 1, 1), string(0x4282, doc_type))
+
+
+def info(duration_ms=5000.0):
+    return element(0x1549A966, uint(0x2AD7B1, 1000000), double(0x4489, duration_ms))
+
+
+def tracks():
+    video = element(
+        0xAE,
+        uint(0x83, 1, 1),
+        string(0x86, "V_MPEG4/ISO/AVC"),
+        uint(0x23E383, 40000000),
+        element(0xE0, uint(0xB0, 1920, 2), uint(0xBA, 1080, 2)),
+    )
+    audio = element(
+        0xAE,
+        uint(0x83, 2, 1),
+        string(0x86, "A_AAC"),
+        element(0xE1, uint(0x9F, 2, 1), double(0xB5, 48000.0)),
+    )
+    return element(0x1654AE6B, video, audio)
+
+
+def cluster():
+    return element(0x1F43B675, uint(0xE7, 0), bytes(32))
+
+
+def matroska_file(*segment_children, doc_type="matroska"):
+    return ebml_header(doc_type) + element(0x18538067, *segment_children)
+
+
+def test_matroska_header_is_parsed_into_ffprobe_output(tmp_path):
+    data = matroska_file(info(), tracks(), cluster())
+    path = write(tmp_path, data, "input.mkv")
+
+    parsed = parse_media_header(path)
+
+    assert parsed["format"]["format_name"] == "matroska,webm"
+    assert parsed["format"]["duration"] == "5.000000"
+    video, audio = parsed["streams"]
+    assert video["codec_name"] == "h264"
+    assert (video["width"], video["height"]) == (1920, 1080)
+    assert video["avg_frame_rate"] == "25/1"
+    assert audio["codec_name"] == "aac"
+    assert audio["channels"] == 2
+    assert audio["sample_rate"] == "48000"
+
+
+def test_webm_doc_type_is_accepted(tmp_path):
+    path = write(
+        tmp_path, matroska_file(info(), tracks(), doc_type="webm"), "input.webm"
+    )
+
+    assert parse_media_header(path)["format"]["duration"] == "5.000000"
+
+
+def test_unknown_doc_type_returns_none(tmp_path):
+    path = write(
+        tmp_path, matroska_file(info(), tracks(), doc_type="other"), "input.mkv"
+    )
+
+    assert parse_media_header(path) is None
+
+
+def test_tracks_after_clusters_are_found_via_the_seek_head(tmp_path):
+    def seek_head(tracks_position):
+        seek = element(
+            0x4DBB,
+            element(0x53AB, (0x1654AE6B).to_bytes(4, "big")),
+            uint(0x53AC, tracks_position, 8),
+        )
+        return element(0x114D9B74, seek)
+
+    # The SeekHead has a fixed size, so build it once to learn the offset
+    head = seek_head(0) + info() + cluster()
+    data = matroska_file(seek_head(len(head)), info(), cluster(), tracks())
+    path = write(tmp_path, data, "input.mkv")
+
+    parsed = parse_media_header(path)
+
+    assert [s["codec_type"] for s in parsed["streams"]] == ["video", "audio"]
+
+
+def test_missing_tracks_returns_none(tmp_path):
+    path = write(tmp_path, matroska_file(info(), cluster()), "input.mkv")
+
+    assert parse_media_header(path) is None
+
+
+def test_truncated_tracks_element_returns_none(tmp_path):
+    data = matroska_file(info(), tracks())
+    path = write(tmp_path, data[:-10], "input.mkv")
+
+    assert parse_media_header(path) is None
+
+
+def test_truncated_ebml_header_returns_none(tmp_path):
+    path = write(tmp_path, ebml_header()[:10], "input.mkv")
+
+    assert parse_media_header(path) is None
+
+
+def test_oversize_matroska_element_is_not_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(header_parser, "MAX_HEADER_SIZE", 64)
+    path = write(tmp_path, matroska_file(info(), tracks()), "input.mkv")
+
+    assert parse_media_header(path) is None
@@ -0,0 +1,57 @@
+"""
+Tests for native HLS encryption key handling.
+"""
+
+from pyprocessor.processing.hls_encryption import KEY_DIR_NAME, HLSKeyRotator
+
+
+def test_keys_are_published_with_the_output(tmp_path):
+    rotator = HLSKeyRotator(tmp_path)
+    try:
+        rotator.prepare()
+        key_id = rotator.key_ids[0]
+        uri, key_path = rotator.key_info_file.read_text().splitlines()
+
+        assert uri == f"../{KEY_DIR_NAME}/{key_id}.key"
+        assert key_path == str(tmp_path / KEY_DIR_NAME / f"{key_id}.key")
+        assert len((tmp_path / KEY_DIR_NAME / f"{key_id}.key").read_bytes()) == 16
+    finally:
+        rotator.cleanup()
+
+
+def test_key_server_keys_stay_out_of_the_output(tmp_path):
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    key_dir = tmp_path / "served"
+    rotator = HLSKeyRotator(
+        staging, key_uri="https://keys.example.com/hls/", key_dir=key_dir
+    )
+    try:
+        rotator.prepare()
+        key_id = rotator.key_ids[0]
+        uri = rotator.key_info_file.read_text().splitlines()[0]
+
+        assert uri == f"https://keys.example.com/hls/{key_id}.key"
+        assert (key_dir / f"{key_id}.key").exists()
+        assert not (staging / KEY_DIR_NAME).exists()
+    finally:
+        rotator.cleanup()
+
+
+def test_rotation_issues_distinct_keys(tmp_path):
+    variant = tmp_path / "720p"
+    variant.mkdir()
+    rotator = HLSKeyRotator(tmp_path, rotation_segments=2)
+    try:
+        rotator.prepare()
+        (variant / "segment_001.ts").write_bytes(b"")
+        assert rotator.poll()
+        keys = [
+            (tmp_path / KEY_DIR_NAME / f"{key_id}.key").read_bytes()
+            for key_id in rotator.key_ids
+        ]
+
+        assert len(rotator.key_ids) == 2
+        assert keys[0] != keys[1]
+    finally:
+        rotator.cleanup()
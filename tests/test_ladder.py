@@ -0,0 +1,141 @@
+"""
+Tests for the rendition ladder planner.
+"""
+
+import pytest
+
+from pyprocessor.processing.ladder import LadderPlan, LadderRung, plan_ladder
+from pyprocessor.utils.logging.error_manager import EncodingError
+
+BITRATES = {"1080p": "11000k", "720p": "6500k", "480p": "4000k", "360p": "1500k"}
+
+
+def probe(width=1920, height=1080, fps="30/1"):
+    """Build FFprobe output for a source video stream."""
+    return {
+        "streams": [
+            {
+                "codec_type": "video",
+                "width": width,
+                "height": height,
+                "avg_frame_rate": fps,
+            }
+        ]
+    }
+
+
+def test_rungs_above_the_source_are_dropped():
+    plan = plan_ladder({"bitrates": BITRATES}, probe(1280, 720))
+
+    assert [rung.name for rung in plan.rungs] == ["720p", "480p", "360p"]
+
+
+def test_source_smaller_than_every_rung_keeps_the_lowest():
+    plan = plan_ladder({"bitrates": BITRATES}, probe(320, 180))
+
+    assert [(rung.name, rung.width, rung.height) for rung in plan.rungs] == [
+        ("360p", 320, 180)
+    ]
+
+
+def test_no_audio_bitrates_means_no_audio():
+    for audio_mode in ("muxed", "group"):
+        plan = plan_ladder(
+            {"bitrates": BITRATES, "audio_bitrates": [], "audio_mode": audio_mode},
+            probe(),
+        )
+
+        assert plan.audio_renditions == []
+        assert plan.build_audio_args() == []
+        assert plan.variant_names == ["1080p", "720p", "480p", "360p"]
+        assert plan.build_var_stream_map(True) == (
+            "v:0,name:1080p v:1,name:720p v:2,name:480p v:3,name:360p"
+        )
+        assert plan.to_dict()["audio_renditions"] == []
+
+
+def test_no_configured_rungs_raises():
+    with pytest.raises(EncodingError):
+        plan_ladder({"bitrates": {"hd": "5000k", "720p": ""}}, probe())
+
+
+@pytest.mark.parametrize("scaling_mode", ["parallel", "cascade"])
+def test_empty_plan_has_no_filter_graph(scaling_mode):
+    plan = LadderPlan([], 30, scaling_mode=scaling_mode)
+
+    with pytest.raises(EncodingError):
+        plan.build_filter_complex()
+
+
+def test_cascade_filter_feeds_each_rung_from_the_one_above():
+    plan = LadderPlan(
+        [LadderRung("720p", 1280, 720, "6500k"), LadderRung("360p", 640, 360, "1500k")],
+        30,
+        scaling_mode="cascade",
+    )
+
+    assert plan.build_filter_complex() == (
+        "[0:v]scale=1280:720,split=2[v1out][c1];[c1]scale=640:360[v2out]"
+    )
+
+
+def test_group_mode_shares_one_audio_group():
+    plan = plan_ladder(
+        {
+            "bitrates": BITRATES,
+            "audio_bitrates": ["192k", "128k", "96k", "64k"],
+            "audio_mode": "group",
+        },
+        probe(),
+    )
+
+    # One AAC stream for the whole ladder with the default config
+    assert plan.audio_renditions == ["192k"]
+    assert plan.build_audio_args().count("-map") == 1
+    assert plan.build_var_stream_map(True) == (
+        "a:0,agroup:aud,name:audio_192k,default:yes "
+        "v:0,agroup:aud,name:1080p v:1,agroup:aud,name:720p "
+        "v:2,agroup:aud,name:480p v:3,agroup:aud,name:360p"
+    )
+    assert plan.variant_names[-1] == "audio_192k"
+
+
+def test_group_mode_renditions_are_alternatives_in_one_group():
+    plan = plan_ladder(
+        {
+            "bitrates": BITRATES,
+            "audio_bitrates": ["128k", "128k", "64k", "32k"],
+            "audio_mode": "group",
+            "audio_group_renditions": 2,
+        },
+        probe(1280, 720),
+    )
+
+    assert plan.audio_renditions == ["128k", "64k"]
+    assert plan.build_audio_args().count("-map") == 2
+    assert plan.build_var_stream_map(True).split() == [
+        "a:0,agroup:aud,name:audio_128k,default:yes",
+        "a:1,agroup:aud,name:audio_64k",
+        "v:0,agroup:aud,name:720p",
+        "v:1,agroup:aud,name:480p",
+        "v:2,agroup:aud,name:360p",
+    ]
+
+
+def test_muxed_mode_pairs_each_rung_with_an_audio_stream():
+    plan = plan_ladder(
+        {"bitrates": BITRATES, "audio_bitrates": ["192k", "128k"]}, probe()
+    )
+
+    assert plan.audio_renditions == ["192k", "128k", "128k", "128k"]
+    assert plan.build_var_stream_map(True).split()[:2] == [
+        "v:0,a:0,name:1080p",
+        "v:1,a:1,name:720p",
+    ]
+
+
+@pytest.mark.parametrize(
+    "bitrate, bufsize", [("11000k", "22000k"), ("20M", "40000k"), ("2.5M", "5000k")]
+)
+def test_buffer_size_is_twice_the_bitrate_in_any_unit(bitrate, bufsize):
+    assert LadderRung("2160p", 3840, 2160, bitrate).bufsize == bufsize
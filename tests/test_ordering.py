@@ -0,0 +1,112 @@
+"""
+Tests for file ordering and the makespan prediction.
+"""
+
+import pytest
+
+from pyprocessor.processing import ordering
+from pyprocessor.processing.ordering import (
+    OrderingPlan,
+    load_calibration,
+    predict_makespan,
+    save_calibration,
+)
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    """Files whose estimated cost is their size (none of them can be probed)."""
+    monkeypatch.setattr(ordering, "estimate_cost", lambda path: None)
+    paths = []
+    for name, size in (("a.mp4", 10), ("b.mp4", 40), ("c.mp4", 20)):
+        path = tmp_path / name
+        path.write_bytes(bytes(size))
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def disk_cache(monkeypatch):
+    """Replace the disk cache with a dictionary."""
+    cache = {}
+    monkeypatch.setattr(
+        ordering, "cache_get", lambda key, default=None, backend=None: cache.get(key)
+    )
+    monkeypatch.setattr(
+        ordering,
+        "cache_set",
+        lambda key, value, backend=None: cache.__setitem__(key, value),
+    )
+    return cache
+
+
+def test_predict_makespan_replays_the_order():
+    assert predict_makespan([4, 3, 3, 2], workers=2) == 6
+    assert predict_makespan([4, 3, 3, 2], workers=2, batch_size=2) == 7
+
+
+@pytest.mark.parametrize(
+    "policy, order",
+    [
+        ("fifo", ["a.mp4", "b.mp4", "c.mp4"]),
+        ("lpt", ["b.mp4", "c.mp4", "a.mp4"]),
+        ("spt", ["a.mp4", "c.mp4", "b.mp4"]),
+    ],
+)
+def test_files_are_ordered_by_the_policy(files, policy, order):
+    plan = OrderingPlan(files, policy=policy, workers=2)
+
+    assert [f.name for f in plan.files] == order
+
+
+def test_prediction_is_unavailable_without_an_earlier_calibration(files):
+    plan = OrderingPlan(files, workers=2)
+    plan.record_result("b.mp4", True, 8.0)
+
+    report = plan.finish(makespan=10.0)
+
+    # The run calibrates itself, but that is not a prediction
+    assert report["seconds_per_unit"] == 0.2
+    assert report["predicted_makespan"] is None
+    assert report["prediction_error"] is None
+
+
+def test_prediction_uses_the_calibration_known_before_the_run(files):
+    plan = OrderingPlan(files, policy="lpt", workers=2, seconds_per_unit=0.1)
+    assert plan.predicted_makespan == pytest.approx(4.0)
+
+    plan.record_result("b.mp4", True, 8.0)
+    report = plan.finish(makespan=10.0)
+
+    assert report["predicted_makespan"] == pytest.approx(4.0)
+    assert report["seconds_per_unit"] == 0.2
+    assert report["prediction_error"] == pytest.approx(1.5)
+
+
+def test_fifo_costs_only_the_completed_files_after_the_run(files, monkeypatch):
+    probed = []
+    monkeypatch.setattr(ordering, "estimate_cost", lambda path: probed.append(path))
+
+    plan = OrderingPlan(files, workers=2, seconds_per_unit=0.1)
+
+    assert probed == []
+    assert plan.predicted_makespan is None
+    assert plan.unpredicted_reason.startswith("'fifo'")
+
+    plan.record_result("b.mp4", True, 8.0)
+    plan.record_result("c.mp4", False, 1.0)
+    report = plan.finish(makespan=10.0)
+
+    assert [path.name for path in probed] == ["b.mp4"]
+    assert report["seconds_per_unit"] == 0.2
+
+
+def test_calibration_is_kept_per_parameters_and_workers(disk_cache):
+    params = {"encoder": "libx264", "preset": "medium"}
+    assert load_calibration(params, 4) is None
+
+    save_calibration(0.25, params, 4)
+
+    assert load_calibration(dict(reversed(params.items())), 4) == 0.25
+    assert load_calibration(params, 8) is None
+    assert load_calibration({**params, "preset": "slow"}, 4) is None
@@ -0,0 +1,44 @@
+"""
+Tests for committing staging directories to the output folder.
+"""
+
+import os
+import stat
+import tempfile
+
+import pytest
+
+from pyprocessor.utils.file_system.output_commit import UMASK, commit_directory
+
+
+def make_staging(tmp_path):
+    """Create a staging directory the way the encoder does (mkdtemp, mode 0700)."""
+    staging = tempfile.mkdtemp(prefix=".ffmpeg_input_", dir=tmp_path)
+    with open(os.path.join(staging, "master.m3u8"), "w") as f:
+        f.write("#EXTM3U\n")
+    return staging
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_renamed_output_gets_the_default_directory_mode(tmp_path):
+    staging = make_staging(tmp_path)
+    destination = tmp_path / "output" / "input"
+
+    result = commit_directory(staging, destination)
+
+    assert result.strategy == "rename"
+    assert stat.S_IMODE(destination.stat().st_mode) == 0o777 & ~UMASK
+    assert (destination / "master.m3u8").read_text() == "#EXTM3U\n"
+
+
+def test_non_empty_destination_is_not_replaced(tmp_path):
+    staging = make_staging(tmp_path)
+    destination = tmp_path / "output"
+    destination.mkdir()
+    (destination / "existing.txt").write_text("keep")
+
+    result = commit_directory(staging, destination)
+
+    assert result.strategy in ("hardlink", "reflink", "copy")
+    assert (destination / "existing.txt").read_text() == "keep"
+    assert (destination / "master.m3u8").exists()
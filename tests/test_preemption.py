@@ -0,0 +1,62 @@
+"""
+Tests for handing --prioritize requests to running batches.
+"""
+
+import json
+
+from pyprocessor.utils.process import preemption
+from pyprocessor.utils.process.preemption import (
+    LISTENER_DIR_NAME,
+    get_listening_runs,
+    listen_for_priority_requests,
+    read_priority_requests,
+    request_priority,
+    stop_listening,
+)
+
+
+def register_dead_run(directory, run_id="dead"):
+    listener_dir = directory / LISTENER_DIR_NAME
+    listener_dir.mkdir(parents=True, exist_ok=True)
+    (listener_dir / f"{run_id}.json").write_text(json.dumps({"pid": 4321}))
+    return run_id
+
+
+def test_request_fails_without_a_listening_run(tmp_path):
+    assert request_priority("trailer.mp4", directory=tmp_path) == []
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_requests_reach_only_the_run_they_were_made_for(tmp_path):
+    run_id = listen_for_priority_requests(tmp_path)
+
+    paths = request_priority("/videos/trailer.mp4", 50, directory=tmp_path)
+
+    assert len(paths) == 1
+    assert read_priority_requests("other", tmp_path) == []
+    assert read_priority_requests(run_id, tmp_path) == [("trailer.mp4", 50)]
+    assert read_priority_requests(run_id, tmp_path) == []
+
+
+def test_runs_that_are_gone_are_forgotten_with_their_requests(tmp_path, monkeypatch):
+    dead = register_dead_run(tmp_path)
+    (tmp_path / f"{dead}-left.json").write_text(
+        json.dumps({"name": "trailer.mp4", "priority": 1})
+    )
+    monkeypatch.setattr(preemption.psutil, "pid_exists", lambda pid: pid != 4321)
+
+    run_id = listen_for_priority_requests(tmp_path)
+
+    assert get_listening_runs(tmp_path) == [run_id]
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_stopped_run_takes_no_more_requests(tmp_path):
+    run_id = listen_for_priority_requests(tmp_path)
+    request_priority("trailer.mp4", directory=tmp_path)
+
+    stop_listening(run_id, tmp_path)
+
+    assert get_listening_runs(tmp_path) == []
+    assert list(tmp_path.glob("*.json")) == []
+    assert request_priority("trailer.mp4", directory=tmp_path) == []
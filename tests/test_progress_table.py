@@ -0,0 +1,96 @@
+"""
+Tests for the shared-memory progress table.
+"""
+
+import multiprocessing
+import pickle
+
+import pytest
+
+from pyprocessor.utils.process import progress_table
+from pyprocessor.utils.process.progress_table import (
+    COMPLETED,
+    IDLE,
+    RUNNING,
+    ProgressTable,
+    SlotProgress,
+)
+
+
+@pytest.fixture
+def table():
+    with ProgressTable(4) as table:
+        yield table
+
+
+def write_from_child(table):
+    table.update(2, percent=50.0, fps=30.0, pid=4321)
+    table.close()
+
+
+def test_new_slots_are_idle_and_unchanged(table):
+    assert table.read(0) == SlotProgress(IDLE, None, None, None, None)
+    assert table.changes() == {}
+
+
+def test_fields_left_out_keep_their_value(table):
+    table.update(1, percent=10.0, fps=24.0, speed=0.8, pid=1234)
+    table.update(1, percent=20.0)
+    table.update(1, pid=0)
+
+    assert table.read(1) == SlotProgress(RUNNING, 20.0, 24.0, 0.8, None)
+
+    table.set_state(1, COMPLETED)
+    assert table.read(1).state_name == "completed"
+    assert table.read(1).percent == 20.0
+
+
+def test_changes_report_each_write_once(table):
+    table.update(0, percent=5.0)
+    table.update(3, percent=7.0)
+
+    assert set(table.changes()) == {0, 3}
+    assert table.changes() == {}
+
+    table.update(3, percent=9.0)
+    assert table.changes() == {3: SlotProgress(RUNNING, 9.0, None, None, None)}
+
+
+def test_slot_being_written_is_skipped_until_it_is_consistent(table):
+    table.update(1, percent=5.0)
+    table.changes()
+
+    # A writer has bumped the tail but not yet the head
+    offset = 1 * progress_table._SLOT.size + progress_table._TAIL_OFFSET
+    progress_table._SEQ.pack_into(table._shm.buf, offset, 2)
+
+    assert table.read(1) is None
+    assert table.changes() == {}
+
+    table.update(1, percent=6.0)
+    assert table.changes()[1].percent == 6.0
+
+
+def test_pickled_table_attaches_to_the_same_block(table):
+    attached = pickle.loads(pickle.dumps(table))
+    try:
+        assert not attached.owner
+        attached.update(0, percent=42.0)
+    finally:
+        attached.close()
+
+    assert table.read(0).percent == 42.0
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="fork"
+)
+def test_worker_process_writes_are_seen_by_the_parent(table):
+    process = multiprocessing.get_context("fork").Process(
+        target=write_from_child, args=(table,)
+    )
+    process.start()
+    process.join(10)
+
+    assert process.exitcode == 0
+    assert table.changes() == {2: SlotProgress(RUNNING, 50.0, 30.0, None, 4321)}
@@ -0,0 +1,125 @@
+"""
+Tests for the event-driven priority scheduler.
+"""
+
+import threading
+
+import pytest
+
+from pyprocessor.utils.process.process_manager import create_thread_pool
+from pyprocessor.utils.process.scheduler_manager import SchedulerManager
+
+# Seconds a test waits for a task before it fails
+WAIT = 10
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A fresh scheduler running one task at a time on a thread pool."""
+    monkeypatch.setattr(SchedulerManager, "_instance", None)
+    manager = SchedulerManager()
+    manager.configure(max_concurrent=1, executor_id=create_thread_pool(2))
+    yield manager
+    manager.stop_scheduler()
+
+
+def block(scheduler):
+    """Occupy the only slot until the returned event is set."""
+    gate = threading.Event()
+    task_id = scheduler.schedule_task(gate.wait, WAIT, priority=1000)
+    return gate, task_id
+
+
+def test_ready_tasks_start_by_priority_then_submission(scheduler):
+    gate, first = block(scheduler)
+    order = []
+    tasks = [
+        scheduler.schedule_task(order.append, name, priority=priority)
+        for name, priority in (("low", 1), ("high", 9), ("mid", 5), ("mid2", 5))
+    ]
+
+    gate.set()
+    for task_id in [first] + tasks:
+        scheduler.wait_for_task(task_id, timeout=WAIT)
+
+    assert order == ["high", "mid", "mid2", "low"]
+
+
+def test_priority_change_moves_a_pending_task(scheduler):
+    gate, first = block(scheduler)
+    order = []
+    a = scheduler.schedule_task(order.append, "a", priority=5)
+    b = scheduler.schedule_task(order.append, "b", priority=1)
+
+    assert scheduler.set_priority(b, 10)
+    gate.set()
+    for task_id in (first, a, b):
+        scheduler.wait_for_task(task_id, timeout=WAIT)
+
+    assert order == ["b", "a"]
+
+
+def test_dependents_start_when_their_dependency_finishes(scheduler):
+    gate, first = block(scheduler)
+    order = []
+    dependency = scheduler.schedule_task(order.append, "dependency", priority=1)
+    dependent = scheduler.schedule_task(
+        order.append, "dependent", priority=9, dependencies=[dependency]
+    )
+
+    gate.set()
+    for task_id in (first, dependency, dependent):
+        scheduler.wait_for_task(task_id, timeout=WAIT)
+
+    assert order == ["dependency", "dependent"]
+
+
+def test_cancelled_task_never_runs_and_reports_back(scheduler):
+    gate, first = block(scheduler)
+    order = []
+    results = []
+    cancelled = scheduler.schedule_task(
+        order.append,
+        "cancelled",
+        callback=lambda task_id, success, result: results.append((success, result)),
+    )
+    after = scheduler.schedule_task(order.append, "after")
+
+    scheduler.cancel_task(cancelled)
+    gate.set()
+    for task_id in (first, after):
+        scheduler.wait_for_task(task_id, timeout=WAIT)
+
+    assert order == ["after"]
+    assert results == [(False, "Task cancelled")]
+    assert scheduler.get_task_status(cancelled)["status"] == "cancelled"
+
+
+def test_start_callback_adds_arguments_when_the_task_starts(scheduler):
+    gate, first = block(scheduler)
+    started = []
+
+    def on_start(task_id):
+        started.append(task_id)
+        return {"cpus": [len(started)]}
+
+    task_id = scheduler.schedule_task(lambda cpus=None: cpus, start_callback=on_start)
+    # Nothing is decided while the task waits for the slot
+    assert started == []
+
+    gate.set()
+    scheduler.wait_for_task(first, timeout=WAIT)
+
+    assert scheduler.wait_for_task(task_id, timeout=WAIT) == [1]
+    assert started == [task_id]
+
+
+def test_stats_report_the_dispatch_latency_percentiles(scheduler):
+    for task_id in [scheduler.schedule_task(int) for _ in range(20)]:
+        scheduler.wait_for_task(task_id, timeout=WAIT)
+
+    stats = scheduler.get_stats()
+
+    assert stats["dispatched"] == 20
+    assert 0 < stats["dispatch_latency_p99_ms"] <= stats["dispatch_latency_max_ms"]
+    assert stats["dispatch_latency_avg_ms"] <= stats["dispatch_latency_max_ms"]
@@ -0,0 +1,132 @@
+"""
+Tests for recording and resuming runs in the task journal.
+"""
+
+import logging
+import os
+
+import pytest
+
+from pyprocessor.processing import task_journal
+from pyprocessor.processing.task_journal import TaskJournal
+
+PARAMS = {"encoder": "libx264", "preset": "medium"}
+
+
+@pytest.fixture
+def folders(tmp_path):
+    """Input folder with three sources and an empty output folder."""
+    input_folder = tmp_path / "input"
+    output_folder = tmp_path / "output"
+    input_folder.mkdir()
+    output_folder.mkdir()
+    files = []
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        path = input_folder / name
+        path.write_bytes(b"source " + name.encode())
+        files.append(path)
+    return files, input_folder, output_folder
+
+
+def open_journal(tmp_path):
+    return TaskJournal(tmp_path / "journal.db", logger=logging.getLogger(__name__))
+
+
+def write_output(output_folder, name, data=b"#EXTM3U\n"):
+    directory = output_folder / os.path.splitext(name)[0]
+    directory.mkdir(exist_ok=True)
+    (directory / "master.m3u8").write_bytes(data)
+
+
+def interrupted_run(tmp_path, files, input_folder, output_folder):
+    """Record a run that completed a.mp4, failed b.mp4 and died during c.mp4."""
+    journal = open_journal(tmp_path)
+    journal.start_run(files, input_folder, output_folder, PARAMS)
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        journal.file_started(name)
+    write_output(output_folder, "a.mp4")
+    journal.file_finished("a.mp4", True, duration=10.0)
+    journal.file_finished("b.mp4", False, error="FFmpeg failed")
+    run_id = journal.run_id
+    journal.close()
+    return run_id
+
+
+def test_resume_skips_completed_files_with_unchanged_output(tmp_path, folders):
+    files, input_folder, output_folder = folders
+    run_id = interrupted_run(tmp_path, files, input_folder, output_folder)
+
+    journal = open_journal(tmp_path)
+    remaining = journal.start_run(
+        files, input_folder, output_folder, PARAMS, resume=True
+    )
+
+    assert [f.name for f in remaining] == ["b.mp4", "c.mp4"]
+    assert journal.run_id == run_id
+    assert journal.get_run()["files"] == {"completed": 1, "queued": 2}
+    journal.close()
+
+
+def test_resume_requeues_started_and_failed_files(tmp_path, folders):
+    files, input_folder, output_folder = folders
+    interrupted_run(tmp_path, files, input_folder, output_folder)
+
+    journal = open_journal(tmp_path)
+    journal.start_run(files, input_folder, output_folder, PARAMS, resume=True)
+    rows = {
+        row["name"]: row for row in journal._connection.execute("SELECT * FROM files")
+    }
+    journal.close()
+
+    for name in ("b.mp4", "c.mp4"):
+        assert rows[name]["state"] == "queued"
+        assert rows[name]["error"] is None
+        # Attempts carry over, so repeated failures stay visible
+        assert rows[name]["attempts"] == 1
+
+
+def test_resume_processes_files_whose_output_changed(tmp_path, folders):
+    files, input_folder, output_folder = folders
+    interrupted_run(tmp_path, files, input_folder, output_folder)
+    write_output(output_folder, "a.mp4", b"#EXTM3U\n#EXT-X-ENDLIST\n")
+
+    journal = open_journal(tmp_path)
+    remaining = journal.start_run(
+        files, input_folder, output_folder, PARAMS, resume=True
+    )
+    journal.close()
+
+    assert [f.name for f in remaining] == ["a.mp4", "b.mp4", "c.mp4"]
+
+
+def test_changed_parameters_start_a_new_run(tmp_path, folders):
+    files, input_folder, output_folder = folders
+    run_id = interrupted_run(tmp_path, files, input_folder, output_folder)
+
+    journal = open_journal(tmp_path)
+    remaining = journal.start_run(
+        files,
+        input_folder,
+        output_folder,
+        {**PARAMS, "preset": "slow"},
+        resume=True,
+    )
+
+    assert remaining == files
+    assert journal.run_id != run_id
+    assert journal.get_run()["files"] == {"queued": 3}
+    journal.close()
+
+
+def test_resume_prunes_old_runs(tmp_path, folders, monkeypatch):
+    files, input_folder, output_folder = folders
+    journal = open_journal(tmp_path)
+    for _ in range(2):
+        journal.start_run(files, input_folder, output_folder, PARAMS)
+    monkeypatch.setattr(task_journal, "KEPT_RUNS", 1)
+
+    journal.start_run(files, input_folder, output_folder, PARAMS, resume=True)
+
+    runs = journal._connection.execute("SELECT run_id FROM runs").fetchall()
+    assert [row["run_id"] for row in runs] == [journal.run_id]
+    journal.close()
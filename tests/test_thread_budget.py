@@ -0,0 +1,89 @@
+"""
+Tests for splitting FFmpeg threads across concurrent encodes.
+"""
+
+from pyprocessor.processing.thread_budget import (
+    ThreadBudget,
+    build_encoder_thread_args,
+    create_thread_budget,
+    split_job_threads,
+    split_threads,
+)
+
+
+class Config:
+    """Configuration stub with dotted keys."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+def test_budget_is_off_unless_enabled():
+    assert create_thread_budget(Config({}), 4) is None
+
+    budget = create_thread_budget(
+        Config(
+            {
+                "batch_processing.thread_budget": True,
+                "batch_processing.encode_threads": 16,
+            }
+        ),
+        4,
+    )
+
+    assert (budget.total_threads, budget.max_jobs) == (16, 4)
+
+
+def test_jobs_get_even_shares_of_the_free_threads():
+    budget = ThreadBudget(16, 4)
+
+    assert [budget.acquire() for _ in range(4)] == [4, 4, 4, 4]
+    assert budget.free_threads == 0
+
+
+def test_threads_freed_by_a_job_go_to_the_next_one():
+    budget = ThreadBudget(16, 4)
+    shares = [budget.acquire() for _ in range(4)]
+
+    budget.release(shares[0])
+
+    assert budget.acquire() == 4
+    assert budget.to_dict()["jobs_started"] == 5
+
+
+def test_last_jobs_split_the_threads_between_themselves():
+    budget = ThreadBudget(16, 4)
+
+    assert budget.acquire(waiting=2) == 8
+    assert budget.acquire(waiting=1) == 8
+
+
+def test_spent_budget_still_gives_the_minimum():
+    budget = ThreadBudget(2, 4, min_threads=1)
+    budget.acquire(waiting=1)
+
+    assert budget.acquire() == 1
+
+
+def test_split_threads_follows_the_weights():
+    assert split_threads(12, [4, 2, 0.0]) == [8, 4, 1]
+    assert split_threads(6, [0, 0]) == [3, 3]
+
+
+def test_filter_and_encoders_share_the_job_threads():
+    assert split_job_threads(8) == (2, 6)
+    assert split_job_threads(3) == (1, 2)
+    assert split_job_threads(1) == (1, 1)
+
+
+def test_x265_gets_its_pool_sized():
+    assert build_encoder_thread_args("libx264", 1, 4) == ["-threads:v:1", "4"]
+    assert build_encoder_thread_args("libx265", 0, 8) == [
+        "-threads:v:0",
+        "8",
+        "-x265-params:v:0",
+        "pools=8:frame-threads=4",
+    ]